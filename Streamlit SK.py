@@ -1,48 +1,5 @@
 import streamlit as st
 
-# --- Metrics aliasing & resolution (added)
-from typing import Iterable
-
-_METRIC_ALIASES = {
-    # Display label -> candidate column names (order matters)
-    "OP xGAssisted": [
-        "OP xGAssisted", "Op xA P90", "OP xA P90", "OP xA",
-        "xA OP P90", "xA (OP) P90", "Op Xa P90"
-    ],
-    "Touches Inside Box": ["Touches Inside Box", "Touches In Box"],
-    "OBV": ["OBV", "Obv", "On Ball Value"],
-    "OBV Pass P90": ["OBV Pass P90", "Pass OBV", "Pass OBV P90", "OBV Pass"],
-    "OBV Dribble Carry P90": [
-        "OBV Dribble Carry P90", "OBV Dribble Carry", "OBV Dribble & Carry P90",
-        "OBV Dribble & Carry", "Dribble & Carry OBV", "Dribble & Carry OBV P90"
-    ],
-}
-
-def resolve_metric_col(columns: Iterable[str], name: str) -> str:
-    """Return the actual column present in `columns` matching metric `name` using aliases and case-insensitive matching.
-    Raises KeyError if nothing matches."""
-    cols = list(columns)
-    lower_map = {c.lower(): c for c in cols}
-    # direct hit
-    if name in cols:
-        return name
-    # alias list
-    candidates = _METRIC_ALIASES.get(name, [name])
-    # try exact then case-insensitive
-    for cand in candidates:
-        if cand in cols:
-            return cand
-        if cand.lower() in lower_map:
-            return lower_map[cand.lower()]
-    # final fallback: loose contains match (case-insensitive)
-    name_l = name.lower()
-    for c in cols:
-        if name_l == c.lower():
-            return c
-    # not found
-    raise KeyError(name)
-
-
 
 # --- Added helper: safe_image to avoid app crash if logo is missing
 def safe_image(path_or_bytes, **kwargs):
@@ -71,12 +28,39 @@ import urllib.parse as _parse
 import pandas as pd
 import plotly.express as px
 import numpy as np
+import os
 import random
+from functools import partial
 import re
+from contextlib import contextmanager
 import plotly.graph_objects as go
 from PIL import Image
 from st_aggrid import AgGrid, GridOptionsBuilder, GridUpdateMode
 from streamlit import session_state as ss
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+from skapp import leaderboards, profiling
+from skapp.cache import (
+    DISK_CACHE_NAME, LOAD_CACHE_BYTES, DiskCache, SharedLRU, persisted, selection_key, value_nbytes,
+)
+from skapp.data import XPHYSICAL_PATH, XTECHNICAL_PATH, prepare_dataset, shorten_season
+from skapp.filter_expr import FilterExpressionError, compile_expression
+from skapp.filters import percentile_filter, quantile_table
+from skapp.metrics import (
+    NAME_NORMALIZER, XPHY_METRIC_MAP, graph_columns, metric_labels_tech, metric_templates_tech,
+    points_column, resolve_metric_col, threshold_max, xtech_post_config,
+)
+from skapp.percentiles import lookup_peer_means, lookup_percentiles, pct_rank, peer_frame
+from skapp.query import grid_rows
+from skapp.registry import PLAYER_ID, REGISTRY_PATH, UNKNOWN_ID
+from skapp.reports import (
+    build_blocks, index_gauge_tasks, index_peers, lazy, physical_radar, technical_radar,
+)
+from skapp.snapshot import (
+    DATASETS, PARTITION_COLUMNS, SNAPSHOT_DIR, XPHYSICAL_RANK, map_dataset, partition_version, peer_stats_version,
+    read_peer_stats, refresh as refresh_snapshot, source_signature,
+)
+from skapp.sessions import SessionRegistry
+from skapp.timing import TIMINGS_LOG, Timings
 
 # === [CHANGED] Season helpers (robust to 'YYYY/YYYY' labels) ===
 def sort_seasons(seasons):
@@ -93,753 +77,237 @@ def latest_season_from(series):
     return sort_seasons(vals)[-1]
 # === [/CHANGED] ===
 
+# --- Filtres groupés du Player Search ("Batch filter changes") : chaque rangée de filtres et chaque popover est
+# un formulaire, appliqué en un seul rerun ; le seuil de chaque cran de percentile est calculé à l'avance et
+# affiché par le navigateur pendant le glissement
+@contextmanager
+def filter_form(key, batched, submit="Apply"):
+    if not batched:
+        yield
+        return
+    with st.form(key, border=False):
+        yield
+        st.form_submit_button(submit, type="primary", use_container_width=True)
+
+def threshold_slider(label, quantiles, key, step=5):
+    """Percentile select slider (0-100) whose options show the threshold of each step (`quantiles`: 0..100)."""
+    return st.select_slider(
+        label, options=list(range(0, 101, step)), value=0, key=key,
+        format_func=lambda p: f"{p} (≥ {quantiles[p]:,.2f})" if p else "0",
+    )
+
+def expression_filter(key, frame):
+    """"Filter expression" box of a Player Search table: the compiled expression, or None (empty or invalid)."""
+    text = st.text_input(
+        "Filter expression", key=key,
+        placeholder="xTECH > 70 and Age < 23 and HSR Distance P90 above position p80",
+        help="Metric comparisons combined with and / or / not, e.g. `(xTECH + xDEF) / 2 > 60`, "
+             "`Prefered Foot == \"Left Footed\"`. `p80` is the 80th percentile of the metric over the rows "
+             "filtered, `position p80` within the player's position group; names with symbols can be "
+             "written between backticks.",
+    )
+    if not text.strip():
+        return None
+    try:
+        return compile_expression(text, frame.columns)
+    except FilterExpressionError as e:
+        st.error(f"Filter expression: {e}")
+        return None
+
 st.set_page_config(layout="wide")
 
-def shorten_season(s):
-    s = str(s)
-    if re.match(r'^\d{4}/\d{4}$', s):
-        y1, y2 = s.split('/')
-        return f"{y1[-2:]}/{y2[-2:]}"
-    return s
+# --- Instrumentation des reruns (skapp.timing) : spans par page / onglet, panneau ?diagnostics=1
+@st.cache_resource
+def load_timings():
+    return Timings()
+
+timings = load_timings()
+rerun_done = timings.mark("rerun")
+aggrid = timings.wrap("aggrid", AgGrid)
+
+# --- Profilage cProfile des N prochains reruns de la session (?profile=N, skapp.profiling)
+def finish_profile():
+    profile = ss.pop("profile_running", None)
+    if profile is not None:
+        ss.setdefault("profiles", []).append(profiling.save(profile, ss.get("profile_page", "app")))
+
+profile_arg = st.query_params.get("profile")
+if profile_arg != ss.get("profile_arg"):  # nouvelle valeur du paramètre : on (ré)arme le compteur
+    ss["profile_arg"] = profile_arg
+    ss["profile_left"] = int(profile_arg) if (profile_arg or "").isdigit() else 0
+# rerun précédent interrompu (st.stop / st.rerun) : son profil est écrit ici
+finish_profile()
+if ss.get("profile_left", 0) > 0:
+    ss["profile_left"] -= 1
+    ss["profile_running"] = profiling.start()
 
 @st.cache_data
-def load_xphysical():
-    df = pd.read_csv('SK_All.csv', sep=",")
-    df.columns = df.columns.str.strip()
-    return df
+def load_snapshot(signature):
+    """Manifest du snapshot partitionné (skapp.snapshot), rafraîchi partition par partition.
+
+    `signature` (taille + mtime des CSV) sert de clé : le rafraîchissement ne se
+    relance que lorsqu'un fichier source change.
+    """
+    return refresh_snapshot(XPHYSICAL_PATH, XTECHNICAL_PATH, SNAPSHOT_DIR, REGISTRY_PATH)
+
+@st.cache_resource(max_entries=len(DATASETS))
+def load_dataset(_manifest, dataset, version):
+    """Dataset mappé en mémoire depuis son fichier Arrow (skapp.snapshot.map_dataset), partagé par les sessions.
+
+    Une seule instance par processus et par version (pas de copie par rerun comme st.cache_data) ; ses colonnes
+    numériques sont des vues en lecture seule sur le fichier, partagées entre processus : ne pas la modifier en place.
+    """
+    return prepare_dataset(map_dataset(_manifest, dataset, SNAPSHOT_DIR), dataset)
 
 @st.cache_data
-def load_xtechnical():
-    df_tech = pd.read_csv('SB_All.csv', sep=",")
-    df_tech.columns = df_tech.columns.str.strip()
-    df_tech["season_short"] = df_tech["Season Name"].apply(shorten_season)
-    df_tech["Display Name"] = df_tech.apply(
-        lambda row: f"{row['Player Known Name']} ({row['Player Name']})"
-        if pd.notna(row.get("Player Known Name")) and row["Player Known Name"] != row["Player Name"]
-        else row["Player Name"],
-        axis=1
-    )
-    return df_tech
+def load_peer_stats(_manifest, group, version):
+    """Moyennes des peers d'un groupe de radar (skapp.percentiles), indexées par (poste, saison, métrique)."""
+    return read_peer_stats(_manifest, group, SNAPSHOT_DIR)
 
 @st.cache_data
-def load_merged():
-    df_merged = pd.read_csv('SB_SK_MERGED.csv')
-    df_merged.columns = df_merged.columns.str.strip()
-    return df_merged
-
-df_merged = load_merged()
-df = load_xphysical()
-df_tech = load_xtechnical()
-
-# --- Normalisation des noms (appliquée aux bons DFs)
-NAME_NORMALIZER = {
-    "Op xA P90": "OP xGAssisted",
-    "OP xA P90": "OP xGAssisted",
-    "OP xA": "OP xGAssisted",
-    "xA OP P90": "OP xGAssisted",
-    "Pass OBV": "OBV Pass P90",
-    "Pass OBV P90": "OBV Pass P90",
-    "Touches In Box": "Touches Inside Box",
-    "Obv": "OBV",
-}
-
-def normalize_cols(_df):
-    if _df is None:
-        return
-    _df.columns = _df.columns.str.strip()
-    rename_map = {k: v for k, v in NAME_NORMALIZER.items() if k in _df.columns}
-    if rename_map:
-        _df.rename(columns=rename_map, inplace=True)
+def load_player_labels(_df_phys, _df_sb, _df_mg, versions):
+    """Libellés des selectbox joueurs, indexés par Player ID (homonymes distingués par club et saison)."""
+    df_phys, df_sb, df_mg = _df_phys, _df_sb, _df_mg
+    known = df_mg["Player Known Name"]
+    merged_label = df_mg["Player Name"].where(
+        known.isna() | (known.astype(str).str.strip() == "") | (known == df_mg["Player Name"]),
+        known + " (" + df_mg["Player Name"] + ")",
+    )
+
+    def _by_id(ids, labels, teams, seasons):
+        frame = pd.DataFrame({
+            "label": labels.to_numpy(), "team": teams.to_numpy(), "season": seasons.to_numpy(),
+        }, index=ids.to_numpy()).dropna(subset=["label"])
+        frame = frame[(frame.index != UNKNOWN_ID) & ~frame.index.duplicated(keep="last")]
+        # Homonymes (IDs différents, même libellé) : club et saison de leur dernière ligne, puis l'ID si besoin
+        same = frame["label"].duplicated(keep=False)
+        frame.loc[same, "label"] = (
+            frame.loc[same, "label"] + " – " + frame.loc[same, "team"].astype(str) + ", "
+            + frame.loc[same, "season"].astype(str)
+        )
+        same = frame["label"].duplicated(keep=False)
+        frame.loc[same, "label"] = frame.loc[same, "label"] + " #" + frame.index[same].astype(str)
+        return frame["label"].to_dict()
+
+    return {
+        "xphysical": _by_id(
+            df_phys[PLAYER_ID], df_phys["Short Name"] + " (" + df_phys["Player"] + ")", df_phys["Team"],
+            df_phys["Season"],
+        ),
+        "xtechnical": _by_id(df_sb[PLAYER_ID], df_sb["Display Name"], df_sb["Team Name"], df_sb["Season Name"]),
+        "merged": _by_id(df_mg[PLAYER_ID], merged_label, df_mg["Team Name"], df_mg["Season Name"]),
+    }
+
+def snapshot_version(name):
+    return snapshot["datasets"][name]["version"]
+
+@st.cache_resource
+def disk_cache():
+    """Cache SQLite (skapp.cache) partagé par les processus : leaderboards et figures des rapports, clés versionnées."""
+    return DiskCache(os.path.join(SNAPSHOT_DIR, DISK_CACHE_NAME))
+
+def persisted_tasks(prefix, key, tasks):
+    """Tâches de build_blocks lues / écrites dans le cache disque sous (prefix, nom de la tâche, *key)."""
+    cache = disk_cache()
+    return {name: partial(cache.get_or_compute, (prefix, name, *key), task) for name, task in tasks.items()}
+
+# --- Caches dépendants d'une partition (saison, compétition) : `version` = version de la partition (contenu + peers),
+# un rafraîchissement du snapshot n'invalide que les entrées des partitions modifiées
+@st.cache_data(max_entries=256)
+def xphysical_peer_stats(_df, season, competition, position, version):
+    peers = _df.loc[
+        (_df["Position Group"] == position) & (_df["Season"] == season) & (_df["Competition"] == competition),
+        "xPhysical",
+    ]
+    return peers.mean(), len(peers)
 
-# Appliquer sur TOUS les DFs utilisés par le radar technique/merged
-normalize_cols(df_merged)
-normalize_cols(df_tech)
-normalize_cols(df)
+@st.cache_data(max_entries=256)
+@persisted(disk_cache)
+def top50_xphysical(_df, competition, season, position, version):
+    return leaderboards.top50_xphysical(_df, competition, season, position)
+
+@st.cache_data(max_entries=256)
+@persisted(disk_cache)
+def top50_xtechnical(_df, competition, season, position, index_col, min_minutes, version):
+    return leaderboards.top50_xtechnical(_df, competition, season, position, index_col, min_minutes)
+
+def selected_player_id(row) -> int:
+    """Player ID d'une ligne sélectionnée dans AgGrid (UNKNOWN_ID si absent)."""
+    try:
+        return int(row.get(PLAYER_ID))
+    except (TypeError, ValueError):
+        return UNKNOWN_ID
+
+with timings.span("load"):
+    snapshot = load_snapshot(source_signature(XPHYSICAL_PATH, XTECHNICAL_PATH))
+    df_merged = load_dataset(snapshot, "merged", snapshot_version("merged"))
+    df = load_dataset(snapshot, "xphysical", snapshot_version("xphysical"))
+    df_tech = load_dataset(snapshot, "xtechnical", snapshot_version("xtechnical"))
+    # Player ID : clé entière commune aux 3 DFs (lookups + navigation entre onglets), posée par le snapshot
+    player_labels = load_player_labels(
+        df, df_tech, df_merged, tuple(snapshot_version(d) for d in ("xphysical", "xtechnical", "merged"))
+    )
 
 merged_df = df_merged  # garder un alias si d'autres blocs y font référence
 
+# --- "Load Data" des Player Search : sous-ensembles (saisons, compétitions) partagés entre sessions
+# (LRU borné en octets, skapp.cache) ; la session ne garde que sa sélection, la valeur est en lecture seule
+@st.cache_resource
+def load_cache():
+    return SharedLRU(LOAD_CACHE_BYTES)
+
+# Mémoire par session (skapp.sessions) : les sélections des sessions actives sont épinglées dans le LRU,
+# celles des sessions inactives depuis 30 min libérées (recalculées au retour de la session)
+@st.cache_resource
+def load_sessions():
+    return SessionRegistry(load_cache())
+
+session_id = get_script_run_ctx().session_id
+
+def filter_quantiles(name, seasons, competitions, base_filters, frame, columns):
+    """Quantiles 0..100 des métriques des popovers (skapp.filters) pour la sélection et ses filtres de base.
+
+    Calculés une fois par (sélection, filtres de base) et partagés par le LRU : les sliders ne les recalculent pas.
+    """
+    key = ("quantiles", *selection_key(name, snapshot_version(name), seasons, competitions), base_filters,
+           tuple(columns))
+    return load_cache().get_or_compute(key, lambda: quantile_table(frame, columns))
+
+def load_selection(name, seasons, competitions):
+    """Lignes de `name` pour la sélection, calculées une fois par processus et par version du dataset."""
+    frame = {"xphysical": df, "xtechnical": df_tech, "merged": df_merged}[name]
+    season_col, comp_col = PARTITION_COLUMNS[name]
+    key = selection_key(name, snapshot_version(name), seasons, competitions)
+    load_sessions().hold(session_id, name, key)
+    return load_cache().get_or_compute(
+        key, lambda: frame[frame[season_col].isin(key[2]) & frame[comp_col].isin(key[3])]
+    )
+
+def search_rows(name, seasons, competitions, base_filters, filter_percentiles, expression, columns, pandas_rows):
+    """Lignes de la grille d'un Player Search (skapp.query, backend SKAPP_QUERY_BACKEND, pandas par défaut).
+
+    `pandas_rows()` filtre la sélection en mémoire ; avec SKAPP_QUERY_BACKEND=duckdb, DuckDB lit les partitions
+    de la sélection et ne renvoie que `columns` (+ colonnes des seuils actifs), indexées comme la sélection.
+    Repli sur `pandas_rows()` si DuckDB échoue et pour une expression de filtre (ses percentiles portent
+    sur les lignes de base).
+    """
+    if expression:
+        return pandas_rows()
+    percentiles = {}
+    for (_, col), min_pct in filter_percentiles.items():
+        percentiles[col] = max(min_pct, percentiles.get(col, 0))
+    columns = list(dict.fromkeys([*columns, *(c for c, p in percentiles.items() if p > 0)]))
+    return grid_rows(
+        pandas_rows, snapshot, name, seasons, competitions, percentiles=percentiles, columns=columns,
+        directory=SNAPSHOT_DIR, **base_filters,
+    )
+
 # Ensuite seulement, tes listes et tes widgets/filtres
 season_list = sort_seasons(df["Season"].dropna().unique().tolist())
 position_list = sorted(df["Position Group"].dropna().unique().tolist())
 competition_list = sorted(df["Competition"].dropna().unique().tolist())
 player_list = sorted(df["Short Name"].dropna().unique().tolist())
 
-classic_gk_metric_map = {
-    "Gsaa Ratio": ("xTech GK GSAA %", [0, 5, 7, 12, 15]),
-    "Save Ratio": ("xTech GK Save %", [0, 1, 2, 3, 4]),
-    "Da Aggressive Distance": ("xTech GK Aggressive Distance", [0, 1, 2, 3, 4]),
-    "Long Ball Ratio": ("xTech GK Long Ball %", [0, 1, 2, 3, 4]),
-    "Op Xgbuildup P90": ("xTech GK OPxGBuildup", [0, 1, 2, 3, 4]),
-    "Pressured Passing Ratio": ("xTech GK Passing u. Pressure %", [0, 1, 2, 3, 4]),
-    "Passing Ratio": ("xTech GK Passing %", [0, 1, 2, 3, 4]),
-    "Pass Into Danger Ratio": ("xTech GK Pass Into Danger %", [7, 5, 3, 1, 0])
-}
-
-classic_cb_metric_map = {
-    "OBV Dribble Carry P90": ("xTech CB OBV D&C", [0, 1, 2, 3, 4]),
-    "Long Ball Ratio": ("xTech CB Long Ball %", [0, 1, 2, 3, 4]),
-    "Pressured Passing Ratio": ("xTech CB Passing u. Pressure %", [0, 1, 2, 3, 5]),
-    "OBV Pass P90": ("xTech CB OBV Pass", [0, 1, 3, 5, 7]),
-    "Passing Ratio": ("xTech CB Passing %", [0, 1, 2, 3, 5]),
-    "Deep Progressions P90": ("xTech CB Deep Prog", [0, 1, 2, 3, 5]),
-    "Blocks Per Shot": ("xTech CB Blocks/Shot", [0, 1, 3, 5, 7]),
-    "Challenge Ratio": ("xTech CB Challenge %", [0, 1, 3, 5, 7]),
-    "Average X Pressure": ("xTech CB Avg X Pressure", [0, 1, 2, 3, 5]),
-    "Padj Tackles P90": ("xTech CB Padj Tackles", [0, 1, 2, 3, 4]),
-    "Hops": ("xTech CB HOPS", [0, 5, 7, 10, 12]),
-}
-
-classic_fb_metric_map = {
-    "Np Shots P90": ("xTech FB Np Shots", [0, 1, 2, 3, 5]),
-    "OP xGAssisted": ("xTech FB OPxA", [0, 1, 3, 5, 7]),
-    "Crossing Ratio": ("xTech FB Crossing %", [0, 1, 2, 3, 4]),
-    "Crosses P90": ("xTech FB Crosses", [0, 1, 2, 3, 5]),
-    "Op Passes Into And Touches Inside Box P90": ("xTech FB OP Box Touch", [0, 1, 3, 5, 7]),
-    "Perte Balle/Passe Ratio": ("xTech FB Ball Loss %", [0, 1, 2, 3, 4]),
-    "Scoring Contribution": ("xTech FB G+A", [0, 1, 2, 3, 4]),
-    "Op Xgbuildup Per Possession": ("xTech FB OPxGBuildup", [0, 1, 2, 3, 4]),
-    "Padj Pressures P90": ("xTech FB Padj Pressures", [0, 1, 3, 5, 7]),
-    "Fhalf Pressures P90": ("xTech FB FHalf Pressures", [0, 1, 2, 3, 4]),
-    "Fhalf Counterpressures P90": ("xTech FB FHalf Counterpressures", [0, 1, 2, 3, 4]),
-    "Padj Tackles And Interceptions P90": ("xTech FB Padj T&I", [0, 1, 2, 3, 5]),
-    "Challenge Ratio": ("xTech FB Challenge %", [0, 1, 2, 3, 5]),
-    "Hops": ("xTech FB HOPS", [0, 1, 2, 3, 5])
-}
-
-classic_mid_metric_map = {
-    "Np Shots P90": ("xTech MID Np Shots", [0, 1, 2, 3, 4]),
-    "Npxgxa P90": ("xTech MID Npxgxa", [0, 1, 2, 3, 4]),
-    "OBV Pass P90": ("xTech MID OBV Pass", [0, 1, 3, 5, 7]),
-    "OBV Dribble Carry P90": ("xTech MID OBV Carry", [0, 1, 3, 5, 7]),
-    "Op Passes Into And Touches Inside Box P90": ("xTech MID Box Pass+Touch", [0, 1, 2, 3, 5]),
-    "Perte Balle/Passe Ratio": ("xTech MID Ball Loss %", [0, 1, 2, 3, 4]),
-    "Scoring Contribution": ("xTech MID G+A", [0, 1, 2, 3, 5]),
-    "Op Xgbuildup Per Possession": ("xTech MID OPxGBuildup", [0, 1, 2, 3, 4]),
-    "Passing Ratio": ("xTech MID Passing %", [0, 1, 3, 5, 7]),
-    "Pressured Passing Ratio": ("xTech MID Pressured Passing %", [0, 1, 3, 5, 7]),
-    "Fhalf Ball Recoveries P90": ("xTech MID Opp. Ball Recov.", [0, 1, 2, 3, 5]),
-    "Pressure Regains P90": ("xTech MID Pressure Regains", [0, 1, 3, 5, 7]),
-    "Counterpressure Regains P90": ("xTech MID CPR", [0, 1, 2, 3, 5]),
-    "Padj Tackles And Interceptions P90": ("xTech MID T&I", [0, 3, 5, 7, 10]),
-    "Challenge Ratio": ("xTech MID Challenge %", [0, 1, 2, 3, 5]),
-    "Hops": ("xTech MID HOPS", [0, 1, 2, 3, 5])
-}
-
-classic_am_metric_map = {
-    "Passes Into Box P90": ("xTech AM Passes Into Box", [0, 1, 3, 4, 5]),
-    "Touches Inside Box P90": ("xTech AM Touches Inside Box", [0, 1, 2, 3, 4]),
-    "Dribbles P90": ("xTech AM Dribbles", [0, 1, 3, 4, 5]),
-    "OP xGAssisted": ("xTech AM xA", [0, 3, 5, 7, 10]),
-    "Np Shots P90": ("xTech AM Shots", [0, 3, 5, 7, 10]),
-    "OBV Pass P90": ("xTech AM OBV Pass", [0, 3, 5, 7, 10]),
-    "OBV Dribble Carry P90": ("xTech AM OBV Carry", [0, 1, 3, 5, 7]),
-    "Perte Balle/Passe Ratio": ("xTech AM Ball Loss %", [0, 1, 2, 3, 4]),
-    "Scoring Contribution": ("xTech AM G+A", [0, 1, 3, 4, 5]),
-    "Through Balls P90": ("xTech AM Through Balls", [0, 1, 2, 3, 4]),
-    "Fhalf Pressures P90": ("xTech AM FH Pressures", [0, 3, 5, 7, 10]),
-    "Counterpressures P90": ("xTech AM Counterpressures", [0, 3, 5, 7, 10])
-}
-
-classic_wing_metric_map = {
-    "Touches Inside Box P90": ("xTech WING Touches Inside Box", [0, 1, 3, 4, 5]),
-    "Dribble Ratio": ("xTech WING Dribble Ratio", [0, 1, 2, 3, 4]),
-    "Dribbles P90": ("xTech WING Dribbles", [0, 3, 5, 7, 10]),
-    "OP xGAssisted": ("xTech WING OPxA", [0, 3, 5, 7, 10]),
-    "Np Shots P90": ("xTech WING Np Shots", [0, 3, 5, 7, 10]),
-    "OBV Dribble Carry P90": ("xTech WING OBV Carry", [0, 5, 7, 10, 12]),
-    "Scoring Contribution": ("xTech WING G+A", [0, 1, 3, 4, 5]),
-    "Crosses P90": ("xTech WING Crosses", [0, 1, 2, 3, 4]),
-    "Shot On Target Ratio": ("xTech WING SOT Ratio", [0, 1, 2, 3, 4]),
-    "Fouls Won P90": ("xTech WING Fouls Won", [0, 1, 3, 4, 5]),
-    "Fhalf Pressures P90": ("xTech WING FHalf Pressures", [0, 3, 5, 7, 10]),
-    "Counterpressures P90": ("xTech WING Counterpressures", [0, 3, 5, 7, 10])
-}
-
-classic_st_metric_map = {
-    "Np Xg P90": ("xTech ST Np Xg", [0, 5, 7, 10, 12]),
-    "Np Shots P90": ("xTech ST Np Shots", [0, 1, 3, 5, 7]),
-    "Touches Inside Box P90": ("xTech ST Touches Inside Box", [0, 3, 5, 7, 10]),
-    "OP xGAssisted": ("xTech ST Op Xa", [0, 1, 2, 3, 4]),
-    "Perte Balle/Passe Ratio": ("xTech ST Ball Loss %", [0, 1, 3, 4, 5]),
-    "Np Xg Per Shot": ("xTech ST Xg Per Shot", [0, 1, 3, 4, 5]),
-    "Scoring Contribution": ("xTech ST G+A", [0, 1, 3, 5, 7]),
-    "PSxG - xG": ("xTech ST PSxG Diff", [0, 1, 2, 3, 4]),
-    "Shot On Target Ratio": ("xTech ST SoT %", [0, 1, 2, 3, 4]),
-    "Fhalf Pressures P90": ("xTech ST Fhalf Pressures", [0, 3, 5, 7, 10]),
-    "Counterpressures P90": ("xTech ST Counterpressures", [0, 3, 5, 7, 10])
-}
-
-xtech_columns_map = {
-    'Goalkeeper': 'xTechnical GK (/100)',
-    'Central Defender': 'xTechnical CB (/100)',
-    'Full Back': 'xTechnical FB (/100)',
-    'Midfielder': 'xTechnical MID (/100)',
-    'Attacking Midfielder': 'xTechnical AM (/100)',
-    'Winger': 'xTechnical WING (/100)',
-    'Striker': 'xTechnical ST (/100)'
-}
-
-xtech_prefix_map = {
-    'Goalkeeper': 'GK',
-    'Central Defender': 'CB',
-    'Full Back': 'FB',
-    'Midfielder': 'MID',
-    'Attacking Midfielder': 'AM',
-    'Winger': 'WING',
-    'Striker': 'ST'
-}
-
-xtech_tech_columns_map = {
-    'Goalkeeper': 'xTech GK Usage (/100)',
-    'Central Defender': 'xTech CB TECH (/100)',
-    'Full Back': 'xTech FB TECH (/100)',
-    'Midfielder': 'xTech MID TECH (/100)',
-    'Attacking Midfielder': 'xTech AM TECH (/100)',
-    'Winger': 'xTech WING TECH (/100)',
-    'Striker': 'xTech ST TECH (/100)'
-}
-
-xtech_def_columns_map = {
-    'Goalkeeper': 'xTech GK Save (/100)',
-    'Central Defender': 'xTech CB DEF (/100)',
-    'Full Back': 'xTech FB DEF (/100)',
-    'Midfielder': 'xTech MID DEF (/100)',
-    'Attacking Midfielder': 'xTech AM DEF (/100)',
-    'Winger': 'xTech WING DEF (/100)',
-    'Striker': 'xTech ST DEF (/100)'
-}
-
-xtech_post_config = {
-    "Midfielder": {
-        "metric_map": classic_mid_metric_map,
-        "def": [
-            "Fhalf Ball Recoveries P90",
-            "Pressure Regains P90",
-            "Counterpressure Regains P90",
-            "Padj Tackles And Interceptions P90",
-            "Challenge Ratio",
-            "Hops"
-        ],
-        "tech": [
-            "Np Shots P90",
-            "Npxgxa P90",
-            "OBV Pass P90",
-            "OBV Dribble Carry P90",
-            "Op Passes Into And Touches Inside Box P90",
-            "Perte Balle/Passe Ratio",
-            "Scoring Contribution",
-            "Op Xgbuildup Per Possession",
-            "Passing Ratio",
-            "Pressured Passing Ratio"
-        ],
-        "labels": {
-            "Fhalf Ball Recoveries P90": "Opp. Half Recoveries",
-            "Pressure Regains P90": "Pressure Regains",
-            "Counterpressure Regains P90": "Counterpressure Regains",
-            "Padj Tackles And Interceptions P90": "PAdj Tackles & Interceptions",
-            "Counterpressures P90": "Counterpressures",
-            "Challenge Ratio": "Tack./Dribbled Past %",
-            "Hops": "HOPS (Aerial Score)",
-            "Np Shots P90": "Shots",
-            "Npxgxa P90": "NPxG + xA",
-            "OBV Pass P90": "OBV Pass",
-            "OBV Dribble Carry P90": "OBV Dribble & Carry",
-            "Op Passes Into And Touches Inside Box P90": "OP Passes + Touches Into Box",
-            "Perte Balle/Passe Ratio": "Ball Loss %",
-            "Scoring Contribution": "Scoring Contribution (G+A)",
-            "Op Xgbuildup Per Possession": "xGBuildup (/possession)",
-            "Passing Ratio": "Passing %",
-            "Pressured Passing Ratio": "Passing u. Pressure %"
-        }
-    },
-
-    "Striker": {
-        "metric_map": classic_st_metric_map,
-        "def": [
-            "Fhalf Pressures P90", "Counterpressures P90"
-        ],
-        "tech": [
-            "Np Xg P90", "Np Shots P90", "Touches Inside Box P90", "OP xGAssisted",
-            "Perte Balle/Passe Ratio", "Np Xg Per Shot", "Scoring Contribution",
-            "PSxG - xG", "Shot On Target Ratio"
-        ],
-        "labels": {
-            "Fhalf Pressures P90": "Opp. Half Pressures",
-            "Counterpressures P90": "Counterpressures",       
-            "Np Xg P90": "NPxG",
-            "Np Shots P90": "Shots",
-            "OP xGAssisted": "OP xA",
-            "Perte Balle/Passe Ratio": "Ball Loss %",
-            "Np Xg Per Shot": "xG/Shot",
-            "Scoring Contribution": "Scoring Contribution (G+A)",
-            "PSxG - xG": "PSxG - xG",
-            "Shot On Target Ratio": "Shooting %"
-        }
-    },
-
-    "Attacking Midfielder": {
-        "metric_map": classic_am_metric_map,
-        "def": [
-            "Fhalf Pressures P90", "Counterpressures P90"
-        ],
-        "tech": [
-            "Passes Into Box P90", "Touches Inside Box P90", "Dribbles P90", "OP xGAssisted",
-            "Np Shots P90", "OBV Pass P90", "OBV Dribble Carry P90", "Perte Balle/Passe Ratio",
-            "Scoring Contribution", "Through Balls P90"
-        ],
-        "labels": {
-            "Fhalf Pressures P90": "Opp. Half Pressures",
-            "Counterpressures P90": "Counterpressures",
-            "Passes Into Box P90": "Passes Into Box",
-            "Touches Inside Box P90": "Touches Inside Box",
-            "Dribbles P90": "Succ. Dribbles",
-            "OP xGAssisted": "OP xA",
-            "Np Shots P90": "Shots",
-            "OBV Pass P90": "OBV Pass",
-            "OBV Dribble Carry P90": "OBV Dribble & Carry",
-            "Perte Balle/Passe Ratio": "Ball Loss %",
-            "Scoring Contribution": "Scoring Contribution (G+A)",
-            "Deep Progressions P90": "Deep Progressions",
-            "Through Balls P90": "Throughballs"
-        }
-    },
-
-    "Winger": {
-        "metric_map": classic_wing_metric_map,
-        "def": [
-            "Fhalf Pressures P90", "Counterpressures P90"
-        ],
-        "tech": [
-            "Touches Inside Box P90", "Dribble Ratio", "Dribbles P90", "OP xGAssisted", "Np Shots P90",
-            "OBV Dribble Carry P90", "Scoring Contribution", "Crosses P90", "Shot On Target Ratio", "Fouls Won P90"
-        ],
-        "labels": {
-            "Fhalf Pressures P90": "Opp. Half Pressures",
-            "Counterpressures P90": "Counterpressures",
-            "Touches Inside Box P90": "Touches Inside Box",
-            "Dribble Ratio": "Dribble Success %",
-            "Dribbles P90": "Succ. Dribbles",
-            "OP xGAssisted": "OP xA",
-            "Np Shots P90": "Shots",
-            "OBV Dribble Carry P90": "OBV Dribble & Carry",
-            "Scoring Contribution": "Scoring Contribution (G+A)",
-            "Crosses P90": "Succ. Crosses",
-            "Shot On Target Ratio": "Shooting %",
-            "Fouls Won P90": "Fouls Won"
-        }
-    },
-
-    "Full Back": {
-        "metric_map": classic_fb_metric_map,
-        "def": [
-            "Padj Pressures P90",
-            "Fhalf Pressures P90",
-            "Fhalf Counterpressures P90",
-            "Padj Tackles And Interceptions P90",
-            "Challenge Ratio",
-            "Hops"
-        ],
-        "tech": [
-            "Np Shots P90",
-            "OP xGAssisted",
-            "Crossing Ratio",
-            "Crosses P90",
-            "Op Passes Into And Touches Inside Box P90",
-            "Perte Balle/Passe Ratio",
-            "Scoring Contribution",
-            "Op Xgbuildup Per Possession"
-        ],
-        "labels": {
-            "Padj Pressures P90": "PAdj Pressures",
-            "Fhalf Pressures P90": "Opp. Half Pressures",
-            "Fhalf Counterpressures P90": "Opp. Half Counterpressures",
-            "Padj Tackles And Interceptions P90": "PAdj Tackles & Interceptions",
-            "Challenge Ratio": "Tack./Dribbled Past %",
-            "Hops": "HOPS",   
-            "Np Shots P90": "Shots",
-            "OP xGAssisted": "OP xA",
-            "Crossing Ratio": "Crossing %",
-            "Crosses P90": "Crosses",
-            "Op Passes Into And Touches Inside Box P90": "OP Passes + Touches Into Box",
-            "Perte Balle/Passe Ratio": "Ball Loss %",
-            "Scoring Contribution": "Scoring Contribution (G+A)",
-            "Op Xgbuildup Per Possession": "xGBuildup (/possession)"
-        }
-    },
-
-    "Central Defender": {
-        "metric_map": classic_cb_metric_map,
-        "def": [
-            "Blocks Per Shot", "Challenge Ratio", "Average X Pressure",
-            "Padj Tackles P90", "Hops"
-        ],
-        "tech": [
-            "OBV Dribble Carry P90", "Long Ball Ratio", "Pressured Passing Ratio", "OBV Pass P90",
-            "Passing Ratio", "Deep Progressions P90"
-        ],
-        "labels": {
-            "Blocks Per Shot": "Blocks/Shot",
-            "Challenge Ratio": "Tack./Dribbled Past %",
-            "Average X Pressure": "Av. Pressure Dist.",
-            "Padj Tackles P90": "PAdj Tackles",
-            "Hops": "HOPS",           
-            "OBV Dribble Carry P90": "OBV Dribble & Carry",
-            "Long Ball Ratio": "Long Ball %",
-            "Pressured Passing Ratio": "Passing u. Pressure %",
-            "OBV Pass P90": "OBV Pass",
-            "Passing Ratio": "Passing %",
-            "Deep Progressions P90": "Deep Progressions"
-        }
-    },
-
-    "Goalkeeper": {
-        "metric_map": classic_gk_metric_map,
-        "save": [
-            "Gsaa Ratio",
-            "Save Ratio",
-            "Da Aggressive Distance"
-        ],
-        "usage": [
-            "Long Ball Ratio",
-            "Op Xgbuildup P90",
-            "Pressured Passing Ratio",
-            "Passing Ratio",
-            "Pass Into Danger Ratio"
-        ],
-        "labels": {
-            "Gsaa Ratio": "GSAA %",
-            "Save Ratio": "Save %",
-            "Da Aggressive Distance": "GK Aggressive Dist.",
-            "Long Ball Ratio": "Long Ball %",
-            "Op Xgbuildup P90": "OP xGBuildup",           
-            "Pressured Passing Ratio": "Passing u. Pressure %",
-            "Passing Ratio": "Passing %",
-            "Pass Into Danger Ratio": "Pass into Danger %",
-        }
-    }
-}
-
-# 3. Seuils xPhy intégrés en dur
-threshold_dict1 = {
-    'psv99_top5': {
-        'Central Defender': [
-            {'min': 31.48, 'max': None, 'score': 12},
-            {'min': 30.84, 'max': 31.48, 'score': 9},
-            {'min': 30.28, 'max': 30.84, 'score': 6},
-            {'min': 29.64, 'max': 30.28, 'score': 3},
-            {'min': None,  'max': 29.64, 'score': 0},
-        ],
-        'Full Back': [
-            {'min': 32.0,  'max': None, 'score': 14},
-            {'min': 31.46, 'max': 32.0,  'score': 10},
-            {'min': 30.94, 'max': 31.46, 'score': 6},
-            {'min': 30.08, 'max': 30.94, 'score': 4},
-            {'min': None,  'max': 30.08, 'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 29.76, 'max': None, 'score': 10},
-            {'min': 29.07, 'max': 29.76, 'score': 7},
-            {'min': 28.38,  'max': 29.07, 'score': 5},
-            {'min': 27.62, 'max': 28.38,  'score': 3},
-            {'min': None,  'max': 27.62, 'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 30.54, 'max': None,   'score': 10},
-            {'min': 29.74, 'max': 30.54,  'score': 7},
-            {'min': 29.23, 'max': 29.74,  'score': 5},
-            {'min': 28.27, 'max': 29.23,  'score': 3},
-            {'min': None,  'max': 28.27,  'score': 0},
-        ],
-        'Winger': [
-            {'min': 32.56, 'max': None, 'score': 14},
-            {'min': 31.82, 'max': 32.56, 'score': 10},
-            {'min': 31.22, 'max': 31.82, 'score': 6},
-            {'min': 30.24, 'max': 31.22, 'score': 4},
-            {'min': None,  'max': 30.24, 'score': 0},
-        ],
-        'Striker': [
-            {'min': 32.2,  'max': None, 'score': 14},
-            {'min': 31.28, 'max': 32.2,  'score': 10},
-            {'min': 30.7,  'max': 31.28, 'score': 6},
-            {'min': 29.96, 'max': 30.7,  'score': 4},
-            {'min': None,  'max': 29.96, 'score': 0},
-        ],
-    },
-    'hi_distance_full_all': {
-        'Central Defender': [
-            {'min': 551.56, 'max': None, 'score': 4},
-            {'min': 492.06, 'max': 551.56, 'score': 3},
-            {'min': 441.2,  'max': 492.06, 'score': 2},
-            {'min': 390.76, 'max': 441.2,  'score': 1},
-            {'min': None,   'max': 390.76, 'score': 0},
-        ],
-        'Full Back': [
-            {'min': 946.93, 'max': None, 'score': 4},
-            {'min': 860.03, 'max': 946.93, 'score': 3},
-            {'min': 786.18, 'max': 860.03, 'score': 2},
-            {'min': 703.91, 'max': 786.18, 'score': 1},
-            {'min': None,   'max': 703.91, 'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 854.02, 'max': None, 'score': 4},
-            {'min': 746.49, 'max': 854.02, 'score': 3},
-            {'min': 665.42, 'max': 746.49, 'score': 2},
-            {'min': 560.44, 'max': 665.42, 'score': 1},
-            {'min': None,   'max': 560.44, 'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 893.73,  'max': None,   'score': 4},
-            {'min': 803.93,  'max': 893.73, 'score': 3},
-            {'min': 726.53,  'max': 803.93, 'score': 2},
-            {'min': 616.37,  'max': 726.53, 'score': 1},
-            {'min': None,    'max': 616.37, 'score': 0},
-        ],
-        'Winger': [
-            {'min': 1035.79,'max': None, 'score': 4},
-            {'min': 940.79, 'max': 1035.79,'score': 3},
-            {'min': 863.0,  'max': 940.79, 'score': 2},
-            {'min': 777.13, 'max': 863.0,  'score': 1},
-            {'min': None,   'max': 777.13, 'score': 0},
-        ],
-        'Striker': [
-            {'min': 924.18, 'max': None, 'score': 4},
-            {'min': 837.87, 'max': 924.18, 'score': 3},
-            {'min': 754.05, 'max': 837.87, 'score': 2},
-            {'min': 659.55, 'max': 754.05, 'score': 1},
-            {'min': None,   'max': 659.55, 'score': 0},
-        ],
-    },
-    'total_distance_full_all': {
-        'Central Defender': [
-            {'min': 9688.63, 'max': None, 'score': 7},
-            {'min': 9446.1,  'max': 9688.63, 'score': 5},
-            {'min': 9231.08, 'max': 9446.1,  'score': 3},
-            {'min': 8913.02, 'max': 9231.08, 'score': 1},
-            {'min': None,    'max': 8913.02, 'score': 0},
-        ],
-        'Full Back': [
-            {'min': 10330.71,'max': None, 'score': 7},
-            {'min': 10103.2, 'max': 10330.71,'score': 5},
-            {'min': 9802.22, 'max': 10103.2, 'score': 3},
-            {'min': 9525.6,  'max': 9802.22, 'score': 1},
-            {'min': None,    'max': 9525.6,  'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 11193.90,  'max': None, 'score': 10},
-            {'min': 10926.04,  'max': 11193.90,  'score': 7},
-            {'min': 10627.19,  'max': 10926.04,  'score': 5},
-            {'min': 10271.79,   'max': 10627.19,  'score': 3},
-            {'min': None,    'max': 10271.79,   'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 10529.28,  'max': None,     'score': 7},
-            {'min': 9975.60,   'max': 10529.28, 'score': 5},
-            {'min': 9438.64,   'max': 9975.60,  'score': 3},
-            {'min': 8933.82,   'max': 9438.64,  'score': 1},
-            {'min': None,      'max': 8933.82,  'score': 0},
-        ],
-        'Winger': [
-            {'min': 10597.7,  'max': None, 'score': 7},
-            {'min': 10253.05,  'max': 10597.7, 'score': 5},
-            {'min': 9922.66,   'max': 10253.05, 'score': 3},
-            {'min': 9576.8,    'max': 9922.66,  'score': 1},
-            {'min': None,    'max': 9576.8,   'score': 0},
-        ],
-        'Striker': [
-            {'min': 10337.14,  'max': None, 'score': 7},
-            {'min': 9986.61,  'max': 10337.14, 'score': 5},
-            {'min': 9725.31,   'max': 9986.61, 'score': 3},
-            {'min': 9370.5,  'max': 9725.31,  'score': 1},
-            {'min': None,    'max': 9370.5, 'score': 0},
-        ],
-    },
-    'hsr_distance_full_all': {
-        'Central Defender': [
-            {'min': 418.68,  'max': None,    'score': 7},
-            {'min': 386.56,  'max': 418.68,  'score': 5},
-            {'min': 359.06,  'max': 386.56,  'score': 3},
-            {'min': 319.99,  'max': 359.06,  'score': 1},
-            {'min': None,    'max': 319.99,  'score': 0},
-        ],
-        'Full Back': [
-            {'min': 683.49,  'max': None,    'score': 7},
-            {'min': 626.45,  'max': 683.49,  'score': 5},
-            {'min': 574.46,  'max': 626.45,  'score': 3},
-            {'min': 515.74,  'max': 574.46,  'score': 1},
-            {'min': None,    'max': 515.74,  'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 671.14,  'max': None,    'score': 7},
-            {'min': 603.56,  'max': 671.14,  'score': 5},
-            {'min': 547.54,  'max': 603.56,  'score': 3},
-            {'min': 465.70,  'max': 547.54,  'score': 1},
-            {'min': None,    'max': 465.70,  'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 688.96,  'max': None,   'score': 10},
-            {'min': 629.37,  'max': 688.96, 'score': 7},
-            {'min': 567.04,  'max': 629.37, 'score': 5},
-            {'min': 495.78,  'max': 567.04, 'score': 3},
-            {'min': None,    'max': 495.78, 'score': 0},
-        ],
-        'Winger': [
-            {'min': 719.96,  'max': None,    'score': 7},
-            {'min': 671.78,  'max': 719.96,  'score': 5},
-            {'min': 622.00,  'max': 671.78,  'score': 3},
-            {'min': 560.85,  'max': 622.00,  'score': 1},
-            {'min': None,    'max': 560.85,  'score': 0},
-        ],
-        'Striker': [
-            {'min': 649.93,  'max': None,    'score': 7},
-            {'min': 595.20,  'max': 649.93,  'score': 5},
-            {'min': 551.35,  'max': 595.20,  'score': 3},
-            {'min': 484.71,  'max': 551.35,  'score': 1},
-            {'min': None,    'max': 484.71,  'score': 0},
-        ],
-    },
-    'sprint_distance_full_all': {
-        'Central Defender': [
-            {'min': 139.22, 'max': None,    'score': 7},
-            {'min': 119.31, 'max': 139.22,  'score': 5},
-            {'min': 102.34,  'max': 119.31,  'score': 3},
-            {'min': 82.93,  'max': 102.34,   'score': 1},
-            {'min': None,   'max': 82.93,   'score': 0},
-        ],
-        'Full Back': [
-            {'min': 272.36, 'max': None,    'score': 7},
-            {'min': 240.01, 'max': 272.36,  'score': 5},
-            {'min': 204.02, 'max': 240.01,  'score': 3},
-            {'min': 172.29,  'max': 204.02,  'score': 1},
-            {'min': None,   'max': 172.29,   'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 180.98, 'max': None,    'score': 4},
-            {'min': 139.11, 'max': 180.98,  'score': 3},
-            {'min': 109.68, 'max': 139.11,  'score': 2},
-            {'min': 80.78,  'max': 109.68,  'score': 1},
-            {'min': None,   'max': 80.78,   'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 214.74,  'max': None,   'score': 4},
-            {'min': 184.28,  'max': 214.74, 'score': 3},
-            {'min': 159.87,  'max': 184.28, 'score': 2},
-            {'min': 112.56,  'max': 159.87, 'score': 1},
-            {'min': None,    'max': 112.56, 'score': 0},
-        ],
-        'Winger': [
-            {'min': 305.22, 'max': None,    'score': 7},
-            {'min': 258.86, 'max': 305.22,  'score': 5},
-            {'min': 224.24, 'max': 258.86,  'score': 3},
-            {'min': 179.44, 'max': 224.24,  'score': 1},
-            {'min': None,   'max': 179.44,  'score': 0},
-        ],
-        'Striker': [
-            {'min': 253.71, 'max': None,    'score': 7},
-            {'min': 219.69, 'max': 253.71,  'score': 5},
-            {'min': 180.40, 'max': 219.69,  'score': 3},
-            {'min': 136.27, 'max': 180.40,  'score': 1},
-            {'min': None,   'max': 136.27,  'score': 0},
-        ],
-    },
-    'sprint_count_full_all': {
-        'Central Defender': [
-            {'min': 7.79, 'max': None,   'score': 7},
-            {'min': 6.74,  'max': 7.79,  'score': 5},
-            {'min': 5.87,  'max': 6.74,   'score': 3},
-            {'min': 4.9,  'max': 5.87,   'score': 1},
-            {'min': None,  'max': 4.9,   'score': 0},
-        ],
-        'Full Back': [
-            {'min': 14.47, 'max': None,   'score': 7},
-            {'min': 12.89, 'max': 14.47,  'score': 5},
-            {'min': 11.44, 'max': 12.89,  'score': 3},
-            {'min': 9.69,  'max': 11.44,  'score': 1},
-            {'min': None,  'max': 9.69,   'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 10.10, 'max': None,   'score': 4},
-            {'min': 7.85,  'max': 10.10,  'score': 3},
-            {'min': 6.26,  'max': 7.85,   'score': 2},
-            {'min': 4.83,  'max': 6.26,   'score': 1},
-            {'min': None,  'max': 4.83,   'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 12.36, 'max': None,   'score': 4},
-            {'min': 10.51, 'max': 12.36,  'score': 3},
-            {'min': 8.62,  'max': 10.51,  'score': 2},
-            {'min': 6.31,  'max': 8.62,   'score': 1},
-            {'min': None,  'max': 6.31,   'score': 0},
-        ],
-        'Winger': [
-            {'min': 16.27, 'max': None,   'score': 7},
-            {'min': 14.26, 'max': 16.27,  'score': 5},
-            {'min': 12.32, 'max': 14.26,  'score': 3},
-            {'min': 10.2,  'max': 12.32,  'score': 1},
-            {'min': None,  'max': 10.2,   'score': 0},
-        ],
-        'Striker': [
-            {'min': 14.28, 'max': None,   'score': 7},
-            {'min': 12.44, 'max': 14.28,  'score': 5},
-            {'min': 10.54,  'max': 12.44,  'score': 3},
-            {'min': 7.99,  'max': 10.54,   'score': 1},
-            {'min': None,  'max': 7.99,   'score': 0},
-        ],
-    },
-    'highaccel_count_full_all': {
-        'Central Defender': [
-            {'min': 5.84, 'max': None, 'score': 7},
-            {'min': 5.14, 'max': 5.84, 'score': 5},
-            {'min': 4.62, 'max': 5.14, 'score': 3},
-            {'min': 4.09, 'max': 4.62, 'score': 1},
-            {'min': None,'max': 4.09,  'score': 0},
-        ],
-        'Full Back': [
-            {'min': 8.93, 'max': None, 'score': 7},
-            {'min': 8.07, 'max': 8.93, 'score': 5},
-            {'min': 7.22, 'max': 8.07, 'score': 3},
-            {'min': 6.24, 'max': 7.22, 'score': 1},
-            {'min': None,'max': 6.24,  'score': 0},
-        ],
-        'Midfielder': [
-            {'min': 5.18,'max': None,'score': 7},
-            {'min': 4.37,'max': 5.18,'score': 5},
-            {'min': 3.77,'max': 4.37,'score': 3},
-            {'min': 3.15,'max': 3.77,'score': 1},
-            {'min': None,'max': 3.15,'score': 0},
-        ],
-        'Attacking Midfielder': [
-            {'min': 6.97, 'max': None,   'score': 7},
-            {'min': 5.62, 'max': 6.97,   'score': 5},
-            {'min': 4.81, 'max': 5.62,   'score': 3},
-            {'min': 4.04, 'max': 4.81,   'score': 1},
-            {'min': None, 'max': 4.04,   'score': 0},
-        ],
-        'Winger': [
-            {'min': 9.96,'max': None,'score': 10},
-            {'min': 8.88,'max': 9.96,'score': 7},
-            {'min': 7.63,'max': 8.88,'score': 5},
-            {'min': 6.30,'max': 7.63,'score': 3},
-            {'min': None,'max': 6.30,'score': 0},
-        ],
-        'Striker': [
-            {'min': 9.52,'max': None,'score': 4},
-            {'min': 8.35,'max': 9.52,'score': 3},
-            {'min': 7.12,'max': 8.35,'score': 2},
-            {'min': 6.20,'max': 7.12,'score': 1},
-            {'min': None,'max': 6.20,'score': 0},
-        ],
-    },
-}
-
-# Mapping affiché → Player Name
-display_to_playername = df_tech.set_index("Display Name")["Player Name"].to_dict()
-
-# Nettoyage éventuel des colonnes cibles xTechnical
-df_tech["Prefered Foot"] = df_tech["Prefered Foot"].str.strip()
-df_tech["Player Name"] = df_tech["Player Name"].str.strip()
-df_tech["Position Group"] = df_tech["Position Group"].str.strip()
-df_tech["Competition Name"] = df_tech["Competition Name"].str.strip()
-
 # Création des listes de filtres xTechnical
 season_list_tech = sort_seasons(df_tech["Season Name"].dropna().unique().tolist())
 position_list_tech = sorted(df_tech["Position Group"].dropna().unique().tolist())
@@ -847,146 +315,145 @@ competition_list_tech = sorted(df_tech["Competition Name"].dropna().unique().tol
 player_list_tech = sorted(df_tech["Player Name"].dropna().unique().tolist())
 foot_list_tech = sorted(df_tech["Prefered Foot"].dropna().unique().tolist())
 
-# Création des templates Radar xTechnical
-metric_templates_tech = {
-    "Goalkeeper": [
-        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Pressured Change In Pass Length",
-        "Clcaa", "Da Aggressive Distance", "Gsaa P90", "Save Ratio", "Ot Shots Faced P90",
-        "Pass Into Danger Ratio", "Pressured Passing Ratio"
-    ],
-    "Central Defender": [
-        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Long Balls P90", "Xgbuildup P90",
-        "Aerial Ratio", "Aerial Wins P90", "Padj Tackles And Interceptions P90", "Pressure Regains P90",
-        "Defensive Action Regains P90", "OBV Pass P90", "OBV Dribble Carry P90"
-    ],
-    "CB-DEF": [
-        "Fouls P90", "Fhalf Ball Recoveries P90", "Average X Pressure", "Padj Pressures P90",
-        "Pressure Regains P90", "Aerial Ratio", "Aerial Wins P90", "Challenge Ratio", "Padj Interceptions P90",
-        "Padj Clearances P90", "Blocks Per Shot", "Errors P90"
-    ],
-    "CB-OFF": [
-        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Long Balls P90", "Dispossessions P90",
-        "Turnovers P90", "Np Shots P90", "OBV Pass P90", "OBV Dribble Carry P90", "Carries P90",
-        "Deep Progressions P90", "Pressured Passing Ratio"
-    ],
-    "Full Back": [
-        "Passing Ratio", "Op Passes P90", "Deep Progressions P90", "Crosses P90", "Crossing Ratio",
-        "Aerial Ratio", "Average X Defensive Action", "Padj Tackles And Interceptions P90", "Padj Pressures P90",
-        "Fhalf Counterpressures P90", "Np Shots P90", "Op Passes Into And Touches Inside Box P90", "OP xGAssisted"
-    ],
-    "FB-DEF": [
-        "Fouls P90", "Fhalf Ball Recoveries P90", "Average X Defensive Action", "Padj Pressures P90",
-        "Fhalf Pressures P90", "Fhalf Counterpressures P90", "Aerial Ratio", "Aerial Wins P90",
-        "Padj Tackles P90", "Challenge Ratio", "Padj Interceptions P90"
-    ],
-    "FB-OFF": [
-        "Passing Ratio", "Op Passes P90", "Deep Progressions P90", "Crosses P90", "Crossing Ratio",
-        "Dribbles P90", "Dispossessions P90", "Turnovers P90", "OP xGAssisted", "Touches Inside Box P90",
-        "Passes Inside Box P90", "Pressured Passing Ratio"
-    ],
-    "Midfielder (CDM)": [
-        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Turnovers P90", "Deep Progressions P90",
-        "Aerial Ratio", "Padj Tackles P90", "Padj Interceptions P90", "Fhalf Ball Recoveries P90",
-        "Padj Pressures P90", "Fhalf Counterpressures P90", "Shots Key Passes P90", "Pressured Passing Ratio"
-    ],
-    "Midfielder (CM)": [
-        "Passing Ratio", "Op Passes P90", "Turnovers P90", "Deep Progressions P90", "Aerial Ratio",
-        "Padj Tackles And Interceptions P90", "Padj Pressures P90", "Fhalf Counterpressures P90",
-        "Npxgxa P90", "Op Passes Into And Touches Inside Box P90", "Np Shots P90",
-        "Scoring Contribution", "Pressured Passing Ratio"
-    ],
-    "MID-DEF": [
-        "Fouls P90", "Aerial Ratio", "Aerial Wins P90", "Padj Tackles P90", "Padj Interceptions P90",
-        "Pressure Regains P90", "Fhalf Pressures P90", "Counterpressures P90", "Fhalf Counterpressures P90",
-        "Padj Clearances P90", "Fhalf Ball Recoveries P90"
-    ],
-    "MID-OFF": [
-        "Passing Ratio", "Op Passes P90", "Turnovers P90", "Dispossessions P90", "Deep Progressions P90",
-        "Through Balls P90", "OP xGAssisted", "Op Passes Into And Touches Inside Box P90", "Np Xg P90",
-        "Np Shots P90", "OBV Pass P90", "OBV Dribble Carry P90", "Pressured Passing Ratio"
-    ],
-    "Attacking Midfielder": [
-        "Passing Ratio", "Op Passes P90", "Turnovers P90", "Dribbles P90", "Deep Progressions P90",
-        "Padj Pressures P90", "Fhalf Counterpressures P90", "Through Balls P90", "OP xGAssisted",
-        "Op Passes Into And Touches Inside Box P90", "Np Xg P90", "Scoring Contribution", "Pressured Passing Ratio"
-    ],
-    "Winger": [
-        "Passing Ratio", "Padj Pressures P90", "Counterpressures P90", "Op Key Passes P90", "OP xGAssisted",
-        "OBV Pass P90", "Dribbles P90", "OBV Dribble Carry P90", "Fouls Won P90", "Np Shots P90",
-        "Scoring Contribution", "Op Passes Into And Touches Inside Box P90", "Turnovers P90"
-    ],
-    "Striker": [
-        "Passing Ratio", "Turnovers P90", "Dribbles P90", "Aerial Wins P90", "Padj Pressures P90",
-        "Counterpressures P90", "OP xGAssisted", "Touches Inside Box P90", "Np Xg P90", "Npg P90",
-        "Np Shots P90", "Np Xg Per Shot", "Shot On Target Ratio"
-    ]
-}
-
-metric_labels_tech = {
-    "Goalkeeper": ["Passing%", "OP Passes", "Long Ball%", "Being Press. Change in Pass Length",
-                   "Claims - CCAA%", "GK Aggressive Distance", "Goals Saved Above Average", "Save%",
-                   "On Target Shots Faced", "Pass into Danger%", "Pressured Pass%"],
-    "Central Defender": ["Passing%", "OP Passes", "Long Ball%", "Long Balls", "xGBuildup",
-                         "Aerial Win%", "Aerial Wins", "PAdj Tackles & Interceptions", "Pressure Regains",
-                         "Defensive Action Regains", "Pass OBV", "Dribble & Carry OBV"],
-    "CB-DEF": ["Fouls", "Opp. Half Ball Recoveries", "Average Pressure Distance", "PAdj Pressures",
-               "Pressure Regains", "Aerial Win%", "Aerial Wins", "Tack/Dribbled Past%", "PAdj Interceptions",
-               "PAdj Clearances", "Blocks/Shot", "Errors"],
-    "CB-OFF": ["Passing%", "OP Passes", "Long Ball%", "Long Balls", "Dispossessed", "Turnovers",
-               "Shots", "Pass OBV", "Dribble & Carry OBV", "Carries", "Deep Progressions", "Pressured Pass%"],
-    "Full Back": ["Passing%", "OP Passes", "Deep Progressions", "Successful Crosses", "Crossing %",
-                  "Aerial Win%", "Average Def. Action Distance", "Padj Tackles And Interceptions", "PAdj Pressures",
-                  "Counterpressures in Opp. Half", "Shots", "OP Passes + Touches Inside Box", "OP xGAssisted"],
-    "FB-DEF": ["Fouls", "Opp. Half Ball Recoveries", "Average Def. Action Distance", "PAdj Pressures",
-               "Pressures in Opp. Half", "Counterpressures in Opp. Half", "Aerial Win%", "Aerial Wins",
-               "PAdj Tackles", "Tack/Dribbled Past%", "PAdj Interceptions"],
-    "FB-OFF": ["Passing%", "OP Passes", "Deep Progressions", "Successful Crosses", "Crossing %",
-               "Successful Dribbles", "Dispossessed", "Turnovers", "OP xGAssisted", "Touches Inside Box",
-               "Passes Inside Box", "Pressured Pass%"],
-    "Midfielder (CDM)": ["Passing%", "OP Passes", "Long Ball%", "Turnovers", "Deep Progressions",
-                  "Aerial Win%", "PAdj Tackles", "PAdj Interceptions", "Opp. Half Ball Recoveries",
-                  "PAdj Pressures", "Pressures in Opp. Half", "Shots & Key Passes", "Pressured Pass%"],
-    "Midfielder (CM)": ["Passing%", "OP Passes", "Turnovers", "Deep Progressions", "Aerial Win%",
-                 "PAdj Tackles And Interceptions", "PAdj Pressures", "Counterpressures in Opp. Half",
-                 "xG & xG Assisted", "OP Passes + Touches Inside Box", "Shots", "Scoring Contribution", "Pressured Pass%"],
-    "MID-DEF": ["Fouls", "Aerial Win%", "Aerial Wins", "PAdj Tackles", "PAdj Interceptions",
-                "Pressure Regains", "Pressures in Opp. Half", "Counterpressures",
-                "Counterpressures in Opp. Half", "PAdj Clearances", "Opp. Half Ball Recoveries"],
-    "MID-OFF": ["Passing%", "OP Passes", "Turnovers", "Dispossessed", "Deep Progressions",
-                "Throughballs", "OP xGAssisted", "OP Passes + Touches Inside Box", "xG", "Shots",
-                "Pass OBV", "Dribble & Carry OBV", "Pressured Pass%"],
-    "Attacking Midfielder": ["Passing%", "OP Passes", "Turnovers", "Successful Dribbles", "Deep Progressions",
-                             "PAdj Pressures", "Counterpressures in Opp. Half", "Throughballs", "OP xGAssisted",
-                             "OP Passes + Touches Inside Box", "xG", "Scoring Contribution", "Pressured Pass%"],
-    "Winger": ["Passing%", "PAdj Pressures", "Counterpressures", "Key Passes", "OP xGAssisted",
-               "Pass OBV", "Successful Dribbles", "Dribble & Carry OBV", "Fouls Won", "Shots",
-               "Scoring Contribution", "OP Passes + Touches Inside Box", "Turnovers"],
-    "Striker": ["Passing%", "Turnovers", "Successful Dribbles", "Aerial Wins", "PAdj Pressures",
-                "Counterpressures", "OP xGAssisted", "Touches Inside Box", "xG", "NP Goals",
-                "Shots", "xG/Shot", "Shooting%"]
-}
 
-# In[8]:
+# === Rapport détaillé Merged (Player Search) ===
+# Calculé seulement à l'ouverture (st.dialog) ; radars, jauges et tableaux (skapp.reports) mis en
+# cache (mémoire puis disque) par (joueur, club, saison, compétition) et version de la partition merged
+@st.cache_data(max_entries=256)
+@persisted(disk_cache)
+def merged_report_physical(_row, player_id, team_name, season, competition, version):
+    """Radar physique (percentiles vs Top 5, > 600 min) du rapport détaillé."""
+    pos = _row.get("Position Group", "—")
+    return physical_radar(
+        _row, "merged_phy", load_peer_stats(snapshot, "merged_phy", peer_stats_version(snapshot, "merged_phy")),
+        lazy(lambda: peer_frame("merged_phy", df_merged, pos, season)), _row.get("Player Name"),
+    )
+
+@st.cache_data(max_entries=256)
+@persisted(disk_cache)
+def merged_report_technical(_row, player_id, team_name, season, competition, selected_template, version):
+    """Radar technique du rapport détaillé pour un template."""
+    pos = _row.get("Position Group")
+    return technical_radar(
+        _row, "merged_tech", metric_templates_tech[selected_template], metric_labels_tech[selected_template],
+        load_peer_stats(snapshot, "merged_tech", peer_stats_version(snapshot, "merged_tech")),
+        lazy(lambda: peer_frame("merged_tech", df_tech, pos, season)), _row.get("Player Name"),
+    )
+
+@st.cache_data(max_entries=256)
+@persisted(disk_cache)
+def merged_report_indexes(_row, player_id, team_name, season, competition, version):
+    """Jauges xPHY / xDEF / xTECH (rang et moyenne des pairs de la compétition) et tableaux de points."""
+    return index_gauge_results(_row)
+
+def index_gauge_results(row):
+    """Jauges dans l'ordre d'affichage ; la première erreur arrête la suite."""
+    results = build_blocks(index_gauge_tasks(row, index_peers(df_merged, row)))
+    gauges = []
+    for gauge, error in results.values():
+        if error is not None:
+            return gauges, str(error)
+        gauges.append(gauge)
+    return gauges, None
+
+@st.dialog("Detailed report", width="large")
+def merged_detailed_report(row, player_name, team_name, comp):
+    key = (selected_player_id(row), team_name, row.get("Season Name"), comp)
+    version = partition_version(snapshot, "merged", row.get("Season Name"), comp)
+
+    # === Titre joueur ===
+    pos = row.get("Position Group", "—")
+    season = row.get("Season Name", None)
+    age = int(float(row.get("Age", 0))) if pd.notna(row.get("Age", None)) else "—"
+    mins = int(float(row.get("Minutes", 0))) if pd.notna(row.get("Minutes", None)) else "—"
+    title_html = f"""
+    <div style='font-size:17px; font-weight:500; text-align:center; margin: 10px 0;'>
+    {player_name} ({pos}) – {season} – {team_name} ({comp}) – {age} y/o – {mins} min
+    </div>
+    """
+    st.markdown(title_html, unsafe_allow_html=True)
+
+    # === Tabs du rapport ===
+    tab_radars_ps, tab_indexes_ps = st.tabs(["Radars", "Indexes"])
+
+    # ==== Zone radars côte à côte ====
+    with tab_radars_ps, timings.tab("Radars"):
+        col1, col2 = st.columns(2)
+
+        with col1:
+            try:
+                st.plotly_chart(merged_report_physical(row, *key, version), use_container_width=True)
+            except Exception as e:
+                st.error(f"Erreur radar physique : {e}")
+
+        with col2:
+            # === Radar Technique dynamique avec selectbox ===
+            try:
+                # Position et template par défaut
+                position_group_to_template = {
+                    "Goalkeeper": "Goalkeeper",
+                    "Central Defender": "Central Defender",
+                    "Full Back": "Full Back",
+                    "Midfielder": "Midfielder (CDM)",
+                    "Attacking Midfielder": "Attacking Midfielder",
+                    "Winger": "Winger",
+                    "Striker": "Striker",
+                }
+                default_template = position_group_to_template.get(row.get("Position Group"), "Striker")
 
-# On définit les colonnes pour le graphe
-graph_columns = [
-    "PSV-99", "TOP 5 PSV-99", "Total Distance P90", "M/min P90", "Running Distance P90",
-    "HSR Distance P90", "HSR Count P90", "Sprinting Distance P90", "Sprint Count P90",
-    "HI Distance P90", "HI Count P90", "Medium Acceleration Count P90",
-    "High Acceleration Count P90", "Medium Deceleration Count P90", "High Deceleration Count P90",
-    "Explosive Acceleration to HSR Count P90", "Explosive Acceleration to Sprint Count P90", 
-    "Total Distance TIP P30", "M/min TIP P30", "Running Distance TIP P30",
-    "HSR Distance TIP P30", "HSR Count TIP P30", "Sprinting Distance TIP P30", "Sprint Count TIP P30",
-    "HI Distance TIP P30", "HI Count TIP P30", "Medium Acceleration Count TIP P30",
-    "High Acceleration Count TIP P30", "Medium Deceleration Count TIP P30", "High Deceleration Count TIP P30",
-    "Explosive Acceleration to HSR Count TIP P30", "Explosive Acceleration to Sprint Count TIP P30",
-    "Total Distance OTIP P30", "M/min OTIP P30", "Running Distance OTIP P30",
-    "HSR Distance OTIP P30", "HSR Count OTIP P30", "Sprinting Distance OTIP P30", "Sprint Count OTIP P30",
-    "HI Distance OTIP P30", "HI Count OTIP P30", "Medium Acceleration Count OTIP P30",
-    "High Acceleration Count OTIP P30", "Medium Deceleration Count OTIP P30", "High Deceleration Count OTIP P30",
-    "Explosive Acceleration to HSR Count OTIP P30", "Explosive Acceleration to Sprint Count OTIP P30",
-    "xPhysical"
-]
+                # Stockage temporaire du template sélectionné
+                template_label = f"template_select_{player_name}_{season}_{team_name}".replace(" ", "_")
+                selected_template = st.session_state.get(template_label, default_template)
+
+                st.plotly_chart(
+                    merged_report_technical(row, *key, selected_template, version), use_container_width=True
+                )
+
+                # Selectbox SOUS le radar : seul le rapport est recalculé (fragment du dialog)
+                new_template = st.selectbox(
+                    "Select a radar template",
+                    options=list(metric_templates_tech.keys()),
+                    index=list(metric_templates_tech.keys()).index(selected_template),
+                    key=template_label + "_under",
+                )
+                if new_template != selected_template:
+                    st.session_state[template_label] = new_template
+                    st.rerun(scope="fragment")
+
+            except Exception as e:
+                st.error(f"Erreur radar technique : {e}")
+
+    # === Onglet 2 : Indexes ===
+    with tab_indexes_ps, timings.tab("Indexes"):
+        try:
+            pos = row.get("Position Group", "")
+            # === Affichage des 3 jauges ===
+            gauges, error = merged_report_indexes(row, *key, version)
+            for col, gauge in zip(st.columns(3), gauges):
+                with col:
+                    st.plotly_chart(gauge["figure"], use_container_width=True)
+                    st.markdown(
+                        f"<div style='text-align:center; font-size:18px; margin-top:-40px; margin-bottom:2px;'><b>{gauge['label']}</b></div>",
+                        unsafe_allow_html=True
+                    )
+                    st.markdown(
+                        f"<div style='text-align:center; font-size:14px; margin-top:-26px; margin-bottom:2px; color:grey'>"
+                        f"Average ({pos} in {row['Competition Name']}): {gauge['mean']:.1f}</div>",
+                        unsafe_allow_html=True
+                    )
+                    if gauge["details"] is not None:
+                        st.markdown(f"##### {gauge['details_title']}")
+                        st.dataframe(gauge["details"], use_container_width=True)
+            if error:
+                st.error(f"Erreur affichage jauges index : {error}")
+
+            st.divider()
+
+        except Exception as e:
+            st.error(f"Erreur affichage jauges index : {e}")
+
+
+# In[8]:
 
 # Charge le logo (met le chemin exact si besoin)
 logo_path = 'AS Roma.png'
@@ -998,6 +465,43 @@ page = st.sidebar.radio(
     "Choose tab",
     ["xPhysical", "xTech/xDef", "Merged Data"]
 )
+timings.page(page)
+ss["profile_page"] = page
+load_sessions().touch(session_id, page, sum(value_nbytes(v) for v in ss.to_dict().values()))
+
+# --- Panneau de diagnostic (caché) : p50 / p95 des spans depuis le démarrage du processus
+if st.query_params.get("diagnostics") == "1":
+    with st.sidebar.expander("Diagnostics", expanded=True):
+        st.dataframe(timings.summary(), hide_index=True, use_container_width=True)
+        log_on = st.toggle(f"Append spans to {TIMINGS_LOG}", value=timings.log_path is not None, key="diag_log")
+        timings.log_path = TIMINGS_LOG if log_on else None
+        if st.button("Reset timings", key="diag_reset"):
+            timings.clear()
+        lru = load_cache().stats()
+        st.caption(
+            f"Loaded selections: {lru['bytes'] / 1024 ** 2:.0f} / {lru['max_bytes'] / 1024 ** 2:.0f} MB, "
+            f"{lru['entries']} entries, {len(load_sessions())} sessions ({load_sessions().released} idle released)"
+        )
+        st.dataframe(load_sessions().report().head(10), hide_index=True, use_container_width=True)
+
+# --- Panneau du profilage : profils de la session (le rerun en cours apparaît au suivant)
+if profile_arg is not None:
+    with st.sidebar.expander("Profiler", expanded=True):
+        st.caption(f"{ss.get('profile_left', 0)} rerun(s) left to profile")
+        profiles = ss.get("profiles", [])
+        if profiles:
+            prof_path = st.selectbox(
+                "Profile", profiles[::-1], format_func=os.path.basename, key="profile_pick"
+            )
+            sort_col = st.radio(
+                "Sort by", ["Cumulative (ms)", "Own (ms)", "Calls"], horizontal=True, key="profile_sort"
+            )
+            top = profiling.top_functions(prof_path, sort=sort_col)
+            st.dataframe(top, hide_index=True, use_container_width=True)
+            for ext in (".prof", ".txt"):
+                path = prof_path[:-len(".prof")] + ext
+                with open(path, "rb") as fh:
+                    st.download_button(ext, fh.read(), file_name=os.path.basename(path), key=f"profile_dl{ext}")
 
 if page == "xPhysical":
     
@@ -1058,7 +562,7 @@ if page == "xPhysical":
     # Création des sous-onglets
     tabs_ps, tab1, tab2, tab3, tab4 = st.tabs(["Player Search", "Scatter Plot", "Radar", "Index", "Top 50"])
     
-    with tabs_ps:
+    with tabs_ps, timings.tab("Player Search"):
         xphysical_help_expander()
     
         # ==== Colonnes xPhysical ====
@@ -1069,14 +573,6 @@ if page == "xPhysical":
         player_col   = "Player"
         team_col     = "Team"
     
-        # Alias (pour affichage/exports + TM)
-        if "Player Name" not in df.columns and player_col in df.columns:
-            df["Player Name"] = df[player_col]
-        if "Team Name" not in df.columns and team_col in df.columns:
-            df["Team Name"] = df[team_col]
-        if "Competition Name" not in df.columns and comp_col in df.columns:
-            df["Competition Name"] = df[comp_col]
-    
         # ==== Sélecteurs de chargement ====
         seasons_all = sorted(df[season_col].dropna().astype(str).unique().tolist())
         comps_all   = sorted(df[comp_col].dropna().astype(str).unique().tolist())
@@ -1108,8 +604,8 @@ if page == "xPhysical":
             )
     
         # ---- État
-        if "xphy_ps_loaded_df" not in st.session_state:
-            st.session_state.xphy_ps_loaded_df = None
+        if "xphy_ps_loaded" not in st.session_state:
+            st.session_state.xphy_ps_loaded = False
         if "xphy_ps_last_seasons" not in st.session_state:
             st.session_state.xphy_ps_last_seasons = []
         if "xphy_ps_last_comps" not in st.session_state:
@@ -1121,9 +617,9 @@ if page == "xPhysical":
                  tuple(st.session_state.get("xphy_ps_ui_comps", [])))
         _last = (tuple(st.session_state.get("xphy_ps_last_seasons", [])),
                  tuple(st.session_state.get("xphy_ps_last_comps", [])))
-        if st.session_state.xphy_ps_loaded_df is not None and _now != _last:
+        if st.session_state.xphy_ps_loaded and _now != _last:
             st.session_state.xphy_ps_pending = True
-            st.session_state.xphy_ps_loaded_df = None
+            st.session_state.xphy_ps_loaded = False
     
         comp_sel = st.session_state.get("xphy_ps_ui_comps", [])
         load_disabled = not bool(comp_sel)
@@ -1142,71 +638,72 @@ if page == "xPhysical":
                 st.session_state.xphy_ps_last_seasons = seasons_all
                 st.session_state.xphy_ps_last_comps   = comps_all
     
-            df_loaded = df[
-                df[season_col].isin(st.session_state.xphy_ps_last_seasons)
-                & df[comp_col].isin(st.session_state.xphy_ps_last_comps)
-            ].copy()
-            st.session_state.xphy_ps_loaded_df = df_loaded
+            st.session_state.xphy_ps_loaded = True
             st.session_state.xphy_ps_pending = False
             st.rerun()
     
-        ps_ready = (
-            st.session_state.xphy_ps_loaded_df is not None 
-            and not st.session_state.xphy_ps_pending
-            and not st.session_state.xphy_ps_loaded_df.empty
+        df_loaded = (
+            load_selection("xphysical", st.session_state.xphy_ps_last_seasons, st.session_state.xphy_ps_last_comps)
+            if st.session_state.xphy_ps_loaded and not st.session_state.xphy_ps_pending else None
         )
+        ps_ready = df_loaded is not None and not df_loaded.empty
     
         if not ps_ready:
             st.info("Please load data to continue.")
         else:
             st.markdown("---")
-            df_loaded = st.session_state.xphy_ps_loaded_df.copy()
     
             # ==== Filtres dynamiques ====
             DESIRED_ORDER = ["Goalkeeper", "Central Defender", "Full Back", "Midfield", "Wide Attacker", "Center Forward"]
     
-            c3, c4 = st.columns([1.2, 1.2])
+            batched = st.toggle(
+                "Batch filter changes", key="xphy_ps_batched",
+                help="Filters are applied together with the Apply buttons (one recompute per filter row or popover).",
+            )
+            with filter_form("xphy_ps_filters_form", batched, "Apply filters"):
+                c3, c4 = st.columns([1.2, 1.2])
     
-            with c3:
-                if pos_col in df_loaded.columns:
-                    raw_pos = df_loaded[pos_col].dropna().astype(str).unique().tolist()
-                    order_idx = {v: i for i, v in enumerate(DESIRED_ORDER)}
-                    pos_options = sorted(raw_pos, key=lambda x: order_idx.get(x, 999))
-                else:
-                    pos_options = []
-                selected_positions = st.multiselect(
-                    "Position Group(s)",
-                    options=pos_options,
-                    default=[],
-                    key="xphy_ps_positions",
-                )
+                with c3:
+                    if pos_col in df_loaded.columns:
+                        raw_pos = df_loaded[pos_col].dropna().astype(str).unique().tolist()
+                        order_idx = {v: i for i, v in enumerate(DESIRED_ORDER)}
+                        pos_options = sorted(raw_pos, key=lambda x: order_idx.get(x, 999))
+                    else:
+                        pos_options = []
+                    selected_positions = st.multiselect(
+                        "Position Group(s)",
+                        options=pos_options,
+                        default=[],
+                        key="xphy_ps_positions",
+                    )
     
-            def _bounds(series, default=(0, 0)):
-                s = pd.to_numeric(series, errors="coerce")
-                return (int(s.min()), int(s.max())) if s.notna().any() else default
+                def _bounds(series, default=(0, 0)):
+                    s = pd.to_numeric(series, errors="coerce")
+                    return (int(s.min()), int(s.max())) if s.notna().any() else default
     
-            _ps_ver = str(hash((tuple(st.session_state.xphy_ps_last_seasons),
-                                tuple(st.session_state.xphy_ps_last_comps))))
+                _ps_ver = str(hash((tuple(st.session_state.xphy_ps_last_seasons),
+                                    tuple(st.session_state.xphy_ps_last_comps))))
     
-            with c4:
-                if age_col in df_loaded.columns and not df_loaded[age_col].isnull().all():
-                    a_min, a_max = _bounds(df_loaded[age_col], default=(16, 45))
-                    selected_age = st.slider(
-                        "Age",
-                        min_value=a_min, max_value=a_max,
-                        value=(a_min, a_max), step=1,
-                        key=f"xphy_ps_age_{_ps_ver}",
-                    )
-                else:
-                    selected_age = None
+                with c4:
+                    if age_col in df_loaded.columns and not df_loaded[age_col].isnull().all():
+                        a_min, a_max = _bounds(df_loaded[age_col], default=(16, 45))
+                        selected_age = st.slider(
+                            "Age",
+                            min_value=a_min, max_value=a_max,
+                            value=(a_min, a_max), step=1,
+                            key=f"xphy_ps_age_{_ps_ver}",
+                        )
+                    else:
+                        selected_age = None
     
             # Appliquer les filtres Position + Age
-            df_filtered_base = df_loaded.copy()
-    
-            if selected_positions:
-                df_filtered_base = df_filtered_base[df_filtered_base[pos_col].isin(selected_positions)]
-            if selected_age:
-                df_filtered_base = df_filtered_base[(df_filtered_base[age_col] >= selected_age[0]) & (df_filtered_base[age_col] <= selected_age[1])]
+            with timings.span("filter"):
+                df_filtered_base = df_loaded.copy()
+
+                if selected_positions:
+                    df_filtered_base = df_filtered_base[df_filtered_base[pos_col].isin(selected_positions)]
+                if selected_age:
+                    df_filtered_base = df_filtered_base[(df_filtered_base[age_col] >= selected_age[0]) & (df_filtered_base[age_col] <= selected_age[1])]
     
             # ==== Groupes de métriques ====
             PSV_METRICS = [
@@ -1264,28 +761,41 @@ if page == "xPhysical":
             st.markdown("<hr style='margin:6px 0 0 0; border-color:#555;'>", unsafe_allow_html=True)
             row = st.columns(4, gap="small")
     
+            # Quantiles des métriques sur les lignes filtrées : légendes, seuils et état des sliders
+            popover_cols = list(dict.fromkeys(
+                c for _, metric_list in metric_popovers for c, _ in metric_list if c in df_filtered_base.columns
+            ))
+            quantiles = filter_quantiles(
+                "xphysical", st.session_state.xphy_ps_last_seasons, st.session_state.xphy_ps_last_comps,
+                (tuple(selected_positions), selected_age), df_filtered_base, popover_cols,
+            )
+
             filter_percentiles = {}
             active_filters_count = {name: 0 for name, _ in metric_popovers}
     
             for i, (name, metric_list) in enumerate(metric_popovers):
                 with row[i]:
-                    with st.popover(name, use_container_width=True):
+                    with st.popover(name, use_container_width=True), filter_form(f"xphy_pop_form_{name}", batched):
                         for col_name, label in metric_list:
                             if col_name in df_filtered_base.columns:
                                 slider_key = f"xphy_pop_{name}_{col_name}_{st.session_state.xphy_ps_reset_counter}"
-                                s = pd.to_numeric(df_filtered_base[col_name], errors="coerce").dropna()
-                                if s.empty:
+                                q = quantiles[col_name]
+                                if q.isna().all():
                                     st.slider(f"{label} – Percentile", 0, 100, 0, 5, key=slider_key, disabled=True)
                                     continue
-                                p = st.slider(f"{label} – Percentile", 0, 100, 0, 5, key=slider_key)
+                                if batched:
+                                    p = threshold_slider(f"{label} – Percentile", q, slider_key)
+                                else:
+                                    p = st.slider(f"{label} – Percentile", 0, 100, 0, 5, key=slider_key)
                                 filter_percentiles[(name, col_name)] = p
                                 if p > 0:
-                                    thr = float(np.nanpercentile(s, p))
-                                    st.caption(f"≥ **{thr:,.2f}** (min {s.min():,.2f} / max {s.max():,.2f})")
+                                    st.caption(f"≥ **{q[p]:,.2f}** (min {q[0]:,.2f} / max {q[100]:,.2f})")
                                     active_filters_count[name] = active_filters_count.get(name, 0) + 1
                     cnt = active_filters_count.get(name, 0)
                     st.caption(f"{cnt} active filter{'s' if cnt != 1 else ''}")
     
+            expression = expression_filter(f"xphy_ps_expr_{st.session_state.xphy_ps_reset_counter}", df_filtered_base)
+
             # --- Boutons Clear + TM + Send to Radar
             col_btn1, col_btn2, col_btn3 = st.columns([1.0, 1.4, 1.4], gap="small")
     
@@ -1300,17 +810,19 @@ if page == "xPhysical":
             with col_btn3:
                 send_radar_slot = st.empty()
     
-            # ============== Filtrage PERCENTILES ==============
-            df_final = df_filtered_base.copy()
-    
-            for (cat, col), min_pct in filter_percentiles.items():
-                if min_pct > 0 and col in df_final.columns:
-                    ref_vals = pd.to_numeric(df_final[col], errors="coerce").dropna()
-                    if len(ref_vals) > 0:
-                        threshold = ref_vals.quantile(min_pct / 100)
-                        df_final = df_final[pd.to_numeric(df_final[col], errors="coerce") >= threshold]
-    
-            df_filtered = df_final.copy()
+            # ============== Filtrage PERCENTILES + expression ==============
+            # (seuils lus dans la table de quantiles des lignes de base : l'ordre des deux filtres est indifférent)
+            def xphy_pandas_rows():
+                df_expr = df_filtered_base[expression.mask(df_filtered_base)] if expression else df_filtered_base
+                return percentile_filter(df_expr, filter_percentiles, quantiles).copy()
+
+            with timings.span("filter"):
+                df_filtered = search_rows(
+                    "xphysical", st.session_state.xphy_ps_last_seasons, st.session_state.xphy_ps_last_comps,
+                    {"positions": selected_positions, "age": selected_age}, filter_percentiles, expression,
+                    ["Player Name", "Team Name", comp_col, pos_col, age_col, "xPhysical", "Transfermarkt", PLAYER_ID],
+                    xphy_pandas_rows,
+                )
     
             # Lien Transfermarkt
             TM_BASE = "https://www.transfermarkt.fr/schnellsuche/ergebnis/schnellsuche?query="
@@ -1325,13 +837,17 @@ if page == "xPhysical":
                 # Colonnes à afficher
                 display_cols = [
                     "Player Name", "Team Name", comp_col, pos_col, age_col,
-                    "xPhysical", "Transfermarkt"
+                    "xPhysical", "Transfermarkt", PLAYER_ID
                 ]
     
                 # Ajouter les colonnes filtrées via percentiles
                 for (cat, col), min_pct in filter_percentiles.items():
                     if min_pct > 0 and col in df_filtered.columns and col not in display_cols:
                         display_cols.append(col)
+                # ... et les métriques de l'expression
+                for col in (expression.columns if expression else []):
+                    if col not in display_cols and pd.api.types.is_numeric_dtype(df_filtered[col]):
+                        display_cols.append(col)
     
                 display_cols = [col for col in display_cols if col in df_filtered.columns]
                 df_display = df_filtered[display_cols].reset_index(drop=True).copy()
@@ -1386,9 +902,10 @@ if page == "xPhysical":
                         headerStyle={'textAlign': 'center'}
                     )
     
-                # Masquer Transfermarkt
+                # Masquer Transfermarkt + Player ID
                 if "Transfermarkt" in df_display.columns:
                     gb.configure_column("Transfermarkt", hide=True)
+                gb.configure_column(PLAYER_ID, hide=True)
     
                 gb.configure_pagination(enabled=False)
 
@@ -1398,7 +915,7 @@ if page == "xPhysical":
                     domLayout='normal'
                 )
     
-                grid_response = AgGrid(
+                grid_response = aggrid(
                     df_display,
                     gridOptions=gb.build(),
                     height=500,
@@ -1416,8 +933,8 @@ if page == "xPhysical":
                 # 🔥 MODIFIÉ : Afficher boutons SEULEMENT si sélection
                 if isinstance(selected_rows, list) and len(selected_rows) > 0 and isinstance(selected_rows[0], dict):
                     display_row = selected_rows[0]
-                    player_name_sel = display_row.get("Player Name")
-                    full_row = df_filtered[df_filtered["Player Name"] == player_name_sel]
+                    player_id_sel = selected_player_id(display_row)
+                    full_row = df_filtered[df_filtered[PLAYER_ID] == player_id_sel]
                 
                     if not full_row.empty:
                         tm_url = full_row.iloc[0].get("Transfermarkt")
@@ -1433,15 +950,8 @@ if page == "xPhysical":
                         with send_radar_slot:
                             if st.button("📊 Send to Radar", use_container_width=True, key="xphy_send_radar_btn"):
                                 try:
-                                    _df_dn = df[[player_col, "Short Name"]].dropna().drop_duplicates()
-                                    _df_dn["Display Name"] = _df_dn["Short Name"].astype(str) + " (" + _df_dn[player_col].astype(str) + ")"
-                                    player_to_display_map = dict(zip(_df_dn[player_col], _df_dn["Display Name"]))
-                                    player_key = display_row.get("Player Name") or display_row.get(player_col)
-                                    display_val = player_to_display_map.get(player_key)
-                                    if display_val is None:
-                                        short_name_fallback = display_row.get("Short Name")
-                                        display_val = f"{short_name_fallback} ({player_key})" if short_name_fallback and player_key else player_key
-                                    st.session_state["radar_p1"] = display_val
+                                    # Le selectbox du radar est indexé par Player ID
+                                    st.session_state["radar_p1"] = player_id_sel
                                     import streamlit.components.v1 as components
                                     components.html(
                                         """
@@ -1515,7 +1025,7 @@ if page == "xPhysical":
             xphysical_glossary_expander()
     
 ###################### --- Onglet Scatter Plot ---
-    with tab1:
+    with tab1, timings.tab("Scatter Plot"):
         
                         
         # Ligne 1 : saisons, compétitions, postes
@@ -1670,6 +1180,7 @@ if page == "xPhysical":
             label_df.loc[mask_t, "color_marker"] = "red"
         
         # Scatter principal (points) avec Player_Label
+        figure_done = timings.mark("figure")
         fig = px.scatter(
             plot_df,
             x=selected_xaxis,
@@ -1749,12 +1260,13 @@ if page == "xPhysical":
         )
         
         st.plotly_chart(fig, use_container_width=False)
+        figure_done()
                 
         xphysical_glossary_expander()
 
 #####-------------- RADAR #####    
 
-    with tab2:
+    with tab2, timings.tab("Radar"):
         # 1) Choix des métriques  
         default_metrics = [
             "TOP 5 PSV-99",
@@ -1786,35 +1298,32 @@ if page == "xPhysical":
             st.warning("At least one metric is necessary.")
             st.stop()
 
-        # Ajout colonne Display Name
-        df["Display Name"] = df["Short Name"] + " (" + df["Player"] + ")"
-
-        # Dictionnaire pour retrouver le Short Name
-        display_to_shortname = dict(zip(df["Display Name"], df["Short Name"]))
-
         # === MAPPINGS JOUEURS POUR AFFICHAGE ===
-        # Optimisation : mapping unique Player -> Display Name
-        df_display = df[["Player", "Display Name"]].dropna().drop_duplicates()
-        player_to_display = dict(zip(df_display["Player"], df_display["Display Name"]))
-        display_to_player = {v: k for k, v in player_to_display.items()}
-        display_options = sorted(player_to_display.values())
+        # Options = Player ID, libellé "Short Name (Player)" via format_func
+        id_to_display = player_labels["xphysical"]
+        display_options = sorted(id_to_display, key=id_to_display.get)
+        if st.session_state.get("radar_p1") not in id_to_display:
+            st.session_state.pop("radar_p1", None)
 
         # === JOUEUR 1 ===
         col1, col2 = st.columns(2)
 
         with col1:
-            # Affichage joueur (Display Name), clé réelle = Player
-            default_display = next((name for name in display_options if "Artem Dovbyk" in name), display_options[0])
-            p1_display = st.selectbox("Player 1", display_options, index=display_options.index(default_display), key="radar_p1")
-            p1 = display_to_player[p1_display]
+            default_display = next((pid for pid in display_options if "Artem Dovbyk" in id_to_display[pid]), display_options[0])
+            p1_id = st.selectbox(
+                "Player 1", display_options, index=display_options.index(default_display),
+                format_func=id_to_display.get, key="radar_p1"
+            )
+            df_p1 = df[df[PLAYER_ID] == p1_id]
+            p1 = df_p1["Player"].iloc[0]
 
         with col2:
             # Liste des saisons disponibles
-            seasons1 = sorted(df[df["Player"] == p1]["Season"].dropna().unique().tolist())
+            seasons1 = sorted(df_p1["Season"].dropna().unique().tolist())
             default_season = (seasons1[-1] if seasons1 else None)
             s1 = st.selectbox("Season 1", seasons1, index=seasons1.index(default_season), key="radar_s1")
 
-        df1 = df[(df["Player"] == p1) & (df["Season"] == s1)]
+        df1 = df_p1[df_p1["Season"] == s1]
 
         # Club
         teams1 = df1["Team"].dropna().unique().tolist()
@@ -1842,13 +1351,14 @@ if page == "xPhysical":
         if compare:
             col3, col4 = st.columns(2)
             with col3:
-                p2_display = st.selectbox("Player 2", display_options, key="radar_p2")
-                p2 = display_to_player[p2_display]
+                p2_id = st.selectbox("Player 2", display_options, format_func=id_to_display.get, key="radar_p2")
+                df_p2 = df[df[PLAYER_ID] == p2_id]
+                p2 = df_p2["Player"].iloc[0]
             with col4:
-                seasons2 = sorted(df[df["Player"] == p2]["Season"].unique().tolist())
+                seasons2 = sorted(df_p2["Season"].unique().tolist())
                 s2 = st.selectbox("Season 2", seasons2, key="radar_s2")
 
-            df2 = df[(df["Player"] == p2) & (df["Season"] == s2)]
+            df2 = df_p2[df_p2["Season"] == s2]
 
             # Club
             teams2 = df2["Team"].dropna().unique().tolist()
@@ -1871,18 +1381,13 @@ if page == "xPhysical":
             # Ligne finale joueur 2
             row2 = df2.iloc[0]
             
-        # --- Choix du contexte : All (P90) / TIP (P30) / OTIP (P30)
-        mode = st.pills(
-            "Game Context",
-            options=["All", "TIP", "OTIP"],
-            selection_mode="single",
-            default="All",
-            key="xphy_radar_mode",
-            help=(
-                "You can change the radar by clicking on the pills. "
-                "All = P90 data. TIP = when player's Team is In Possession (normalized P30). "
-                "OTIP = when Other Team is In Possession (normalized P30)."
-            ),
+        # --- Contextes : All (P90) / TIP (P30) / OTIP (P30), calculés ensemble et basculés
+        # côté navigateur (boutons Plotly), sans rerun Streamlit
+        modes = ["All", "TIP", "OTIP"]
+        st.caption(
+            "Game Context: switch the radar with the All / TIP / OTIP buttons above the chart. "
+            "All = P90 data. TIP = when player's Team is In Possession (normalized P30). "
+            "OTIP = when Other Team is In Possession (normalized P30)."
         )
 
         # --- Mapping utilitaire pour obtenir le bon nom de colonne selon le mode
@@ -1897,178 +1402,145 @@ if page == "xPhysical":
                     return metric_label
             return metric_label
 
-        # Liste des colonnes réelles utilisées pour les calculs (dans peers/row)
-        metric_cols = [col_for_metric(m, mode) for m in metrics]
+        # Colonnes réelles des trois contextes, mises bout à bout (un seul passage de calcul)
+        metric_cols = [col_for_metric(m, mode) for mode in modes for m in metrics]
 
-        # Labels visibles sur le radar
+        # Labels visibles sur le radar (= colonne mappée en TIP/OTIP)
         theta_labels = [
             (col_for_metric(m, mode) if mode in ("TIP", "OTIP") else m)
-            for m in metrics
-        ]
-
-        # 4) Préparer les peers (cinq ligues), avec fallback pour libellés “AAAA/AAAA”
-        champions = [
-            "ENG - Premier League","FRA - Ligue 1",
-            "ESP - LaLiga","ITA - Serie A","GER - Bundesliga"
+            for mode in modes for m in metrics
         ]
 
-        # 4.1) Peers sur même saison & grands championnats
-        peers = df[
-            (df["Position Group"] == pos1) &
-            (df["Season"] == s1) &
-            (df["Competition"].isin(champions))
-        ]
-
-        # 4.2) Si aucun peer et si la saison est du type AAAA/AAAA, on essaye AAAA-1/AAAA
-        if peers.empty:
-            parts = s1.split("/")
-            if len(parts) == 2 and parts[0] == parts[1]:
-                year = int(parts[0])
-                alt_season = f"{year-1}/{year}"
-                peers = df[
-                    (df["Position Group"] == pos1) &
-                    (df["Season"] == alt_season) &
-                    (df["Competition"].isin(champions))
-                ]
-
-        # 4.3) Si toujours aucun peer, on élargit à toutes compétitions pour la même saison
-        if peers.empty:
-            peers = df[
-                (df["Position Group"] == pos1) &
-                (df["Season"] == s1)
-            ]
+        # 4) Peers (cinq ligues, fallback AAAA-1/AAAA puis toutes compétitions) : groupe "xphy"
+        # du snapshot. Ils ne sont extraits que si le moteur live en a besoin.
+        percentiles_done = timings.mark("percentiles")
+        _peers = []
+        def xphy_peers():
+            if not _peers:
+                _peers.append(peer_frame("xphy", df, pos1, s1))
+            return _peers[0]
 
-        # 5) Fonction fiable de percentile rank
-        def pct_rank(series, value):
-            """Retourne le percentile de value dans la série series (0–100)."""
-            arr = series.dropna().values
-            if len(arr) == 0:
-                return 0.0
-            lower = (arr < value).sum()
-            equal = (arr == value).sum()
-            rank = (lower + 0.5 * equal) / len(arr) * 100
-            return float(rank)
-
-        # 6) Calcul des percentiles pour chaque métrique (mappées selon le mode)  # CHANGED
-        r1 = []
-        for m, mc in zip(metrics, metric_cols):
-            col = resolve_metric_col(peers.columns, mc)
-            r1.append(pct_rank(peers[col], row1[col]))
+        # 5-6) Percentiles matérialisés (lecture), live pour une métrique hors snapshot
+        r1 = lookup_percentiles(row1, "xphy", metric_cols, peers=xphy_peers)
 
         if compare:
-            r2 = []
-            for m, mc in zip(metrics, metric_cols):
-                col = resolve_metric_col(peers.columns, mc)
-                r2.append(pct_rank(peers[col], row2[col]))
+            # joueur 2 classé parmi les peers du joueur 1 (live s'il n'est pas du même groupe)
+            r2 = lookup_percentiles(row2, "xphy", metric_cols, peers=xphy_peers, peer_group=(pos1, s1))
         else:
-            # moyenne des peers sur les colonnes mappées, puis percentile           # CHANGED
-            mean_vals_by_label = {}
-            for m, mc in zip(metrics, metric_cols):
-                col = resolve_metric_col(peers.columns, mc)
-                mean_vals_by_label[m] = float(peers[col].mean())
-            r2 = []
-            for m, mc in zip(metrics, metric_cols):
-                col = resolve_metric_col(peers.columns, mc)
-                r2.append(pct_rank(peers[col], mean_vals_by_label[m]))
-
-        # 7) Fermer les boucles + raw values pour le hover (utiliser labels mappés) # CHANGED
-        metrics_closed = theta_labels + [theta_labels[0]]  # labels visibles
-        r1_closed     = r1 + [r1[0]]
-        r2_closed     = r2 + [r2[0]]
-
-        # raw1 via colonnes mappées
-        raw1 = []
-        for mc in metric_cols:
-            col = resolve_metric_col(row1.index if hasattr(row1, "index") else peers.columns, mc)
-            raw1.append(row1[col])
-        raw1_closed = raw1 + [raw1[0]]
-        cd1 = [[v] for v in raw1_closed]
-
-        if compare:
-            raw2 = []
-            for mc in metric_cols:
-                col = resolve_metric_col(row2.index if hasattr(row2, "index") else peers.columns, mc)
-                raw2.append(row2[col])
-        else:
-            mean_vals = []
-            for mc in metric_cols:
-                col = resolve_metric_col(peers.columns, mc)
-                mean_vals.append(float(peers[col].mean()))
-            raw2 = mean_vals
-
-        raw2_closed = raw2 + [raw2[0]]
-        cd2 = [[v] for v in raw2_closed]
-
-        # 8) Construction du radar Plotly (labels = metrics_closed déjà mappés)     # CHANGED
+            # moyenne des peers et son percentile : table des peers du snapshot
+            means = lookup_peer_means(
+                load_peer_stats(snapshot, "xphy", peer_stats_version(snapshot, "xphy")), pos1, s1, metric_cols
+            )
+            if means is None:
+                peers = xphy_peers()
+                means = ([], [])
+                for mc in metric_cols:
+                    col = resolve_metric_col(peers.columns, mc)
+                    means[0].append(float(peers[col].mean()))
+                    means[1].append(pct_rank(peers[col], means[0][-1]))
+            mean_vals, r2 = means
+        percentiles_done()
+
+        # raw values pour le hover, via colonnes mappées
+        raw1 = [row1[resolve_metric_col(row1.index, mc)] for mc in metric_cols]
+        raw2 = [row2[resolve_metric_col(row2.index, mc)] for mc in metric_cols] if compare else mean_vals
+
+        # 7-8) Radar Plotly : 4 traces par contexte, une seule visible à la fois
+        figure_done = timings.mark("figure")
         fig = go.Figure()
-
-        # Construire les strings de hover
-        hover1 = [
-            f"<b>{theta}</b><br>"
-            f"Value: {raw:.2f}<br>"
-            f"Percentile: {r:.1f}%"
-            for theta, raw, r in zip(metrics_closed, raw1_closed, r1_closed)
-        ]
-        hover2 = [
-            f"<b>{theta}</b><br>"
-            f"Value: {raw:.2f}<br>"
-            f"Percentile: {r:.1f}%"
-            for theta, raw, r in zip(metrics_closed, raw2_closed, r2_closed)
-        ]
-
-        # Trace Joueur 1
-        fig.add_trace(go.Scatterpolar(
-            r=r1_closed,
-            theta=metrics_closed,
-            mode='lines',
-            hoverinfo='skip',
-            fill='toself',
-            fillcolor='rgba(255,215,0,0.3)',
-            line=dict(color='gold', width=2),
-            name=p1
-        ))
-        # Markers invisibles pour hover
-        fig.add_trace(go.Scatterpolar(
-            r=r1_closed,
-            theta=metrics_closed,
-            mode='markers',
-            hoverinfo='text',
-            hovertext=hover1,  # CHANGED
-            marker=dict(size=12, color='rgba(255,215,0,0)'),
-            showlegend=False
-        ))
-
-        # Trace 2 (joueur 2 ou Top5 avg)
-        fig.add_trace(go.Scatterpolar(
-            r=r2_closed,
-            theta=metrics_closed,
-            mode='lines',
-            hoverinfo='skip',
-            fill='toself',
-            fillcolor='rgba(144,238,144,0.3)',
-            line=dict(color=(compare and 'cyan') or 'lightgreen', width=2),
-            name=(compare and p2) or 'Top5 Average'
-        ))
-        # Markers invisibles pour hover
-        fig.add_trace(go.Scatterpolar(
-            r=r2_closed,
-            theta=metrics_closed,
-            mode='markers',
-            hoverinfo='text',
-            hovertext=hover2,  # CHANGED
-            marker=dict(size=12, color='rgba(144,238,144,0)'),
-            showlegend=False
-        ))
-
-        # 9) Mise en forme finale
         team1 = row1["Team"]
         age1_str = f"{int(row1['Age'])}" if pd.notna(row1['Age']) else "?"
-        # Ajout du mode dans le titre pour clarté                                   # CHANGED
-        title_text = f"{p1} ({pos1}) – {s1} – {team1} ({row1['Competition']}) – {age1_str} y/o • Mode: {mode}"
-
-        if compare:
-            age2_str = f"{int(row2['Age'])}" if pd.notna(row2['Age']) else "?"
-            title_text += f" vs {p2} ({pos2}) – {s2} – {row2['Team']} ({row2['Competition']}) – {age2_str} y/o"
+        titles = []
+        n = len(metrics)
+        for i, mode in enumerate(modes):
+            sl = slice(i * n, (i + 1) * n)
+            # Fermer les boucles
+            metrics_closed = theta_labels[sl] + [theta_labels[sl][0]]
+            r1_closed, r2_closed = r1[sl] + [r1[sl][0]], r2[sl] + [r2[sl][0]]
+            raw1_closed, raw2_closed = raw1[sl] + [raw1[sl][0]], raw2[sl] + [raw2[sl][0]]
+
+            # Construire les strings de hover
+            hover1 = [
+                f"<b>{theta}</b><br>"
+                f"Value: {raw:.2f}<br>"
+                f"Percentile: {r:.1f}%"
+                for theta, raw, r in zip(metrics_closed, raw1_closed, r1_closed)
+            ]
+            hover2 = [
+                f"<b>{theta}</b><br>"
+                f"Value: {raw:.2f}<br>"
+                f"Percentile: {r:.1f}%"
+                for theta, raw, r in zip(metrics_closed, raw2_closed, r2_closed)
+            ]
+            visible = mode == modes[0]
+
+            # Trace Joueur 1
+            fig.add_trace(go.Scatterpolar(
+                r=r1_closed,
+                theta=metrics_closed,
+                mode='lines',
+                hoverinfo='skip',
+                fill='toself',
+                fillcolor='rgba(255,215,0,0.3)',
+                line=dict(color='gold', width=2),
+                name=p1,
+                visible=visible
+            ))
+            # Markers invisibles pour hover
+            fig.add_trace(go.Scatterpolar(
+                r=r1_closed,
+                theta=metrics_closed,
+                mode='markers',
+                hoverinfo='text',
+                hovertext=hover1,
+                marker=dict(size=12, color='rgba(255,215,0,0)'),
+                showlegend=False,
+                visible=visible
+            ))
+
+            # Trace 2 (joueur 2 ou Top5 avg)
+            fig.add_trace(go.Scatterpolar(
+                r=r2_closed,
+                theta=metrics_closed,
+                mode='lines',
+                hoverinfo='skip',
+                fill='toself',
+                fillcolor='rgba(144,238,144,0.3)',
+                line=dict(color=(compare and 'cyan') or 'lightgreen', width=2),
+                name=(compare and p2) or 'Top5 Average',
+                visible=visible
+            ))
+            # Markers invisibles pour hover
+            fig.add_trace(go.Scatterpolar(
+                r=r2_closed,
+                theta=metrics_closed,
+                mode='markers',
+                hoverinfo='text',
+                hovertext=hover2,
+                marker=dict(size=12, color='rgba(144,238,144,0)'),
+                showlegend=False,
+                visible=visible
+            ))
+
+            # Titre du contexte
+            title_text = f"{p1} ({pos1}) – {s1} – {team1} ({row1['Competition']}) – {age1_str} y/o • Mode: {mode}"
+            if compare:
+                age2_str = f"{int(row2['Age'])}" if pd.notna(row2['Age']) else "?"
+                title_text += f" vs {p2} ({pos2}) – {s2} – {row2['Team']} ({row2['Competition']}) – {age2_str} y/o"
+            titles.append(title_text)
+
+        # 9) Boutons de contexte (client) + mise en forme finale
+        buttons = [
+            dict(
+                label=mode,
+                method="update",
+                args=[
+                    {"visible": [j // 4 == i for j in range(4 * len(modes))]},
+                    {"title.text": titles[i]},
+                ],
+            )
+            for i, mode in enumerate(modes)
+        ]
 
         fig.update_layout(
             hovermode='closest',
@@ -2088,40 +1560,55 @@ if page == "xPhysical":
             font_color='white',
             showlegend=True,
             title={
-                'text': title_text,
+                'text': titles[0],
                 'x': 0.5,
                 'xanchor': 'center'
             },
+            updatemenus=[dict(
+                type="buttons",
+                direction="right",
+                buttons=buttons,
+                active=0,
+                x=0, xanchor="left",
+                y=1.12, yanchor="top",
+                # Couleurs du thème sombre de Streamlit (fond des widgets, couleur primaire) : Plotly remplit
+                # le bouton actif / survolé en #F4FAFF sans option, le libellé doit se lire sur les deux fonds
+                bgcolor="#262730",
+                bordercolor="#4B4B5A",
+                font=dict(color="#FF4B4B"),
+            )],
             height=500
         )
 
         st.plotly_chart(fig, use_container_width=True)
+        figure_done()
        
         xphysical_glossary_expander()
 
     
     # --- Onglet Index ---
-    with tab3:
-        # === MAPPINGS JOUEURS (optimisé une seule fois plus haut)
-        # player_to_display = dict(zip(df["Player"], df["Display Name"]))
-        # display_to_player = {v: k for k, v in player_to_display.items()}
-        # display_options = sorted(player_to_display.values())
+    with tab3, timings.tab("Index"):
+        # === MAPPINGS JOUEURS (Player ID -> libellé, définis dans l'onglet Radar)
 
         # 1) Sélection Joueur & Saison
         col1, col2 = st.columns(2)
 
         with col1:
-            default_display = next((name for name in display_options if "Artem Dovbyk" in name), display_options[0])
-            player_display1 = st.selectbox("Select a player", display_options, index=display_options.index(default_display), key="idx_p1")
-            player = display_to_player[player_display1]
+            default_display = next((pid for pid in display_options if "Artem Dovbyk" in id_to_display[pid]), display_options[0])
+            player_id = st.selectbox(
+                "Select a player", display_options, index=display_options.index(default_display),
+                format_func=id_to_display.get, key="idx_p1"
+            )
+            df_player = df[df[PLAYER_ID] == player_id]
+            player = df_player["Player"].iloc[0]
 
         with col2:
-            seasons = sorted(df[df["Player"] == player]["Season"].dropna().unique())
+            seasons = sorted(df_player["Season"].dropna().unique())
             default_season = (seasons[-1] if seasons else None)  # [CHANGED] auto-latest via sort_seasons
             season = st.selectbox("Select a season", seasons, index=seasons.index(default_season), key="idx_s1")
 
         # 2) Filtrer par Joueur + Saison
-        df_fs = df[(df["Player"] == player) & (df["Season"] == season)]
+        df_fs = df_player[df_player["Season"] == season]
         if df_fs.empty:
             st.warning("No data for this player/season.")
             st.stop()
@@ -2489,17 +1976,15 @@ if page == "xPhysical":
         detail_df = pd.DataFrame(rows)
 
         # — Jauge xPhysical
-        df_peers = df[
-            (df["Position Group"] == position) &
-            (df["Season"] == season) &
-            (df["Competition"] == row["Competition"])
-        ].sort_values("xPhysical", ascending=False)
-        mean_peer  = df_peers["xPhysical"].mean()
-        rank       = int(df_peers.reset_index().index[df_peers["Player"] == player][0] + 1)
-        total_peers= len(df_peers)
+        mean_peer, total_peers = xphysical_peer_stats(
+            df, season, row["Competition"], position,
+            partition_version(snapshot, "xphysical", season, row["Competition"]),
+        )
+        rank       = int(row[XPHYSICAL_RANK])
         hue        = 120 * (index_xphy / 100)
         bar_color  = f"hsl({hue:.0f}, 75%, 50%)"
 
+        figure_done = timings.mark("figure")
         fig_gauge = go.Figure(go.Indicator(
             mode="gauge+number",
             value=index_xphy,
@@ -2524,6 +2009,7 @@ if page == "xPhysical":
             height=300
         )
         st.plotly_chart(fig_gauge, use_container_width=True)
+        figure_done()
         
         # Label xPhy juste sous le score
         st.markdown(
@@ -2546,7 +2032,7 @@ if page == "xPhysical":
         st.dataframe(display_df)  
     
     # --- Onglet Top 50 xPhysical ---
-    with tab4:
+    with tab4, timings.tab("Top 50"):
         col1, col2 = st.columns(2)
         with col1:
             selected_competition = st.selectbox(
@@ -2574,14 +2060,11 @@ if page == "xPhysical":
             key="top50_xphy_pos"
         )
 
-        # Filtrage
-        filtered_top = df[
-            (df["Competition"] == selected_competition) &
-            (df["Season"] == selected_season) &
-            (df["Position Group"] == selected_position)
-        ].copy()
-
-        top_50 = filtered_top.sort_values(by="xPhysical", ascending=False).head(50).reset_index(drop=True)
+        # Filtrage (mis en cache par partition)
+        top_50 = top50_xphysical(
+            df, selected_competition, selected_season, selected_position,
+            partition_version(snapshot, "xphysical", selected_season, selected_competition),
+        )
 
         # Construction manuelle des rows
         rows = []
@@ -2721,7 +2204,7 @@ elif page == "xTech/xDef":
     # Création des sous-onglets pour xTechnical
     tab_ps, tab1, tab2, tab3, tab4, tab5 = st.tabs(["Player Search", "Scatter Plot ", "Radar", "Index", "Top 50", "Rookie"])
     
-    with tab_ps:
+    with tab_ps, timings.tab("Player Search"):
     
         xtech_help_expander()
 
@@ -2763,8 +2246,8 @@ elif page == "xTech/xDef":
             )
 
         # --- Etat
-        if "xtech_ps_loaded_df" not in st.session_state:
-            st.session_state.xtech_ps_loaded_df = None
+        if "xtech_ps_loaded" not in st.session_state:
+            st.session_state.xtech_ps_loaded = False
         if "xtech_ps_last_seasons" not in st.session_state:
             st.session_state.xtech_ps_last_seasons = []
         if "xtech_ps_last_comps" not in st.session_state:
@@ -2776,9 +2259,9 @@ elif page == "xTech/xDef":
                 tuple(st.session_state.get("xtech_ps_ui_comps", [])))
         _last= (tuple(st.session_state.get("xtech_ps_last_seasons", [])),
                 tuple(st.session_state.get("xtech_ps_last_comps", [])))
-        if st.session_state.xtech_ps_loaded_df is not None and _now != _last:
+        if st.session_state.xtech_ps_loaded and _now != _last:
             st.session_state.xtech_ps_pending = True
-            st.session_state.xtech_ps_loaded_df = None
+            st.session_state.xtech_ps_loaded = False
 
         comp_sel = st.session_state.get("xtech_ps_ui_comps", [])
         load_disabled = not bool(comp_sel)
@@ -2797,104 +2280,104 @@ elif page == "xTech/xDef":
                 st.session_state.xtech_ps_last_seasons = seasons_all
                 st.session_state.xtech_ps_last_comps   = comps_all
 
-            df_loaded = df_tech[
-                df_tech[season_col].isin(st.session_state.xtech_ps_last_seasons)
-                & df_tech[comp_col].isin(st.session_state.xtech_ps_last_comps)
-            ].copy()
-            st.session_state.xtech_ps_loaded_df = df_loaded
+            st.session_state.xtech_ps_loaded = True
             st.session_state.xtech_ps_pending = False
             st.rerun()
 
-        ps_ready = (
-            st.session_state.xtech_ps_loaded_df is not None 
-            and not st.session_state.xtech_ps_pending
-            and not st.session_state.xtech_ps_loaded_df.empty
+        df_loaded = (
+            load_selection("xtechnical", st.session_state.xtech_ps_last_seasons, st.session_state.xtech_ps_last_comps)
+            if st.session_state.xtech_ps_loaded and not st.session_state.xtech_ps_pending else None
         )
+        ps_ready = df_loaded is not None and not df_loaded.empty
 
         if not ps_ready:
             st.info("Please load data to continue.")
         else:
             st.markdown("---")
-            df_loaded = st.session_state.xtech_ps_loaded_df.copy()
 
             # ============== Filtres dynamiques ==============
             DESIRED_ORDER = ["Goalkeeper", "Full Back", "Central Defender", "Midfielder", "Attacking Midfielder", "Winger", "Striker"]
 
-            c1, c2 = st.columns([1.2, 1.2])
-            with c1:
-                if pos_col in df_loaded.columns:
-                    raw_pos = df_loaded[pos_col].dropna().astype(str).unique().tolist()
-                    order_idx = {v: i for i, v in enumerate(DESIRED_ORDER)}
-                    pos_options = sorted(raw_pos, key=lambda x: order_idx.get(x, 999))
-                else:
-                    pos_options = []
-                selected_positions = st.multiselect(
-                    "Position Group(s)",
-                    options=pos_options,
-                    default=[],
-                    key="xtech_ps_positions",
-                )
-
-            with c2:
-                standard_pf = ["Right Footed", "Left Footed", "Ambidextrous"]
-                if foot_col in df_loaded.columns:
-                    pf_seen = df_loaded[foot_col].dropna().astype(str).str.strip().unique().tolist()
-                    pf_options = [p for p in standard_pf if p in pf_seen] or standard_pf
-                else:
-                    pf_options = standard_pf
-                selected_feet = st.multiselect(
-                    "Preferred Foot",
-                    options=pf_options,
-                    default=pf_options,
-                    key="xtech_ps_foot",
-                )
-
-            def _bounds(series, default=(0, 0)):
-                s = pd.to_numeric(series, errors="coerce")
-                return (int(s.min()), int(s.max())) if s.notna().any() else default
-
-            _ps_ver = str(hash((tuple(st.session_state.xtech_ps_last_seasons), tuple(st.session_state.xtech_ps_last_comps))))
-
-            c3, c4 = st.columns([1.2, 1.2])
-            with c3:
-                if age_col in df_loaded.columns and not df_loaded[age_col].isnull().all():
-                    a_min, a_max = _bounds(df_loaded[age_col], default=(16, 45))
-                    selected_age = st.slider(
-                        "Age",
-                        min_value=a_min,
-                        max_value=a_max,
-                        value=(a_min, a_max),
-                        step=1,
-                        key=f"xtech_ps_age_{_ps_ver}",
+            batched = st.toggle(
+                "Batch filter changes", key="xtech_ps_batched",
+                help="Filters are applied together with the Apply buttons (one recompute per filter row or popover).",
+            )
+            with filter_form("xtech_ps_filters_form", batched, "Apply filters"):
+                c1, c2 = st.columns([1.2, 1.2])
+                with c1:
+                    if pos_col in df_loaded.columns:
+                        raw_pos = df_loaded[pos_col].dropna().astype(str).unique().tolist()
+                        order_idx = {v: i for i, v in enumerate(DESIRED_ORDER)}
+                        pos_options = sorted(raw_pos, key=lambda x: order_idx.get(x, 999))
+                    else:
+                        pos_options = []
+                    selected_positions = st.multiselect(
+                        "Position Group(s)",
+                        options=pos_options,
+                        default=[],
+                        key="xtech_ps_positions",
                     )
-                else:
-                    selected_age = None
-
-            with c4:
-                if minutes_col in df_loaded.columns and not df_loaded[minutes_col].isnull().all():
-                    m_min, m_max = _bounds(df_loaded[minutes_col], default=(0, 4000))
-                    selected_minutes = st.slider(
-                        "Minutes",
-                        min_value=m_min,
-                        max_value=m_max,
-                        value=(m_min, m_max),
-                        step=50,
-                        key=f"xtech_ps_minutes_{_ps_ver}",
+
+                with c2:
+                    standard_pf = ["Right Footed", "Left Footed", "Ambidextrous"]
+                    if foot_col in df_loaded.columns:
+                        pf_seen = df_loaded[foot_col].dropna().astype(str).str.strip().unique().tolist()
+                        pf_options = [p for p in standard_pf if p in pf_seen] or standard_pf
+                    else:
+                        pf_options = standard_pf
+                    selected_feet = st.multiselect(
+                        "Preferred Foot",
+                        options=pf_options,
+                        default=pf_options,
+                        key="xtech_ps_foot",
                     )
-                else:
-                    selected_minutes = None
 
+                def _bounds(series, default=(0, 0)):
+                    s = pd.to_numeric(series, errors="coerce")
+                    return (int(s.min()), int(s.max())) if s.notna().any() else default
+
+                _ps_ver = str(hash((tuple(st.session_state.xtech_ps_last_seasons), tuple(st.session_state.xtech_ps_last_comps))))
+
+                c3, c4 = st.columns([1.2, 1.2])
+                with c3:
+                    if age_col in df_loaded.columns and not df_loaded[age_col].isnull().all():
+                        a_min, a_max = _bounds(df_loaded[age_col], default=(16, 45))
+                        selected_age = st.slider(
+                            "Age",
+                            min_value=a_min,
+                            max_value=a_max,
+                            value=(a_min, a_max),
+                            step=1,
+                            key=f"xtech_ps_age_{_ps_ver}",
+                        )
+                    else:
+                        selected_age = None
+
+                with c4:
+                    if minutes_col in df_loaded.columns and not df_loaded[minutes_col].isnull().all():
+                        m_min, m_max = _bounds(df_loaded[minutes_col], default=(0, 4000))
+                        selected_minutes = st.slider(
+                            "Minutes",
+                            min_value=m_min,
+                            max_value=m_max,
+                            value=(m_min, m_max),
+                            step=50,
+                            key=f"xtech_ps_minutes_{_ps_ver}",
+                        )
+                    else:
+                        selected_minutes = None
             # ============== Application filtres ==============
-            df_filtered_base = df_loaded.copy()
+            with timings.span("filter"):
+                df_filtered_base = df_loaded.copy()
 
-            if selected_positions:
-                df_filtered_base = df_filtered_base[df_filtered_base[pos_col].isin(selected_positions)]
-            if selected_feet:
-                df_filtered_base = df_filtered_base[df_filtered_base[foot_col].astype(str).str.strip().isin(selected_feet)]
-            if selected_age:
-                df_filtered_base = df_filtered_base[(df_filtered_base[age_col] >= selected_age[0]) & (df_filtered_base[age_col] <= selected_age[1])]
-            if selected_minutes:
-                df_filtered_base = df_filtered_base[(df_filtered_base[minutes_col] >= selected_minutes[0]) & (df_filtered_base[minutes_col] <= selected_minutes[1])]
+                if selected_positions:
+                    df_filtered_base = df_filtered_base[df_filtered_base[pos_col].isin(selected_positions)]
+                if selected_feet:
+                    df_filtered_base = df_filtered_base[df_filtered_base[foot_col].astype(str).str.strip().isin(selected_feet)]
+                if selected_age:
+                    df_filtered_base = df_filtered_base[(df_filtered_base[age_col] >= selected_age[0]) & (df_filtered_base[age_col] <= selected_age[1])]
+                if selected_minutes:
+                    df_filtered_base = df_filtered_base[(df_filtered_base[minutes_col] >= selected_minutes[0]) & (df_filtered_base[minutes_col] <= selected_minutes[1])]
 
             # --- Colonne URL Transfermarkt
             TM_BASE = "https://www.transfermarkt.fr/schnellsuche/ergebnis/schnellsuche?query="
@@ -2957,6 +2440,15 @@ elif page == "xTech/xDef":
                 ("GK", GK_METRICS),
             ]
 
+            # Quantiles des métriques sur les lignes filtrées : légendes, seuils et état des sliders
+            popover_cols = list(dict.fromkeys(
+                c for _, metric_list in metric_popovers for c, _ in metric_list if c in df_filtered_base.columns
+            ))
+            quantiles = filter_quantiles(
+                "xtechnical", st.session_state.xtech_ps_last_seasons, st.session_state.xtech_ps_last_comps,
+                (tuple(selected_positions), tuple(selected_feet), selected_age, selected_minutes), df_filtered_base, popover_cols,
+            )
+
             filter_percentiles = {}
             active_filters_count = {name: 0 for name, _ in metric_popovers}
 
@@ -2967,23 +2459,27 @@ elif page == "xTech/xDef":
             for i, (name, metric_list) in enumerate(metric_popovers):
                 target_col = row1[i] if i < 4 else row2[i - 4]
                 with target_col:
-                    with st.popover(name, use_container_width=True):
+                    with st.popover(name, use_container_width=True), filter_form(f"xtech_pop_form_{name}", batched):
                         for col_name, label in metric_list:
                             if col_name in df_filtered_base.columns:
                                 slider_key = f"xtech_pop_{name}_{col_name}_{st.session_state.xtech_ps_reset_counter}"
-                                s = pd.to_numeric(df_filtered_base[col_name], errors="coerce").dropna()
-                                if s.empty:
+                                q = quantiles[col_name]
+                                if q.isna().all():
                                     st.slider(f"{label} – Percentile", 0, 100, 0, 5, key=slider_key, disabled=True)
                                     continue
-                                p = st.slider(f"{label} – Percentile", 0, 100, 0, 5, key=slider_key)
+                                if batched:
+                                    p = threshold_slider(f"{label} – Percentile", q, slider_key)
+                                else:
+                                    p = st.slider(f"{label} – Percentile", 0, 100, 0, 5, key=slider_key)
                                 filter_percentiles[(name, col_name)] = p
                                 if p > 0:
-                                    thr = float(np.nanpercentile(s, p))
-                                    st.caption(f"≥ **{thr:,.2f}** (min {s.min():,.2f} / max {s.max():,.2f})")
+                                    st.caption(f"≥ **{q[p]:,.2f}** (min {q[0]:,.2f} / max {q[100]:,.2f})")
                                     active_filters_count[name] = active_filters_count.get(name, 0) + 1
                     cnt = active_filters_count.get(name, 0)
                     st.caption(f"{cnt} active filter{'s' if cnt != 1 else ''}")
 
+            expression = expression_filter(f"xtech_ps_expr_{st.session_state.xtech_ps_reset_counter}", df_filtered_base)
+
             # --- Boutons Clear + TM + Send to Radar
             col_btn1, col_btn2, col_btn3 = st.columns([1.0, 1.4, 1.4], gap="small")
 
@@ -2998,17 +2494,26 @@ elif page == "xTech/xDef":
             with col_btn3:
                 send_radar_slot = st.empty()
 
-            # ============== Filtrage PERCENTILES ==============
-            df_final = df_filtered_base.copy()
-
-            for (cat, col), min_pct in filter_percentiles.items():
-                if min_pct > 0 and col in df_final.columns:
-                    ref_vals = pd.to_numeric(df_final[col], errors="coerce").dropna()
-                    if len(ref_vals) > 0:
-                        threshold = ref_vals.quantile(min_pct / 100)
-                        df_final = df_final[pd.to_numeric(df_final[col], errors="coerce") >= threshold]
-
-            df_filtered = df_final.copy()
+            # ============== Filtrage PERCENTILES + expression ==============
+            # (seuils lus dans la table de quantiles des lignes de base : l'ordre des deux filtres est indifférent)
+            def xtech_pandas_rows():
+                df_expr = df_filtered_base[expression.mask(df_filtered_base)] if expression else df_filtered_base
+                return percentile_filter(df_expr, filter_percentiles, quantiles).copy()
+
+            with timings.span("filter"):
+                df_filtered = search_rows(
+                    "xtechnical", st.session_state.xtech_ps_last_seasons, st.session_state.xtech_ps_last_comps,
+                    {"positions": selected_positions, "feet": selected_feet, "age": selected_age,
+                     "minutes": selected_minutes},
+                    filter_percentiles, expression,
+                    ["Player Name", "Team Name", comp_col, pos_col, age_col, minutes_col, "xTECH", "xDEF",
+                     "Transfermarkt", PLAYER_ID],
+                    xtech_pandas_rows,
+                )
+            if "Transfermarkt" not in df_filtered.columns:  # lignes DuckDB : colonne des fichiers seulement
+                df_filtered["Transfermarkt"] = df_filtered["Player Name"].apply(
+                    lambda name: TM_BASE + _parse.quote(str(name)) if pd.notna(name) else ""
+                )
 
             # ========== AgGrid ==========
             if not df_filtered.empty:
@@ -3016,13 +2521,17 @@ elif page == "xTech/xDef":
                 # Colonnes à afficher
                 display_cols = [
                     "Player Name", "Team Name", comp_col, pos_col, age_col, 
-                    minutes_col, "xTECH", "xDEF", "Transfermarkt"
+                    minutes_col, "xTECH", "xDEF", "Transfermarkt", PLAYER_ID
                 ]
 
                 # Ajouter les colonnes filtrées via percentiles
                 for (cat, col), min_pct in filter_percentiles.items():
                     if min_pct > 0 and col in df_filtered.columns and col not in display_cols:
                         display_cols.append(col)
+                # ... et les métriques de l'expression
+                for col in (expression.columns if expression else []):
+                    if col not in display_cols and pd.api.types.is_numeric_dtype(df_filtered[col]):
+                        display_cols.append(col)
 
                 display_cols = [col for col in display_cols if col in df_filtered.columns]
                 df_display = df_filtered[display_cols].reset_index(drop=True).copy()
@@ -3092,9 +2601,10 @@ elif page == "xTech/xDef":
                         headerStyle={'textAlign': 'center'}
                     )
 
-                # Masquer Transfermarkt
+                # Masquer Transfermarkt + Player ID
                 if "Transfermarkt" in df_display.columns:
                     gb.configure_column("Transfermarkt", hide=True)
+                gb.configure_column(PLAYER_ID, hide=True)
 
                 gb.configure_pagination(enabled=False)
 
@@ -3105,7 +2615,7 @@ elif page == "xTech/xDef":
                     domLayout='normal'
                 )
 
-                grid_response = AgGrid(
+                grid_response = aggrid(
                     df_display,
                     gridOptions=gb.build(),
                     height=500,
@@ -3123,8 +2633,8 @@ elif page == "xTech/xDef":
                 # Afficher boutons SEULEMENT si sélection
                 if isinstance(selected_rows, list) and len(selected_rows) > 0 and isinstance(selected_rows[0], dict):
                     display_row = selected_rows[0]
-                    player_name_sel = display_row.get("Player Name")
-                    full_row = df_filtered[df_filtered["Player Name"] == player_name_sel]
+                    player_id_sel = selected_player_id(display_row)
+                    full_row = df_filtered[df_filtered[PLAYER_ID] == player_id_sel]
 
                     if not full_row.empty:
                         tm_url = full_row.iloc[0].get("Transfermarkt")
@@ -3140,18 +2650,8 @@ elif page == "xTech/xDef":
                         with send_radar_slot:
                             if st.button("📊 Send to Radar", use_container_width=True, key="xtech_send_radar_btn"):
                                 try:
-                                    # Récupérer le Display Name directement depuis df_tech
-                                    player_name_selected = display_row.get("Player Name")
-
-                                    # df_tech a déjà une colonne Display Name !
-                                    player_row = df_tech[df_tech["Player Name"] == player_name_selected]
-                                    if not player_row.empty:
-                                        display_val = player_row.iloc[0].get("Display Name", player_name_selected)
-                                    else:
-                                        display_val = player_name_selected
-
-                                    # Assigner à la clé du selectbox radar
-                                    st.session_state["tech_radar_p1"] = display_val
+                                    # Le selectbox du radar est indexé par Player ID
+                                    st.session_state["tech_radar_p1"] = player_id_sel
 
                                     # Redirection JavaScript simple
                                     import streamlit.components.v1 as components
@@ -3230,7 +2730,7 @@ elif page == "xTech/xDef":
         
 
 #######################=== Onglet Scatter Plot ===
-    with tab1:
+    with tab1, timings.tab("Scatter Plot"):
        
        # Ligne 1 : Saisons, Compétitions, Postes
         col1, col2, col3 = st.columns([1.2, 1.2, 1.2])
@@ -3494,6 +2994,7 @@ elif page == "xTech/xDef":
             label_df_tech.loc[mask_t, "color_marker"] = "red"
 
         # Plot de base
+        figure_done = timings.mark("figure")
         fig = px.scatter(
             plot_df_tech,
             x=selected_xaxis_tech,
@@ -3551,27 +3052,34 @@ elif page == "xTech/xDef":
         )
 
         st.plotly_chart(fig, use_container_width=False)
+        figure_done()
         
         xtech_glossary_expander()
         
 ################### === Onglet Radar ===
-    with tab2:
+    with tab2, timings.tab("Radar"):
         MIN_MINUTES_TECH = 300
         # Sélection Joueur 1 + Saison
         col1, col2 = st.columns(2)
         with col1:
-            display_options = sorted(df_tech["Display Name"].dropna().unique())
+            # Options = Player ID, libellé "Known Name (Player Name)" via format_func
+            id_to_display_tech = player_labels["xtechnical"]
+            display_options = sorted(id_to_display_tech, key=id_to_display_tech.get)
+            if st.session_state.get("tech_radar_p1") not in id_to_display_tech:
+                st.session_state.pop("tech_radar_p1", None)
             default_display_name = next(
-                (name for name in display_options if "Artem Dovbyk" in name),
+                (pid for pid in display_options if "Artem Dovbyk" in id_to_display_tech[pid]),
                 display_options[0]
             )
-            p1_display = st.selectbox(
+            p1_id = st.selectbox(
                 "Player 1",
                 options=display_options,
                 index=display_options.index(default_display_name),
+                format_func=id_to_display_tech.get,
                 key="tech_radar_p1"
             )
-            p1 = display_to_playername[p1_display]
+            df_p1 = df_tech[df_tech[PLAYER_ID] == p1_id]
+            p1 = df_p1["Player Name"].iloc[0]
         with col2:
             # [NEW] tri correct des saisons + défaut = dernière saison
             import re as _re_s
@@ -3580,7 +3088,7 @@ elif page == "xTech/xDef":
                 m = _re_s.match(r'^(\d{4})/(\d{4})$', s)  # <- ajouter s ici
                 return int(m.group(1)) if m else -10**9
             seasons1 = sorted(
-                df_tech[df_tech["Player Name"] == p1]["Season Name"].dropna().unique().tolist(),
+                df_p1["Season Name"].dropna().unique().tolist(),
                 key=_season_key_s
             )
 
@@ -3597,13 +3105,13 @@ elif page == "xTech/xDef":
             )
             s1 = st.selectbox("Season 1", seasons1, index=s1_index, key="tech_radar_s1")
             
-        df1 = df_tech[(df_tech["Player Name"] == p1) & (df_tech["Season Name"] == s1)]
+        df1 = df_p1[df_p1["Season Name"] == s1]
         if df1.empty:
             st.warning("Aucune donnée trouvée pour ce joueur et cette saison.")
             st.stop()
 
         # Calcul de la compétition principale (où le joueur a le plus joué sur cette saison)
-        df_allplayer1 = df_tech[(df_tech["Player Name"] == p1) & (df_tech["Season Name"] == s1)]
+        df_allplayer1 = df1
         comp_minutes1 = df_allplayer1.groupby("Competition Name")["Minutes"].sum().sort_values(ascending=False)
         main_competition1 = comp_minutes1.index[0] if not comp_minutes1.empty else None
 
@@ -3659,26 +3167,16 @@ elif page == "xTech/xDef":
         labels = metric_labels_tech[selected_template]
 
         # Comparaison
-        # 1. Liste des joueurs AS Roma
-        roma_players = df_tech[df_tech["Team Name"] == "AS Roma"]["Player Name"].dropna().unique().tolist()
-
-        # 2. Tous les autres joueurs sauf ceux de la Roma déjà inclus
-        all_players = df_tech["Player Name"].dropna().unique().tolist()
-        other_players = [p for p in all_players if p not in roma_players]
-
-        # 3. Liste ordonnée pour le selectbox
-        player2_options = roma_players + other_players
-        
         compare = st.checkbox("Compare to a 2nd player")
         if compare:
             col3, col4 = st.columns(2)
             with col3:
-                p2_display = st.selectbox("Player 2", display_options, key="tech_radar_p2")
-                p2 = display_to_playername[p2_display]
+                p2_id = st.selectbox("Player 2", display_options, format_func=id_to_display_tech.get, key="tech_radar_p2")
+                df_p2 = df_tech[df_tech[PLAYER_ID] == p2_id]
+                p2 = df_p2["Player Name"].iloc[0]
             with col4:
                 seasons2 = sort_seasons(
-                    df_tech.loc[df_tech["Player Name"] == p2, "Season Name"]
-                          .dropna().astype(str).unique().tolist()
+                    df_p2["Season Name"].dropna().astype(str).unique().tolist()
                 )
 
                 if st.session_state.get("tech_radar_prev_p2") != p2:
@@ -3691,13 +3189,13 @@ elif page == "xTech/xDef":
                     else (len(seasons2) - 1 if seasons2 else 0)
                 )
                 s2 = st.selectbox("Season 2", seasons2, index=s2_index, key="tech_radar_s2")
-            df2 = df_tech[(df_tech["Player Name"] == p2) & (df_tech["Season Name"] == s2)]
+            df2 = df_p2[df_p2["Season Name"] == s2]
             if df2.empty:
                 st.warning("Aucune donnée trouvée pour le joueur 2.")
                 st.stop()
         
             # === Sélection compétition pour Joueur 2 ===
-            df_allplayer2 = df_tech[(df_tech["Player Name"] == p2) & (df_tech["Season Name"] == s2)]
+            df_allplayer2 = df2
             comp_minutes2 = df_allplayer2.groupby("Competition Name")["Minutes"].sum().sort_values(ascending=False)
             main_competition2 = comp_minutes2.index[0] if not comp_minutes2.empty else None
         
@@ -3719,69 +3217,58 @@ elif page == "xTech/xDef":
             row2 = df2.iloc[0]
             pos2 = row2["Position Group"] if "Position Group" in row2 else ""
 
-        # Peers
-        top5_leagues = ["ENG - Premier League", "FRA - Ligue 1", "SPA - La Liga", "ITA - Serie A", "GER - 1. Bundesliga"]
-        peers = df_tech[
-            (df_tech["Position Group"] == pos1) &
-            (df_tech["Season Name"] == s1) &
-            (df_tech["Competition Name"].isin(top5_leagues)) &
-            (df_tech["Minutes"] >= 600)
-        ]
-        if peers.empty:
-            peers = df_tech[
-                (df_tech["Position Group"] == pos1) &
-                (df_tech["Season Name"] == s1) &
-                (df_tech["Minutes"] >= 600)
-            ]
-
-        # Percentiles
-        def pct_rank(series, value):
-            arr = series.dropna().values
-            if len(arr) == 0:
-                return 0.0
-            lower = (arr < value).sum()
-            equal = (arr == value).sum()
-            return (lower + 0.5 * equal) / len(arr) * 100
+        # Peers (top 5, >= 600 min, fallback toutes compétitions) : groupe "xtech" du snapshot,
+        # extraits seulement si le moteur live en a besoin
+        percentiles_done = timings.mark("percentiles")
+        _peers = []
+        def xtech_peers():
+            if not _peers:
+                _peers.append(peer_frame("xtech", df_tech, pos1, s1))
+            return _peers[0]
 
         # Liste des métriques à inverser
         inverse_metrics = ["Turnovers P90", "Dispossessions P90","Pass Into Danger Ratio"]
 
-        # Calcul des percentiles en tenant compte de l’inversion
-        r1 = [
-            100 - pct_rank(peers[resolve_metric_col(peers.columns, m)], row1[resolve_metric_col(row1.index if hasattr(row1, "index") else peers.columns, m)]) if m in inverse_metrics else pct_rank(peers[resolve_metric_col(peers.columns, m)], row1[resolve_metric_col(row1.index if hasattr(row1, "index") else peers.columns, m)])
-            for m in metrics
-        ]
+        # Percentiles matérialisés, en tenant compte de l’inversion
+        r1 = lookup_percentiles(
+            row1, "xtech", metrics, peers=xtech_peers, inverse=inverse_metrics, peer_group=(pos1, s1)
+        )
 
         if compare:
-            r2 = [
-                100 - pct_rank(peers[resolve_metric_col(peers.columns, m)], row2[m]) if m in inverse_metrics else pct_rank(peers[resolve_metric_col(peers.columns, m)], row2[resolve_metric_col(row2.index if hasattr(row2, "index") else peers.columns, m)]
-)
-                for m in metrics
-            ]
+            r2 = lookup_percentiles(
+                row2, "xtech", metrics, peers=xtech_peers, inverse=inverse_metrics, peer_group=(pos1, s1)
+            )
         else:
-            r2 = [
-                100 - pct_rank(peers[resolve_metric_col(peers.columns, m)], peers[resolve_metric_col(peers.columns, m)].mean()) if m in inverse_metrics else pct_rank(peers[resolve_metric_col(peers.columns, m)], peers[resolve_metric_col(peers.columns, m)].mean())
-                for m in metrics
-            ]
+            means = lookup_peer_means(
+                load_peer_stats(snapshot, "xtech", peer_stats_version(snapshot, "xtech")),
+                pos1, s1, metrics, inverse=inverse_metrics,
+            )
+            if means is None:
+                peers = xtech_peers()
+                cols = [resolve_metric_col(peers.columns, m) for m in metrics]
+                means = ([peers[c].mean() for c in cols], [
+                    100 - pct_rank(peers[c], peers[c].mean()) if m in inverse_metrics else pct_rank(peers[c], peers[c].mean())
+                    for m, c in zip(metrics, cols)
+                ])
+            mean_vals, r2 = means
+        percentiles_done()
 
 
         r1_closed = r1 + [r1[0]]
         r2_closed = r2 + [r2[0]]
         metrics_closed = labels + [labels[0]]
 
-        raw1 = [row1[resolve_metric_col(row1.index if hasattr(row1, "index") else peers.columns, m)] for m in metrics]
+        raw1 = [row1[resolve_metric_col(row1.index, m)] for m in metrics]
         raw1_closed = raw1 + [raw1[0]]
         raw2 = [
-            row2[resolve_metric_col(row2.index if hasattr(row2, "index") else peers.columns, m)]
-            for m in metrics
-        ] if compare else [
-            peers[resolve_metric_col(peers.columns, m)].mean()
+            row2[resolve_metric_col(row2.index, m)]
             for m in metrics
-        ]
+        ] if compare else mean_vals
         raw2_closed = raw2 + [raw2[0]]
 
         # Radar plot
         # 8) Construction du radar Plotly
+        figure_done = timings.mark("figure")
         fig = go.Figure()
 
         # 1) Joueur 1 – Calque “fill”
@@ -3875,6 +3362,7 @@ elif page == "xTech/xDef":
         )
 
         st.plotly_chart(fig, use_container_width=True)
+        figure_done()
         
         # 📘 Metric Definitions: integrated into Radar tab
         definitions_rich = {
@@ -3951,26 +3439,31 @@ elif page == "xTech/xDef":
 
         
     # === Onglet Index ===
-    with tab3:
+    with tab3, timings.tab("Index"):
         # Sélection Joueur + Saison
         col1, col2 = st.columns(2)
         with col1:
-            display_options = sorted(df_tech["Display Name"].dropna().unique())
-            default_display_name = next((name for name in display_options if "Artem Dovbyk" in name), display_options[0])
-            p1_display = st.selectbox("Player", display_options, index=display_options.index(default_display_name), key="tech_index_p1")
-            p1 = display_to_playername[p1_display]
+            id_to_display_tech = player_labels["xtechnical"]
+            display_options = sorted(id_to_display_tech, key=id_to_display_tech.get)
+            default_display_name = next((pid for pid in display_options if "Artem Dovbyk" in id_to_display_tech[pid]), display_options[0])
+            p1_id = st.selectbox(
+                "Player", display_options, index=display_options.index(default_display_name),
+                format_func=id_to_display_tech.get, key="tech_index_p1"
+            )
+            df_p1 = df_tech[df_tech[PLAYER_ID] == p1_id]
+            p1 = df_p1["Player Name"].iloc[0]
         with col2:
-            seasons = sorted(df_tech[df_tech["Player Name"] == p1]["Season Name"].dropna().unique())
+            seasons = sorted(df_p1["Season Name"].dropna().unique())
             s1 = st.selectbox("Season", seasons, index=len(seasons) - 1, key="tech_index_s1")
 
         # Filtrage Joueur + Saison
-        df1 = df_tech[(df_tech["Player Name"] == p1) & (df_tech["Season Name"] == s1)]
+        df1 = df_p1[df_p1["Season Name"] == s1]
         if df1.empty:
             st.warning("No data found.")
             st.stop()
         
         # Sélection compétition principale (où le joueur a le plus joué)
-        df_allplayer = df_tech[(df_tech["Player Name"] == p1) & (df_tech["Season Name"] == s1)]
+        df_allplayer = df1
         comp_minutes = df_allplayer.groupby("Competition Name")["Minutes"].sum().sort_values(ascending=False)
         main_competition = comp_minutes.index[0] if not comp_minutes.empty else None
         
@@ -4024,14 +3517,14 @@ elif page == "xTech/xDef":
         mean_def = peers[def_col].mean()
         
         sorted_peers_tech = peers.sort_values(tech_col, ascending=False).reset_index(drop=True)
-        if row["Player Name"] in sorted_peers_tech["Player Name"].values:
-            rank_tech = sorted_peers_tech[sorted_peers_tech["Player Name"] == row["Player Name"]].index[0] + 1
+        if row[PLAYER_ID] in sorted_peers_tech[PLAYER_ID].values:
+            rank_tech = sorted_peers_tech[sorted_peers_tech[PLAYER_ID] == row[PLAYER_ID]].index[0] + 1
         else:
             rank_tech = "—"
             
         sorted_peers_def = peers.sort_values(def_col, ascending=False).reset_index(drop=True)
-        if row["Player Name"] in sorted_peers_def["Player Name"].values:
-            rank_def = sorted_peers_def[sorted_peers_def["Player Name"] == row["Player Name"]].index[0] + 1
+        if row[PLAYER_ID] in sorted_peers_def[PLAYER_ID].values:
+            rank_def = sorted_peers_def[sorted_peers_def[PLAYER_ID] == row[PLAYER_ID]].index[0] + 1
         else:
             rank_def = "—"
         
@@ -4574,7 +4067,7 @@ elif page == "xTech/xDef":
                 st.dataframe(detail_df.set_index("Metrics"), use_container_width=True)
     
 ################### --- Onglet Top 50 xTechnical --- ###################
-    with tab4:
+    with tab4, timings.tab("Top 50"):
         # 1. Sélection Compétition et Saison (déjà côte à côte)
         col1, col2 = st.columns(2)
         with col1:
@@ -4638,16 +4131,11 @@ elif page == "xTech/xDef":
             key="top50_xtech_min"
         )
 
-        # 5. FILTRAGE
-        filtered_top = df_tech[
-            (df_tech["Competition Name"] == selected_comp) &
-            (df_tech["Season Name"] == selected_season) &
-            (df_tech["Position Group"] == selected_pos) &
-            (df_tech["Minutes"] >= min_minutes)
-        ].copy()
-
-        filtered_top = filtered_top[filtered_top[selected_index].notna()]
-        top_50 = filtered_top.sort_values(by=selected_index, ascending=False).head(50).reset_index(drop=True)
+        # 5. FILTRAGE (mis en cache par partition)
+        top_50 = top50_xtechnical(
+            df_tech, selected_comp, selected_season, selected_pos, selected_index, min_minutes,
+            partition_version(snapshot, "xtechnical", selected_season, selected_comp),
+        )
 
         # 6. CONSTRUCTION TABLEAU
         rows = []
@@ -4678,7 +4166,7 @@ elif page == "xTech/xDef":
         
 ################### --- Onglet Rookie --- ###################
 
-    with tab5:
+    with tab5, timings.tab("Rookie"):
         # --- Sélection & bornes issues du dataset xTech
         ROOKIE_SEASON = ["2025", "2025/2026"]
 
@@ -4856,7 +4344,7 @@ elif page == "xTech/xDef":
 
         # --- Préparation du DataFrame d'affichage
         wanted_cols = ["Player Name", "Team Name", "Competition Name", "Position Group",
-                       "Minutes", "Age", "xTECH", "xDEF"]
+                       "Minutes", "Age", "xTECH", "xDEF", PLAYER_ID]
         visible_cols = [c for c in wanted_cols if c in rookies.columns]
         rookies_display = rookies[visible_cols].copy()
 
@@ -4934,9 +4422,10 @@ elif page == "xTech/xDef":
                     headerStyle={'textAlign': 'center'}
                 )
 
-            # Masquer Transfermarkt
+            # Masquer Transfermarkt + Player ID
             if "Transfermarkt" in df_display_rookie.columns:
                 gb.configure_column("Transfermarkt", hide=True)
+            gb.configure_column(PLAYER_ID, hide=True)
 
             gb.configure_pagination(enabled=False)
 
@@ -4947,7 +4436,7 @@ elif page == "xTech/xDef":
                 domLayout='normal'
             )
 
-            grid_response_rookie = AgGrid(
+            grid_response_rookie = aggrid(
                 df_display_rookie,
                 gridOptions=gb.build(),
                 height=500,
@@ -4965,9 +4454,8 @@ elif page == "xTech/xDef":
 
             if isinstance(selected_rows, list) and len(selected_rows) > 0 and isinstance(selected_rows[0], dict):
                 display_row = selected_rows[0]
-                player_name_sel = display_row.get("Player Name")
-
-                full_row = rookies_display[rookies_display["Player Name"] == player_name_sel]
+                # Par Player ID : deux homonymes sont deux joueurs distincts
+                full_row = rookies_display[rookies_display[PLAYER_ID] == selected_player_id(display_row)]
 
                 if not full_row.empty:
                     tm_url = full_row.iloc[0].get("Transfermarkt")
@@ -5037,7 +4525,7 @@ elif page == "xTech/xDef":
 elif page == "Merged Data":
     tab1, tab2 = st.tabs(["Player Search", "Merged Indexes"])
     
-    with tab1:
+    with tab1, timings.tab("Player Search"):
         season_col = "Season Name"
         comp_col = "Competition Name"
 
@@ -5045,8 +4533,8 @@ elif page == "Merged Data":
         latest_merged = latest_season_from(df_merged[season_col])  # [CHANGED]
 
         # State init (inchangé)
-        if "merged_loaded_df" not in st.session_state:
-            st.session_state.merged_loaded_df = None
+        if "merged_loaded" not in st.session_state:
+            st.session_state.merged_loaded = False
         if "merged_pending" not in st.session_state:
             st.session_state.merged_pending = True
         if "merged_last_seasons" not in st.session_state:
@@ -5088,79 +4576,92 @@ elif page == "Merged Data":
         filters_now = (tuple(st.session_state.ui_seasons), tuple(st.session_state.ui_comps))
         filters_last = (tuple(st.session_state.merged_last_seasons), tuple(st.session_state.merged_last_comps))
 
-        if st.session_state.merged_loaded_df is not None and filters_now != filters_last:
+        if st.session_state.merged_loaded and filters_now != filters_last:
             st.session_state.merged_pending = True
-            st.session_state.merged_loaded_df = None
+            st.session_state.merged_loaded = False
 
         # --- Chargement des données sur bouton explicite ---
         if st.button("Load Data"):
             st.session_state.merged_last_seasons = st.session_state.ui_seasons.copy() if st.session_state.ui_seasons else season_options
             st.session_state.merged_last_comps = st.session_state.ui_comps.copy() if st.session_state.ui_comps else filtered_comps
             st.session_state.merged_pending = False
-
-            filtered = df_merged[
-                df_merged[season_col].isin(st.session_state.merged_last_seasons)
-                & df_merged[comp_col].isin(st.session_state.merged_last_comps)
-            ]
-            st.session_state.merged_loaded_df = filtered.copy()
+            st.session_state.merged_loaded = True
 
         # ----------- Message et Séparateur -----------
 
-        if st.session_state.merged_loaded_df is None or st.session_state.merged_pending:
+        if not st.session_state.merged_loaded or st.session_state.merged_pending:
             st.info("Please load data to continue.")
 
         st.markdown("---")
 
         # --- Filtres dynamiques et affichage DATA ---
-        if st.session_state.merged_loaded_df is not None and not st.session_state.merged_pending:
-            df_loaded = st.session_state.merged_loaded_df.copy()
+        if st.session_state.merged_loaded and not st.session_state.merged_pending:
+            df_loaded = load_selection("merged", st.session_state.merged_last_seasons, st.session_state.merged_last_comps)
 
-            col3, col4 = st.columns(2)
-            with col3:
-                # Position Group
-                POSITION_ORDER = [
-                    "Central Defender",
-                    "Full Back",
-                    "Midfielder",
-                    "Attacking Midfielder",
-                    "Winger",
-                    "Striker"
-                ]
-                if "Position Group" in df_loaded.columns:
-                    positions_available = [pos for pos in POSITION_ORDER if pos in df_loaded["Position Group"].dropna().unique()]
-                    selected_positions = st.multiselect(
-                        "Position(s)",
-                        options=positions_available,
-                        default=["Central Defender"] if "Central Defender" in positions_available else positions_available
-                    )
-                else:
-                    selected_positions = []
+            batched = st.toggle(
+                "Batch filter changes", key="merged_ps_batched",
+                help="Filters are applied together with the Apply buttons (one recompute per filter row or popover).",
+            )
+            with filter_form("merged_filters_form", batched, "Apply filters"):
+                col3, col4 = st.columns(2)
+                with col3:
+                    # Position Group
+                    POSITION_ORDER = [
+                        "Central Defender",
+                        "Full Back",
+                        "Midfielder",
+                        "Attacking Midfielder",
+                        "Winger",
+                        "Striker"
+                    ]
+                    if "Position Group" in df_loaded.columns:
+                        positions_available = [pos for pos in POSITION_ORDER if pos in df_loaded["Position Group"].dropna().unique()]
+                        selected_positions = st.multiselect(
+                            "Position(s)",
+                            options=positions_available,
+                            default=["Central Defender"] if "Central Defender" in positions_available else positions_available
+                        )
+                    else:
+                        selected_positions = []
                     
-                # Age
-                if "Age" in df_loaded.columns and not df_loaded["Age"].isnull().all():
-                    min_age, max_age = int(df_loaded["Age"].min()), int(df_loaded["Age"].max())
-                    age_range = st.slider("Age", min_value=min_age, max_value=max_age, value=(min_age, max_age))
-                else:
-                    age_range = None
+                    # Age
+                    if "Age" in df_loaded.columns and not df_loaded["Age"].isnull().all():
+                        min_age, max_age = int(df_loaded["Age"].min()), int(df_loaded["Age"].max())
+                        age_range = st.slider("Age", min_value=min_age, max_value=max_age, value=(min_age, max_age))
+                    else:
+                        age_range = None
+
+                with col4:
+                    # Preferred Foot
+                    if "Prefered Foot" in df_loaded.columns:
+                        feet = sorted(df_loaded["Prefered Foot"].dropna().unique())
+                        selected_feet = st.multiselect(
+                            "Preferred Foot",
+                            options=feet,
+                            default=feet
+                        )
+                    else:
+                        selected_feet = []
 
-            with col4:
-                # Preferred Foot
-                if "Prefered Foot" in df_loaded.columns:
-                    feet = sorted(df_loaded["Prefered Foot"].dropna().unique())
-                    selected_feet = st.multiselect(
-                        "Preferred Foot",
-                        options=feet,
-                        default=feet
-                    )
-                else:
-                    selected_feet = []
+                    # Minutes Played
+                    if "Minutes" in df_loaded.columns and not df_loaded["Minutes"].isnull().all():
+                        min_min, max_min = int(df_loaded["Minutes"].min()), int(df_loaded["Minutes"].max())
+                        minutes_range = st.slider("Minutes Played", min_value=min_min, max_value=max_min, value=(min_min, max_min))
+                    else:
+                        minutes_range = None
+            
+            # Filtres de base (avant les popovers : les seuils des percentiles groupés en dépendent)
+            with timings.span("filter"):
+                df_filtered_base = df_loaded.copy()
 
-                # Minutes Played
-                if "Minutes" in df_loaded.columns and not df_loaded["Minutes"].isnull().all():
-                    min_min, max_min = int(df_loaded["Minutes"].min()), int(df_loaded["Minutes"].max())
-                    minutes_range = st.slider("Minutes Played", min_value=min_min, max_value=max_min, value=(min_min, max_min))
-                else:
-                    minutes_range = None
+                if selected_positions:
+                    df_filtered_base = df_filtered_base[df_filtered_base["Position Group"].isin(selected_positions)]
+                if selected_feet:
+                    df_filtered_base = df_filtered_base[df_filtered_base["Prefered Foot"].isin(selected_feet)]
+                if age_range:
+                    df_filtered_base = df_filtered_base[(df_filtered_base["Age"] >= age_range[0]) & (df_filtered_base["Age"] <= age_range[1])]
+                if minutes_range:
+                    df_filtered_base = df_filtered_base[(df_filtered_base["Minutes"] >= minutes_range[0]) & (df_filtered_base["Minutes"] <= minutes_range[1])]
             
             st.markdown("---")
             
@@ -5259,6 +4760,15 @@ elif page == "Merged Data":
                 ("Defensive", DEFENSIVE_METRICS),
             ]
             
+            # Quantiles des métriques sur les lignes filtrées : légendes, seuils et état des sliders
+            popover_cols = list(dict.fromkeys(
+                c for _, metric_list in metric_popovers for c, _ in metric_list if c in df_filtered_base.columns
+            ))
+            quantiles = filter_quantiles(
+                "merged", st.session_state.merged_last_seasons, st.session_state.merged_last_comps,
+                (tuple(selected_positions), tuple(selected_feet), age_range, minutes_range), df_filtered_base, popover_cols,
+            )
+
             filter_percentiles = {}
             
             st.markdown("""
@@ -5297,18 +4807,21 @@ elif page == "Merged Data":
             for idx, (name, metric_list) in enumerate(metric_popovers):
                 with pop_cols[idx]:
                     st.markdown('<div class="custom-popover-wrap">', unsafe_allow_html=True)
-                    with st.popover(f"{name}", use_container_width=True):
+                    with st.popover(f"{name}", use_container_width=True), filter_form(f"pop_form_{name}", batched):
                         for col, label in metric_list:
                             if col in df_loaded.columns:
                                 slider_key = f"pop_{name}_{col}_{st.session_state.reset_counter}"
-                                min_percentile = st.slider(
-                                    f"{label} - Percentile",
-                                    min_value=0,
-                                    max_value=100,
-                                    value=0,
-                                    step=10,
-                                    key=slider_key
-                                )
+                                if batched and not quantiles[col].isna().all():
+                                    min_percentile = threshold_slider(f"{label} - Percentile", quantiles[col], slider_key, step=10)
+                                else:
+                                    min_percentile = st.slider(
+                                        f"{label} - Percentile",
+                                        min_value=0,
+                                        max_value=100,
+                                        value=0,
+                                        step=10,
+                                        key=slider_key
+                                    )
                                 filter_percentiles[(name, col)] = min_percentile
                                 if min_percentile > 0:
                                     active_filters[name] += 1
@@ -5334,35 +4847,36 @@ elif page == "Merged Data":
                 if st.button("Clear filters"):
                     st.session_state.reset_counter += 1
                     st.rerun()
+
+            expression = expression_filter(f"merged_ps_expr_{st.session_state.reset_counter}", df_filtered_base)
             
             # ======================
             # Filtrage pipeline final
             # ======================
             
-            df_filtered_base = df_loaded.copy()
-            
-            if selected_positions:
-                df_filtered_base = df_filtered_base[df_filtered_base["Position Group"].isin(selected_positions)]
-            if selected_feet:
-                df_filtered_base = df_filtered_base[df_filtered_base["Prefered Foot"].isin(selected_feet)]
-            if age_range:
-                df_filtered_base = df_filtered_base[(df_filtered_base["Age"] >= age_range[0]) & (df_filtered_base["Age"] <= age_range[1])]
-            if minutes_range:
-                df_filtered_base = df_filtered_base[(df_filtered_base["Minutes"] >= minutes_range[0]) & (df_filtered_base["Minutes"] <= minutes_range[1])]
-            
-            df_final = df_filtered_base.copy()
-            
-            for (cat, col), min_pct in filter_percentiles.items():
-                if min_pct > 0 and col in df_final.columns:
-                    ref_vals = df_final[col].dropna()
-                    if len(ref_vals) > 0:
-                        threshold = ref_vals.quantile(min_pct / 100)
-                        df_final = df_final[df_final[col] >= threshold]
-            
-            df_filtered = df_final.copy()
+            # (seuils lus dans la table de quantiles des lignes de base : l'ordre des deux filtres est indifférent)
+            def merged_pandas_rows():
+                df_expr = df_filtered_base[expression.mask(df_filtered_base)] if expression else df_filtered_base
+                return percentile_filter(df_expr, filter_percentiles, quantiles).copy()
+
+            with timings.span("filter"):
+                df_filtered = search_rows(
+                    "merged", st.session_state.merged_last_seasons, st.session_state.merged_last_comps,
+                    {"positions": selected_positions, "feet": selected_feet, "age": age_range,
+                     "minutes": minutes_range},
+                    filter_percentiles, expression,
+                    ["Player Name", "Team Name", "Age", "Position Group", "Season Name", "Competition Name",
+                     "Minutes", "xPhysical", "xTECH", "xDEF", PLAYER_ID],
+                    merged_pandas_rows,
+                )
+            # Lignes entières (export CSV, rapport détaillé) : DuckDB ne lit que les colonnes de la grille,
+            # ses lignes gardent leur position dans le dataset, donc leur index dans la sélection chargée
+            df_rows = (
+                df_filtered if df_filtered.columns.equals(df_loaded.columns) else df_loaded.loc[df_filtered.index]
+            )
 
             # --- Bouton download CSV juste sous les popovers ---
-            csv = df_filtered.to_csv(index=False)
+            csv = df_rows.to_csv(index=False)
             st.download_button(
                 label="Download selection as CSV",
                 data=csv,
@@ -5379,7 +4893,7 @@ elif page == "Merged Data":
                 display_cols = [
                     'Player Name', 'Team Name', 'Age', 'Position Group',
                     'Season Name', 'Competition Name', 'Minutes',
-                    'xPhysical', 'xTECH', 'xDEF'
+                    'xPhysical', 'xTECH', 'xDEF', PLAYER_ID
                 ]
                 display_cols = [col for col in display_cols if col in df_filtered.columns]
                 df_display = df_filtered[display_cols].reset_index(drop=True).copy()
@@ -5408,6 +4922,7 @@ elif page == "Merged Data":
 
                 if "Player Name" in df_display.columns:
                     gb.configure_column("Player Name", pinned="left")
+                gb.configure_column(PLAYER_ID, hide=True)
 
                 # Désactivation de la pagination
                 gb.configure_pagination(enabled=False)
@@ -5415,7 +4930,7 @@ elif page == "Merged Data":
                 grid_options = gb.build()
 
                 # 3. Affichage AgGrid avec scroll vertical (hauteur fixe)
-                grid_response = AgGrid(
+                grid_response = aggrid(
                     df_display,
                     gridOptions=grid_options,
                     height=500,
@@ -5436,619 +4951,16 @@ elif page == "Merged Data":
                     season = display_row.get("Season Name")
                     comp = display_row.get("Competition Name")
 
-                    row = df_filtered[
-                        (df_filtered["Player Name"] == player_name) &
-                        (df_filtered["Team Name"] == team_name) &
-                        (df_filtered["Season Name"] == season) &
-                        (df_filtered["Competition Name"] == comp)
+                    row = df_rows[
+                        (df_rows[PLAYER_ID] == selected_player_id(display_row)) &
+                        (df_rows["Team Name"] == team_name) &
+                        (df_rows["Season Name"] == season) &
+                        (df_rows["Competition Name"] == comp)
                     ].iloc[0]
 
-                    with st.popover(f"📊 Show detailed report for {player_name}", use_container_width=True):
-                        
-                        # === Titre joueur ===
-                        pos = row.get("Position Group", "—")
-                        season = row.get("Season Name", None)
-                        age = int(float(row.get("Age", 0))) if pd.notna(row.get("Age", None)) else "—"
-                        mins = int(float(row.get("Minutes", 0))) if pd.notna(row.get("Minutes", None)) else "—"
-                        title_html = f"""
-                        <div style='font-size:17px; font-weight:500; text-align:center; margin: 10px 0;'>
-                        {player_name} ({pos}) – {season} – {team_name} ({comp}) – {age} y/o – {mins} min
-                        </div>
-                        """
-                        st.markdown(title_html, unsafe_allow_html=True)
-                        
-                        # === Tabs dans le popover ===
-                        tab_radars_ps, tab_indexes_ps = st.tabs(["Radars", "Indexes"])
-                        
-                        # ==== Zone radars côte à côte ====
-                        with tab_radars_ps:
-                            col1, col2 = st.columns(2)
+                    if st.button(f"📊 Show detailed report for {player_name}", use_container_width=True, key="merged_report_btn"):
+                        merged_detailed_report(row, player_name, team_name, comp)
 
-                            with col1:
-                                # === Radar physique (version finale) ===
-                                try:
-                                    physical_metrics = [
-                                        "TOP 5 PSV-99", "HI Distance P90", "M/min P90",
-                                        "HSR Distance P90", "Sprinting Distance P90", "Sprint Count P90", "High Acceleration Count P90"
-                                    ]
-                                    metrics_phys_labels = [
-                                        "TOP5 PSV-99", "HI Dist", "Tot Dist", "HSR Dist", "Sprint Dist", "Sprint Ct", "High Acc Ct"
-                                    ]
-
-                                    LIGUES_CIBLE = ["ITA - Serie A", "GER - 1. Bundesliga", "SPA - La Liga", "FRA - Ligue 1", "ENG - Premier League"]
-                                    ref_phys = df_merged[
-                                        (df_merged["Competition Name"].isin(LIGUES_CIBLE)) &
-                                        (df_merged["Position Group"] == pos) &
-                                        (df_merged["Season Name"].astype(str).str.contains(str(season), na=False)) &
-                                        (df_merged["Minutes"].astype(float) > 600)
-                                    ]
-                                    
-                                    def pct_rank(series, value):
-                                        """Retourne le percentile de value dans la série series (0–100)."""
-                                        arr = series.dropna().values
-                                        if len(arr) == 0:
-                                            return 0.0
-                                        lower = (arr < value).sum()
-                                        equal = (arr == value).sum()
-                                        rank = (lower + 0.5 * equal) / len(arr) * 100
-                                        return float(rank)
-
-                                    r_player = [pct_rank(ref_phys[m], float(row.get(m, 0))) for m in physical_metrics]
-                                    r_top5 = [pct_rank(ref_phys[m], ref_phys[m].mean()) for m in physical_metrics]
-                                    raw_vals = [row.get(m, "NA") for m in physical_metrics]
-
-                                    r_player_closed = r_player + [r_player[0]]
-                                    r_top5_closed = r_top5 + [r_top5[0]]
-                                    metrics_closed = metrics_phys_labels + [metrics_phys_labels[0]]
-                                    raw_closed = raw_vals + [raw_vals[0]]
-
-                                    fig = go.Figure()
-                                    fig.add_trace(go.Scatterpolar(
-                                        r=r_player_closed,
-                                        theta=metrics_closed,
-                                        mode='lines',
-                                        fill='toself',
-                                        line=dict(color='gold', width=2),
-                                        fillcolor='rgba(255,215,0,0.3)',
-                                        hoverinfo='skip',
-                                        name=player_name
-                                    ))
-                                    fig.add_trace(go.Scatterpolar(
-                                        r=r_player_closed,
-                                        theta=metrics_closed,
-                                        mode='markers',
-                                        hoverinfo='text',
-                                        hovertext=[
-                                            f"<b>{label}</b><br>Value: {v*90:.0f} m<br>Percentile: {r:.1f}%"
-                                            if label == "Tot Dist"
-                                            else f"<b>{label}</b><br>Value: {v:.2f}<br>Percentile: {r:.1f}%"
-                                            for label, v, r in zip(metrics_closed, raw_closed, r_player_closed)
-                                        ],
-                                        marker=dict(size=12, color='rgba(255,215,0,0)'),
-                                        showlegend=False
-                                    ))
-                                    fig.add_trace(go.Scatterpolar(
-                                        r=r_top5_closed,
-                                        theta=metrics_closed,
-                                        mode='lines',
-                                        fill='toself',
-                                        line=dict(color='lightgreen', width=2),
-                                        fillcolor='rgba(144,238,144,0.3)',
-                                        hoverinfo='skip',
-                                        name='Top5 Average'
-                                    ))
-                                    fig.add_trace(go.Scatterpolar(
-                                        r=r_top5_closed,
-                                        theta=metrics_closed,
-                                        mode='markers',
-                                        hoverinfo='text',
-                                        hovertext=[
-                                            f"<b>{label}</b><br>Mean Percentile: {r:.1f}%" 
-                                            for label, r in zip(metrics_closed, r_top5_closed)
-                                        ],
-                                        marker=dict(size=12, color='rgba(144,238,144,0)'),
-                                        showlegend=False
-                                    ))
-                                    fig.update_layout(
-                                        hovermode='closest',
-                                        polar=dict(
-                                            bgcolor='rgba(0,0,0,0)',
-                                            radialaxis=dict(
-                                                range=[0, 100],
-                                                tickvals=[0, 25, 50, 75, 100],
-                                                ticks='outside',
-                                                showticklabels=True,
-                                                ticksuffix='%',
-                                                tickfont=dict(color='white'),
-                                                gridcolor='gray'
-                                            )
-                                        ),
-                                        paper_bgcolor='rgba(0,0,0,0)',
-                                        font_color='white',
-                                        showlegend=False,
-                                        height=500
-                                    )
-                                    st.plotly_chart(fig, use_container_width=True)
-                                except Exception as e:
-                                    st.error(f"Erreur radar physique : {e}")
-
-                            with col2:
-                                # === Radar Technique dynamique avec selectbox ===
-                                try:
-                                    # 1) Position et template par défaut
-                                    pos = row.get("Position Group")
-                                    position_group_to_template = {
-                                        "Goalkeeper": "Goalkeeper",
-                                        "Central Defender": "Central Defender",
-                                        "Full Back": "Full Back",
-                                        "Midfielder": "Midfielder (CDM)",
-                                        "Attacking Midfielder": "Attacking Midfielder",
-                                        "Winger": "Winger",
-                                        "Striker": "Striker",
-                                    }
-                                    default_template = position_group_to_template.get(pos, "Striker")
-
-                                    # 2) Stockage temporaire du template sélectionné
-                                    template_label = f"template_select_{player_name}_{season}_{team_name}".replace(" ", "_")
-                                    selected_template = st.session_state.get(template_label, default_template)
-
-                                    # 3) Extraction des métriques et labels
-                                    template = metric_templates_tech[selected_template]
-                                    labels = metric_labels_tech[selected_template]
-
-                                    # 4) Peers Top5 (incluant les 2 variantes de Bundesliga) + fallback
-                                    top5 = ["ITA - Serie A", "GER - 1. Bundesliga", "SPA - La Liga", "FRA - Ligue 1", "ENG - Premier League"]
-                                    ref_tech = df_tech[
-                                        (df_tech["Position Group"] == pos) &
-                                        (df_tech["Season Name"] == row["Season Name"]) &
-                                        (df_tech["Competition Name"].isin(top5)) &
-                                        (df_tech["Minutes"] >= 600)
-                                    ]
-                                    if ref_tech.empty:
-                                        ref_tech = df_tech[
-                                            (df_tech["Position Group"] == pos) &
-                                            (df_tech["Season Name"] == row["Season Name"]) &
-                                            (df_tech["Minutes"] >= 600)
-                                        ]
-
-                                    inverse_metrics = ["Turnovers P90", "Dispossessions P90"]
-
-                                    def pct_rank(series, value):
-                                        s = pd.to_numeric(series, errors="coerce").dropna().values
-                                        try:
-                                            v = float(value)
-                                        except Exception:
-                                            v = np.nan if "np" in globals() else float("nan")
-                                        if len(s) == 0 or (pd.isna(v) if "pd" in globals() else (v != v)):
-                                            return 0.0
-                                        lower = (s < v).sum()
-                                        equal = (s == v).sum()
-                                        return (lower + 0.5 * equal) / len(s) * 100
-
-                                    # --- Helpers de résolution de colonnes / valeurs (utilise resolve_metric_col défini plus haut)
-                                    def _get(obj, name: str):
-                                        cols = obj.index if hasattr(obj, "index") and not hasattr(obj, "columns") else obj.columns
-                                        return obj[resolve_metric_col(cols, name)]
-
-                                    def _fmt(v):
-                                        try:
-                                            v = float(v)
-                                            if pd.isna(v):
-                                                return "NA"
-                                            return f"{v:.2f}"
-                                        except Exception:
-                                            return "NA"
-
-                                    # 5) Calculs robustes (on saute les métriques absentes)
-                                    r_tech, r_avg, raw_vals, labels_kept = [], [], [], []
-                                    for m, lab in zip(template, labels):
-                                        try:
-                                            ser = _get(ref_tech, m)   # Series des peers sur la vraie colonne
-                                            val = _get(row, m)        # valeur du joueur sur la vraie clé
-                                        except KeyError:
-                                            continue
-
-                                        r = 100 - pct_rank(ser, val) if m in inverse_metrics else pct_rank(ser, val)
-                                        rav = 100 - pct_rank(ser, ser.mean()) if m in inverse_metrics else pct_rank(ser, ser.mean())
-
-                                        r_tech.append(r)
-                                        r_avg.append(rav)
-                                        raw_vals.append(val)
-                                        labels_kept.append(lab)
-
-                                    # 6) Construction du radar (fermé)
-                                    metrics_closed = labels_kept + [labels_kept[0]]
-                                    r_tech_closed = r_tech + [r_tech[0]] if r_tech else []
-                                    r_avg_closed = r_avg + [r_avg[0]] if r_avg else []
-                                    raw_closed = raw_vals + [raw_vals[0]] if raw_vals else []
-
-                                    fig_tech = go.Figure()
-                                    if r_tech_closed:
-                                        fig_tech.add_trace(go.Scatterpolar(
-                                            r=r_tech_closed,
-                                            theta=metrics_closed,
-                                            mode='lines',
-                                            fill='toself',
-                                            line=dict(color='gold', width=2),
-                                            fillcolor='rgba(255,215,0,0.3)',
-                                            hoverinfo='skip',
-                                            name=player_name
-                                        ))
-                                        fig_tech.add_trace(go.Scatterpolar(
-                                            r=r_tech_closed,
-                                            theta=metrics_closed,
-                                            mode='markers',
-                                            hoverinfo='text',
-                                            hovertext=[
-                                                f"<b>{label}</b><br>Value: {_fmt(v)}<br>Percentile: {r:.1f}%"
-                                                for label, v, r in zip(metrics_closed, raw_closed, r_tech_closed)
-                                            ],
-                                            marker=dict(size=12, color='rgba(255,215,0,0)'),
-                                            showlegend=False
-                                        ))
-                                    if r_avg_closed:
-                                        fig_tech.add_trace(go.Scatterpolar(
-                                            r=r_avg_closed,
-                                            theta=metrics_closed,
-                                            mode='lines',
-                                            fill='toself',
-                                            line=dict(color='lightgreen', width=2),
-                                            fillcolor='rgba(144,238,144,0.3)',
-                                            hoverinfo='skip',
-                                            name='Top5 Average'
-                                        ))
-                                        fig_tech.add_trace(go.Scatterpolar(
-                                            r=r_avg_closed,
-                                            theta=metrics_closed,
-                                            mode='markers',
-                                            hoverinfo='text',
-                                            hovertext=[
-                                                f"<b>{label}</b><br>Mean Percentile: {r:.1f}%"
-                                                for label, r in zip(metrics_closed, r_avg_closed)
-                                            ],
-                                            marker=dict(size=12, color='rgba(144,238,144,0)'),
-                                            showlegend=False
-                                        ))
-
-                                    fig_tech.update_layout(
-                                        hovermode='closest',
-                                        polar=dict(
-                                            bgcolor='rgba(0,0,0,0)',
-                                            radialaxis=dict(
-                                                range=[0, 100],
-                                                tickvals=[0, 25, 50, 75, 100],
-                                                ticks='outside',
-                                                showticklabels=True,
-                                                ticksuffix='%',
-                                                tickfont=dict(color='white'),
-                                                gridcolor='gray',
-                                            ),
-                                            angularaxis=dict(rotation=90, direction="clockwise"),
-                                        ),
-                                        paper_bgcolor='rgba(0,0,0,0)',
-                                        font_color='white',
-                                        showlegend=False,
-                                        height=500,
-                                    )
-                                    st.plotly_chart(fig_tech, use_container_width=True)
-
-                                    # 7) Selectbox SOUS le radar, avec maj + rerun
-                                    new_template = st.selectbox(
-                                        "Select a radar template",
-                                        options=list(metric_templates_tech.keys()),
-                                        index=list(metric_templates_tech.keys()).index(selected_template),
-                                        key=template_label + "_under",
-                                    )
-                                    if new_template != selected_template:
-                                        st.session_state[template_label] = new_template
-                                        st.rerun()
-
-                                except Exception as e:
-                                    st.error(f"Erreur radar technique : {e}")
-
-                        # === Onglet 2 : Indexes ===
-                        with tab_indexes_ps:
-                            try:
-                                pos = row.get("Position Group", "")
-                                poste_map = {
-                                    "Goalkeeper": "GK",
-                                    "Central Defender": "CB",
-                                    "Full Back": "FB",
-                                    "Midfielder": "MID",
-                                    "Attacking Midfielder": "AM",
-                                    "Winger": "WING",
-                                    "Striker": "ST"
-                                }
-                                poste = poste_map.get(pos, "ST")
-
-                                index_xphy       = float(row.get("xPhysical", 0))
-                                index_xtech_def  = float(row.get(f"xTech {poste} DEF (/100)", 0))
-                                index_xtech_tech = float(row.get(f"xTech {poste} TECH (/100)", 0))
-
-                                df_peers = df_merged[
-                                    (df_merged["Position Group"] == pos) &
-                                    (df_merged["Season Name"] == row["Season Name"]) &
-                                    (df_merged["Competition Name"] == row["Competition Name"]) &
-                                    (df_merged["Minutes"] >= 600)
-                                ]
-
-                                def plot_gauge(index_value, mean_peer, rank, total_peers, label):
-                                    hue = 120 * (index_value / 100)
-                                    bar_color = f"hsl({hue:.0f}, 75%, 50%)"
-                                    fig = go.Figure(go.Indicator(
-                                        mode="gauge+number",
-                                        value=int(round(index_value)),
-                                        number={'font': {'size': 48}},
-                                        gauge={
-                                            'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "white"},
-                                            'bar': {'color': bar_color, 'thickness': 0.25},
-                                            'bgcolor': "rgba(255,255,255,0)",
-                                            'borderwidth': 0,
-                                            'shape': "angular",
-                                            'steps': [{'range': [0, 100], 'color': 'rgba(100,100,100,0.3)'}],
-                                            'threshold': {'line': {'color': "white", 'width': 4},
-                                                          'thickness': 0.75,
-                                                          'value': mean_peer}
-                                        },
-                                        domain={'x': [0, 1], 'y': [0, 1]},
-                                        title={'text': f"<b>{rank}ᵉ/{total_peers}</b>", 'font': {'size': 20}}
-                                    ))
-                                    fig.update_layout(
-                                        margin={'t': 40, 'b': 0, 'l': 0, 'r': 0},
-                                        paper_bgcolor="rgba(0,0,0,0)",
-                                        height=300
-                                    )
-                                    return fig
-
-                                # === Affichage des 3 jauges ===
-                                c1, c2, c3 = st.columns(3)
-
-                                # === xPhysical ===
-                                with c1:
-                                    df_ranked = df_peers.sort_values("xPhysical", ascending=False).reset_index(drop=True)
-
-                                    if row["Player Name"] in df_ranked["Player Name"].values:
-                                        rank = int(df_ranked[df_ranked["Player Name"] == row["Player Name"]].index[0] + 1)
-                                    else:
-                                        rank = "—"  # Pas de classement si < 600 min ou joueur non présent
-
-                                    mean_val = df_peers["xPhysical"].mean() if not df_peers.empty else np.nan
-
-                                    st.plotly_chart(
-                                        plot_gauge(index_xphy, mean_val, rank, len(df_peers), "xPhysical"),
-                                        use_container_width=True
-                                    )
-
-                                    st.markdown(
-                                        "<div style='text-align:center; font-size:18px; margin-top:-40px; margin-bottom:2px;'><b>xPHY</b></div>",
-                                        unsafe_allow_html=True
-                                    )
-
-                                    st.markdown(
-                                        f"<div style='text-align:center; font-size:14px; margin-top:-26px; margin-bottom:2px; color:grey'>"
-                                        f"Average ({pos} in {row['Competition Name']}): {mean_val:.1f}</div>",
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                    try:
-                                        pos = row.get("Position Group", "")
-                                        xphy_metric_map = {
-                                            "TOP 5 PSV-99": ("psv99_top5", "TOP 5 PSV-99"),
-                                            "HI Distance P90": ("hi_distance_full_all", "HI Distance P90"),
-                                            "Total Distance P90": ("total_distance_full_all", "Total Distance P90"),
-                                            "HSR Distance P90": ("hsr_distance_full_all", "HSR Distance P90"),
-                                            "Sprinting Distance P90": ("sprint_distance_full_all", "Sprinting Distance P90"),
-                                            "Sprint Count P90": ("sprint_count_full_all", "Sprint Count P90"),
-                                            "High Acceleration Count P90": ("highaccel_count_full_all", "High Acceleration Count P90"),
-                                        }
-
-                                        detail_rows = []
-                                        total_pts = 0
-                                        total_max = 0
-
-                                        for label, (bar_key, raw_label) in xphy_metric_map.items():
-                                            val = row.get(label)
-                                            score = 0
-                                            max_score = 0
-
-                                            if pd.notna(val):
-                                                thresholds = threshold_dict1.get(bar_key, {}).get(pos, [])
-                                                for thresh in thresholds:
-                                                    min_val = thresh.get("min")
-                                                    max_val = thresh.get("max")
-                                                    pts = thresh.get("score", 0)
-
-                                                    if (min_val is None or val >= min_val) and (max_val is None or val < max_val):
-                                                        score = pts
-                                                        break
-                                                max_score = max(t["score"] for t in threshold_dict1[bar_key][pos]) if bar_key in threshold_dict1 and pos in threshold_dict1[bar_key] else 0
-
-
-                                            total_pts += score
-                                            total_max += max_score
-
-                                            detail_rows.append({
-                                                "Metric": raw_label,
-                                                "Player Value": f"{val:.2f}" if pd.notna(val) else "NA",
-                                                "Points": f"{score} / {max_score}"
-                                            })
-
-                                        # Ajout du total et index
-                                        index_val = row.get("xPhysical", 0)
-                                        detail_rows.append({
-                                            "Metric": "**Total**",
-                                            "Player Value": "",
-                                            "Points": f"**{total_pts} / {total_max}**"
-                                        })
-                                        detail_rows.append({
-                                            "Metric": "**xPhysical Index**",
-                                            "Player Value": "",
-                                            "Points": f"**{index_val:.0f}**"
-                                        })
-
-                                        st.markdown("##### xPhysical Details")
-                                        st.dataframe(pd.DataFrame(detail_rows).set_index("Metric"), use_container_width=True)
-
-                                    except Exception as e:
-                                        st.error(f"Erreur détails xPhysical : {e}")
-
-                                # === xTech DEF ===
-                                with c2:
-                                    colname_def = f"xTech {poste} DEF (/100)"
-                                    df_ranked = df_peers.sort_values(colname_def, ascending=False).reset_index(drop=True)
-
-                                    if row["Player Name"] in df_ranked["Player Name"].values:
-                                        rank = int(df_ranked[df_ranked["Player Name"] == row["Player Name"]].index[0] + 1)
-                                    else:
-                                        rank = "—"  # Pas de classement
-
-                                    mean_val = df_peers[colname_def].mean() if not df_peers.empty else np.nan
-
-                                    st.plotly_chart(
-                                        plot_gauge(index_xtech_def, mean_val, rank, len(df_peers), "xTech DEF"),
-                                        use_container_width=True
-                                    )
-                                    st.markdown(
-                                        "<div style='text-align:center; font-size:18px; margin-top:-40px; margin-bottom:2px;'><b>xDEF</b></div>",
-                                        unsafe_allow_html=True
-                                    )
-                                    st.markdown(
-                                        f"<div style='text-align:center; font-size:14px; margin-top:-26px; margin-bottom:2px; color:grey'>"
-                                        f"Average ({pos} in {row['Competition Name']}): {mean_val:.1f}"
-                                        "</div>",
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                    # === Tableau xDEF dans le popover ===
-                                    if pos != "Goalkeeper":
-                                        config = xtech_post_config.get(pos)
-                                        if config:
-                                            metric_map = config["metric_map"]
-                                            labels = config["labels"]
-                                            metric_rows = []
-
-                                            for raw_col in config["def"]:
-                                                note_col, scores = metric_map.get(raw_col, (None, None))
-                                                if not note_col or raw_col not in df_merged.columns:
-                                                    continue
-                                                raw_val = row.get(raw_col, None)
-                                                note_val = row.get(note_col, None)
-                                                max_pts = max(scores)
-                                                label = labels.get(raw_col, raw_col)
-                                                metric_rows.append({
-                                                    "Metrics": label,
-                                                    "Player Figures": f"{raw_val:.2f}" if pd.notna(raw_val) else "NA",
-                                                    "Points": f"{note_val} / {max_pts}" if pd.notna(note_val) else f"0 / {max_pts}"
-                                                })
-
-                                            # Total
-                                            total_pts = sum(int(r["Points"].split("/")[0].strip()) for r in metric_rows if "/" in r["Points"])
-                                            total_max = sum(int(r["Points"].split("/")[1].strip()) for r in metric_rows if "/" in r["Points"])
-                                            metric_rows.append({
-                                                "Metrics": "**Total**",
-                                                "Player Figures": "",
-                                                "Points": f"**{total_pts} / {total_max}**"
-                                            })
-
-                                            # Index
-                                            index_val = row.get("xDEF", None)
-                                            if pd.notna(index_val):
-                                                metric_rows.append({
-                                                    "Metrics": "**Index xDEF**",
-                                                    "Player Figures": "",
-                                                    "Points": f"**{index_val:.0f} / 100**"
-                                                })
-
-                                            df_def = pd.DataFrame(metric_rows).drop_duplicates(subset=["Metrics"], keep="first")
-                                            st.markdown("##### xDef Details")
-                                            st.dataframe(df_def.set_index("Metrics"), use_container_width=True)
-
-
-                                # === xTech TECH ===
-                                with c3:
-                                    colname_tech = f"xTech {poste} TECH (/100)"
-                                    df_ranked = df_peers.sort_values(colname_tech, ascending=False).reset_index(drop=True)
-
-                                    if row["Player Name"] in df_ranked["Player Name"].values:
-                                        rank = int(df_ranked[df_ranked["Player Name"] == row["Player Name"]].index[0] + 1)
-                                    else:
-                                        rank = "—"  # Pas de classement
-
-                                    mean_val = df_peers[colname_tech].mean() if not df_peers.empty else np.nan
-
-                                    st.plotly_chart(
-                                        plot_gauge(index_xtech_tech, mean_val, rank, len(df_peers), "xTech TECH"),
-                                        use_container_width=True
-                                    )
-                                    st.markdown(
-                                        "<div style='text-align:center; font-size:18px; margin-top:-40px; margin-bottom:2px;'><b>xTECH</b></div>",
-                                        unsafe_allow_html=True
-                                    )
-                                    st.markdown(
-                                        f"<div style='text-align:center; font-size:14px; margin-top:-26px; margin-bottom:2px; color:grey'>"
-                                        f"Average ({pos} in {row['Competition Name']}): {mean_val:.1f}"
-                                        "</div>",
-                                        unsafe_allow_html=True
-                                    )
-                                    
-                                    # === Tableau xTECH dans le popover ===
-                                    if pos != "Goalkeeper":
-                                        config = xtech_post_config.get(pos)
-                                        if config:
-                                            metric_map = config["metric_map"]
-                                            labels = config["labels"]
-                                            metric_rows = []
-
-                                            for raw_col in config["tech"]:
-                                                note_col, scores = metric_map.get(raw_col, (None, None))
-                                                if not note_col or raw_col not in df_merged.columns:
-                                                    # on ne sort plus trop tôt car raw_col peut être aliasé ; on tolère la suite
-                                                    pass
-
-                                                # [FIX] Résoudre la vraie colonne disponible dans df_merged/row
-                                                try:
-                                                    actual_col = resolve_metric_col(df_merged.columns, raw_col)  # [FIX]
-                                                except KeyError:
-                                                    actual_col = raw_col
-
-                                                raw_val  = row.get(actual_col, None)                              # [FIX]
-                                                note_val = row.get(note_col, None)
-                                                max_pts  = max(scores)
-                                                label    = labels.get(raw_col, raw_col)
-                                                metric_rows.append({
-                                                    "Metrics": label,
-                                                    "Player Figures": f"{raw_val:.2f}" if pd.notna(raw_val) else "NA",
-                                                    "Points": f"{note_val} / {max_pts}" if pd.notna(note_val) else f"0 / {max_pts}"
-                                                })
-
-
-                                            # Total
-                                            total_pts = sum(int(r["Points"].split("/")[0].strip()) for r in metric_rows if "/" in r["Points"])
-                                            total_max = sum(int(r["Points"].split("/")[1].strip()) for r in metric_rows if "/" in r["Points"])
-                                            metric_rows.append({
-                                                "Metrics": "**Total**",
-                                                "Player Figures": "",
-                                                "Points": f"**{total_pts} / {total_max}**"
-                                            })
-
-                                            # Index
-                                            index_val = row.get("xTECH", None)
-                                            if pd.notna(index_val):
-                                                metric_rows.append({
-                                                    "Metrics": "**Index xTECH**",
-                                                    "Player Figures": "",
-                                                    "Points": f"**{index_val:.0f} / 100**"
-                                                })
-
-                                            df_tech = pd.DataFrame(metric_rows).drop_duplicates(subset=["Metrics"], keep="first")
-                                            st.markdown("##### xTech Details")
-                                            st.dataframe(df_tech.set_index("Metrics"), use_container_width=True)
-                            
-                                st.divider()
-
-                            except Exception as e:
-                                st.error(f"Erreur affichage jauges index : {e}")
-                
                 # --------------------------------------------
                 # Résumé compact en une seule ligne (stylé)
                 # --------------------------------------------
@@ -6083,6 +4995,8 @@ elif page == "Merged Data":
                 percentile_filters = [f"{col} ≥ {min_pct}th %." for (cat, col), min_pct in filter_percentiles.items() if min_pct > 0]
                 if percentile_filters:
                     summary_parts.append("Percentiles: " + ", ".join(percentile_filters))
+                if expression:
+                    summary_parts.append(f"Expression: {expression.source}")
 
                 # Texte final
                 if summary_parts:
@@ -6097,25 +5011,20 @@ elif page == "Merged Data":
                 )
 
     #################################### Onglet 2 : Merged Indexes
-    with tab2:
-        # --- Sélection joueur pour Merged Indexes ---
-        df_merged["Player Display Name MI"] = df_merged.apply(
-            lambda row: f"{row['Player Known Name']} ({row['Player Name']})"
-            if pd.notna(row.get("Player Known Name")) and row["Player Known Name"].strip() != "" and row["Player Known Name"] != row["Player Name"]
-            else row["Player Name"],
-            axis=1
-        )       
-        df_merged.rename(columns=NAME_NORMALIZER, inplace=True)
-
+    with tab2, timings.tab("Merged Indexes"):
+        # colonnes déjà normalisées au chargement (prepare_dataset)
         # --- Selectors: player, season, competition, club [MERGED INDEXES] ---
-        display_names_mi = sorted(df_merged["Player Display Name MI"].dropna().unique())
-        display_to_player_mi = dict(zip(df_merged["Player Display Name MI"], df_merged["Player Name"]))
+        # Options = Player ID, libellé "Known Name (Player Name)" via format_func
+        id_to_display_mi = player_labels["merged"]
+        display_ids_mi = sorted(id_to_display_mi, key=id_to_display_mi.get)
 
-        player_display_name_mi = st.selectbox("Select a player", display_names_mi, key="mi_player_select")
-        player_name_mi = display_to_player_mi[player_display_name_mi]
+        player_id_mi = st.selectbox(
+            "Select a player", display_ids_mi, format_func=id_to_display_mi.get, key="mi_player_select"
+        )
 
         # Toutes les lignes du joueur
-        df_player_all_mi = df_merged[df_merged["Player Name"] == player_name_mi]
+        df_player_all_mi = df_merged[df_merged[PLAYER_ID] == player_id_mi]
+        player_name_mi = df_player_all_mi["Player Name"].iloc[0]
 
         # Tri correct des saisons 'YYYY/YYYY' (dernier = plus récent)
         def _season_key_mi(s):
@@ -6190,265 +5099,69 @@ elif page == "Merged Data":
         """
         st.markdown(title_html_mi, unsafe_allow_html=True)
 
+        # --- Template du radar technique (choisi sous le radar, conservé en session) ---
+        position_group_to_template = {
+            "Goalkeeper": "Goalkeeper",
+            "Central Defender": "Central Defender",
+            "Full Back": "Full Back",
+            "Midfielder": "Midfielder (CDM)",
+            "Attacking Midfielder": "Attacking Midfielder",
+            "Winger": "Winger",
+            "Striker": "Striker"
+        }
+        default_template_mi = position_group_to_template.get(row_mi.get("Position Group"), "Striker")
+        template_label_mi = f"radar_template_{row_mi.get('Player Name', 'Player')}_{season_mi}_{team_name_mi}".replace(" ", "_")
+        selected_template_mi = st.session_state.get(template_label_mi, default_template_mi)
+
+        # --- Radars et jauges indépendants : construits d'abord (skapp.reports), puis affichés
+        # dans l'ordre ; une erreur reste locale à son bloc ; figures gardées
+        # dans le cache disque par (joueur, club, saison, compétition) et version de la partition
+        key_mi = (
+            player_id_mi, row_mi.get("Team Name"), row_mi.get("Season Name"), row_mi.get("Competition Name"),
+            partition_version(snapshot, "merged", row_mi.get("Season Name"), row_mi.get("Competition Name")),
+        )
+        tasks_mi = {
+            **persisted_tasks("mi", key_mi, {
+                "physical": partial(
+                    physical_radar, row_mi, "mi_phy",
+                    load_peer_stats(snapshot, "mi_phy", peer_stats_version(snapshot, "mi_phy")),
+                    lazy(lambda: peer_frame("mi_phy", df_merged, pos_mi, season_mi)), player_name_mi,
+                ),
+            }),
+            **persisted_tasks("mi", key_mi + (selected_template_mi,), {
+                "technical": partial(
+                    technical_radar, row_mi, "mi_tech",
+                    metric_templates_tech[selected_template_mi], metric_labels_tech[selected_template_mi],
+                    load_peer_stats(snapshot, "mi_tech", peer_stats_version(snapshot, "mi_tech")),
+                    lazy(lambda: peer_frame("mi_tech", df_merged, pos_mi, row_mi["Season Name"])),
+                    row_mi.get("Player Name", "Player"),
+                ),
+            }),
+            **persisted_tasks("mi", key_mi, index_gauge_tasks(row_mi, index_peers(df_merged, row_mi))),
+        }
+        with timings.span("figure"):
+            results_mi = build_blocks(tasks_mi, lambda name: timings.span(f"figure:{name}"))
+
         # --- Tabs ---
         tab_radars_mi, tab_indexes_mi = st.tabs(["Radars", "Indexes"])
 
         # ========================== RADARS ===============================
-        with tab_radars_mi:
+        with tab_radars_mi, timings.tab("Radars"):
             col1, col2 = st.columns(2)
 
             # ---- RADAR PHYSIQUE ----
             with col1:
-                try:
-                    physical_metrics_mi = [
-                        "TOP 5 PSV-99", "HI Distance P90", "M/min P90",
-                        "HSR Distance P90", "Sprinting Distance P90", "Sprint Count P90", "High Acceleration Count P90"
-                    ]
-                    metrics_phys_labels_mi = [
-                        "TOP5 PSV-99", "HI Dist", "Tot Dist", "HSR Dist", "Sprint Dist", "Sprint Ct", "High Acc Ct"
-                    ]
-                    LIGUES_CIBLE = ["ITA - Serie A", "GER - 1. Bundesliga", "SPA - La Liga", "FRA - Ligue 1", "ENG - Premier League"]
-                    ref_phys_mi = df_merged[
-                        (df_merged["Competition Name"].isin(LIGUES_CIBLE)) &
-                        (df_merged["Position Group"] == pos_mi) &
-                        (df_merged["Season Name"].astype(str).str.contains(str(season_mi), na=False)) &
-                        (df_merged["Minutes"].astype(float) > 500)
-                    ]
-
-                    def pct_rank_mi(series, value):
-                        arr = series.dropna().values
-                        if len(arr) == 0:
-                            return 0.0
-                        lower = (arr < value).sum()
-                        equal = (arr == value).sum()
-                        return (lower + 0.5 * equal) / len(arr) * 100
-
-                    r_player_mi = [pct_rank_mi(ref_phys_mi[m], float(row_mi.get(m, 0))) for m in physical_metrics_mi]
-                    r_top5_mi = [pct_rank_mi(ref_phys_mi[m], ref_phys_mi[m].mean()) for m in physical_metrics_mi]
-                    raw_vals_mi = [row_mi.get(m, "NA") for m in physical_metrics_mi]
-                    r_player_closed_mi = r_player_mi + [r_player_mi[0]]
-                    r_top5_closed_mi = r_top5_mi + [r_top5_mi[0]]
-                    metrics_closed_mi = metrics_phys_labels_mi + [metrics_phys_labels_mi[0]]
-                    raw_closed_mi = raw_vals_mi + [raw_vals_mi[0]]
-
-                    fig = go.Figure()
-                    fig.add_trace(go.Scatterpolar(
-                        r=r_player_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='lines',
-                        fill='toself',
-                        line=dict(color='gold', width=2),
-                        fillcolor='rgba(255,215,0,0.3)',
-                        hoverinfo='skip',
-                        name=player_name_mi
-                    ))
-                    fig.add_trace(go.Scatterpolar(
-                        r=r_player_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='markers',
-                        hoverinfo='text',
-                        hovertext=[
-                            f"<b>{label}</b><br>Value: {v*90:.0f} m<br>Percentile: {r:.1f}%"
-                            if label == "Tot Dist"
-                            else f"<b>{label}</b><br>Value: {v:.2f}<br>Percentile: {r:.1f}%"
-                            for label, v, r in zip(metrics_closed_mi, raw_closed_mi, r_player_closed_mi)
-                        ],
-                        marker=dict(size=12, color='rgba(255,215,0,0)'),
-                        showlegend=False
-                    ))
-                    fig.add_trace(go.Scatterpolar(
-                        r=r_top5_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='lines',
-                        fill='toself',
-                        line=dict(color='lightgreen', width=2),
-                        fillcolor='rgba(144,238,144,0.3)',
-                        hoverinfo='skip',
-                        name='Top5 Average'
-                    ))
-                    fig.add_trace(go.Scatterpolar(
-                        r=r_top5_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='markers',
-                        hoverinfo='text',
-                        hovertext=[
-                            f"<b>{label}</b><br>Mean Percentile: {r:.1f}%" 
-                            for label, r in zip(metrics_closed_mi, r_top5_closed_mi)
-                        ],
-                        marker=dict(size=12, color='rgba(144,238,144,0)'),
-                        showlegend=False
-                    ))
-                    fig.update_layout(
-                        hovermode='closest',
-                        polar=dict(
-                            bgcolor='rgba(0,0,0,0)',
-                            radialaxis=dict(
-                                range=[0, 100],
-                                tickvals=[0, 25, 50, 75, 100],
-                                ticks='outside',
-                                showticklabels=True,
-                                ticksuffix='%',
-                                tickfont=dict(color='white'),
-                                gridcolor='gray'
-                            )
-                        ),
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font_color='white',
-                        showlegend=False,
-                        height=500
-                    )
+                fig, error = results_mi["physical"]
+                if error is None:
                     st.plotly_chart(fig, use_container_width=True)
-                except Exception as e:
-                    st.error(f"Erreur radar physique : {e}")
+                else:
+                    st.error(f"Erreur radar physique : {error}")
 
       ##------Radar Technique----##
     
             with col2:
-                try:
-                    pos_mi = row_mi.get("Position Group")
-                    player_name_mi = row_mi.get("Player Name", "Player")
-                    season_mi = row_mi.get("Season Name")
-                    team_name_mi = row_mi.get("Team Name", "")
-
-                    position_group_to_template = {
-                        "Goalkeeper": "Goalkeeper",
-                        "Central Defender": "Central Defender",
-                        "Full Back": "Full Back",
-                        "Midfielder": "Midfielder (CDM)",
-                        "Attacking Midfielder": "Attacking Midfielder",
-                        "Winger": "Winger",
-                        "Striker": "Striker"
-                    }
-                    default_template_mi = position_group_to_template.get(pos_mi, "Striker")
-                    template_label_mi = f"radar_template_{player_name_mi}_{season_mi}_{team_name_mi}".replace(" ", "_")
-
-                    selected_template_mi = st.session_state.get(template_label_mi, default_template_mi)
-                    template_mi = metric_templates_tech[selected_template_mi]
-                    labels_mi = metric_labels_tech[selected_template_mi]
-
-                    ref_tech_mi = df_merged[
-                        (df_merged["Position Group"] == pos_mi) &
-                        (df_merged["Season Name"] == row_mi["Season Name"]) &
-                        (df_merged["Competition Name"].isin(["ITA - Serie A", "GER - 1. Bundesliga", "SPA - La Liga", "FRA - Ligue 1", "ENG - Premier League"])) &
-                        (df_merged["Minutes"] >= 600)
-                    ]
-                    if ref_tech_mi.empty:
-                        ref_tech_mi = df_merged[
-                            (df_merged["Position Group"] == pos_mi) &
-                            (df_merged["Season Name"] == row_mi["Season Name"]) &
-                            (df_merged["Minutes"] >= 600)
-                        ]
-                    ref_tech_mi.rename(columns=NAME_NORMALIZER, inplace=True)
-
-                    inverse_metrics = ["Turnovers P90", "Dispossessions P90"]
-
-                    def pct_rank_mi(series, value):
-                        arr = series.dropna().values
-                        if len(arr) == 0: return 0.0
-                        lower = (arr < value).sum()
-                        equal = (arr == value).sum()
-                        return (lower + 0.5 * equal) / len(arr) * 100
-
-                    def _col(name): 
-                        return resolve_metric_col(ref_tech_mi.columns, name)
-
-                    def _row(name): 
-                        return resolve_metric_col(row_mi.index, name)
-
-                    r_tech_mi, r_avg_mi, raw_vals_mi, labels_kept = [], [], [], []
-                    for m, lab in zip(template_mi, labels_mi):
-                        try:
-                            mc = _col(m)           # colonne réelle dans ref_tech_mi
-                            mr = _row(m)           # clé réelle dans row_mi
-                            ser = ref_tech_mi[mc]
-                            val = row_mi[mr]
-                        except KeyError:
-                            continue  # saute les métriques introuvables dans le merged
-
-                        r   = 100 - pct_rank_mi(ser, val) if m in inverse_metrics else pct_rank_mi(ser, val)
-                        rav = 100 - pct_rank_mi(ser, ser.mean()) if m in inverse_metrics else pct_rank_mi(ser, ser.mean())
-
-                        r_tech_mi.append(r)
-                        r_avg_mi.append(rav)
-                        raw_vals_mi.append(val)
-                        labels_kept.append(lab)
-
-                    # mets aussi à jour les labels utilisés pour le radar fermé
-                    metrics_closed_mi = labels_kept + [labels_kept[0]]
-                    r_tech_closed_mi  = r_tech_mi + [r_tech_mi[0]]
-                    r_avg_closed_mi   = r_avg_mi + [r_avg_mi[0]]
-                    raw_closed_mi     = raw_vals_mi + [raw_vals_mi[0]]
-
-                    metrics_closed_mi = labels_mi + [labels_mi[0]]
-                    r_tech_closed_mi = r_tech_mi + [r_tech_mi[0]]
-                    r_avg_closed_mi = r_avg_mi + [r_avg_mi[0]]
-                    raw_closed_mi = raw_vals_mi + [raw_vals_mi[0]]
-
-                    fig_tech_mi = go.Figure()
-                    fig_tech_mi.add_trace(go.Scatterpolar(
-                        r=r_tech_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='lines',
-                        fill='toself',
-                        line=dict(color='gold', width=2),
-                        fillcolor='rgba(255,215,0,0.3)',
-                        hoverinfo='skip',
-                        name=player_name_mi
-                    ))
-                    fig_tech_mi.add_trace(go.Scatterpolar(
-                        r=r_tech_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='markers',
-                        hoverinfo='text',
-                        hovertext=[
-                            f"<b>{label}</b><br>Value: {v:.2f}<br>Percentile: {r:.1f}%"
-                            for label, v, r in zip(metrics_closed_mi, raw_closed_mi, r_tech_closed_mi)
-                        ],
-                        marker=dict(size=12, color='rgba(255,215,0,0)'),
-                        showlegend=False
-                    ))
-                    fig_tech_mi.add_trace(go.Scatterpolar(
-                        r=r_avg_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='lines',
-                        fill='toself',
-                        line=dict(color='lightgreen', width=2),
-                        fillcolor='rgba(144,238,144,0.3)',
-                        hoverinfo='skip',
-                        name='Top5 Average'
-                    ))
-                    fig_tech_mi.add_trace(go.Scatterpolar(
-                        r=r_avg_closed_mi,
-                        theta=metrics_closed_mi,
-                        mode='markers',
-                        hoverinfo='text',
-                        hovertext=[
-                            f"<b>{label}</b><br>Mean Percentile: {r:.1f}%" 
-                            for label, r in zip(metrics_closed_mi, r_avg_closed_mi)
-                        ],
-                        marker=dict(size=12, color='rgba(144,238,144,0)'),
-                        showlegend=False
-                    ))
-                    fig_tech_mi.update_layout(
-                        hovermode='closest',
-                        polar=dict(
-                            bgcolor='rgba(0,0,0,0)',
-                            radialaxis=dict(
-                                range=[0, 100],
-                                tickvals=[0, 25, 50, 75, 100],
-                                ticks='outside',
-                                showticklabels=True,
-                                ticksuffix='%',
-                                tickfont=dict(color='white'),
-                                gridcolor='gray'
-                            ),
-                            angularaxis=dict(rotation=90, direction="clockwise")
-                        ),
-                        paper_bgcolor='rgba(0,0,0,0)',
-                        font_color='white',
-                        showlegend=False,
-                        height=500
-                    )
+                fig_tech_mi, error = results_mi["technical"]
+                if error is None:
                     st.plotly_chart(fig_tech_mi, use_container_width=True)
 
                     # --- Selectbox sous le radar ---
@@ -6461,233 +5174,28 @@ elif page == "Merged Data":
                     if new_template_mi != selected_template_mi:
                         st.session_state[template_label_mi] = new_template_mi
                         st.rerun()
-
-                except Exception as e:
-                    st.error(f"Erreur radar technique : {e}")
+                else:
+                    st.error(f"Erreur radar technique : {error}")
                
         # ===================== INDEXES & TABLEAUX ==============================
-        with tab_indexes_mi:
-            try:
-                poste_map = {
-                    "Goalkeeper": "GK",
-                    "Central Defender": "CB",
-                    "Full Back": "FB",
-                    "Midfielder": "MID",
-                    "Attacking Midfielder": "AM",
-                    "Winger": "WING",
-                    "Striker": "ST"
-                }
-                pos_mi = row_mi.get("Position Group", "")
-                poste_mi = poste_map.get(pos_mi, "ST")
-                index_xphy_mi       = float(row_mi.get("xPhysical", 0))
-                index_xtech_def_mi  = float(row_mi.get(f"xTech {poste_mi} DEF (/100)", 0))
-                index_xtech_tech_mi = float(row_mi.get(f"xTech {poste_mi} TECH (/100)", 0))
-
-                df_peers_mi = df_merged[
-                    (df_merged["Position Group"] == pos_mi) &
-                    (df_merged["Season Name"] == row_mi["Season Name"]) &
-                    (df_merged["Competition Name"] == row_mi["Competition Name"]) &
-                    (df_merged["Minutes"] >= 600)
-                ]
-
-                def plot_gauge_mi(index_value, mean_peer, rank, total_peers, label):
-                    hue = 120 * (index_value / 100)
-                    bar_color = f"hsl({hue:.0f}, 75%, 50%)"
-                    fig = go.Figure(go.Indicator(
-                        mode="gauge+number",
-                        value=int(round(index_value)),
-                        number={'font': {'size': 48}},
-                        gauge={
-                            'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "white"},
-                            'bar': {'color': bar_color, 'thickness': 0.25},
-                            'bgcolor': "rgba(255,255,255,0)",
-                            'borderwidth': 0,
-                            'shape': "angular",
-                            'steps': [{'range': [0, 100], 'color': 'rgba(100,100,100,0.3)'}],
-                            'threshold': {
-                                'line': {'color': "white", 'width': 4},
-                                'thickness': 0.75,
-                                'value': mean_peer
-                            }
-                        },
-                        domain={'x': [0, 1], 'y': [0, 1]},
-                        title={'text': f"<b>{rank}ᵉ/{total_peers}</b>", 'font': {'size': 20}}
-                    ))
-                    fig.update_layout(
-                        margin={'t': 40, 'b': 0, 'l': 0, 'r': 0},
-                        paper_bgcolor="rgba(0,0,0,0)",
-                        height=300
-                    )
-                    return fig
-
-                c1, c2, c3 = st.columns(3)
-
-                # --- xPhysical ---
-                with c1:
-                    df_ranked_phy_mi = df_peers_mi.sort_values("xPhysical", ascending=False).reset_index(drop=True)
-                    if row_mi["Player Name"] in df_ranked_phy_mi["Player Name"].values:
-                        rank_phy_mi = int(df_ranked_phy_mi[df_ranked_phy_mi["Player Name"] == row_mi["Player Name"]].index[0] + 1)
-                    else:
-                        rank_phy_mi = "—"
-                    mean_val_phy_mi = df_peers_mi["xPhysical"].mean() if not df_peers_mi.empty else np.nan
-                    st.plotly_chart(plot_gauge_mi(index_xphy_mi, mean_val_phy_mi, rank_phy_mi, len(df_peers_mi), "xPhysical"), use_container_width=True)
-                    st.markdown("<div style='text-align:center; font-size:18px; margin-top:-40px;'><b>xPHY</b></div>", unsafe_allow_html=True)
-                    st.markdown(f"<div style='text-align:center; font-size:14px; margin-top:-26px; color:grey'>Average ({pos_mi} in {row_mi['Competition Name']}): {mean_val_phy_mi:.1f}</div>", unsafe_allow_html=True)
-
-                    # --- Détail xPhysical ---
-                    try:
-                        xphy_metric_map = {
-                            "TOP 5 PSV-99": ("psv99_top5", "TOP 5 PSV-99"),
-                            "HI Distance P90": ("hi_distance_full_all", "HI Distance P90"),
-                            "Total Distance P90": ("total_distance_full_all", "Total Distance P90"),
-                            "HSR Distance P90": ("hsr_distance_full_all", "HSR Distance P90"),
-                            "Sprinting Distance P90": ("sprint_distance_full_all", "Sprinting Distance P90"),
-                            "Sprint Count P90": ("sprint_count_full_all", "Sprint Count P90"),
-                            "High Acceleration Count P90": ("highaccel_count_full_all", "High Acceleration Count P90"),
-                        }
-                        detail_rows_mi = []
-                        total_pts_mi = 0
-                        total_max_mi = 0
-                        for label, (bar_key, raw_label) in xphy_metric_map.items():
-                            val = row_mi.get(label)
-                            score = 0
-                            max_score = 0
-                            if pd.notna(val):
-                                thresholds = threshold_dict1.get(bar_key, {}).get(pos_mi, [])
-                                for thresh in thresholds:
-                                    min_val = thresh.get("min")
-                                    max_val = thresh.get("max")
-                                    pts = thresh.get("score", 0)
-                                    if (min_val is None or val >= min_val) and (max_val is None or val < max_val):
-                                        score = pts
-                                        break
-                                max_score = max(t["score"] for t in threshold_dict1[bar_key][pos_mi]) if bar_key in threshold_dict1 and pos_mi in threshold_dict1[bar_key] else 0
-                            total_pts_mi += score
-                            total_max_mi += max_score
-                            detail_rows_mi.append({
-                                "Metric": raw_label,
-                                "Player Value": f"{val:.2f}" if pd.notna(val) else "NA",
-                                "Points": f"{score} / {max_score}"
-                            })
-                        index_val = row_mi.get("xPhysical", 0)
-                        detail_rows_mi.append({
-                            "Metric": "**Total**",
-                            "Player Value": "",
-                            "Points": f"**{total_pts_mi} / {total_max_mi}**"
-                        })
-                        detail_rows_mi.append({
-                            "Metric": "**xPhysical Index**",
-                            "Player Value": "",
-                            "Points": f"**{index_val:.0f}**"
-                        })
-                        st.markdown("##### xPhysical Details")
-                        st.dataframe(pd.DataFrame(detail_rows_mi).set_index("Metric"), use_container_width=True)
-                    except Exception as e:
-                        st.error(f"Erreur détails xPhysical : {e}")
-
-                # --- xTech DEF ---
-                with c2:
-                    colname_def_mi = f"xTech {poste_mi} DEF (/100)"
-                    df_ranked_def_mi = df_peers_mi.sort_values(colname_def_mi, ascending=False).reset_index(drop=True)
-                    if row_mi["Player Name"] in df_ranked_def_mi["Player Name"].values:
-                        rank_def_mi = int(df_ranked_def_mi[df_ranked_def_mi["Player Name"] == row_mi["Player Name"]].index[0] + 1)
-                    else:
-                        rank_def_mi = "—"
-                    mean_val_def_mi = df_peers_mi[colname_def_mi].mean() if not df_peers_mi.empty else np.nan
-                    st.plotly_chart(plot_gauge_mi(index_xtech_def_mi, mean_val_def_mi, rank_def_mi, len(df_peers_mi), "xTech DEF"), use_container_width=True)
-                    st.markdown("<div style='text-align:center; font-size:18px; margin-top:-40px;'><b>xDEF</b></div>", unsafe_allow_html=True)
-                    st.markdown(f"<div style='text-align:center; font-size:14px; margin-top:-26px; color:grey'>Average ({pos_mi} in {row_mi['Competition Name']}): {mean_val_def_mi:.1f}</div>", unsafe_allow_html=True)
-
-                    if pos_mi != "Goalkeeper":
-                        config = xtech_post_config.get(pos_mi)
-                        if config:
-                            metric_map = config["metric_map"]
-                            labels = config["labels"]
-                            metric_rows_mi = []
-                            for raw_col in config["def"]:
-                                note_col, scores = metric_map.get(raw_col, (None, None))
-                                if not note_col or raw_col not in df_merged.columns:
-                                    continue
-                                raw_val = row_mi.get(raw_col, None)
-                                note_val = row_mi.get(note_col, None)
-                                max_pts = max(scores)
-                                label = labels.get(raw_col, raw_col)
-                                metric_rows_mi.append({
-                                    "Metrics": label,
-                                    "Player Figures": f"{raw_val:.2f}" if pd.notna(raw_val) else "NA",
-                                    "Points": f"{note_val} / {max_pts}" if pd.notna(note_val) else f"0 / {max_pts}"
-                                })
-                            total_pts = sum(int(r["Points"].split("/")[0].strip()) for r in metric_rows_mi if "/" in r["Points"])
-                            total_max = sum(int(r["Points"].split("/")[1].strip()) for r in metric_rows_mi if "/" in r["Points"])
-                            metric_rows_mi.append({
-                                "Metrics": "**Total**",
-                                "Player Figures": "",
-                                "Points": f"**{total_pts} / {total_max}**"
-                            })
-                            index_val = row_mi.get("xDEF", None)
-                            if pd.notna(index_val):
-                                metric_rows_mi.append({
-                                    "Metrics": "**Index xDEF**",
-                                    "Player Figures": "",
-                                    "Points": f"**{index_val:.0f} / 100**"
-                                })
-                            df_def_mi = pd.DataFrame(metric_rows_mi).drop_duplicates(subset=["Metrics"], keep="first")
-                            st.markdown("##### xDef Details")
-                            st.dataframe(df_def_mi.set_index("Metrics"), use_container_width=True)
-                    else:
-                        st.info("No xDEF breakdown available for Goalkeepers.")
-
-                # --- xTech TECH ---
-                with c3:
-                    colname_tech_mi = f"xTech {poste_mi} TECH (/100)"
-                    df_ranked_tech_mi = df_peers_mi.sort_values(colname_tech_mi, ascending=False).reset_index(drop=True)
-                    if row_mi["Player Name"] in df_ranked_tech_mi["Player Name"].values:
-                        rank_tech_mi = int(df_ranked_tech_mi[df_ranked_tech_mi["Player Name"] == row_mi["Player Name"]].index[0] + 1)
-                    else:
-                        rank_tech_mi = "—"
-                    mean_val_tech_mi = df_peers_mi[colname_tech_mi].mean() if not df_peers_mi.empty else np.nan
-                    st.plotly_chart(plot_gauge_mi(index_xtech_tech_mi, mean_val_tech_mi, rank_tech_mi, len(df_peers_mi), "xTech TECH"), use_container_width=True)
-                    st.markdown("<div style='text-align:center; font-size:18px; margin-top:-40px;'><b>xTECH</b></div>", unsafe_allow_html=True)
-                    st.markdown(f"<div style='text-align:center; font-size:14px; margin-top:-26px; color:grey'>Average ({pos_mi} in {row_mi['Competition Name']}): {mean_val_tech_mi:.1f}</div>", unsafe_allow_html=True)
-
-                    if pos_mi != "Goalkeeper":
-                        config = xtech_post_config.get(pos_mi)
-                        if config:
-                            metric_map = config["metric_map"]
-                            labels = config["labels"]
-                            metric_rows_mi = []
-                            for raw_col in config["tech"]:
-                                note_col, scores = metric_map.get(raw_col, (None, None))
-                                if not note_col or raw_col not in df_merged.columns:
-                                    continue
-                                raw_val = row_mi.get(raw_col, None)
-                                note_val = row_mi.get(note_col, None)
-                                max_pts = max(scores)
-                                label = labels.get(raw_col, raw_col)
-                                metric_rows_mi.append({
-                                    "Metrics": label,
-                                    "Player Figures": f"{raw_val:.2f}" if pd.notna(raw_val) else "NA",
-                                    "Points": f"{note_val} / {max_pts}" if pd.notna(note_val) else f"0 / {max_pts}"
-                                })
-                            total_pts = sum(int(r["Points"].split("/")[0].strip()) for r in metric_rows_mi if "/" in r["Points"])
-                            total_max = sum(int(r["Points"].split("/")[1].strip()) for r in metric_rows_mi if "/" in r["Points"])
-                            metric_rows_mi.append({
-                                "Metrics": "**Total**",
-                                "Player Figures": "",
-                                "Points": f"**{total_pts} / {total_max}**"
-                            })
-                            index_val = row_mi.get("xTECH", None)
-                            if pd.notna(index_val):
-                                metric_rows_mi.append({
-                                    "Metrics": "**Index xTECH**",
-                                    "Player Figures": "",
-                                    "Points": f"**{index_val:.0f} / 100**"
-                                })
-                            df_tech_mi = pd.DataFrame(metric_rows_mi).drop_duplicates(subset=["Metrics"], keep="first")
-                            st.markdown("##### xTech Details")
-                            st.dataframe(df_tech_mi.set_index("Metrics"), use_container_width=True)
-                    else:
-                        st.info("No xTECH breakdown available for Goalkeepers.")
-
-            except Exception as e:
-                st.error(f"Erreur affichage jauges index : {e}")
+        with tab_indexes_mi, timings.tab("Indexes"):
+            pos_mi = row_mi.get("Position Group", "")
+            # la première jauge en erreur arrête l'affichage des suivantes
+            for col, label in zip(st.columns(3), ["xPHY", "xDEF", "xTECH"]):
+                gauge, error = results_mi[label]
+                if error is not None:
+                    st.error(f"Erreur affichage jauges index : {error}")
+                    break
+                with col:
+                    st.plotly_chart(gauge["figure"], use_container_width=True)
+                    st.markdown(f"<div style='text-align:center; font-size:18px; margin-top:-40px;'><b>{label}</b></div>", unsafe_allow_html=True)
+                    st.markdown(f"<div style='text-align:center; font-size:14px; margin-top:-26px; color:grey'>Average ({pos_mi} in {row_mi['Competition Name']}): {gauge['mean']:.1f}</div>", unsafe_allow_html=True)
+
+                    if gauge["details"] is not None:
+                        st.markdown(f"##### {gauge['details_title']}")
+                        st.dataframe(gauge["details"], use_container_width=True)
+                    elif pos_mi == "Goalkeeper":
+                        st.info(f"No {label} breakdown available for Goalkeepers.")
+
+rerun_done()
+finish_profile()
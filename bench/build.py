@@ -0,0 +1,191 @@
+"""Full snapshot rebuilds with each build engine, timed and compared.
+
+For each ``--scales`` data scale, the synthetic files are generated
+(`bench.pages.prepare`), then the snapshot is rebuilt from scratch
+(``full=True``) with each engine of `skapp.snapshot.ENGINES`, each in its own
+directory and from a copy of the same player registry.  The report gives per
+engine the best wall time of ``--repeat`` rebuilds and the time of the
+column-wise steps (ingest, scoring, ranking, percentiles), then the
+differences of the outputs against the pandas build: partition and peer files
+read back with pandas (values and dtypes, exactly) and the bytes of the Arrow
+files the app maps.  An engine that is not installed is reported as skipped.
+With ``--workers N`` (N > 1), a pandas build in N processes is added
+(``pandas-N``), with its slowest seasons, and compared the same way.
+
+Usage::
+
+    python -m bench.build [--scales 1 5] [--repeat 1] [--engines pandas polars] [--work bench_data]
+                          [--workers 4] [--out bench_build.json]
+"""
+
+import argparse
+import json
+import os
+import shutil
+import tempfile
+import time
+from collections import Counter
+
+import pandas as pd
+
+from bench.pages import _git_commit, prepare
+from skapp import snapshot
+from skapp.registry import REGISTRY_PATH
+
+
+def _timed_steps(steps: dict, totals: Counter) -> dict:
+    def wrap(name, fn):
+        def timed(*args, **kwargs):
+            t0 = time.perf_counter()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                totals[name] += time.perf_counter() - t0
+        return timed
+    return {name: wrap(name, fn) for name, fn in steps.items()}
+
+
+def build(engine: str, directory: str, registry: str, workers: int = 1) -> dict:
+    """Full rebuild with `engine` (in `workers` processes) into `directory`; wall time and time per step.
+
+    The step times of a parallel build only cover the main process.
+    """
+    totals = Counter()
+    steps = _timed_steps(snapshot._steps(engine), totals)
+    original = snapshot._steps
+    snapshot._steps = lambda name: steps
+    try:
+        t0 = time.perf_counter()
+        manifest = snapshot.refresh(directory=directory, registry_path=registry, full=True, engine=engine,
+                                    workers=workers)
+        seconds = time.perf_counter() - t0
+    finally:
+        snapshot._steps = original
+    return {"manifest": manifest, "seconds": seconds, "steps": dict(totals)}
+
+
+def _files(manifest: dict) -> list:
+    out = [p["file"] for d in snapshot.DATASETS for p in manifest["datasets"][d]["partitions"].values()]
+    return out + [e["file"] for g in manifest.get("peers", {}).values() for e in g.values()]
+
+
+def differences(reference: str, ref_manifest: dict, other: str, manifest: dict) -> list:
+    """(file, problem) of the outputs of `other` that differ from those of `reference`."""
+    problems = []
+    files, ref_files = _files(manifest), _files(ref_manifest)
+    problems += [(f, "missing") for f in sorted(set(ref_files) - set(files))]
+    problems += [(f, "extra") for f in sorted(set(files) - set(ref_files))]
+    for rel in sorted(set(files) & set(ref_files)):
+        try:
+            pd.testing.assert_frame_equal(
+                pd.read_parquet(os.path.join(reference, rel)), pd.read_parquet(os.path.join(other, rel)),
+                check_exact=True,
+            )
+        except AssertionError as exc:
+            problems.append((rel, str(exc).splitlines()[0][:200]))
+    for dataset in snapshot.DATASETS:
+        rel = f"{dataset}.arrow"
+        with open(os.path.join(reference, rel), "rb") as a, open(os.path.join(other, rel), "rb") as b:
+            if a.read() != b.read():
+                problems.append((rel, "Arrow bytes differ"))
+    return problems
+
+
+def run_scale(scale: float, work: str, engines, repeat: int, seed: int = 0, workers: int = 1) -> dict:
+    data = prepare(scale, work, seed)
+    cwd = os.getcwd()
+    os.chdir(data["directory"])
+    out = {"rows": data["rows"], "engines": {}}
+    dirs = {}
+    runs_of = [(engine, engine, 1) for engine in engines]
+    if workers > 1:
+        runs_of.append((f"pandas-{workers}", "pandas", workers))
+    try:
+        for name, engine, n in runs_of:
+            try:
+                snapshot._steps(engine)
+            except ImportError as exc:
+                out["engines"][name] = {"skipped": str(exc)}
+                continue
+            runs = []
+            for _ in range(max(repeat, 1)):
+                directory = tempfile.mkdtemp(prefix=f"build-{name}-")
+                registry = os.path.join(directory, "registry.csv")
+                if os.path.exists(REGISTRY_PATH):
+                    shutil.copy(REGISTRY_PATH, registry)
+                runs.append((build(engine, directory, registry, n), directory))
+            result, directory = min(runs, key=lambda r: r[0]["seconds"])
+            for _, d in runs:
+                if d != directory:
+                    shutil.rmtree(d, ignore_errors=True)
+            dirs[name] = (directory, result["manifest"])
+            report = result["manifest"]["refresh"]
+            out["engines"][name] = {
+                "seconds": round(result["seconds"], 3),
+                "steps_s": {k: round(v, 3) for k, v in sorted(result["steps"].items())},
+                "partitions": sum(len(result["manifest"]["datasets"][d]["partitions"]) for d in snapshot.DATASETS),
+                "failed": report["failed"],
+            }
+            if n > 1:
+                seasons = [(t["seconds"], f"{d} {s}") for d, ts in report["timings"]["seasons"].items()
+                           for s, t in ts.items()]
+                out["engines"][name]["slowest_seasons_s"] = {s: v for v, s in sorted(seasons, reverse=True)[:5]}
+        if "pandas" in dirs:
+            reference, ref_manifest = dirs["pandas"]
+            for engine, (directory, manifest) in dirs.items():
+                if engine != "pandas":
+                    problems = differences(reference, ref_manifest, directory, manifest)
+                    out["engines"][engine]["differences"] = [f"{f}: {p}" for f, p in problems]
+    finally:
+        os.chdir(cwd)
+        for directory, _ in dirs.values():
+            shutil.rmtree(directory, ignore_errors=True)
+    return out
+
+
+def run(scales, engines=snapshot.ENGINES, work: str = "bench_data", repeat: int = 1, seed: int = 0,
+        workers: int = 1) -> dict:
+    work = os.path.abspath(work)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(), "repeat": repeat,
+        "cpus": os.cpu_count(),
+        "scales": {f"{s:g}": run_scale(s, work, engines, repeat, seed, workers) for s in scales},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 5])
+    parser.add_argument("--repeat", type=int, default=1, help="best of N rebuilds per engine")
+    parser.add_argument("--engines", nargs="+", choices=snapshot.ENGINES, default=list(snapshot.ENGINES))
+    parser.add_argument("--work", default="bench_data", help="directory of the synthetic datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--workers", type=int, default=1, help="also build with pandas in N processes")
+    parser.add_argument("--out", default="bench_build.json")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, args.engines, args.work, args.repeat, args.seed, args.workers)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    for scale, result in report["scales"].items():
+        print(f"scale {scale}: {result['rows']} ({report['cpus']} CPUs)")
+        for engine, r in result["engines"].items():
+            if "skipped" in r:
+                print(f"  {engine:<8} skipped: {r['skipped']}")
+                continue
+            steps = "  ".join(f"{k} {v}s" for k, v in r["steps_s"].items())
+            print(f"  {engine:<8} {r['seconds']:>8.2f}s  {r['partitions']} partitions  ({steps})")
+            for dataset, seasons in r["failed"].items():
+                for season, error in seasons.items():
+                    print(f"    ! failed {dataset} {season}: {error}")
+            if "slowest_seasons_s" in r:
+                print("    slowest seasons: " + ", ".join(f"{s} {v}s" for s, v in r["slowest_seasons_s"].items()))
+            for problem in r.get("differences", [])[:10]:
+                print(f"    ! {problem}")
+            if "differences" in r and not r["differences"]:
+                print("    same files as the pandas build")
+    print(f"-> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,208 @@
+"""Micro-benchmarks of the computational cores of the app, with scaling curves.
+
+Each core (`CASES`) is timed on synthetic frames of 10k, 100k and 1M rows
+(``--rows``): percentile ranking (one live `pct_rank`, vectorised `pct_ranks`,
+the snapshot `materialize`), peer selection (`peer_frame`), xPhysical threshold
+scoring (`xphy_points`), ``Display Name`` construction, percentile filtering of
+the Player Search (with and without its quantile table, and a filter expression)
+and the two Top 50 builds.
+
+The frames are a season block of `skapp.synthetic` repeated up to the row
+count; the competitions of each copy are renamed, as if more leagues were
+covered, so that the peer groups and Top 50 partitions keep their size while
+the frame grows.  For each core the report gives the best time of ``--repeat``
+runs per size and the slope of log(time) against log(rows): ~1 for a path that
+is O(n) per interaction, ~0 for one that does not depend on the frame size.
+
+The JSON report (``--out``) can be compared with a previous one
+(``--compare old.json``) to catch regressions.
+
+Usage::
+
+    python -m bench.engine [--rows 10000 100000 1000000] [--repeat 3] [--cases pct_rank top50_xtechnical]
+                           [--out bench_engine.json] [--compare old.json]
+"""
+
+import argparse
+import json
+import platform
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench.pages import _git_commit
+from skapp import leaderboards, synthetic
+from skapp.data import display_names
+from skapp.filter_expr import compile_expression
+from skapp.filters import percentile_filter, quantile_table
+from skapp.metrics import NAME_NORMALIZER, XPHY_METRIC_MAP, resolve_metric_col, xphy_points
+from skapp.percentiles import PEER_GROUPS, TECH_RADAR_METRICS, materialize, pct_rank, pct_ranks, peer_frame
+from skapp.snapshot import XPHYSICAL_RANK
+
+ROWS = [10_000, 100_000, 1_000_000]
+POSITION = "Central Defender"
+SEASON = synthetic.SEASONS[-1]
+# Sliders d'un scout : trois métriques au 50e percentile
+XPHY_FILTERS = ["HI Distance P90", "Sprint Count P90", "M/min P90"]
+XTECH_FILTERS = ["Ball Recoveries P90", "Tackles And Interceptions P90", "Op Passes P90"]
+# Expression type d'un scout (champ "Filter expression")
+XTECH_EXPRESSION = "xTECH > 60 and Minutes >= 900 and xDEF above position p80"
+
+
+def _base(seed: int = 0) -> dict:
+    """One block of synthetic rows per dataset, every season, restricted to the columns the cores read."""
+    comps = synthetic.competitions(1)
+    players = synthetic.roster(0, len(comps), seed)
+    frames = {"xphysical": [], "xtechnical": []}
+    for season in range(len(synthetic.SEASONS)):
+        rng = np.random.default_rng([seed, 0, season])
+        frames["xphysical"].append(synthetic.xphysical_frame(players, season, comps, rng))
+        frames["xtechnical"].append(synthetic.xtechnical_frame(players, season, comps, rng))
+    sk = pd.concat(frames["xphysical"], ignore_index=True)
+    sb = pd.concat(frames["xtechnical"], ignore_index=True)
+    sb = sb.rename(columns={k: v for k, v in NAME_NORMALIZER.items() if k in sb.columns})
+
+    metrics = []
+    for m in TECH_RADAR_METRICS + XTECH_FILTERS:
+        try:
+            metrics.append(resolve_metric_col(sb.columns, m))
+        except KeyError:
+            continue
+    sb_cols = ["Player Name", "Player Known Name", "Team Name", "Competition Name", "Season Name",
+               "Position Group", "Minutes", "xDEF", "xTECH"]
+    sk_cols = ["Player", "Team", "Competition", "Season", "Position Group", "xPhysical"]
+    sk_cols += [label for label in XPHY_METRIC_MAP if label in sk.columns]
+    return {
+        "xphysical": sk[list(dict.fromkeys(sk_cols + XPHY_FILTERS))],
+        "xtechnical": sb[list(dict.fromkeys(sb_cols + metrics))],
+    }
+
+
+def scaled(base: dict, rows: int) -> dict:
+    """`base` repeated up to `rows` rows per dataset, with the competitions of each copy renamed."""
+    out = {}
+    for name, df in base.items():
+        comp_col = "Competition" if name == "xphysical" else "Competition Name"
+        take = np.resize(np.arange(len(df)), rows)
+        copy = np.arange(rows) // len(df)
+        big = df.iloc[take].reset_index(drop=True)
+        comp = big[comp_col].astype(str).to_numpy()
+        big[comp_col] = np.where(copy == 0, comp, comp + " (" + copy.astype(str) + ")")
+        if name == "xphysical":
+            # rank_xphysical de chaque partition (saison, compétition)
+            big[XPHYSICAL_RANK] = big.groupby(["Season", "Competition", "Position Group"])["xPhysical"].rank(
+                method="first", ascending=False, na_option="bottom"
+            ).astype("Int64")
+        out[name] = big
+    return out
+
+
+def _filters(metrics) -> dict:
+    return {("bench", m): 50 for m in metrics}
+
+
+# Nom -> (données de taille n) -> fonction sans argument à chronométrer
+CASES = {
+    "pct_rank": lambda d: (lambda: pct_rank(d["xtechnical"]["xDEF"], 60.0)),
+    "pct_ranks": lambda d: (lambda: pct_ranks(d["xtechnical"]["xDEF"], d["xtechnical"]["xDEF"])),
+    "materialize_xtech": lambda d: (lambda: materialize("xtech", d["xtechnical"], d["xtechnical"])),
+    "peer_frame": lambda d: (lambda: peer_frame("xtech", d["xtechnical"], POSITION, SEASON)),
+    "threshold_points": lambda d: (lambda: xphy_points(d["xphysical"])),
+    "display_names": lambda d: (lambda: display_names(d["xtechnical"])),
+    "percentile_filter_xphy": lambda d: (lambda: percentile_filter(d["xphysical"], _filters(XPHY_FILTERS))),
+    "percentile_filter_xtech": lambda d: (lambda: percentile_filter(d["xtechnical"], _filters(XTECH_FILTERS))),
+    "quantile_table_xtech": lambda d: (lambda: quantile_table(d["xtechnical"], XTECH_FILTERS)),
+    "percentile_filter_table_xtech": lambda d: (
+        lambda q=quantile_table(d["xtechnical"], XTECH_FILTERS):
+        percentile_filter(d["xtechnical"], _filters(XTECH_FILTERS), q)
+    ),
+    "filter_expression_xtech": lambda d: (
+        lambda e=compile_expression(XTECH_EXPRESSION, d["xtechnical"].columns): e.mask(d["xtechnical"])
+    ),
+    "top50_xphysical": lambda d: (
+        lambda: leaderboards.top50_xphysical(d["xphysical"], PEER_GROUPS["xphy"]["leagues"][0], SEASON, POSITION)
+    ),
+    "top50_xtechnical": lambda d: (
+        lambda: leaderboards.top50_xtechnical(
+            d["xtechnical"], PEER_GROUPS["xtech"]["leagues"][0], SEASON, POSITION, "xDEF", 600,
+        )
+    ),
+}
+
+
+def slope(rows, seconds) -> float:
+    """Exponent of the best power law fit of `seconds` against `rows` (log-log)."""
+    points = [(np.log(n), np.log(s)) for n, s in zip(rows, seconds) if s]
+    if len(points) < 2:
+        return float("nan")
+    x, y = np.array(points).T
+    return float(np.polyfit(x, y, 1)[0])
+
+
+def run(rows=ROWS, repeat: int = 3, cases=None, seed: int = 0) -> dict:
+    cases = list(cases or CASES)
+    base = _base(seed)
+    results = {case: {} for case in cases}
+    for n in rows:
+        data = scaled(base, n)
+        for case in cases:
+            fn = CASES[case](data)
+            best = []
+            for _ in range(repeat):
+                t0 = time.perf_counter()
+                fn()
+                best.append(time.perf_counter() - t0)
+            results[case][str(n)] = round(min(best) * 1000, 3)
+        del data
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+        "python": platform.python_version(), "pandas": pd.__version__, "numpy": np.__version__,
+        "repeat": repeat, "rows": list(rows),
+        "cases": {
+            case: {"ms": times, "slope": round(slope(rows, [times[str(n)] for n in rows]), 2)}
+            for case, times in results.items()
+        },
+    }
+
+
+def compare(old: dict, new: dict) -> list:
+    """(case, rows, old ms, new ms, ratio) of the sizes present in both reports."""
+    out = []
+    for case, result in new["cases"].items():
+        before = old.get("cases", {}).get(case, {}).get("ms", {})
+        for n, ms in result["ms"].items():
+            if before.get(n) and ms:
+                out.append((case, int(n), before[n], ms, round(ms / before[n], 2)))
+    return out
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=ROWS)
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per size")
+    parser.add_argument("--cases", nargs="+", choices=list(CASES))
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_engine.json")
+    parser.add_argument("--compare", help="previous report to compare the timings with")
+    args = parser.parse_args(argv)
+
+    report = run(args.rows, args.repeat, args.cases, args.seed)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    print(f"{'case':<30}" + "".join(f"{n:>12,}" for n in report["rows"]) + "   slope")
+    for case, result in report["cases"].items():
+        print(f"{case:<30}" + "".join(f"{result['ms'][str(n)]:>10.1f}ms" for n in report["rows"])
+              + f"   {result['slope']:.2f}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            old = json.load(fh)
+        print("\nvs", args.compare)
+        for case, n, before, after, ratio in compare(old, report):
+            flag = "  <- slower" if ratio > 1.2 else ""
+            print(f"  {case:<30} {n:>10,} rows  {before} ms -> {after} ms  x{ratio}{flag}")
+    print(f"-> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,180 @@
+"""Load test: N scouts using the app at once, each in its own AppTest process.
+
+The synthetic files of ``--scale`` are generated (`bench.pages.prepare`) and
+their snapshot built once; then ``--users`` worker processes each run
+``--sessions`` scout sessions back to back.  A session opens the app and
+follows the click script of one page (`SCRIPTS`, built from the steps of
+`bench.pages`), picked at random with the weights of `PAGE_MIX`; ``--think``
+adds a pause between clicks.  Every click is a rerun, timed.
+
+A worker process stands for one app server process: its sessions share its
+`st.cache_resource` / `st.cache_data` caches, while the workers only share the
+snapshot and disk cache files, as separate server processes would.
+
+The report gives the throughput (reruns per second over the whole run), the
+latency percentiles (overall and per page), the errors, and per worker its RSS
+after the first session, at the end, and their difference (memory growth).
+
+Usage::
+
+    python -m bench.load [--users 8] [--sessions 5] [--scale 1] [--think 0] [--work bench_data]
+                         [--out bench_load.json]
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+import random
+import resource
+import time
+from collections import defaultdict
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+from bench.pages import APP_SCRIPT, PAGE_TIMEOUT, STEPS, GridSelection, _git_commit, _page, _peak_rss_mb, prepare
+from skapp.snapshot import refresh
+
+# Part des sessions par page (un scout ouvre surtout xPhysical et le rapport Merged)
+PAGE_MIX = {"xPhysical": 0.4, "xTech/xDef": 0.3, "Merged Data": 0.3}
+# page -> [(étape, action)] : l'ouverture de l'app, puis les clics de la page
+SCRIPTS = {
+    page: [("open", lambda at, grid: None)] + ([("page", _page(page))] if page != STEPS[0][0] else [])
+    + [(name, action) for p, name, action in STEPS if p == page and name != "open"]
+    for page in dict.fromkeys(p for p, _, _ in STEPS)
+}
+
+
+def _rss_mb() -> float:
+    """Current RSS (Linux), peak RSS elsewhere."""
+    try:
+        with open("/proc/self/statm") as fh:
+            return round(int(fh.read().split()[1]) * resource.getpagesize() / 1024 ** 2, 1)
+    except OSError:
+        return _peak_rss_mb()
+
+
+def worker(index: int, directory: str, sessions: int, think: float, seed: int) -> dict:
+    """`sessions` scout sessions in this process; returns their reruns and the RSS after each session."""
+    from streamlit.testing.v1 import AppTest
+
+    os.chdir(directory)
+    rng = random.Random(f"{seed}-{index}")
+    pages, weights = list(PAGE_MIX), list(PAGE_MIX.values())
+    reruns, rss = [], []
+    with GridSelection() as grid:
+        for _ in range(sessions):
+            page = rng.choices(pages, weights)[0]
+            grid.on = False
+            at = AppTest.from_file(APP_SCRIPT, default_timeout=PAGE_TIMEOUT)
+            for name, action in SCRIPTS[page]:
+                if think:
+                    time.sleep(think)
+                errors, start, seconds = [], time.time(), None
+                try:
+                    action(at, grid)
+                    t0 = time.perf_counter()
+                    at.run()
+                    seconds = time.perf_counter() - t0
+                    errors = [e.value[:200] for e in at.exception] + [e.value[:200] for e in at.error]
+                except Exception as exc:  # clic impossible : noté, la session continue
+                    errors = [f"{type(exc).__name__}: {exc}"]
+                reruns.append({"page": page, "step": name, "start": start, "seconds": seconds, "errors": errors})
+            rss.append(_rss_mb())
+    return {"worker": index, "pid": os.getpid(), "reruns": reruns, "rss_mb": rss, "peak_rss_mb": _peak_rss_mb()}
+
+
+def _percentiles(seconds) -> dict:
+    ms = np.array(seconds) * 1000
+    if not len(ms):
+        return {"count": 0}
+    return {"count": len(ms), **{f"p{q}_ms": round(float(np.percentile(ms, q)), 1) for q in (50, 95, 99)},
+            "max_ms": round(float(ms.max()), 1)}
+
+
+def summarize(results: list, wall: float) -> dict:
+    reruns = [r for w in results for r in w["reruns"]]
+    timed = [r for r in reruns if r["seconds"] is not None]
+    by_page = defaultdict(list)
+    for r in timed:
+        by_page[r["page"]].append(r["seconds"])
+    errors = defaultdict(int)
+    for r in reruns:
+        for e in r["errors"]:
+            errors[f"{r['page']} {r['step']}: {e}"] += 1
+    return {
+        "reruns": len(reruns),
+        "sessions": sum(len(w["rss_mb"]) for w in results),
+        "wall_s": round(wall, 2),
+        "throughput_rps": round(len(timed) / wall, 2) if wall else None,
+        "latency": _percentiles([r["seconds"] for r in timed]),
+        "pages": {page: _percentiles(s) for page, s in sorted(by_page.items())},
+        "errors": dict(sorted(errors.items(), key=lambda e: -e[1])),
+        "workers": [
+            {
+                "worker": w["worker"], "sessions": len(w["rss_mb"]),
+                "rss_first_mb": w["rss_mb"][0] if w["rss_mb"] else None,
+                "rss_last_mb": w["rss_mb"][-1] if w["rss_mb"] else None,
+                "growth_mb": round(w["rss_mb"][-1] - w["rss_mb"][0], 1) if w["rss_mb"] else None,
+                "peak_rss_mb": w["peak_rss_mb"],
+            }
+            for w in sorted(results, key=lambda w: w["worker"])
+        ],
+    }
+
+
+def run(users: int = 8, sessions: int = 5, scale: float = 1.0, think: float = 0.0, work: str = "bench_data",
+        seed: int = 0) -> dict:
+    data = prepare(scale, os.path.abspath(work), seed)
+    cwd = os.getcwd()
+    os.chdir(data["directory"])
+    try:
+        refresh()  # snapshot construit une fois, avant les workers
+    finally:
+        os.chdir(cwd)
+    # spawn : pas de threads Streamlit hérités d'un fork
+    context = multiprocessing.get_context("spawn")
+    t0 = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=users, mp_context=context) as pool:
+        futures = [pool.submit(worker, i, data["directory"], sessions, think, seed) for i in range(users)]
+        results = [f.result() for f in futures]
+    wall = time.perf_counter() - t0
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+        "users": users, "sessions_per_user": sessions, "scale": scale, "think_s": think, "rows": data["rows"],
+        **summarize(results, wall),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--users", type=int, default=8, help="parallel worker processes")
+    parser.add_argument("--sessions", type=int, default=5, help="sessions per worker")
+    parser.add_argument("--scale", type=float, default=1.0)
+    parser.add_argument("--think", type=float, default=0.0, help="pause before each click (s)")
+    parser.add_argument("--work", default="bench_data", help="directory of the synthetic datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_load.json")
+    args = parser.parse_args(argv)
+
+    report = run(args.users, args.sessions, args.scale, args.think, args.work, args.seed)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    lat = report["latency"]
+    print(f"{report['users']} users x {report['sessions_per_user']} sessions, scale {report['scale']:g}: "
+          f"{report['reruns']} reruns in {report['wall_s']}s, {report['throughput_rps']} reruns/s")
+    print(f"  latency p50 {lat.get('p50_ms')} ms  p95 {lat.get('p95_ms')} ms  p99 {lat.get('p99_ms')} ms"
+          f"  max {lat.get('max_ms')} ms")
+    for page, p in report["pages"].items():
+        print(f"  {page:<12} {p['count']:>5} reruns  p50 {p['p50_ms']} ms  p95 {p['p95_ms']} ms")
+    for w in report["workers"]:
+        print(f"  worker {w['worker']}: RSS {w['rss_first_mb']} -> {w['rss_last_mb']} MB "
+              f"({w['growth_mb']:+} MB), peak {w['peak_rss_mb']} MB")
+    for error, count in list(report["errors"].items())[:10]:
+        print(f"  ! {count}x {error}")
+    print(f"-> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
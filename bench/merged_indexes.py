@@ -0,0 +1,138 @@
+"""Benchmark of the Merged Indexes blocks: one-call figures vs incremental construction.
+
+For a sample of merged rows, builds the physical radar, the technical radar
+and the three index gauges (`skapp.reports`) as the tab does, then again with
+each figure built the way the page used to (``go.Figure()``, one ``add_trace``
+per trace, then ``update_layout``), and reports the median wall-clock time per
+player and per block of both.  Both must produce the same figures.
+
+Usage::
+
+    python -m bench.merged_indexes [--dir snapshot] [--players 30] [--repeat 5]
+"""
+
+import argparse
+import json
+import statistics
+import time
+from collections import defaultdict
+from contextlib import contextmanager, nullcontext
+from functools import partial
+from types import SimpleNamespace
+
+import numpy as np
+import plotly.graph_objects as go
+
+from skapp import reports
+
+from skapp.metrics import NAME_NORMALIZER, metric_labels_tech, metric_templates_tech
+from skapp.percentiles import peer_frame
+from skapp.reports import index_gauge_tasks, index_peers, lazy, physical_radar, technical_radar
+from skapp.snapshot import SNAPSHOT_DIR, load_manifest, read_dataset, read_peer_stats
+
+TEMPLATES = {
+    "Goalkeeper": "Goalkeeper", "Central Defender": "Central Defender", "Full Back": "Full Back",
+    "Midfielder": "Midfielder (CDM)", "Attacking Midfielder": "Attacking Midfielder",
+    "Winger": "Winger", "Striker": "Striker",
+}
+
+
+def page_tasks(row, df_merged, stats_phy, stats_tech) -> dict:
+    """Same blocks as the Merged Indexes tab of the app."""
+    pos, season = row.get("Position Group"), row["Season Name"]
+    template = TEMPLATES.get(pos, "Striker")
+    return {
+        "physical": partial(
+            physical_radar, row, "mi_phy", stats_phy,
+            lazy(lambda: peer_frame("mi_phy", df_merged, pos, season)), row.get("Player Name"),
+        ),
+        "technical": partial(
+            technical_radar, row, "mi_tech", metric_templates_tech[template], metric_labels_tech[template],
+            stats_tech, lazy(lambda: peer_frame("mi_tech", df_merged, pos, season)), row.get("Player Name"),
+        ),
+        **index_gauge_tasks(row, index_peers(df_merged, row)),
+    }
+
+
+def incremental_figure(data=(), layout=None) -> go.Figure:
+    """Figure built trace by trace, then laid out (each step re-validates the whole figure)."""
+    fig = go.Figure()
+    for trace in data:
+        fig.add_trace(trace)
+    fig.update_layout(layout or {})
+    return fig
+
+
+@contextmanager
+def incremental_figures():
+    """`skapp.reports` builders using `incremental_figure` instead of one `go.Figure` call."""
+    real = reports.go
+    reports.go = SimpleNamespace(Figure=incremental_figure)
+    try:
+        yield
+    finally:
+        reports.go = real
+
+
+def _signature(value):
+    """Figure content (key order aside) and points table of a block."""
+    if hasattr(value, "to_json"):
+        return json.loads(value.to_json())
+    return json.loads(value["figure"].to_json()), str(value["details"])
+
+
+def run(directory: str = SNAPSHOT_DIR, players: int = 30, repeat: int = 5, seed: int = 0) -> dict:
+    manifest = load_manifest(directory)
+    df_merged = read_dataset(manifest, "merged", directory).rename(columns=NAME_NORMALIZER)
+    stats_phy = read_peer_stats(manifest, "mi_phy", directory)
+    stats_tech = read_peer_stats(manifest, "mi_tech", directory)
+    sample = np.random.default_rng(seed).choice(len(df_merged), size=min(players, len(df_merged)), replace=False)
+    rows = [df_merged.iloc[i] for i in sample]
+
+    modes = {"incremental": incremental_figures, "one call": nullcontext}
+    totals, blocks = {m: [] for m in modes}, {m: defaultdict(list) for m in modes}
+    for row in rows:
+        ref = {}
+        for mode, patch in modes.items():
+            runs = defaultdict(list)
+            with patch():
+                for _ in range(repeat):
+                    for name, fn in page_tasks(row, df_merged, stats_phy, stats_tech).items():
+                        t0 = time.perf_counter()
+                        value = fn()
+                        runs[name].append(time.perf_counter() - t0)
+                        if ref.setdefault(name, _signature(value)) != _signature(value):
+                            raise AssertionError(f"{mode} {name} differs for row {row.name}")
+            for name, values in runs.items():
+                blocks[mode][name].append(statistics.median(values))
+            totals[mode].append(sum(statistics.median(values) for values in runs.values()))
+
+    total = {m: statistics.median(v) for m, v in totals.items()}
+    return {
+        "rows": len(df_merged), "players": len(rows),
+        "total_ms": {m: round(v * 1000, 2) for m, v in total.items()},
+        "blocks_ms": {
+            name: {m: round(statistics.median(blocks[m][name]) * 1000, 2) for m in modes} for name in blocks["one call"]
+        },
+        "speedup": round(total["incremental"] / total["one call"], 2),
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--players", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args(argv)
+    report = run(args.dir, args.players, args.repeat)
+    total = report["total_ms"]
+    print(
+        f"{report['players']} players of {report['rows']} merged rows, per report: incremental "
+        f"{total['incremental']} ms, one call {total['one call']} ms (x{report['speedup']})"
+    )
+    for name, ms in report["blocks_ms"].items():
+        print(f"  {name:<12} {ms['incremental']:>8} ms -> {ms['one call']:>8} ms")
+
+
+if __name__ == "__main__":
+    main()
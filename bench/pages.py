@@ -0,0 +1,349 @@
+"""Headless page benchmarks of the app, driven by `streamlit.testing.v1.AppTest`.
+
+For each data scale, the synthetic files (`skapp.synthetic`) are generated in
+``--work/scale-<k>`` (kept between runs) and their snapshot is built; then the
+real script is driven through a scripted session per page (`STEPS`): load the
+Player Search data, move a percentile slider, switch the radar player and
+mode, change the Top 50 filters, open the Merged report and switch the Merged
+Indexes player.  Each step is a rerun: its latency is measured on a first,
+cold session (empty process caches) and on ``--repeat`` warm sessions
+(median).  Each scale runs in its own process, so the peak RSS after each step
+is that of the scale.
+
+The AgGrid iframe does not exist headlessly: for the report steps, `AgGrid` is
+wrapped so that the grid returns its first row as selected (what a click
+does in the browser).
+
+The JSON report (``--out``) keys steps by page and name, so two reports can be
+compared (``--compare old.json``).
+
+Usage::
+
+    python -m bench.pages [--scales 1 5 10] [--repeat 3] [--work bench_data] [--out bench_pages.json]
+                          [--compare old.json]
+"""
+
+import argparse
+import json
+import os
+import platform
+import resource
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from collections.abc import Mapping
+
+import streamlit
+import st_aggrid
+from streamlit.testing.v1.element_tree import Selectbox
+
+from skapp import synthetic
+from skapp.cache import DISK_CACHE_NAME
+from skapp.snapshot import SNAPSHOT_DIR, refresh
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+APP_SCRIPT = os.path.join(ROOT, "Streamlit SK.py")
+LOGO = os.path.join(ROOT, "AS Roma.png")
+PAGE_TIMEOUT = 600
+
+
+class _Selected(Mapping):
+    """Grid response whose selected rows are `rows` (the rest comes from the real response)."""
+
+    def __init__(self, response, rows):
+        self._response, self._rows = response, rows
+
+    def __getitem__(self, key):
+        return self._rows if key == "selected_rows" else self._response[key]
+
+    def __iter__(self):
+        return iter(self._response)
+
+    def __len__(self):
+        return len(self._response)
+
+    def __getattr__(self, name):
+        return self._rows if name == "selected_rows" else getattr(self._response, name)
+
+
+class GridSelection:
+    """Wraps `st_aggrid.AgGrid` (read by the script at each rerun); `on` selects the first row of the grids."""
+
+    def __init__(self):
+        self.on = False
+        self._aggrid = st_aggrid.AgGrid
+
+    def __enter__(self):
+        def aggrid(data, *args, **kwargs):
+            response = self._aggrid(data, *args, **kwargs)
+            if self.on and hasattr(data, "head") and len(data):
+                return _Selected(response, data.head(1))
+            return response
+        st_aggrid.AgGrid = aggrid
+        return self
+
+    def __exit__(self, *exc):
+        st_aggrid.AgGrid = self._aggrid
+
+
+# --- Interactions (une étape = un rerun)
+def _get(at, kind, key=None, label=None):
+    for widget in at.get(kind):
+        if (key is not None and widget.key == key) or (label is not None and widget.label == label):
+            return widget
+    raise LookupError(f"{kind} {key or label!r} not rendered")
+
+
+class _IndexedSelectbox(Selectbox):
+    # Selectbox.select_index prend le libellé affiché pour la valeur (faux avec un format_func, ex. Player ID ->
+    # nom) ; l'état envoyé au script n'est que l'index de l'option : on le fixe directement
+    @property
+    def index(self):
+        return self._option_index
+
+
+def _next_option(widget):
+    current = widget.index
+    widget.__class__ = _IndexedSelectbox
+    widget._option_index = min(1, len(widget.options) - 1) if current == 0 else 0
+
+
+def _page(label):
+    def step(at, grid):
+        at.sidebar.radio[0].set_value(label)
+    return step
+
+
+def _load(comps_key, button_key=None):
+    def step(at, grid):
+        for group in at.get("button_group"):  # toutes les positions
+            if "All" in group.options:
+                group.set_value(["All"])
+        comps = _get(at, "multiselect", key=comps_key)
+        comps.set_value(comps.options)
+        (_get(at, "button", key=button_key) if button_key else _get(at, "button", label="Load Data")).click()
+    return step
+
+
+def _percentile(prefix):
+    def step(at, grid):
+        slider = next(s for s in at.slider if (s.key or "").startswith(prefix))
+        lo, hi = slider.min, slider.max
+        mid = type(lo)((lo + hi) / 2) if isinstance(lo, int) else (lo + hi) / 2
+        slider.set_value((mid, hi) if isinstance(slider.value, tuple) else mid)
+    return step
+
+
+def _select(key=None, label=None):
+    def step(at, grid):
+        _next_option(_get(at, "selectbox", key=key, label=label))
+    return step
+
+
+def _check(label):
+    def step(at, grid):
+        _get(at, "checkbox", label=label).check()
+    return step
+
+
+def _set(kind, key, value):
+    def step(at, grid):
+        _get(at, kind, key=key).set_value(value)
+    return step
+
+
+def _select_row(at, grid):
+    grid.on = True
+
+
+def _open_report(at, grid):
+    _get(at, "button", key="merged_report_btn").click()
+
+
+def _close_report(at, grid):
+    grid.on = False
+
+
+STEPS = [
+    ("xPhysical", "open", lambda at, grid: None),
+    ("xPhysical", "ps_load", _load("xphy_ps_ui_comps", "xphy_ps_load_btn")),
+    ("xPhysical", "ps_percentile", _percentile("xphy_pop_")),
+    ("xPhysical", "radar_player", _select(key="radar_p1")),
+    ("xPhysical", "radar_compare", _check("Compare to a 2nd player")),
+    ("xPhysical", "index_player", _select(key="idx_p1")),
+    ("xPhysical", "top50_position", _select(key="top50_xphy_pos")),
+    ("xPhysical", "top50_competition", _select(key="top50_xphy_comp")),
+    ("xTech/xDef", "open", _page("xTech/xDef")),
+    ("xTech/xDef", "ps_load", _load("xtech_ps_ui_comps", "xtech_ps_load_btn")),
+    ("xTech/xDef", "ps_percentile", _percentile("xtech_pop_")),
+    ("xTech/xDef", "radar_player", _select(key="tech_radar_p1")),
+    ("xTech/xDef", "radar_template", _select(label="Choose a template")),
+    ("xTech/xDef", "radar_compare", _check("Compare to a 2nd player")),
+    ("xTech/xDef", "top50_position", _select(key="top50_xtech_pos")),
+    ("xTech/xDef", "top50_index", _select(key="top50_xtech_index")),
+    ("xTech/xDef", "top50_minutes", _set("slider", "top50_xtech_min", 900)),
+    ("Merged Data", "open", _page("Merged Data")),
+    ("Merged Data", "load", _load("ui_comps")),
+    ("Merged Data", "percentile", _percentile("pop_")),
+    ("Merged Data", "report_select", _select_row),
+    ("Merged Data", "report_open", _open_report),
+    ("Merged Data", "report_close", _close_report),
+    ("Merged Data", "mi_player", _select(key="mi_player_select")),
+]
+
+
+def _peak_rss_mb() -> float:
+    return round(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024, 1)  # Ko sous Linux
+
+
+def session(grid: GridSelection) -> list:
+    """One scripted session: latency, peak RSS and errors of each step."""
+    from streamlit.testing.v1 import AppTest
+
+    at = AppTest.from_file(APP_SCRIPT, default_timeout=PAGE_TIMEOUT)
+    results = []
+    for page, name, action in STEPS:
+        errors = []
+        seconds = None
+        try:
+            action(at, grid)
+            t0 = time.perf_counter()
+            at.run()
+            seconds = time.perf_counter() - t0
+            errors = [e.value[:200] for e in at.exception] + [e.value[:200] for e in at.error]
+        except Exception as exc:  # étape impossible (widget absent) : notée, la suite continue
+            errors = [f"{type(exc).__name__}: {exc}"]
+        results.append({"page": page, "step": name, "seconds": seconds, "peak_rss_mb": _peak_rss_mb(),
+                        "errors": errors})
+    return results
+
+
+def prepare(scale: float, work: str, seed: int = 0) -> dict:
+    """Synthetic files of `scale` in their directory (generated once) and a fresh snapshot."""
+    directory = os.path.join(work, f"scale-{scale:g}")
+    marker = os.path.join(directory, "synthetic.json")
+    if not os.path.exists(marker):
+        report = synthetic.generate(directory, scale, seed)
+        with open(marker, "w", encoding="utf-8") as fh:
+            json.dump(report, fh)
+    with open(marker, encoding="utf-8") as fh:
+        report = json.load(fh)
+    shutil.copy(LOGO, directory)
+    cache = os.path.join(directory, SNAPSHOT_DIR, DISK_CACHE_NAME)
+    for path in (cache, cache + "-wal", cache + "-shm"):  # caches disque d'un run précédent : run à froid
+        if os.path.exists(path):
+            os.remove(path)
+    return {"directory": directory, "rows": {d: report[d]["rows"] for d in ("xphysical", "xtechnical", "merged")}}
+
+
+def run_scale(scale: float, work: str, repeat: int, seed: int = 0) -> dict:
+    """Benchmark of one scale, in the current process."""
+    data = prepare(scale, work, seed)
+    os.chdir(data["directory"])
+    t0 = time.perf_counter()
+    refresh()
+    snapshot_seconds = time.perf_counter() - t0
+
+    with GridSelection() as grid:
+        runs = [session(grid) for _ in range(1 + repeat)]
+    steps = []
+    for i, (page, name, _) in enumerate(STEPS):
+        cold, warm = runs[0][i], [r[i]["seconds"] for r in runs[1:] if r[i]["seconds"] is not None]
+        steps.append({
+            "page": page, "step": name,
+            "cold_ms": None if cold["seconds"] is None else round(cold["seconds"] * 1000, 1),
+            "warm_ms": round(statistics.median(warm) * 1000, 1) if warm else None,
+            "peak_rss_mb": cold["peak_rss_mb"],
+            "errors": sorted({e for r in runs for e in r[i]["errors"]}),
+        })
+    return {
+        "scale": scale, "rows": data["rows"], "snapshot_s": round(snapshot_seconds, 3),
+        "peak_rss_mb": _peak_rss_mb(), "steps": steps,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(["git", "-C", ROOT, "rev-parse", "--short", "HEAD"], capture_output=True,
+                              text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(scales, work: str = "bench_data", repeat: int = 3, seed: int = 0) -> dict:
+    """Every scale in its own process; returns the report."""
+    work = os.path.abspath(work)
+    report = {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+        "python": platform.python_version(), "streamlit": streamlit.__version__,
+        "repeat": repeat, "scales": {},
+    }
+    for scale in scales:
+        with tempfile.NamedTemporaryFile(suffix=".json", delete=False) as fh:
+            result_path = fh.name
+        try:
+            subprocess.run(
+                [sys.executable, "-m", "bench.pages", "--worker", "--scales", str(scale), "--work", work,
+                 "--repeat", str(repeat), "--seed", str(seed), "--out", result_path],
+                cwd=ROOT, check=True,
+            )
+            with open(result_path, encoding="utf-8") as fh:
+                report["scales"][f"{scale:g}"] = json.load(fh)
+        finally:
+            os.remove(result_path)
+    return report
+
+
+def compare(old: dict, new: dict) -> list:
+    """(scale, page, step, old warm ms, new warm ms, ratio) of the steps present in both reports."""
+    rows = []
+    for scale, result in new["scales"].items():
+        before = {(s["page"], s["step"]): s for s in old.get("scales", {}).get(scale, {}).get("steps", [])}
+        for s in result["steps"]:
+            prev = before.get((s["page"], s["step"]))
+            if prev and prev["warm_ms"] and s["warm_ms"]:
+                rows.append((scale, s["page"], s["step"], prev["warm_ms"], s["warm_ms"],
+                             round(s["warm_ms"] / prev["warm_ms"], 2)))
+    return rows
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 5, 10])
+    parser.add_argument("--repeat", type=int, default=3, help="warm sessions after the cold one")
+    parser.add_argument("--work", default="bench_data", help="directory of the synthetic datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_pages.json")
+    parser.add_argument("--compare", help="previous report to compare the warm latencies with")
+    parser.add_argument("--worker", action="store_true", help=argparse.SUPPRESS)
+    args = parser.parse_args(argv)
+
+    if args.worker:
+        result = run_scale(args.scales[0], args.work, args.repeat, args.seed)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(result, fh)
+        return
+
+    report = run(args.scales, args.work, args.repeat, args.seed)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    for scale, result in report["scales"].items():
+        print(f"scale {scale}: {result['rows']}, snapshot {result['snapshot_s']}s, "
+              f"peak RSS {result['peak_rss_mb']} MB")
+        for s in result["steps"]:
+            flag = f"  ! {s['errors'][0]}" if s["errors"] else ""
+            print(f"  {s['page']:<12} {s['step']:<18} cold {s['cold_ms']} ms  warm {s['warm_ms']} ms"
+                  f"  rss {s['peak_rss_mb']} MB{flag}")
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as fh:
+            old = json.load(fh)
+        for scale, page, step, before, after, ratio in compare(old, report):
+            print(f"scale {scale} {page} {step}: {before} -> {after} ms (x{ratio})")
+    print(f"-> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
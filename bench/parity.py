@@ -0,0 +1,294 @@
+"""Golden outputs of the percentile, scoring and ranking engines, and their diff.
+
+``capture`` records, from the current implementation and a snapshot, what the
+scouts see for a fixed sample of players:
+
+* the radar percentile vectors and peer-mean percentiles of the xPhysical and
+  xTechnical pages (groups ``xphy`` / ``xtech``, `skapp.percentiles`);
+* the physical and technical radars of the Merged Indexes tab (player and Top 5
+  average vectors) and its three gauges: rank, peer mean and "Points" table
+  (`skapp.reports`);
+* the Top 50 orderings (Player IDs) of every position of the five reference
+  leagues for the latest season (`skapp.leaderboards`).
+
+``check`` recomputes the same outputs, for the same players, with the code and
+snapshot in place (a new engine, a rebuilt snapshot) and diffs them with the
+tolerance of their kind (`TOLERANCES`): percentiles and means within a small
+absolute / relative error, points tables, ranks and orderings exactly.
+
+Both commands also diff the page radars read from the snapshot against the
+live engine the pages used before materialization (`pct_rank` of the row
+and of the peer means among `peer_frame`), so a wrong materialization fails
+even when the golden file was captured from it.
+
+Usage::
+
+    python -m bench.parity capture [--dir snapshot] [--players 40] [--seed 0] [--out parity_golden.json]
+    python -m bench.parity check parity_golden.json [--dir snapshot]
+"""
+
+import argparse
+import json
+import math
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from bench.merged_indexes import TEMPLATES, page_tasks
+from bench.pages import _git_commit
+from skapp import leaderboards
+from skapp.data import prepare_dataset
+from skapp.metrics import graph_columns, metric_templates_tech, resolve_metric_col
+from skapp.percentiles import SB_TOP5, SK_TOP5, lookup_peer_means, lookup_percentiles, pct_rank, peer_frame
+from skapp.registry import PLAYER_ID
+from skapp.reports import build_blocks, lazy
+from skapp.snapshot import PARTITION_COLUMNS, SNAPSHOT_DIR, load_manifest, read_dataset, read_peer_stats
+from skapp.warmup import XTECH_TOP50_DEFAULT_INDEXES, XTECH_TOP50_INDEXES, XTECH_TOP50_MIN_MINUTES, latest_season
+
+PLAYERS = 40
+GOLDEN_PATH = "parity_golden.json"
+# kind -> (tolérance absolue, tolérance relative) ; None : égalité exacte
+TOLERANCES = {
+    "percentile": (1e-6, 0.0),  # points de percentile (0-100)
+    "mean": (0.0, 1e-9),
+    "points": None,
+    "rank": None,
+    "order": None,
+}
+# Métriques inversées du radar de la page xTechnical
+XTECH_PAGE_INVERSE = ["Turnovers P90", "Dispossessions P90", "Pass Into Danger Ratio"]
+# Colonnes identifiant une ligne (un joueur peut avoir plusieurs lignes par saison)
+ROW_KEYS = {
+    "xphysical": [PLAYER_ID, "Season", "Competition", "Team", "Position Group"],
+    "xtechnical": [PLAYER_ID, "Season Name", "Competition Name", "Team Name", "Position Group"],
+    "merged": [PLAYER_ID, "Season Name", "Competition Name", "Team Name", "Position Group"],
+}
+
+
+def load_frames(directory: str = SNAPSHOT_DIR) -> dict:
+    manifest = load_manifest(directory)
+    frames = {d: prepare_dataset(read_dataset(manifest, d, directory), d) for d in ROW_KEYS}
+    stats = {g: read_peer_stats(manifest, g, directory) for g in ("xphy", "xtech", "mi_phy", "mi_tech")}
+    return {"frames": frames, "stats": stats}
+
+
+def row_key(row, dataset: str) -> str:
+    return "|".join(str(row.get(c)) for c in ROW_KEYS[dataset])
+
+
+def sample(frames: dict, players: int = PLAYERS, seed: int = 0) -> dict:
+    """Row keys of `players` rows per dataset (seeded, independent of the row order)."""
+    out = {}
+    for dataset, df in frames.items():
+        keys = sorted(set(df.apply(row_key, axis=1, dataset=dataset)))
+        picked = np.random.default_rng(seed).choice(len(keys), size=min(players, len(keys)), replace=False)
+        out[dataset] = sorted(keys[i] for i in picked)
+    return out
+
+
+def _rows(df: pd.DataFrame, dataset: str, keys: list) -> dict:
+    index = df.apply(row_key, axis=1, dataset=dataset)
+    found = df[index.isin(set(keys))]
+    return {k: row for k, (_, row) in zip(index[found.index], found.iterrows())}
+
+
+def _floats(values) -> list:
+    return [None if v is None or pd.isna(v) else float(v) for v in values]
+
+
+def _table(df) -> dict:
+    return None if df is None else {str(k): {str(c): str(v) for c, v in r.items()} for k, r in df.iterrows()}
+
+
+def _live_radar(row, peers: pd.DataFrame, metrics, inverse) -> tuple:
+    """(player percentiles, peer means, percentiles of the means) ranked among `peers` by `pct_rank`."""
+    cols = [resolve_metric_col(peers.columns, m) for m in metrics]
+    flip = [m in inverse for m in metrics]
+    player = [pct_rank(peers[c], row[resolve_metric_col(row.index, m)]) for c, m in zip(cols, metrics)]
+    means = [peers[c].mean() for c in cols]
+    mean_pct = [pct_rank(peers[c], mean) for c, mean in zip(cols, means)]
+    return (
+        [100 - p if f else p for p, f in zip(player, flip)], means,
+        [100 - p if f else p for p, f in zip(mean_pct, flip)],
+    )
+
+
+def page_radars(data: dict, keys: dict, live: bool = False) -> dict:
+    """Percentile vectors and peer means of the xPhysical and xTechnical page radars.
+
+    With `live`, every value is recomputed among the peers (`_live_radar`)
+    instead of read from the snapshot.
+    """
+    out = {}
+    specs = (
+        ("xphysical", "xphy", "Season", lambda pos: graph_columns, ()),
+        ("xtechnical", "xtech", "Season Name",
+         lambda pos: metric_templates_tech[TEMPLATES.get(pos, "Striker")], XTECH_PAGE_INVERSE),
+    )
+    for dataset, group, season_col, metrics_of, inverse in specs:
+        df = data["frames"][dataset]
+        for key, row in _rows(df, dataset, keys[dataset]).items():
+            pos, season = row["Position Group"], row[season_col]
+            metrics = metrics_of(pos)
+            peers = lazy(lambda: peer_frame(group, df, pos, season))
+            name = f"{group}/{key}"
+            if live:
+                player, means, mean_pct = _live_radar(row, peers(), metrics, inverse)
+            else:
+                player = lookup_percentiles(row, group, metrics, peers=peers, inverse=inverse, peer_group=(pos, season))
+                # table des peers absente : la page calcule les moyennes en direct
+                means, mean_pct = (
+                    lookup_peer_means(data["stats"][group], pos, season, metrics, inverse=inverse)
+                    or _live_radar(row, peers(), metrics, inverse)[1:]
+                )
+            out[f"{name}/player"] = ("percentile", _floats(player))
+            out[f"{name}/mean"] = ("mean", _floats(means))
+            out[f"{name}/mean_pct"] = ("percentile", _floats(mean_pct))
+    return out
+
+
+def merged_indexes(data: dict, keys: dict) -> dict:
+    """Radars and gauges of the Merged Indexes tab."""
+    out = {}
+    df = data["frames"]["merged"]
+    for key, row in _rows(df, "merged", keys["merged"]).items():
+        results = build_blocks(page_tasks(row, df, data["stats"]["mi_phy"], data["stats"]["mi_tech"]))
+        name = f"mi/{key}"
+        for block, (value, error) in results.items():
+            if error is not None:
+                out[f"{name}/{block}/error"] = ("points", type(error).__name__)
+            elif block in ("physical", "technical"):
+                traces = value.data
+                out[f"{name}/{block}/player"] = ("percentile", _floats(traces[0].r) if traces else [])
+                out[f"{name}/{block}/average"] = ("percentile", _floats(traces[2].r) if traces else [])
+            else:
+                out[f"{name}/{block}/rank"] = ("rank", value["figure"].data[0].title.text)
+                out[f"{name}/{block}/mean"] = ("mean", _floats([value["mean"]]))
+                out[f"{name}/{block}/points"] = ("points", _table(value["details"]))
+    return out
+
+
+def top50(data: dict) -> dict:
+    """Player IDs of every Top 50 of the latest season of the reference leagues, in order."""
+    out = {}
+    for dataset, leagues in (("xphysical", SK_TOP5), ("xtechnical", SB_TOP5)):
+        df = data["frames"][dataset]
+        season_col, comp_col = PARTITION_COLUMNS[dataset]
+        season = latest_season(df[season_col].dropna().unique())
+        for competition in leagues:
+            part = df[(df[season_col] == season) & (df[comp_col] == competition)]
+            for position in sorted(part["Position Group"].dropna().unique().tolist()):
+                if dataset == "xphysical":
+                    board = leaderboards.top50_xphysical(df, competition, season, position)
+                    out[f"top50/{dataset}/{competition}/{position}"] = ("order", board[PLAYER_ID].tolist())
+                    continue
+                for index_col in XTECH_TOP50_INDEXES.get(position, XTECH_TOP50_DEFAULT_INDEXES):
+                    if index_col not in df.columns:
+                        continue
+                    board = leaderboards.top50_xtechnical(
+                        df, competition, season, position, index_col, XTECH_TOP50_MIN_MINUTES
+                    )
+                    out[f"top50/{dataset}/{competition}/{position}/{index_col}"] = ("order", board[PLAYER_ID].tolist())
+    return out
+
+
+def _json(raw: dict) -> dict:
+    return json.loads(json.dumps({name: {"kind": k, "value": v} for name, (k, v) in sorted(raw.items())},
+                                 default=lambda o: o.item() if hasattr(o, "item") else str(o)))
+
+
+def outputs(data: dict, keys: dict) -> dict:
+    """``{name: {"kind", "value"}}`` of every golden output, JSON-ready."""
+    return _json({**page_radars(data, keys), **merged_indexes(data, keys), **top50(data)})
+
+
+def live_diff(data: dict, keys: dict) -> list:
+    """`diff` of the live page radars against the ones read from the snapshot."""
+    return [
+        (f"live:{name}", kind, problem)
+        for name, kind, problem in diff(_json(page_radars(data, keys, live=True)), _json(page_radars(data, keys)))
+    ]
+
+
+def capture(directory: str = SNAPSHOT_DIR, players: int = PLAYERS, seed: int = 0) -> dict:
+    """Golden outputs, and the live differences of the page radars (a golden file needs none)."""
+    data = load_frames(directory)
+    keys = sample(data["frames"], players, seed)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(),
+        "players": players, "seed": seed, "sample": keys, "outputs": outputs(data, keys),
+        "live": [list(p) for p in live_diff(data, keys)],
+    }
+
+
+def _close(a, b, tolerance) -> bool:
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_close(x, y, tolerance) for x, y in zip(a, b))
+    if a is None or b is None:
+        return a is b
+    atol, rtol = tolerance
+    return (math.isnan(a) and math.isnan(b)) or abs(a - b) <= atol + rtol * abs(b)
+
+
+def diff(golden: dict, current: dict) -> list:
+    """(name, kind, problem) of the outputs that differ from `golden` beyond their tolerance."""
+    problems = []
+    for name, ref in golden.items():
+        new = current.get(name)
+        if new is None:
+            problems.append((name, ref["kind"], "missing"))
+            continue
+        tolerance = TOLERANCES[ref["kind"]]
+        same = new["value"] == ref["value"] if tolerance is None else _close(new["value"], ref["value"], tolerance)
+        if not same:
+            problems.append((name, ref["kind"], f"{ref['value']!r:.120} -> {new['value']!r:.120}"))
+    for name in current.keys() - golden.keys():
+        problems.append((name, current[name]["kind"], "new output"))
+    return problems
+
+
+def check(golden: dict, directory: str = SNAPSHOT_DIR) -> list:
+    data = load_frames(directory)
+    return diff(golden["outputs"], outputs(data, golden["sample"])) + live_diff(data, golden["sample"])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    sub = parser.add_subparsers(dest="command", required=True)
+    cap = sub.add_parser("capture", help="record the golden outputs of the current implementation")
+    cap.add_argument("--dir", default=SNAPSHOT_DIR)
+    cap.add_argument("--players", type=int, default=PLAYERS, help="sampled rows per dataset")
+    cap.add_argument("--seed", type=int, default=0)
+    cap.add_argument("--out", default=GOLDEN_PATH)
+    chk = sub.add_parser("check", help="diff the current outputs against a golden file")
+    chk.add_argument("golden", nargs="?", default=GOLDEN_PATH)
+    chk.add_argument("--dir", default=SNAPSHOT_DIR)
+    args = parser.parse_args(argv)
+
+    if args.command == "capture":
+        golden = capture(args.dir, args.players, args.seed)
+        for name, kind, problem in golden["live"]:
+            print(f"  {kind:<10} {name}: {problem}")
+        if golden["live"]:
+            print(f"{len(golden['live'])} page radar outputs differ from the live engine: no golden file written")
+            sys.exit(1)
+        with open(args.out, "w", encoding="utf-8") as fh:
+            json.dump(golden, fh, indent=1)
+        print(f"{len(golden['outputs'])} outputs -> {args.out} (page radars match the live engine)")
+        return
+
+    with open(args.golden, encoding="utf-8") as fh:
+        golden = json.load(fh)
+    problems = check(golden, args.dir)
+    for name, kind, problem in problems:
+        print(f"  {kind:<10} {name}: {problem}")
+    live = sum(name.startswith("live:") for name, _, _ in problems)
+    print(f"{len(golden['outputs']) - len(problems) + live}/{len(golden['outputs'])} outputs match"
+          f" (golden {golden['commit']} {golden['created']}), {live} live differences")
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
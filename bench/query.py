@@ -0,0 +1,157 @@
+"""Player Search queries with the in-memory pandas path and DuckDB, side by side.
+
+For each ``--scales`` data scale, the synthetic files are generated and their
+snapshot built (`bench.pages.prepare`); then every query of `QUERIES` (a grid
+query of one Player Search table: a season / competition scope, base filters
+and percentile thresholds, the grid columns) runs two ways:
+
+* ``pandas``: the path of the app, over the dataset mapped in memory
+  (`skapp.snapshot.map_dataset`, loaded once) and the selected rows (kept by
+  the app's load cache, taken once): `skapp.query.filter_frame` and the copy
+  of the result;
+* ``duckdb``: `skapp.query.search` over the partition files.
+
+The report gives per query and backend the best time of ``--repeat`` runs, the
+rows returned and whether both returned the same frame.  DuckDB is reported as
+skipped when it is not installed.
+
+Usage::
+
+    python -m bench.query [--scales 1 5] [--repeat 3] [--work bench_data] [--out bench_query.json]
+"""
+
+import argparse
+import json
+import os
+import time
+
+import pandas as pd
+
+from bench.pages import _git_commit, prepare
+from skapp import query
+from skapp.data import prepare_dataset
+from skapp.snapshot import PARTITION_COLUMNS, map_dataset, refresh
+from skapp.warmup import latest_season
+
+# Colonnes de la grille de chaque page
+GRID_COLUMNS = {
+    "xphysical": ["Player Name", "Team Name", "Competition", "Position Group", "Age", "xPhysical", "Player ID"],
+    "xtechnical": ["Player Name", "Team Name", "Competition Name", "Position Group", "Age", "Minutes",
+                   "xTECH", "xDEF", "Player ID"],
+    "merged": ["Player Name", "Team Name", "Age", "Position Group", "Season Name", "Competition Name", "Minutes",
+               "xPhysical", "xTECH", "xDEF", "Player ID"],
+}
+# Nom -> (dataset, saisons : "all" / "latest", filtres de `skapp.query.search`)
+QUERIES = {
+    "xphy_all": ("xphysical", "all", {}),
+    "xphy_all_filtered": ("xphysical", "all", {
+        "positions": ["Central Defender", "Full Back"], "age": (18, 27),
+        "percentiles": {"HI Distance P90": 50, "Sprint Count P90": 50, "M/min P90": 50},
+    }),
+    "xtech_all": ("xtechnical", "all", {}),
+    "xtech_all_filtered": ("xtechnical", "all", {
+        "positions": ["Central Defender"], "feet": ["Left Footed"], "age": (18, 30), "minutes": (600, 6000),
+        "percentiles": {"Ball Recoveries P90": 50, "Tackles And Interceptions P90": 50, "Op Passes P90": 50},
+    }),
+    "xtech_latest_filtered": ("xtechnical", "latest", {
+        "positions": ["Midfielder"], "minutes": (900, 6000), "percentiles": {"xTECH": 70},
+    }),
+    "merged_all_filtered": ("merged", "all", {
+        "age": (16, 23), "minutes": (600, 6000), "percentiles": {"xTECH": 50, "HI Distance P90": 50},
+    }),
+}
+
+
+def scope(manifest: dict, dataset: str, which: str) -> tuple:
+    """(seasons, competitions) of a query: every partition, or those of the latest season."""
+    parts = manifest["datasets"][dataset]["partitions"].values()
+    seasons = sorted({p["season"] for p in parts})
+    if which == "latest":
+        seasons = [latest_season(seasons)]
+    return seasons, sorted({p["competition"] for p in parts if p["season"] in seasons})
+
+
+def same_frame(a: pd.DataFrame, b: pd.DataFrame) -> bool:
+    """Same columns, rows (and row positions) and values (dtypes aside: nullable integers come back as floats
+    from DuckDB)."""
+    try:
+        pd.testing.assert_frame_equal(a, b, check_dtype=False, check_index_type=False)
+    except AssertionError:
+        return False
+    return True
+
+
+def run_scale(scale: float, work: str, repeat: int, seed: int = 0) -> dict:
+    data = prepare(scale, work, seed)
+    cwd = os.getcwd()
+    os.chdir(data["directory"])
+    try:
+        manifest = refresh()
+        memory = {d: prepare_dataset(map_dataset(manifest, d), d) for d in GRID_COLUMNS}
+        results = {}
+        for name, (dataset, which, filters) in QUERIES.items():
+            seasons, competitions = scope(manifest, dataset, which)
+            frames, entry = {}, {"dataset": dataset, "seasons": len(seasons), "competitions": len(competitions)}
+            season_col, comp_col = PARTITION_COLUMNS[dataset]
+            loaded = memory[dataset]
+            loaded = loaded[loaded[season_col].astype(str).isin(seasons) & loaded[comp_col].isin(competitions)]
+            runs = {
+                "pandas": lambda: query.filter_frame(loaded, dataset, columns=GRID_COLUMNS[dataset], **filters).copy(),
+                "duckdb": lambda: query.search(
+                    manifest, dataset, seasons, competitions, columns=GRID_COLUMNS[dataset], backend="duckdb",
+                    **filters,
+                ),
+            }
+            for backend, fn in runs.items():
+                if backend == "duckdb" and query.duckdb is None:
+                    entry[backend] = {"skipped": "duckdb not installed"}
+                    continue
+                best = []
+                for _ in range(max(repeat, 1)):
+                    t0 = time.perf_counter()
+                    frames[backend] = fn()
+                    best.append(time.perf_counter() - t0)
+                entry[backend] = {"ms": round(min(best) * 1000, 1), "rows": len(frames[backend])}
+            if len(frames) == len(runs):
+                entry["same"] = same_frame(*frames.values())
+            results[name] = entry
+    finally:
+        os.chdir(cwd)
+    return {"rows": data["rows"], "queries": results}
+
+
+def run(scales, work: str = "bench_data", repeat: int = 3, seed: int = 0) -> dict:
+    work = os.path.abspath(work)
+    return {
+        "created": time.strftime("%Y-%m-%dT%H:%M:%S"), "commit": _git_commit(), "repeat": repeat,
+        "duckdb": getattr(query.duckdb, "__version__", None),
+        "scales": {f"{s:g}": run_scale(s, work, repeat, seed) for s in scales},
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--scales", type=float, nargs="+", default=[1, 5])
+    parser.add_argument("--repeat", type=int, default=3, help="best of N runs per backend")
+    parser.add_argument("--work", default="bench_data", help="directory of the synthetic datasets")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--out", default="bench_query.json")
+    args = parser.parse_args(argv)
+
+    report = run(args.scales, args.work, args.repeat, args.seed)
+    with open(args.out, "w", encoding="utf-8") as fh:
+        json.dump(report, fh, indent=1)
+    for scale, result in report["scales"].items():
+        print(f"scale {scale}: {result['rows']}")
+        for name, q in result["queries"].items():
+            cells = []
+            for backend in ("pandas", "duckdb"):
+                r = q[backend]
+                cells.append(f"{backend} " + (r["skipped"] if "skipped" in r else f"{r['ms']:>8.1f} ms ({r['rows']} rows)"))
+            flag = "" if q.get("same", True) else "  ! results differ"
+            print(f"  {name:<24} " + "   ".join(cells) + flag)
+    print(f"-> {args.out}")
+
+
+if __name__ == "__main__":
+    main()
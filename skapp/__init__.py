@@ -0,0 +1,5 @@
+"""Data layer behind the SKApp Streamlit app (Streamlit SK.py).
+
+The app script itself cannot be imported (its file name contains a space), so
+everything that has to be shared with offline jobs lives in this package.
+"""
@@ -0,0 +1,296 @@
+"""Result caches shared by the sessions and the worker processes of the app.
+
+`st.session_state` is per session: a result stored there is computed and held
+once per scout.  Results that only depend on the snapshot and on a selection
+(the "Load Data" subsets of the Player Search pages) are stored once per
+process in a `SharedLRU`, bounded in bytes; sessions keep the key of their
+selection and read the shared value, which must be treated as read-only.
+The keys still used by active sessions are pinned (`skapp.sessions`): above
+the budget, unpinned entries are evicted first.
+
+`st.cache_data` and `SharedLRU` live in process memory and start cold after a
+restart.  Derived artifacts that are slow to rebuild (peer stats, leaderboards,
+report figures) are also written to a `DiskCache`, an SQLite file on the host
+read by every worker process.
+"""
+
+import functools
+import inspect
+import io
+import os
+import pickle
+import sqlite3
+import sys
+import threading
+import time
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+from plotly.basedatatypes import BaseFigure
+
+LOAD_CACHE_BYTES = 512 * 1024 ** 2
+DISK_CACHE_NAME = "cache.sqlite"
+DISK_CACHE_BYTES = 1024 ** 3
+# À incrémenter quand le calcul d'un artefact mis en cache disque change (figures, tableaux)
+DISK_CACHE_FORMAT = 1
+# Date de dernière lecture rafraîchie au plus une fois par intervalle (une lecture n'écrit pas à chaque fois)
+_TOUCH_SECONDS = 60
+
+_MISSING = object()
+
+
+def value_nbytes(value) -> int:
+    """Memory held by a cached value (deep size for DataFrames)."""
+    if isinstance(value, pd.DataFrame):
+        return int(value.memory_usage(index=True, deep=True).sum())
+    return sys.getsizeof(value)
+
+
+def selection_key(dataset: str, version, seasons, competitions) -> tuple:
+    """Key of a (seasons, competitions) selection: order and duplicates do not matter."""
+    return (
+        dataset, version,
+        tuple(sorted(set(seasons), key=str)), tuple(sorted(set(competitions), key=str)),
+    )
+
+
+class SharedLRU:
+    """Thread-safe LRU mapping evicting the least recently used entries above `max_bytes`.
+
+    `get_or_compute` runs `compute` once per missing key: concurrent callers of
+    the same key wait for the first one instead of computing it again.
+    """
+
+    def __init__(self, max_bytes: int, sizeof=value_nbytes):
+        self.max_bytes = max_bytes
+        self.sizeof = sizeof
+        self.pinned = frozenset()  # clés évincées en dernier (remplacé d'un bloc, lu sans verrou)
+        self.nbytes = 0
+        self.hits = self.misses = self.evictions = 0
+        self._items = OrderedDict()  # clé -> (valeur, taille)
+        self._pending = {}  # clé -> Event du calcul en cours
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._items)
+
+    def __contains__(self, key):
+        return key in self._items
+
+    def _hit(self, key):
+        self._items.move_to_end(key)
+        self.hits += 1
+        return self._items[key][0]
+
+    def get(self, key, default=None):
+        with self._lock:
+            return self._hit(key) if key in self._items else default
+
+    def put(self, key, value):
+        size = self.sizeof(value)
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+            if size > self.max_bytes:
+                return  # plus gros que tout le cache : servi sans être gardé
+            self._items[key] = (value, size)
+            self.nbytes += size
+            while self.nbytes > self.max_bytes:
+                pinned = self.pinned
+                victim = next((k for k in self._items if k not in pinned and k != key), None)
+                if victim is None:
+                    victim = next(iter(self._items))
+                self.nbytes -= self._items.pop(victim)[1]
+                self.evictions += 1
+
+    def discard(self, key):
+        with self._lock:
+            if key in self._items:
+                self.nbytes -= self._items.pop(key)[1]
+                self.evictions += 1
+
+    def nbytes_of(self, key) -> int:
+        """Size of the entry of `key` (0 when it is not cached)."""
+        with self._lock:
+            return self._items[key][1] if key in self._items else 0
+
+    def get_or_compute(self, key, compute):
+        while True:
+            with self._lock:
+                if key in self._items:
+                    return self._hit(key)
+                pending = self._pending.get(key)
+                if pending is None:
+                    pending = self._pending[key] = threading.Event()
+                    self.misses += 1
+                    break
+            # calcul en cours dans une autre session : on attend son résultat
+            # (s'il a échoué ou a déjà été évincé, la boucle relance le calcul)
+            pending.wait()
+        try:
+            value = compute()
+            self.put(key, value)
+        finally:
+            with self._lock:
+                self._pending.pop(key).set()
+        return value
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self.nbytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "entries": len(self._items), "bytes": self.nbytes, "max_bytes": self.max_bytes,
+                "hits": self.hits, "misses": self.misses, "evictions": self.evictions,
+            }
+
+
+def _figure(cls, spec):
+    return cls(spec, _validate=False)
+
+
+class _Pickler(pickle.Pickler):
+    # Figures Plotly stockées comme spec (dict) : elles ont été validées à leur construction, la relecture
+    # les reconstruit sans revalider (le pickle par défaut repasse toute la figure dans les validateurs)
+    def reducer_override(self, obj):
+        if isinstance(obj, BaseFigure):
+            return _figure, (type(obj), obj.to_dict())
+        return NotImplemented
+
+
+def _dumps(value) -> bytes:
+    buf = io.BytesIO()
+    _Pickler(buf, protocol=pickle.HIGHEST_PROTOCOL).dump(value)
+    return buf.getvalue()
+
+
+def _plain(key):
+    # np.int64(7) et 7 doivent donner la même clé
+    if isinstance(key, (tuple, list)):
+        return tuple(_plain(k) for k in key)
+    return key.item() if isinstance(key, np.generic) else key
+
+
+class DiskCache:
+    """SQLite cache of pickled results, shared by the worker processes of one host.
+
+    Survives restarts and redeploys: keys carry the dataset / partition version
+    they were computed from, so entries of an old snapshot are never read again
+    and age out.  The database runs in WAL mode (readers do not block the
+    writer); above `max_bytes` the least recently read entries are deleted.  A
+    cache error is a miss: `get_or_compute` then just computes the value.
+    """
+
+    def __init__(self, path: str, max_bytes: int = DISK_CACHE_BYTES):
+        self.path = path
+        self.max_bytes = max_bytes
+        self._local = threading.local()  # une connexion par thread
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+        with self._connect() as conn:
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS entries ("
+                "key TEXT PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, accessed REAL NOT NULL)"
+            )
+            conn.execute("CREATE INDEX IF NOT EXISTS entries_accessed ON entries (accessed)")
+
+    def _connect(self) -> sqlite3.Connection:
+        conn = getattr(self._local, "conn", None)
+        if conn is None:
+            conn = sqlite3.connect(self.path, timeout=30)
+            conn.execute("PRAGMA journal_mode=WAL")
+            conn.execute("PRAGMA synchronous=NORMAL")
+            self._local.conn = conn
+        return conn
+
+    @staticmethod
+    def _key(key) -> str:
+        return repr((DISK_CACHE_FORMAT, _plain(key)))
+
+    def get(self, key, default=None):
+        try:
+            with self._connect() as conn:
+                found = conn.execute(
+                    "SELECT value, accessed FROM entries WHERE key = ?", (self._key(key),)
+                ).fetchone()
+                if found is None:
+                    return default
+                now = time.time()
+                if now - found[1] > _TOUCH_SECONDS:
+                    conn.execute("UPDATE entries SET accessed = ? WHERE key = ?", (now, self._key(key)))
+            return pickle.loads(found[0])
+        except (sqlite3.Error, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+            return default
+
+    def put(self, key, value):
+        try:
+            blob = _dumps(value)
+        except (pickle.PicklingError, TypeError, AttributeError):
+            return
+        if len(blob) > self.max_bytes:
+            return
+        try:
+            with self._connect() as conn:
+                conn.execute(
+                    "INSERT OR REPLACE INTO entries (key, value, size, accessed) VALUES (?, ?, ?, ?)",
+                    (self._key(key), blob, len(blob), time.time()),
+                )
+                self._evict(conn)
+        except sqlite3.Error:
+            pass
+
+    def _evict(self, conn):
+        excess = conn.execute("SELECT COALESCE(SUM(size), 0) FROM entries").fetchone()[0] - self.max_bytes
+        if excess <= 0:
+            return
+        victims = []
+        for key, size in conn.execute("SELECT key, size FROM entries ORDER BY accessed"):
+            victims.append((key,))
+            excess -= size
+            if excess <= 0:
+                break
+        conn.executemany("DELETE FROM entries WHERE key = ?", victims)
+
+    def get_or_compute(self, key, compute):
+        value = self.get(key, _MISSING)
+        if value is _MISSING:
+            value = compute()
+            self.put(key, value)
+        return value
+
+    def clear(self):
+        with self._connect() as conn:
+            conn.execute("DELETE FROM entries")
+
+    def stats(self) -> dict:
+        with self._connect() as conn:
+            entries, nbytes = conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM entries").fetchone()
+        return {"entries": entries, "bytes": nbytes, "max_bytes": self.max_bytes, "path": self.path}
+
+
+def persisted_key(name: str, *args) -> tuple:
+    """Key of a `persisted` function call (lets a job fill the cache ahead of the app)."""
+    return (name,) + args
+
+
+def persisted(cache):
+    """Decorator: results of the function read from / written to `cache()` (a `DiskCache`).
+
+    The key is the function name and its arguments, except those starting with
+    an underscore (the `st.cache_data` convention: ``_df`` frames are not part
+    of the key, a ``version`` argument is).
+    """
+    def decorate(fn):
+        sig = inspect.signature(fn)
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            bound = sig.bind(*args, **kwargs)
+            bound.apply_defaults()
+            key = persisted_key(fn.__qualname__, *(v for k, v in bound.arguments.items() if not k.startswith("_")))
+            return cache().get_or_compute(key, lambda: fn(*args, **kwargs))
+        return wrapper
+    return decorate
@@ -0,0 +1,92 @@
+"""CSV readers for the three datasets used by the app.
+
+The app does not read the CSVs directly: it loads the partitioned snapshot built
+from them by `skapp.snapshot`, which calls these readers; offline jobs
+(`skapp.merge`) call them as well.  `prepare_dataset` applies the clean-ups the
+app expects on a loaded snapshot dataset.
+"""
+
+import os
+import re
+import uuid
+import warnings
+
+import pandas as pd
+
+from skapp.metrics import NAME_NORMALIZER
+
+XPHYSICAL_PATH = "SK_All.csv"
+XTECHNICAL_PATH = "SB_All.csv"
+MERGED_PATH = "SB_SK_MERGED.csv"
+
+
+def temp_path(path: str) -> str:
+    """Temporary file name beside `path`, unique per process and call, for a write then `os.replace`."""
+    return f"{path}.{os.getpid()}.{uuid.uuid4().hex[:12]}.tmp"
+
+
+def shorten_season(s):
+    s = str(s)
+    if re.match(r'^\d{4}/\d{4}$', s):
+        y1, y2 = s.split('/')
+        return f"{y1[-2:]}/{y2[-2:]}"
+    return s
+
+
+def read_xphysical(path: str = XPHYSICAL_PATH) -> pd.DataFrame:
+    df = pd.read_csv(path, sep=",")
+    df.columns = df.columns.str.strip()
+    return df
+
+
+def read_xtechnical(path: str = XTECHNICAL_PATH) -> pd.DataFrame:
+    df_tech = pd.read_csv(path, sep=",")
+    df_tech.columns = df_tech.columns.str.strip()
+    df_tech["season_short"] = df_tech["Season Name"].apply(shorten_season)
+    df_tech["Display Name"] = display_names(df_tech)
+    return df_tech
+
+
+def display_names(df: pd.DataFrame) -> pd.Series:
+    """'Known Name (Player Name)' when the known name differs, else the player name."""
+    return df.apply(
+        lambda row: f"{row['Player Known Name']} ({row['Player Name']})"
+        if pd.notna(row.get("Player Known Name")) and row["Player Known Name"] != row["Player Name"]
+        else row["Player Name"],
+        axis=1
+    )
+
+
+def read_merged(path: str = MERGED_PATH) -> pd.DataFrame:
+    df_merged = pd.read_csv(path)
+    df_merged.columns = df_merged.columns.str.strip()
+    return df_merged
+
+
+# --- Normalisation des noms (appliquée aux bons DFs, NAME_NORMALIZER : skapp.metrics)
+def normalize_cols(_df):
+    if _df is None:
+        return
+    _df.columns = _df.columns.str.strip()
+    rename_map = {k: v for k, v in NAME_NORMALIZER.items() if k in _df.columns}
+    if rename_map:
+        _df.rename(columns=rename_map, inplace=True)
+
+
+def prepare_dataset(df: pd.DataFrame, dataset: str) -> pd.DataFrame:
+    """Clean-ups of a loaded dataset, done once (the app then shares the frame read-only)."""
+    # Appliquer sur TOUS les DFs utilisés par le radar technique/merged
+    normalize_cols(df)
+    if dataset == "xtechnical":
+        # Nettoyage éventuel des colonnes cibles xTechnical
+        for col in ("Prefered Foot", "Player Name", "Position Group", "Competition Name"):
+            df[col] = df[col].str.strip()
+    elif dataset == "xphysical":
+        # Alias (pour affichage/exports + TM) ; une frame mappée a un bloc par colonne (skapp.snapshot.map_dataset) :
+        # la fragmentation est voulue, l'avertissement de pandas ne s'applique pas
+        with warnings.catch_warnings():
+            warnings.simplefilter("ignore", pd.errors.PerformanceWarning)
+            for alias, col in (("Player Name", "Player"), ("Team Name", "Team"), ("Competition Name", "Competition")):
+                if alias not in df.columns and col in df.columns:
+                    df[alias] = df[col]
+    return df
@@ -0,0 +1,358 @@
+"""Filter expressions of the Player Search tables.
+
+A scout types a condition the sliders cannot express, e.g.::
+
+    xTECH > 70 and Age < 23 and Minutes >= 900 and HSR Distance P90 above position p80
+
+Grammar (keywords are case-insensitive)::
+
+    expr       := term (("or" | "|") term)*
+    term       := factor (("and" | "&") factor)*
+    factor     := ("not" | "~") factor | "(" expr ")" | comparison
+    comparison := sum op sum          op: > >= < <= == = != above (>=) below (<=)
+    sum        := product (("+" | "-") product)*
+    product    := operand (("*" | "/") operand)*
+    operand    := metric | number | "text" | [position] p<0-100> | "(" sum ")"
+
+Metric names are the columns of the frame, matched case-insensitively, longest
+name first (``TOP 5 PSV-99``, ``xTech GK Save (/100)``), or the display names
+of `skapp.metrics._METRIC_ALIASES`; a name can also be written between
+backticks.  ``p80`` is the 80th percentile of the metric on the other side of
+the comparison over the rows filtered, ``position p80`` the same within the
+row's position group.  Text only compares (``==`` / ``!=``) with a column, e.g.
+``Prefered Foot == "Left Footed"``.
+
+A missing value makes a comparison unknown, and an unknown condition never
+selects the row: ``Age != 23`` and ``not Age > 23`` leave out the rows without
+an age.  ``and`` / ``or`` follow three-valued logic (``Age > 23 or xTECH > 70``
+keeps a row without an age when its xTECH passes).
+
+`compile_expression` parses and checks an expression against the columns in one
+pass (`FilterExpressionError` gives the position of the problem); the
+`Expression` evaluates to a boolean mask with vectorized array operations, the
+arithmetic of each comparison with numexpr when it is installed.
+"""
+
+import difflib
+import functools
+import re
+
+import numpy as np
+import pandas as pd
+
+from skapp.metrics import _METRIC_ALIASES, resolve_metric_col
+
+try:
+    import numexpr
+except ImportError:  # dépendance optionnelle : évaluation numpy
+    numexpr = None
+
+POSITION_COLUMN = "Position Group"
+
+_COMPARISONS = {">": ">", ">=": ">=", "<": "<", "<=": "<=", "==": "==", "=": "==", "!=": "!=",
+                "above": ">=", "below": "<="}
+_SYMBOLS = re.compile(r">=|<=|==|!=|[><=&|~()+\-*/]")
+_NUMBER = re.compile(r"[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?")
+_PERCENTILE = re.compile(r"(position\s+)?p(\d{1,3})(?![\w.])", re.IGNORECASE)
+_WORD = re.compile(r"[A-Za-z_]+")
+_NUMPY_OPS = {
+    ">": np.greater, ">=": np.greater_equal, "<": np.less, "<=": np.less_equal,
+    "==": np.equal, "!=": np.not_equal, "+": np.add, "-": np.subtract, "*": np.multiply, "/": np.divide,
+}
+
+
+class FilterExpressionError(ValueError):
+    """Invalid expression; `position` is the offset of the problem in the text."""
+
+    def __init__(self, message: str, position: int = None):
+        super().__init__(message if position is None else f"{message} (at character {position + 1})")
+        self.position = position
+
+
+class _Parser:
+    def __init__(self, text: str, columns):
+        self.text = text
+        self.pos = 0
+        self.columns = list(columns)
+        names = {c: c for c in self.columns}
+        for label, candidates in _METRIC_ALIASES.items():
+            for name in (label, *candidates):
+                try:
+                    names.setdefault(name, resolve_metric_col(self.columns, label))
+                except KeyError:
+                    pass
+        # noms en minuscules, les plus longs d'abord ("TOP 5 PSV-99" avant "PSV-99")
+        self.names = sorted(((n.lower(), c) for n, c in names.items()), key=lambda nc: -len(nc[0]))
+
+    # --- lexique
+    def _skip(self):
+        while self.pos < len(self.text) and self.text[self.pos].isspace():
+            self.pos += 1
+
+    def _keyword(self, *words):
+        self._skip()
+        m = _WORD.match(self.text, self.pos)
+        if m and m.group().lower() in words:
+            self.pos = m.end()
+            return m.group().lower()
+        return None
+
+    def _symbol(self, *symbols):
+        self._skip()
+        m = _SYMBOLS.match(self.text, self.pos)
+        if m and m.group() in symbols:
+            self.pos = m.end()
+            return m.group()
+        return None
+
+    def _error(self, message):
+        raise FilterExpressionError(message, min(self.pos, len(self.text)))
+
+    def _name(self):
+        self._skip()
+        if self.text.startswith("`", self.pos):
+            end = self.text.find("`", self.pos + 1)
+            if end < 0:
+                self._error("Unclosed `")
+            name = self.text[self.pos + 1:end]
+            try:
+                column = resolve_metric_col(self.columns, name)
+            except KeyError:
+                self._unknown(name)
+            self.pos = end + 1
+            return column
+        lower = self.text.lower()
+        for name, column in self.names:
+            end = self.pos + len(name)
+            if lower.startswith(name, self.pos) and (end == len(lower) or not (lower[end].isalnum() or lower[end] == "_")):
+                self.pos = end
+                return column
+        return None
+
+    def _unknown(self, name):
+        close = difflib.get_close_matches(name, self.columns, n=3, cutoff=0.6)
+        hint = f"; did you mean {', '.join(repr(c) for c in close)}?" if close else ""
+        self._error(f"Unknown metric {name!r}{hint}")
+
+    # --- grammaire
+    def parse(self):
+        if not self.text.strip():
+            self._error("Empty expression")
+        node = self.expr()
+        self._skip()
+        if self.pos < len(self.text):
+            self._error(f"Unexpected {self.text[self.pos:self.pos + 20]!r}")
+        return node
+
+    def expr(self):
+        node = self.term()
+        while self._keyword("or") or self._symbol("|"):
+            node = ("or", node, self.term())
+        return node
+
+    def term(self):
+        node = self.factor()
+        while self._keyword("and") or self._symbol("&"):
+            node = ("and", node, self.factor())
+        return node
+
+    def factor(self):
+        if self._keyword("not") or self._symbol("~"):
+            return ("not", self.factor())
+        start = self.pos
+        if self._symbol("("):
+            # "(" : groupe logique, ou parenthèse d'une somme ("(xTECH + xDEF) / 2 > 70")
+            try:
+                node = self.expr()
+                if self._symbol(")"):
+                    self._skip()
+                    if not _SYMBOLS.match(self.text, self.pos) or self.text[self.pos] in "&|)":
+                        return node
+            except FilterExpressionError:
+                pass
+            self.pos = start
+        return self.comparison()
+
+    def comparison(self):
+        left = self.sum()
+        op = self._symbol(">=", "<=", "==", "!=", ">", "<", "=") or self._keyword("above", "below")
+        if op is None:
+            self._error("Expected a comparison (>, >=, <, <=, ==, !=, above, below)")
+        right = self.sum()
+        node = ("cmp", _COMPARISONS[op], left, right)
+        self._check(node)
+        return node
+
+    def _check(self, node):
+        _, op, left, right = node
+        for side, other in ((left, right), (right, left)):
+            if side[0] == "pct" and other[0] != "col":
+                self._error("A percentile (p80, position p80) compares with a metric")
+            if side[0] == "pct" and side[2] and POSITION_COLUMN not in self.columns:
+                self._error(f"'position p{side[1]}' needs a {POSITION_COLUMN!r} column")
+            if side[0] == "str" and (other[0] != "col" or op not in ("==", "!=")):
+                self._error("Text compares with a column, with == or !=")
+        if left[0] in ("num", "pct") and right[0] in ("num", "pct"):
+            self._error("A comparison needs a metric")
+
+    def sum(self):
+        node = self.product()
+        while op := self._symbol("+", "-"):
+            node = ("op", op, node, self.product())
+        return node
+
+    def product(self):
+        node = self.operand()
+        while op := self._symbol("*", "/"):
+            node = ("op", op, node, self.operand())
+        return node
+
+    def operand(self):
+        self._skip()
+        if self._symbol("("):
+            node = self.sum()
+            if not self._symbol(")"):
+                self._error("Expected ')'")
+            return node
+        column = self._name()
+        if column is not None:
+            return ("col", column)
+        if self.pos < len(self.text) and self.text[self.pos] in "\"'":
+            quote = self.text[self.pos]
+            end = self.text.find(quote, self.pos + 1)
+            if end < 0:
+                self._error(f"Unclosed {quote}")
+            value = self.text[self.pos + 1:end]
+            self.pos = end + 1
+            return ("str", value)
+        m = _PERCENTILE.match(self.text, self.pos)
+        if m:
+            q = int(m.group(2))
+            if q > 100:
+                self._error("Percentiles go from p0 to p100")
+            self.pos = m.end()
+            return ("pct", q, bool(m.group(1)))
+        m = _NUMBER.match(self.text, self.pos)
+        if m:
+            self.pos = m.end()
+            return ("num", float(m.group()))
+        if self.pos >= len(self.text):
+            self._error("Unexpected end of expression")
+        word = re.match(r"[^\s()<>=!&|~+*/]+(?:\s+[^\s()<>=!&|~+*/]+)*", self.text[self.pos:])
+        self._unknown(word.group().strip() if word else self.text[self.pos])
+
+
+class Expression:
+    """Compiled filter expression; `mask` evaluates it on a frame with the columns it was compiled for."""
+
+    def __init__(self, source: str, tree):
+        self.source = source
+        self.tree = tree
+        self.columns = sorted(_columns(tree))
+
+    def mask(self, df: pd.DataFrame) -> np.ndarray:
+        """Rows where the expression is true (never those where it is unknown)."""
+        with np.errstate(divide="ignore", invalid="ignore"):
+            value, _ = _Leaves(df).logic(self.tree)
+        return np.broadcast_to(value, len(df)).copy()
+
+
+def _columns(node) -> set:
+    if node[0] == "col":
+        return {node[1]}
+    return set().union(*(_columns(n) for n in node[1:] if isinstance(n, tuple)))
+
+
+class _Leaves:
+    """Arrays of the leaves of a tree on `df` (columns, percentiles, text comparisons), each computed once."""
+
+    def __init__(self, df: pd.DataFrame):
+        self.df = df
+        self.variables = {}
+        self._names = {}
+
+    def _var(self, key, compute) -> str:
+        if key not in self._names:
+            self._names[key] = f"v{len(self._names)}"
+            self.variables[self._names[key]] = compute()
+        return self._names[key]
+
+    def _numeric(self, column) -> str:
+        return self._var(("col", column),
+                         lambda: pd.to_numeric(self.df[column], errors="coerce").to_numpy(dtype=float))
+
+    def _percentile(self, q, by_position, column) -> str:
+        def compute():
+            values = pd.to_numeric(self.df[column], errors="coerce")
+            if not by_position:
+                return np.full(len(values), values.quantile(q / 100) if values.notna().any() else np.nan)
+            groups = self.df[POSITION_COLUMN].to_numpy()
+            return values.groupby(groups).transform("quantile", q / 100).to_numpy(dtype=float)
+        return self._var(("pct", q, by_position, column), compute)
+
+    def _text(self, op, column, text) -> tuple:
+        """(value, known) variables of a text comparison: a missing text is unknown."""
+        def known():
+            return self.df[column].notna().to_numpy()
+
+        def compute():
+            equal = (self.df[column].astype(str).str.strip() == text.strip()).to_numpy()
+            return (~equal if op == "!=" else equal) & self.variables[self._var(("known", column), known)]
+        return self._var(("str", op, column, text), compute), self._var(("known", column), known)
+
+    def source(self, node) -> str:
+        """numexpr source of the arithmetic `node`, its arrays in `variables`."""
+        kind = node[0]
+        if kind == "num":
+            return repr(node[1])
+        if kind == "col":
+            return self._numeric(node[1])
+        if kind == "var":
+            return node[1]
+        return f"({self.source(node[2])} {node[1]} {self.source(node[3])})"
+
+    def side(self, node):
+        """Values of one side of a comparison (numexpr for arithmetic when installed)."""
+        kind = node[0]
+        if kind == "num":
+            return np.float64(node[1])
+        if kind in ("col", "var"):
+            return self.variables[self.source(node)]
+        if numexpr is not None:
+            return numexpr.evaluate(self.source(node), local_dict=self.variables)
+        return _NUMPY_OPS[node[1]](self.side(node[2]), self.side(node[3]))
+
+    def logic(self, node) -> tuple:
+        """(value, known) boolean arrays of a condition; value is False wherever known is."""
+        kind = node[0]
+        if kind == "not":
+            value, known = self.logic(node[1])
+            return ~value & known, known
+        if kind in ("and", "or"):
+            (a, a_known), (b, b_known) = self.logic(node[1]), self.logic(node[2])
+            if kind == "and":
+                # faux dès qu'un côté connu est faux
+                return a & b, (a_known & b_known) | (a_known & ~a) | (b_known & ~b)
+            return a | b, (a_known & b_known) | a | b
+        _, op, left, right = node
+        if "str" in (left[0], right[0]):
+            col, text = (left, right) if left[0] == "col" else (right, left)
+            value, known = self._text(op, col[1], text[1])
+            return self.variables[value], self.variables[known]
+        # percentiles : seuil calculé sur la métrique de l'autre côté
+        left, right = (
+            self.side(("var", self._percentile(s[1], s[2], o[1])) if s[0] == "pct" else s)
+            for s, o in ((left, right), (right, left))
+        )
+        known = ~np.isnan(left) & ~np.isnan(right)
+        return _NUMPY_OPS[op](left, right) & known, known
+
+
+@functools.lru_cache(maxsize=256)
+def _compile(text: str, columns: tuple) -> Expression:
+    return Expression(text, _Parser(text, columns).parse())
+
+
+def compile_expression(text: str, columns) -> Expression:
+    """Parse `text` against `columns` (raises `FilterExpressionError`)."""
+    return _compile(text.strip(), tuple(columns))
@@ -0,0 +1,58 @@
+"""Filters of the Player Search tables.
+
+The percentile popovers of the three pages keep the rows at or above the
+chosen percentile of each metric.  The app computes, once per loaded selection
+and base filters (position, age, foot, minutes), a table of the 101 quantiles
+of every popover metric (`quantile_table`); slider captions, thresholds and
+ranges read it instead of taking a percentile of the column at every rerun.
+With the table, each threshold is the percentile of the base rows (the one the
+caption shows); without it, `percentile_filter` takes each threshold on the
+rows left by the previous filters.
+"""
+
+import warnings
+
+import numpy as np
+import pandas as pd
+
+QUANTILES = np.arange(101)
+
+
+def quantile_table(df: pd.DataFrame, columns) -> pd.DataFrame:
+    """Percentiles 0..100 of each column of `df` (linear interpolation, NaN ignored), indexed by percentile.
+
+    A column without values (or a frame without rows) gives NaN.  Same values
+    as ``np.nanpercentile`` / ``Series.quantile`` on the column.
+    """
+    columns = list(columns)
+    if not len(df):
+        return pd.DataFrame(np.nan, index=QUANTILES, columns=columns)
+    values = np.empty((len(df), len(columns)))
+    for j, col in enumerate(columns):
+        values[:, j] = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float)
+    with warnings.catch_warnings():
+        warnings.simplefilter("ignore", RuntimeWarning)  # colonne sans valeur : NaN
+        table = np.nanpercentile(values, QUANTILES, axis=0) if columns else np.empty((len(QUANTILES), 0))
+    return pd.DataFrame(table, index=QUANTILES, columns=columns)
+
+
+def percentile_filter(df: pd.DataFrame, filter_percentiles: dict, quantiles: pd.DataFrame = None) -> pd.DataFrame:
+    """Rows of `df` at or above the ``min_pct`` percentile of each ``(category, column) -> min_pct``.
+
+    With `quantiles` (a `quantile_table` of `df`), the thresholds are read from it.
+    """
+    if quantiles is not None:
+        keep = np.ones(len(df), dtype=bool)
+        for (_, col), min_pct in filter_percentiles.items():
+            if min_pct > 0 and col in df.columns and col in quantiles.columns:
+                threshold = quantiles.at[min_pct, col]
+                if not np.isnan(threshold):
+                    keep &= (pd.to_numeric(df[col], errors="coerce") >= threshold).to_numpy()
+        return df[keep]
+    for (_, col), min_pct in filter_percentiles.items():
+        if min_pct > 0 and col in df.columns:
+            values = pd.to_numeric(df[col], errors="coerce")
+            ref_vals = values.dropna()
+            if len(ref_vals) > 0:
+                df = df[values >= ref_vals.quantile(min_pct / 100)]
+    return df
@@ -0,0 +1,25 @@
+"""Top 50 leaderboards of the xPhysical and xTechnical pages.
+
+One leaderboard covers a single (season, competition) partition of the snapshot;
+the app caches it per partition version (`st.cache_data`, then `skapp.cache`).
+"""
+
+import pandas as pd
+
+from skapp.snapshot import XPHYSICAL_RANK
+
+
+def top50_xphysical(df: pd.DataFrame, competition, season, position) -> pd.DataFrame:
+    part = df[
+        (df["Competition"] == competition) & (df["Season"] == season) & (df["Position Group"] == position)
+    ]
+    return part.sort_values(XPHYSICAL_RANK).head(50).reset_index(drop=True)
+
+
+def top50_xtechnical(df: pd.DataFrame, competition, season, position, index_col, min_minutes) -> pd.DataFrame:
+    part = df[
+        (df["Competition Name"] == competition) & (df["Season Name"] == season) &
+        (df["Position Group"] == position) & (df["Minutes"] >= min_minutes)
+    ]
+    part = part[part[index_col].notna()]
+    return part.sort_values(by=index_col, ascending=False).head(50).reset_index(drop=True)
@@ -0,0 +1,236 @@
+"""Build SB_SK_MERGED.csv from the SkillCorner and StatsBomb files.
+
+Each StatsBomb row (SB_All.csv) is hash-joined to the SkillCorner row
+(SK_All.csv) of the same ``Player ID`` (see `skapp.registry`), season and
+competition.  The merged row keeps every StatsBomb column and adds the
+SkillCorner columns that StatsBomb does not have (physical metrics, xPhysical
+notes...).  Both CSVs are first split by season into temporary files in one
+streamed pass (`split_by_season`); then each season is read, registered,
+joined and appended to the output, so peak memory is bounded by the largest
+season rather than by the files.
+`merge_partition` runs the same join in memory on one (season, competition)
+slice for the incremental snapshot (`skapp.snapshot`).
+
+Usage::
+
+    python -m skapp.merge [--sk SK_All.csv] [--sb SB_All.csv] [--out SB_SK_MERGED.csv]
+"""
+
+import argparse
+import csv
+import os
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+from skapp.data import (
+    MERGED_PATH, XPHYSICAL_PATH, XTECHNICAL_PATH, read_xphysical, read_xtechnical, temp_path,
+)
+from skapp.registry import (
+    PLAYER_ID, REGISTRY_PATH, UNKNOWN_ID, load_registry, normalize_name, player_ids,
+    save_registry, teams_compatible, update_registry,
+)
+
+UNMATCHED_PATH = "SB_SK_MERGED_unmatched.csv"
+
+# Colonnes d'identité SkillCorner : remplacées par leurs équivalents StatsBomb
+SK_IDENTITY_COLUMNS = ["Player", "Short Name", "Team", "Competition", "Season", "Position Group", "Age"]
+# Colonnes calculées par les loaders, absentes des fichiers
+DERIVED_COLUMNS = ["season_short", "Display Name", "Player ID"]
+
+# Libellés de compétition SkillCorner -> StatsBomb quand ils diffèrent
+COMPETITION_ALIASES = {
+    "ESP - LaLiga": "SPA - La Liga",
+    "GER - Bundesliga": "GER - 1. Bundesliga",
+}
+
+
+def competition_key(series: pd.Series) -> pd.Series:
+    mapping = {
+        v: normalize_name(COMPETITION_ALIASES.get(v, v)) for v in pd.unique(series.dropna())
+    }
+    return series.map(mapping).fillna("")
+
+
+def _keep_best_pairs(m: pd.DataFrame) -> pd.DataFrame:
+    """One SK row per SB row: among duplicate keys, prefer a compatible club."""
+    if not m["_sb_row"].duplicated().any():
+        return m
+    pairs = m[["Team Name", "_sk_team"]].drop_duplicates()
+    ok = {
+        (a, b): teams_compatible(a, b) for a, b in zip(pairs["Team Name"], pairs["_sk_team"])
+    }
+    m = m.assign(_team_ok=[ok[(a, b)] for a, b in zip(m["Team Name"], m["_sk_team"])])
+    m = m.sort_values(["_sb_row", "_team_ok"], ascending=[True, False], kind="stable")
+    return m.drop_duplicates("_sb_row").drop(columns="_team_ok")
+
+
+def _merge_sides(df_phys: pd.DataFrame, df_tech: pd.DataFrame, ids_phys, ids_tech):
+    """Output columns and the two keyed frames joined by `build_merged` / `merge_partition`."""
+    sb_cols = [c for c in df_tech.columns if c not in DERIVED_COLUMNS]
+    sk_cols = [
+        c for c in df_phys.columns
+        if c not in SK_IDENTITY_COLUMNS and c not in DERIVED_COLUMNS and c not in sb_cols
+    ]
+    sb = df_tech[sb_cols].assign(
+        _pid=np.asarray(ids_tech),
+        _season=df_tech["Season Name"].astype(str),
+        _comp=competition_key(df_tech["Competition Name"]),
+        _sb_row=np.arange(len(df_tech)),
+    )
+    sk = df_phys[["Player", "Team", "Competition", "Season"] + sk_cols].rename(
+        columns={"Player": "_sk_player", "Team": "_sk_team", "Competition": "_sk_comp", "Season": "_sk_season"}
+    ).assign(
+        _pid=np.asarray(ids_phys),
+        _season=df_phys["Season"].astype(str),
+        _comp=competition_key(df_phys["Competition"]),
+        _sk_row=np.arange(len(df_phys)),
+    )
+    return sb_cols + sk_cols, sb[sb["_pid"] != UNKNOWN_ID], sk[sk["_pid"] != UNKNOWN_ID]
+
+
+def _join(left: pd.DataFrame, right: pd.DataFrame) -> pd.DataFrame:
+    return _keep_best_pairs(left.merge(right, on=["_pid", "_season", "_comp"], how="inner", sort=False))
+
+
+def merge_partition(df_phys: pd.DataFrame, df_tech: pd.DataFrame, ids_phys, ids_tech) -> pd.DataFrame:
+    """In-memory join of two slices (typically one season / competition), ``Player ID`` kept."""
+    out_cols, sb, sk = _merge_sides(df_phys, df_tech, ids_phys, ids_tech)
+    m = _join(sb, sk)
+    return m[out_cols].assign(**{PLAYER_ID: m["_pid"].astype("int64")}).reset_index(drop=True)
+
+
+def split_by_season(path: str, column: str, directory: str) -> dict:
+    """Season -> CSV of the rows of `path` with that `column` value, written under `directory` in one pass.
+
+    Rows are copied as read (header repeated in each file); blank lines are skipped.
+    """
+    os.makedirs(directory, exist_ok=True)
+    files, handles = {}, {}
+    try:
+        with open(path, newline="", encoding="utf-8") as fh:
+            reader = csv.reader(fh)
+            header = next(reader, None)
+            if header is None:
+                return files
+            col = [h.strip() for h in header].index(column)
+            for row in reader:
+                if not row:
+                    continue
+                season = row[col] if col < len(row) else ""
+                if season not in handles:
+                    files[season] = os.path.join(directory, f"{len(files)}.csv")
+                    out = open(files[season], "w", newline="", encoding="utf-8")
+                    handles[season] = (out, csv.writer(out))
+                    handles[season][1].writerow(header)
+                handles[season][1].writerow(row)
+    finally:
+        for out, _ in handles.values():
+            out.close()
+    return files
+
+
+def build_merged(slices, out_path: str = MERGED_PATH, unmatched_path: str = UNMATCHED_PATH) -> dict:
+    """Join each ``(df_phys, df_tech, ids_phys, ids_tech)`` season slice of `slices`, append it to
+    `out_path` and return a report.
+
+    `slices` (at least one) is consumed lazily: one season is in memory at a time.  Unmatched
+    rows of both sides (identity columns only) are written to
+    `unmatched_path`.  Both files are replaced atomically.
+    """
+    t0 = time.perf_counter()
+    tmp_out, tmp_unmatched = temp_path(out_path), temp_path(unmatched_path)
+    try:
+        rows = unmatched_sk = unmatched_sb = 0
+        first = True
+        for df_phys, df_tech, ids_phys, ids_tech in slices:
+            out_cols, left, right = _merge_sides(df_phys, df_tech, ids_phys, ids_tech)
+            m = _join(left, right)
+            m[out_cols].to_csv(tmp_out, mode="w" if first else "a", header=first, index=False)
+            rows += len(m)
+
+            miss_sb = left[~left["_sb_row"].isin(m["_sb_row"])]
+            miss_sk = right[~right["_sk_row"].isin(m["_sk_row"])]
+            pd.concat([
+                pd.DataFrame({
+                    "Source": "SB", "Player": miss_sb["Player Name"], "Team": miss_sb["Team Name"],
+                    "Competition": miss_sb["Competition Name"], "Season": miss_sb["Season Name"],
+                }),
+                pd.DataFrame({
+                    "Source": "SK", "Player": miss_sk["_sk_player"], "Team": miss_sk["_sk_team"],
+                    "Competition": miss_sk["_sk_comp"], "Season": miss_sk["_sk_season"],
+                }),
+            ], ignore_index=True).to_csv(tmp_unmatched, mode="w" if first else "a", header=first, index=False)
+            unmatched_sb += len(miss_sb)
+            unmatched_sk += len(miss_sk)
+            first = False
+
+        os.replace(tmp_out, out_path)
+        os.replace(tmp_unmatched, unmatched_path)
+    finally:
+        for tmp in (tmp_out, tmp_unmatched):
+            if os.path.exists(tmp):  # tranche en échec : pas de fichier partiel laissé
+                os.remove(tmp)
+
+    return {
+        "path": out_path,
+        "rows": rows,
+        "columns": len(out_cols),
+        "unmatched_physical": unmatched_sk,
+        "unmatched_technical": unmatched_sb,
+        "unmatched_path": unmatched_path,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+
+
+def merge_files(sk_path: str = XPHYSICAL_PATH, sb_path: str = XTECHNICAL_PATH,
+                out_path: str = MERGED_PATH, registry_path: str = REGISTRY_PATH) -> dict:
+    """`build_merged` of the two CSVs, read one season at a time; the registry is updated season by season."""
+    registry = load_registry(registry_path)
+    directory = os.path.dirname(os.path.abspath(out_path))
+    with tempfile.TemporaryDirectory(prefix="merge-", dir=directory) as tmp:
+        sk_files = split_by_season(sk_path, "Season", os.path.join(tmp, "sk"))
+        sb_files = split_by_season(sb_path, "Season Name", os.path.join(tmp, "sb"))
+
+        def read(files, season, reader, path):
+            if season in files:
+                return reader(files[season])
+            # saison absente de ce fichier : frame vide à ses colonnes
+            return reader(next(iter(files.values()), path)).iloc[:0]
+
+        def slices():
+            nonlocal registry
+            # fichiers sans ligne : une tranche vide, pour l'en-tête de la sortie
+            for season in sorted(set(sk_files) | set(sb_files)) or [None]:
+                df_phys = read(sk_files, season, read_xphysical, sk_path)
+                df_tech = read(sb_files, season, read_xtechnical, sb_path)
+                registry = update_registry(registry, df_phys, df_tech)
+                yield df_phys, df_tech, player_ids(df_phys, registry, "SK"), player_ids(df_tech, registry, "SB")
+
+        report = build_merged(
+            slices(), out_path=out_path, unmatched_path=os.path.join(directory, UNMATCHED_PATH),
+        )
+    save_registry(registry, registry_path)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sk", default=XPHYSICAL_PATH)
+    parser.add_argument("--sb", default=XTECHNICAL_PATH)
+    parser.add_argument("--out", default=MERGED_PATH)
+    parser.add_argument("--registry", default=REGISTRY_PATH)
+    args = parser.parse_args(argv)
+    report = merge_files(args.sk, args.sb, args.out, args.registry)
+    print(
+        f"{report['rows']} merged rows x {report['columns']} columns -> {report['path']} "
+        f"({report['seconds']}s)\n"
+        f"unmatched: {report['unmatched_physical']} SkillCorner rows, "
+        f"{report['unmatched_technical']} StatsBomb rows -> {report['unmatched_path']}"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,919 @@
+"""Metric catalogue shared by the app and the snapshot builder.
+
+Column aliases (`resolve_metric_col`, `NAME_NORMALIZER`), the radar metric lists
+(`graph_columns`, `metric_templates_tech`) and the xPhysical threshold scale
+used to rescore merged rows (`threshold_dict1`, `xphy_points`).
+"""
+
+from typing import Iterable
+
+import numpy as np
+import pandas as pd
+
+_METRIC_ALIASES = {
+    # Display label -> candidate column names (order matters)
+    "OP xGAssisted": [
+        "OP xGAssisted", "Op xA P90", "OP xA P90", "OP xA",
+        "xA OP P90", "xA (OP) P90", "Op Xa P90"
+    ],
+    "Touches Inside Box": ["Touches Inside Box", "Touches In Box"],
+    "OBV": ["OBV", "Obv", "On Ball Value"],
+    "OBV Pass P90": ["OBV Pass P90", "Pass OBV", "Pass OBV P90", "OBV Pass"],
+    "OBV Dribble Carry P90": [
+        "OBV Dribble Carry P90", "OBV Dribble Carry", "OBV Dribble & Carry P90",
+        "OBV Dribble & Carry", "Dribble & Carry OBV", "Dribble & Carry OBV P90"
+    ],
+}
+
+
+def resolve_metric_col(columns: Iterable[str], name: str) -> str:
+    """Return the actual column present in `columns` matching metric `name` using aliases and case-insensitive matching.
+    Raises KeyError if nothing matches."""
+    cols = list(columns)
+    lower_map = {c.lower(): c for c in cols}
+    # direct hit
+    if name in cols:
+        return name
+    # alias list
+    candidates = _METRIC_ALIASES.get(name, [name])
+    # try exact then case-insensitive
+    for cand in candidates:
+        if cand in cols:
+            return cand
+        if cand.lower() in lower_map:
+            return lower_map[cand.lower()]
+    # final fallback: loose contains match (case-insensitive)
+    name_l = name.lower()
+    for c in cols:
+        if name_l == c.lower():
+            return c
+    # not found
+    raise KeyError(name)
+
+
+# Normalisation des noms de colonnes (appliquée aux DFs de l'app)
+NAME_NORMALIZER = {
+    "Op xA P90": "OP xGAssisted",
+    "OP xA P90": "OP xGAssisted",
+    "OP xA": "OP xGAssisted",
+    "xA OP P90": "OP xGAssisted",
+    "Pass OBV": "OBV Pass P90",
+    "Pass OBV P90": "OBV Pass P90",
+    "Touches In Box": "Touches Inside Box",
+    "Obv": "OBV",
+}
+
+# Colonnes du graphe xPhysical
+graph_columns = [
+    "PSV-99", "TOP 5 PSV-99", "Total Distance P90", "M/min P90", "Running Distance P90",
+    "HSR Distance P90", "HSR Count P90", "Sprinting Distance P90", "Sprint Count P90",
+    "HI Distance P90", "HI Count P90", "Medium Acceleration Count P90",
+    "High Acceleration Count P90", "Medium Deceleration Count P90", "High Deceleration Count P90",
+    "Explosive Acceleration to HSR Count P90", "Explosive Acceleration to Sprint Count P90", 
+    "Total Distance TIP P30", "M/min TIP P30", "Running Distance TIP P30",
+    "HSR Distance TIP P30", "HSR Count TIP P30", "Sprinting Distance TIP P30", "Sprint Count TIP P30",
+    "HI Distance TIP P30", "HI Count TIP P30", "Medium Acceleration Count TIP P30",
+    "High Acceleration Count TIP P30", "Medium Deceleration Count TIP P30", "High Deceleration Count TIP P30",
+    "Explosive Acceleration to HSR Count TIP P30", "Explosive Acceleration to Sprint Count TIP P30",
+    "Total Distance OTIP P30", "M/min OTIP P30", "Running Distance OTIP P30",
+    "HSR Distance OTIP P30", "HSR Count OTIP P30", "Sprinting Distance OTIP P30", "Sprint Count OTIP P30",
+    "HI Distance OTIP P30", "HI Count OTIP P30", "Medium Acceleration Count OTIP P30",
+    "High Acceleration Count OTIP P30", "Medium Deceleration Count OTIP P30", "High Deceleration Count OTIP P30",
+    "Explosive Acceleration to HSR Count OTIP P30", "Explosive Acceleration to Sprint Count OTIP P30",
+    "xPhysical"
+]
+
+# Templates Radar xTechnical
+metric_templates_tech = {
+    "Goalkeeper": [
+        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Pressured Change In Pass Length",
+        "Clcaa", "Da Aggressive Distance", "Gsaa P90", "Save Ratio", "Ot Shots Faced P90",
+        "Pass Into Danger Ratio", "Pressured Passing Ratio"
+    ],
+    "Central Defender": [
+        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Long Balls P90", "Xgbuildup P90",
+        "Aerial Ratio", "Aerial Wins P90", "Padj Tackles And Interceptions P90", "Pressure Regains P90",
+        "Defensive Action Regains P90", "OBV Pass P90", "OBV Dribble Carry P90"
+    ],
+    "CB-DEF": [
+        "Fouls P90", "Fhalf Ball Recoveries P90", "Average X Pressure", "Padj Pressures P90",
+        "Pressure Regains P90", "Aerial Ratio", "Aerial Wins P90", "Challenge Ratio", "Padj Interceptions P90",
+        "Padj Clearances P90", "Blocks Per Shot", "Errors P90"
+    ],
+    "CB-OFF": [
+        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Long Balls P90", "Dispossessions P90",
+        "Turnovers P90", "Np Shots P90", "OBV Pass P90", "OBV Dribble Carry P90", "Carries P90",
+        "Deep Progressions P90", "Pressured Passing Ratio"
+    ],
+    "Full Back": [
+        "Passing Ratio", "Op Passes P90", "Deep Progressions P90", "Crosses P90", "Crossing Ratio",
+        "Aerial Ratio", "Average X Defensive Action", "Padj Tackles And Interceptions P90", "Padj Pressures P90",
+        "Fhalf Counterpressures P90", "Np Shots P90", "Op Passes Into And Touches Inside Box P90", "OP xGAssisted"
+    ],
+    "FB-DEF": [
+        "Fouls P90", "Fhalf Ball Recoveries P90", "Average X Defensive Action", "Padj Pressures P90",
+        "Fhalf Pressures P90", "Fhalf Counterpressures P90", "Aerial Ratio", "Aerial Wins P90",
+        "Padj Tackles P90", "Challenge Ratio", "Padj Interceptions P90"
+    ],
+    "FB-OFF": [
+        "Passing Ratio", "Op Passes P90", "Deep Progressions P90", "Crosses P90", "Crossing Ratio",
+        "Dribbles P90", "Dispossessions P90", "Turnovers P90", "OP xGAssisted", "Touches Inside Box P90",
+        "Passes Inside Box P90", "Pressured Passing Ratio"
+    ],
+    "Midfielder (CDM)": [
+        "Passing Ratio", "Op Passes P90", "Long Ball Ratio", "Turnovers P90", "Deep Progressions P90",
+        "Aerial Ratio", "Padj Tackles P90", "Padj Interceptions P90", "Fhalf Ball Recoveries P90",
+        "Padj Pressures P90", "Fhalf Counterpressures P90", "Shots Key Passes P90", "Pressured Passing Ratio"
+    ],
+    "Midfielder (CM)": [
+        "Passing Ratio", "Op Passes P90", "Turnovers P90", "Deep Progressions P90", "Aerial Ratio",
+        "Padj Tackles And Interceptions P90", "Padj Pressures P90", "Fhalf Counterpressures P90",
+        "Npxgxa P90", "Op Passes Into And Touches Inside Box P90", "Np Shots P90",
+        "Scoring Contribution", "Pressured Passing Ratio"
+    ],
+    "MID-DEF": [
+        "Fouls P90", "Aerial Ratio", "Aerial Wins P90", "Padj Tackles P90", "Padj Interceptions P90",
+        "Pressure Regains P90", "Fhalf Pressures P90", "Counterpressures P90", "Fhalf Counterpressures P90",
+        "Padj Clearances P90", "Fhalf Ball Recoveries P90"
+    ],
+    "MID-OFF": [
+        "Passing Ratio", "Op Passes P90", "Turnovers P90", "Dispossessions P90", "Deep Progressions P90",
+        "Through Balls P90", "OP xGAssisted", "Op Passes Into And Touches Inside Box P90", "Np Xg P90",
+        "Np Shots P90", "OBV Pass P90", "OBV Dribble Carry P90", "Pressured Passing Ratio"
+    ],
+    "Attacking Midfielder": [
+        "Passing Ratio", "Op Passes P90", "Turnovers P90", "Dribbles P90", "Deep Progressions P90",
+        "Padj Pressures P90", "Fhalf Counterpressures P90", "Through Balls P90", "OP xGAssisted",
+        "Op Passes Into And Touches Inside Box P90", "Np Xg P90", "Scoring Contribution", "Pressured Passing Ratio"
+    ],
+    "Winger": [
+        "Passing Ratio", "Padj Pressures P90", "Counterpressures P90", "Op Key Passes P90", "OP xGAssisted",
+        "OBV Pass P90", "Dribbles P90", "OBV Dribble Carry P90", "Fouls Won P90", "Np Shots P90",
+        "Scoring Contribution", "Op Passes Into And Touches Inside Box P90", "Turnovers P90"
+    ],
+    "Striker": [
+        "Passing Ratio", "Turnovers P90", "Dribbles P90", "Aerial Wins P90", "Padj Pressures P90",
+        "Counterpressures P90", "OP xGAssisted", "Touches Inside Box P90", "Np Xg P90", "Npg P90",
+        "Np Shots P90", "Np Xg Per Shot", "Shot On Target Ratio"
+    ]
+}
+
+metric_labels_tech = {
+    "Goalkeeper": ["Passing%", "OP Passes", "Long Ball%", "Being Press. Change in Pass Length",
+                   "Claims - CCAA%", "GK Aggressive Distance", "Goals Saved Above Average", "Save%",
+                   "On Target Shots Faced", "Pass into Danger%", "Pressured Pass%"],
+    "Central Defender": ["Passing%", "OP Passes", "Long Ball%", "Long Balls", "xGBuildup",
+                         "Aerial Win%", "Aerial Wins", "PAdj Tackles & Interceptions", "Pressure Regains",
+                         "Defensive Action Regains", "Pass OBV", "Dribble & Carry OBV"],
+    "CB-DEF": ["Fouls", "Opp. Half Ball Recoveries", "Average Pressure Distance", "PAdj Pressures",
+               "Pressure Regains", "Aerial Win%", "Aerial Wins", "Tack/Dribbled Past%", "PAdj Interceptions",
+               "PAdj Clearances", "Blocks/Shot", "Errors"],
+    "CB-OFF": ["Passing%", "OP Passes", "Long Ball%", "Long Balls", "Dispossessed", "Turnovers",
+               "Shots", "Pass OBV", "Dribble & Carry OBV", "Carries", "Deep Progressions", "Pressured Pass%"],
+    "Full Back": ["Passing%", "OP Passes", "Deep Progressions", "Successful Crosses", "Crossing %",
+                  "Aerial Win%", "Average Def. Action Distance", "Padj Tackles And Interceptions", "PAdj Pressures",
+                  "Counterpressures in Opp. Half", "Shots", "OP Passes + Touches Inside Box", "OP xGAssisted"],
+    "FB-DEF": ["Fouls", "Opp. Half Ball Recoveries", "Average Def. Action Distance", "PAdj Pressures",
+               "Pressures in Opp. Half", "Counterpressures in Opp. Half", "Aerial Win%", "Aerial Wins",
+               "PAdj Tackles", "Tack/Dribbled Past%", "PAdj Interceptions"],
+    "FB-OFF": ["Passing%", "OP Passes", "Deep Progressions", "Successful Crosses", "Crossing %",
+               "Successful Dribbles", "Dispossessed", "Turnovers", "OP xGAssisted", "Touches Inside Box",
+               "Passes Inside Box", "Pressured Pass%"],
+    "Midfielder (CDM)": ["Passing%", "OP Passes", "Long Ball%", "Turnovers", "Deep Progressions",
+                  "Aerial Win%", "PAdj Tackles", "PAdj Interceptions", "Opp. Half Ball Recoveries",
+                  "PAdj Pressures", "Pressures in Opp. Half", "Shots & Key Passes", "Pressured Pass%"],
+    "Midfielder (CM)": ["Passing%", "OP Passes", "Turnovers", "Deep Progressions", "Aerial Win%",
+                 "PAdj Tackles And Interceptions", "PAdj Pressures", "Counterpressures in Opp. Half",
+                 "xG & xG Assisted", "OP Passes + Touches Inside Box", "Shots", "Scoring Contribution", "Pressured Pass%"],
+    "MID-DEF": ["Fouls", "Aerial Win%", "Aerial Wins", "PAdj Tackles", "PAdj Interceptions",
+                "Pressure Regains", "Pressures in Opp. Half", "Counterpressures",
+                "Counterpressures in Opp. Half", "PAdj Clearances", "Opp. Half Ball Recoveries"],
+    "MID-OFF": ["Passing%", "OP Passes", "Turnovers", "Dispossessed", "Deep Progressions",
+                "Throughballs", "OP xGAssisted", "OP Passes + Touches Inside Box", "xG", "Shots",
+                "Pass OBV", "Dribble & Carry OBV", "Pressured Pass%"],
+    "Attacking Midfielder": ["Passing%", "OP Passes", "Turnovers", "Successful Dribbles", "Deep Progressions",
+                             "PAdj Pressures", "Counterpressures in Opp. Half", "Throughballs", "OP xGAssisted",
+                             "OP Passes + Touches Inside Box", "xG", "Scoring Contribution", "Pressured Pass%"],
+    "Winger": ["Passing%", "PAdj Pressures", "Counterpressures", "Key Passes", "OP xGAssisted",
+               "Pass OBV", "Successful Dribbles", "Dribble & Carry OBV", "Fouls Won", "Shots",
+               "Scoring Contribution", "OP Passes + Touches Inside Box", "Turnovers"],
+    "Striker": ["Passing%", "Turnovers", "Successful Dribbles", "Aerial Wins", "PAdj Pressures",
+                "Counterpressures", "OP xGAssisted", "Touches Inside Box", "xG", "NP Goals",
+                "Shots", "xG/Shot", "Shooting%"]
+}
+
+# Barèmes xTech par poste : colonne brute -> (colonne de notes, paliers de points)
+classic_gk_metric_map = {
+    "Gsaa Ratio": ("xTech GK GSAA %", [0, 5, 7, 12, 15]),
+    "Save Ratio": ("xTech GK Save %", [0, 1, 2, 3, 4]),
+    "Da Aggressive Distance": ("xTech GK Aggressive Distance", [0, 1, 2, 3, 4]),
+    "Long Ball Ratio": ("xTech GK Long Ball %", [0, 1, 2, 3, 4]),
+    "Op Xgbuildup P90": ("xTech GK OPxGBuildup", [0, 1, 2, 3, 4]),
+    "Pressured Passing Ratio": ("xTech GK Passing u. Pressure %", [0, 1, 2, 3, 4]),
+    "Passing Ratio": ("xTech GK Passing %", [0, 1, 2, 3, 4]),
+    "Pass Into Danger Ratio": ("xTech GK Pass Into Danger %", [7, 5, 3, 1, 0])
+}
+
+classic_cb_metric_map = {
+    "OBV Dribble Carry P90": ("xTech CB OBV D&C", [0, 1, 2, 3, 4]),
+    "Long Ball Ratio": ("xTech CB Long Ball %", [0, 1, 2, 3, 4]),
+    "Pressured Passing Ratio": ("xTech CB Passing u. Pressure %", [0, 1, 2, 3, 5]),
+    "OBV Pass P90": ("xTech CB OBV Pass", [0, 1, 3, 5, 7]),
+    "Passing Ratio": ("xTech CB Passing %", [0, 1, 2, 3, 5]),
+    "Deep Progressions P90": ("xTech CB Deep Prog", [0, 1, 2, 3, 5]),
+    "Blocks Per Shot": ("xTech CB Blocks/Shot", [0, 1, 3, 5, 7]),
+    "Challenge Ratio": ("xTech CB Challenge %", [0, 1, 3, 5, 7]),
+    "Average X Pressure": ("xTech CB Avg X Pressure", [0, 1, 2, 3, 5]),
+    "Padj Tackles P90": ("xTech CB Padj Tackles", [0, 1, 2, 3, 4]),
+    "Hops": ("xTech CB HOPS", [0, 5, 7, 10, 12]),
+}
+
+classic_fb_metric_map = {
+    "Np Shots P90": ("xTech FB Np Shots", [0, 1, 2, 3, 5]),
+    "OP xGAssisted": ("xTech FB OPxA", [0, 1, 3, 5, 7]),
+    "Crossing Ratio": ("xTech FB Crossing %", [0, 1, 2, 3, 4]),
+    "Crosses P90": ("xTech FB Crosses", [0, 1, 2, 3, 5]),
+    "Op Passes Into And Touches Inside Box P90": ("xTech FB OP Box Touch", [0, 1, 3, 5, 7]),
+    "Perte Balle/Passe Ratio": ("xTech FB Ball Loss %", [0, 1, 2, 3, 4]),
+    "Scoring Contribution": ("xTech FB G+A", [0, 1, 2, 3, 4]),
+    "Op Xgbuildup Per Possession": ("xTech FB OPxGBuildup", [0, 1, 2, 3, 4]),
+    "Padj Pressures P90": ("xTech FB Padj Pressures", [0, 1, 3, 5, 7]),
+    "Fhalf Pressures P90": ("xTech FB FHalf Pressures", [0, 1, 2, 3, 4]),
+    "Fhalf Counterpressures P90": ("xTech FB FHalf Counterpressures", [0, 1, 2, 3, 4]),
+    "Padj Tackles And Interceptions P90": ("xTech FB Padj T&I", [0, 1, 2, 3, 5]),
+    "Challenge Ratio": ("xTech FB Challenge %", [0, 1, 2, 3, 5]),
+    "Hops": ("xTech FB HOPS", [0, 1, 2, 3, 5])
+}
+
+classic_mid_metric_map = {
+    "Np Shots P90": ("xTech MID Np Shots", [0, 1, 2, 3, 4]),
+    "Npxgxa P90": ("xTech MID Npxgxa", [0, 1, 2, 3, 4]),
+    "OBV Pass P90": ("xTech MID OBV Pass", [0, 1, 3, 5, 7]),
+    "OBV Dribble Carry P90": ("xTech MID OBV Carry", [0, 1, 3, 5, 7]),
+    "Op Passes Into And Touches Inside Box P90": ("xTech MID Box Pass+Touch", [0, 1, 2, 3, 5]),
+    "Perte Balle/Passe Ratio": ("xTech MID Ball Loss %", [0, 1, 2, 3, 4]),
+    "Scoring Contribution": ("xTech MID G+A", [0, 1, 2, 3, 5]),
+    "Op Xgbuildup Per Possession": ("xTech MID OPxGBuildup", [0, 1, 2, 3, 4]),
+    "Passing Ratio": ("xTech MID Passing %", [0, 1, 3, 5, 7]),
+    "Pressured Passing Ratio": ("xTech MID Pressured Passing %", [0, 1, 3, 5, 7]),
+    "Fhalf Ball Recoveries P90": ("xTech MID Opp. Ball Recov.", [0, 1, 2, 3, 5]),
+    "Pressure Regains P90": ("xTech MID Pressure Regains", [0, 1, 3, 5, 7]),
+    "Counterpressure Regains P90": ("xTech MID CPR", [0, 1, 2, 3, 5]),
+    "Padj Tackles And Interceptions P90": ("xTech MID T&I", [0, 3, 5, 7, 10]),
+    "Challenge Ratio": ("xTech MID Challenge %", [0, 1, 2, 3, 5]),
+    "Hops": ("xTech MID HOPS", [0, 1, 2, 3, 5])
+}
+
+classic_am_metric_map = {
+    "Passes Into Box P90": ("xTech AM Passes Into Box", [0, 1, 3, 4, 5]),
+    "Touches Inside Box P90": ("xTech AM Touches Inside Box", [0, 1, 2, 3, 4]),
+    "Dribbles P90": ("xTech AM Dribbles", [0, 1, 3, 4, 5]),
+    "OP xGAssisted": ("xTech AM xA", [0, 3, 5, 7, 10]),
+    "Np Shots P90": ("xTech AM Shots", [0, 3, 5, 7, 10]),
+    "OBV Pass P90": ("xTech AM OBV Pass", [0, 3, 5, 7, 10]),
+    "OBV Dribble Carry P90": ("xTech AM OBV Carry", [0, 1, 3, 5, 7]),
+    "Perte Balle/Passe Ratio": ("xTech AM Ball Loss %", [0, 1, 2, 3, 4]),
+    "Scoring Contribution": ("xTech AM G+A", [0, 1, 3, 4, 5]),
+    "Through Balls P90": ("xTech AM Through Balls", [0, 1, 2, 3, 4]),
+    "Fhalf Pressures P90": ("xTech AM FH Pressures", [0, 3, 5, 7, 10]),
+    "Counterpressures P90": ("xTech AM Counterpressures", [0, 3, 5, 7, 10])
+}
+
+classic_wing_metric_map = {
+    "Touches Inside Box P90": ("xTech WING Touches Inside Box", [0, 1, 3, 4, 5]),
+    "Dribble Ratio": ("xTech WING Dribble Ratio", [0, 1, 2, 3, 4]),
+    "Dribbles P90": ("xTech WING Dribbles", [0, 3, 5, 7, 10]),
+    "OP xGAssisted": ("xTech WING OPxA", [0, 3, 5, 7, 10]),
+    "Np Shots P90": ("xTech WING Np Shots", [0, 3, 5, 7, 10]),
+    "OBV Dribble Carry P90": ("xTech WING OBV Carry", [0, 5, 7, 10, 12]),
+    "Scoring Contribution": ("xTech WING G+A", [0, 1, 3, 4, 5]),
+    "Crosses P90": ("xTech WING Crosses", [0, 1, 2, 3, 4]),
+    "Shot On Target Ratio": ("xTech WING SOT Ratio", [0, 1, 2, 3, 4]),
+    "Fouls Won P90": ("xTech WING Fouls Won", [0, 1, 3, 4, 5]),
+    "Fhalf Pressures P90": ("xTech WING FHalf Pressures", [0, 3, 5, 7, 10]),
+    "Counterpressures P90": ("xTech WING Counterpressures", [0, 3, 5, 7, 10])
+}
+
+classic_st_metric_map = {
+    "Np Xg P90": ("xTech ST Np Xg", [0, 5, 7, 10, 12]),
+    "Np Shots P90": ("xTech ST Np Shots", [0, 1, 3, 5, 7]),
+    "Touches Inside Box P90": ("xTech ST Touches Inside Box", [0, 3, 5, 7, 10]),
+    "OP xGAssisted": ("xTech ST Op Xa", [0, 1, 2, 3, 4]),
+    "Perte Balle/Passe Ratio": ("xTech ST Ball Loss %", [0, 1, 3, 4, 5]),
+    "Np Xg Per Shot": ("xTech ST Xg Per Shot", [0, 1, 3, 4, 5]),
+    "Scoring Contribution": ("xTech ST G+A", [0, 1, 3, 5, 7]),
+    "PSxG - xG": ("xTech ST PSxG Diff", [0, 1, 2, 3, 4]),
+    "Shot On Target Ratio": ("xTech ST SoT %", [0, 1, 2, 3, 4]),
+    "Fhalf Pressures P90": ("xTech ST Fhalf Pressures", [0, 3, 5, 7, 10]),
+    "Counterpressures P90": ("xTech ST Counterpressures", [0, 3, 5, 7, 10])
+}
+
+xtech_columns_map = {
+    'Goalkeeper': 'xTechnical GK (/100)',
+    'Central Defender': 'xTechnical CB (/100)',
+    'Full Back': 'xTechnical FB (/100)',
+    'Midfielder': 'xTechnical MID (/100)',
+    'Attacking Midfielder': 'xTechnical AM (/100)',
+    'Winger': 'xTechnical WING (/100)',
+    'Striker': 'xTechnical ST (/100)'
+}
+
+xtech_prefix_map = {
+    'Goalkeeper': 'GK',
+    'Central Defender': 'CB',
+    'Full Back': 'FB',
+    'Midfielder': 'MID',
+    'Attacking Midfielder': 'AM',
+    'Winger': 'WING',
+    'Striker': 'ST'
+}
+
+xtech_tech_columns_map = {
+    'Goalkeeper': 'xTech GK Usage (/100)',
+    'Central Defender': 'xTech CB TECH (/100)',
+    'Full Back': 'xTech FB TECH (/100)',
+    'Midfielder': 'xTech MID TECH (/100)',
+    'Attacking Midfielder': 'xTech AM TECH (/100)',
+    'Winger': 'xTech WING TECH (/100)',
+    'Striker': 'xTech ST TECH (/100)'
+}
+
+xtech_def_columns_map = {
+    'Goalkeeper': 'xTech GK Save (/100)',
+    'Central Defender': 'xTech CB DEF (/100)',
+    'Full Back': 'xTech FB DEF (/100)',
+    'Midfielder': 'xTech MID DEF (/100)',
+    'Attacking Midfielder': 'xTech AM DEF (/100)',
+    'Winger': 'xTech WING DEF (/100)',
+    'Striker': 'xTech ST DEF (/100)'
+}
+
+xtech_post_config = {
+    "Midfielder": {
+        "metric_map": classic_mid_metric_map,
+        "def": [
+            "Fhalf Ball Recoveries P90",
+            "Pressure Regains P90",
+            "Counterpressure Regains P90",
+            "Padj Tackles And Interceptions P90",
+            "Challenge Ratio",
+            "Hops"
+        ],
+        "tech": [
+            "Np Shots P90",
+            "Npxgxa P90",
+            "OBV Pass P90",
+            "OBV Dribble Carry P90",
+            "Op Passes Into And Touches Inside Box P90",
+            "Perte Balle/Passe Ratio",
+            "Scoring Contribution",
+            "Op Xgbuildup Per Possession",
+            "Passing Ratio",
+            "Pressured Passing Ratio"
+        ],
+        "labels": {
+            "Fhalf Ball Recoveries P90": "Opp. Half Recoveries",
+            "Pressure Regains P90": "Pressure Regains",
+            "Counterpressure Regains P90": "Counterpressure Regains",
+            "Padj Tackles And Interceptions P90": "PAdj Tackles & Interceptions",
+            "Counterpressures P90": "Counterpressures",
+            "Challenge Ratio": "Tack./Dribbled Past %",
+            "Hops": "HOPS (Aerial Score)",
+            "Np Shots P90": "Shots",
+            "Npxgxa P90": "NPxG + xA",
+            "OBV Pass P90": "OBV Pass",
+            "OBV Dribble Carry P90": "OBV Dribble & Carry",
+            "Op Passes Into And Touches Inside Box P90": "OP Passes + Touches Into Box",
+            "Perte Balle/Passe Ratio": "Ball Loss %",
+            "Scoring Contribution": "Scoring Contribution (G+A)",
+            "Op Xgbuildup Per Possession": "xGBuildup (/possession)",
+            "Passing Ratio": "Passing %",
+            "Pressured Passing Ratio": "Passing u. Pressure %"
+        }
+    },
+
+    "Striker": {
+        "metric_map": classic_st_metric_map,
+        "def": [
+            "Fhalf Pressures P90", "Counterpressures P90"
+        ],
+        "tech": [
+            "Np Xg P90", "Np Shots P90", "Touches Inside Box P90", "OP xGAssisted",
+            "Perte Balle/Passe Ratio", "Np Xg Per Shot", "Scoring Contribution",
+            "PSxG - xG", "Shot On Target Ratio"
+        ],
+        "labels": {
+            "Fhalf Pressures P90": "Opp. Half Pressures",
+            "Counterpressures P90": "Counterpressures",       
+            "Np Xg P90": "NPxG",
+            "Np Shots P90": "Shots",
+            "OP xGAssisted": "OP xA",
+            "Perte Balle/Passe Ratio": "Ball Loss %",
+            "Np Xg Per Shot": "xG/Shot",
+            "Scoring Contribution": "Scoring Contribution (G+A)",
+            "PSxG - xG": "PSxG - xG",
+            "Shot On Target Ratio": "Shooting %"
+        }
+    },
+
+    "Attacking Midfielder": {
+        "metric_map": classic_am_metric_map,
+        "def": [
+            "Fhalf Pressures P90", "Counterpressures P90"
+        ],
+        "tech": [
+            "Passes Into Box P90", "Touches Inside Box P90", "Dribbles P90", "OP xGAssisted",
+            "Np Shots P90", "OBV Pass P90", "OBV Dribble Carry P90", "Perte Balle/Passe Ratio",
+            "Scoring Contribution", "Through Balls P90"
+        ],
+        "labels": {
+            "Fhalf Pressures P90": "Opp. Half Pressures",
+            "Counterpressures P90": "Counterpressures",
+            "Passes Into Box P90": "Passes Into Box",
+            "Touches Inside Box P90": "Touches Inside Box",
+            "Dribbles P90": "Succ. Dribbles",
+            "OP xGAssisted": "OP xA",
+            "Np Shots P90": "Shots",
+            "OBV Pass P90": "OBV Pass",
+            "OBV Dribble Carry P90": "OBV Dribble & Carry",
+            "Perte Balle/Passe Ratio": "Ball Loss %",
+            "Scoring Contribution": "Scoring Contribution (G+A)",
+            "Deep Progressions P90": "Deep Progressions",
+            "Through Balls P90": "Throughballs"
+        }
+    },
+
+    "Winger": {
+        "metric_map": classic_wing_metric_map,
+        "def": [
+            "Fhalf Pressures P90", "Counterpressures P90"
+        ],
+        "tech": [
+            "Touches Inside Box P90", "Dribble Ratio", "Dribbles P90", "OP xGAssisted", "Np Shots P90",
+            "OBV Dribble Carry P90", "Scoring Contribution", "Crosses P90", "Shot On Target Ratio", "Fouls Won P90"
+        ],
+        "labels": {
+            "Fhalf Pressures P90": "Opp. Half Pressures",
+            "Counterpressures P90": "Counterpressures",
+            "Touches Inside Box P90": "Touches Inside Box",
+            "Dribble Ratio": "Dribble Success %",
+            "Dribbles P90": "Succ. Dribbles",
+            "OP xGAssisted": "OP xA",
+            "Np Shots P90": "Shots",
+            "OBV Dribble Carry P90": "OBV Dribble & Carry",
+            "Scoring Contribution": "Scoring Contribution (G+A)",
+            "Crosses P90": "Succ. Crosses",
+            "Shot On Target Ratio": "Shooting %",
+            "Fouls Won P90": "Fouls Won"
+        }
+    },
+
+    "Full Back": {
+        "metric_map": classic_fb_metric_map,
+        "def": [
+            "Padj Pressures P90",
+            "Fhalf Pressures P90",
+            "Fhalf Counterpressures P90",
+            "Padj Tackles And Interceptions P90",
+            "Challenge Ratio",
+            "Hops"
+        ],
+        "tech": [
+            "Np Shots P90",
+            "OP xGAssisted",
+            "Crossing Ratio",
+            "Crosses P90",
+            "Op Passes Into And Touches Inside Box P90",
+            "Perte Balle/Passe Ratio",
+            "Scoring Contribution",
+            "Op Xgbuildup Per Possession"
+        ],
+        "labels": {
+            "Padj Pressures P90": "PAdj Pressures",
+            "Fhalf Pressures P90": "Opp. Half Pressures",
+            "Fhalf Counterpressures P90": "Opp. Half Counterpressures",
+            "Padj Tackles And Interceptions P90": "PAdj Tackles & Interceptions",
+            "Challenge Ratio": "Tack./Dribbled Past %",
+            "Hops": "HOPS",   
+            "Np Shots P90": "Shots",
+            "OP xGAssisted": "OP xA",
+            "Crossing Ratio": "Crossing %",
+            "Crosses P90": "Crosses",
+            "Op Passes Into And Touches Inside Box P90": "OP Passes + Touches Into Box",
+            "Perte Balle/Passe Ratio": "Ball Loss %",
+            "Scoring Contribution": "Scoring Contribution (G+A)",
+            "Op Xgbuildup Per Possession": "xGBuildup (/possession)"
+        }
+    },
+
+    "Central Defender": {
+        "metric_map": classic_cb_metric_map,
+        "def": [
+            "Blocks Per Shot", "Challenge Ratio", "Average X Pressure",
+            "Padj Tackles P90", "Hops"
+        ],
+        "tech": [
+            "OBV Dribble Carry P90", "Long Ball Ratio", "Pressured Passing Ratio", "OBV Pass P90",
+            "Passing Ratio", "Deep Progressions P90"
+        ],
+        "labels": {
+            "Blocks Per Shot": "Blocks/Shot",
+            "Challenge Ratio": "Tack./Dribbled Past %",
+            "Average X Pressure": "Av. Pressure Dist.",
+            "Padj Tackles P90": "PAdj Tackles",
+            "Hops": "HOPS",           
+            "OBV Dribble Carry P90": "OBV Dribble & Carry",
+            "Long Ball Ratio": "Long Ball %",
+            "Pressured Passing Ratio": "Passing u. Pressure %",
+            "OBV Pass P90": "OBV Pass",
+            "Passing Ratio": "Passing %",
+            "Deep Progressions P90": "Deep Progressions"
+        }
+    },
+
+    "Goalkeeper": {
+        "metric_map": classic_gk_metric_map,
+        "save": [
+            "Gsaa Ratio",
+            "Save Ratio",
+            "Da Aggressive Distance"
+        ],
+        "usage": [
+            "Long Ball Ratio",
+            "Op Xgbuildup P90",
+            "Pressured Passing Ratio",
+            "Passing Ratio",
+            "Pass Into Danger Ratio"
+        ],
+        "labels": {
+            "Gsaa Ratio": "GSAA %",
+            "Save Ratio": "Save %",
+            "Da Aggressive Distance": "GK Aggressive Dist.",
+            "Long Ball Ratio": "Long Ball %",
+            "Op Xgbuildup P90": "OP xGBuildup",           
+            "Pressured Passing Ratio": "Passing u. Pressure %",
+            "Passing Ratio": "Passing %",
+            "Pass Into Danger Ratio": "Pass into Danger %",
+        }
+    }
+}
+
+# Colonne merged -> (clé du barème, libellé affiché)
+XPHY_METRIC_MAP = {
+    "TOP 5 PSV-99": ("psv99_top5", "TOP 5 PSV-99"),
+    "HI Distance P90": ("hi_distance_full_all", "HI Distance P90"),
+    "Total Distance P90": ("total_distance_full_all", "Total Distance P90"),
+    "HSR Distance P90": ("hsr_distance_full_all", "HSR Distance P90"),
+    "Sprinting Distance P90": ("sprint_distance_full_all", "Sprinting Distance P90"),
+    "Sprint Count P90": ("sprint_count_full_all", "Sprint Count P90"),
+    "High Acceleration Count P90": ("highaccel_count_full_all", "High Acceleration Count P90"),
+}
+
+# Seuils xPhy intégrés en dur
+threshold_dict1 = {
+    'psv99_top5': {
+        'Central Defender': [
+            {'min': 31.48, 'max': None, 'score': 12},
+            {'min': 30.84, 'max': 31.48, 'score': 9},
+            {'min': 30.28, 'max': 30.84, 'score': 6},
+            {'min': 29.64, 'max': 30.28, 'score': 3},
+            {'min': None,  'max': 29.64, 'score': 0},
+        ],
+        'Full Back': [
+            {'min': 32.0,  'max': None, 'score': 14},
+            {'min': 31.46, 'max': 32.0,  'score': 10},
+            {'min': 30.94, 'max': 31.46, 'score': 6},
+            {'min': 30.08, 'max': 30.94, 'score': 4},
+            {'min': None,  'max': 30.08, 'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 29.76, 'max': None, 'score': 10},
+            {'min': 29.07, 'max': 29.76, 'score': 7},
+            {'min': 28.38,  'max': 29.07, 'score': 5},
+            {'min': 27.62, 'max': 28.38,  'score': 3},
+            {'min': None,  'max': 27.62, 'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 30.54, 'max': None,   'score': 10},
+            {'min': 29.74, 'max': 30.54,  'score': 7},
+            {'min': 29.23, 'max': 29.74,  'score': 5},
+            {'min': 28.27, 'max': 29.23,  'score': 3},
+            {'min': None,  'max': 28.27,  'score': 0},
+        ],
+        'Winger': [
+            {'min': 32.56, 'max': None, 'score': 14},
+            {'min': 31.82, 'max': 32.56, 'score': 10},
+            {'min': 31.22, 'max': 31.82, 'score': 6},
+            {'min': 30.24, 'max': 31.22, 'score': 4},
+            {'min': None,  'max': 30.24, 'score': 0},
+        ],
+        'Striker': [
+            {'min': 32.2,  'max': None, 'score': 14},
+            {'min': 31.28, 'max': 32.2,  'score': 10},
+            {'min': 30.7,  'max': 31.28, 'score': 6},
+            {'min': 29.96, 'max': 30.7,  'score': 4},
+            {'min': None,  'max': 29.96, 'score': 0},
+        ],
+    },
+    'hi_distance_full_all': {
+        'Central Defender': [
+            {'min': 551.56, 'max': None, 'score': 4},
+            {'min': 492.06, 'max': 551.56, 'score': 3},
+            {'min': 441.2,  'max': 492.06, 'score': 2},
+            {'min': 390.76, 'max': 441.2,  'score': 1},
+            {'min': None,   'max': 390.76, 'score': 0},
+        ],
+        'Full Back': [
+            {'min': 946.93, 'max': None, 'score': 4},
+            {'min': 860.03, 'max': 946.93, 'score': 3},
+            {'min': 786.18, 'max': 860.03, 'score': 2},
+            {'min': 703.91, 'max': 786.18, 'score': 1},
+            {'min': None,   'max': 703.91, 'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 854.02, 'max': None, 'score': 4},
+            {'min': 746.49, 'max': 854.02, 'score': 3},
+            {'min': 665.42, 'max': 746.49, 'score': 2},
+            {'min': 560.44, 'max': 665.42, 'score': 1},
+            {'min': None,   'max': 560.44, 'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 893.73,  'max': None,   'score': 4},
+            {'min': 803.93,  'max': 893.73, 'score': 3},
+            {'min': 726.53,  'max': 803.93, 'score': 2},
+            {'min': 616.37,  'max': 726.53, 'score': 1},
+            {'min': None,    'max': 616.37, 'score': 0},
+        ],
+        'Winger': [
+            {'min': 1035.79,'max': None, 'score': 4},
+            {'min': 940.79, 'max': 1035.79,'score': 3},
+            {'min': 863.0,  'max': 940.79, 'score': 2},
+            {'min': 777.13, 'max': 863.0,  'score': 1},
+            {'min': None,   'max': 777.13, 'score': 0},
+        ],
+        'Striker': [
+            {'min': 924.18, 'max': None, 'score': 4},
+            {'min': 837.87, 'max': 924.18, 'score': 3},
+            {'min': 754.05, 'max': 837.87, 'score': 2},
+            {'min': 659.55, 'max': 754.05, 'score': 1},
+            {'min': None,   'max': 659.55, 'score': 0},
+        ],
+    },
+    'total_distance_full_all': {
+        'Central Defender': [
+            {'min': 9688.63, 'max': None, 'score': 7},
+            {'min': 9446.1,  'max': 9688.63, 'score': 5},
+            {'min': 9231.08, 'max': 9446.1,  'score': 3},
+            {'min': 8913.02, 'max': 9231.08, 'score': 1},
+            {'min': None,    'max': 8913.02, 'score': 0},
+        ],
+        'Full Back': [
+            {'min': 10330.71,'max': None, 'score': 7},
+            {'min': 10103.2, 'max': 10330.71,'score': 5},
+            {'min': 9802.22, 'max': 10103.2, 'score': 3},
+            {'min': 9525.6,  'max': 9802.22, 'score': 1},
+            {'min': None,    'max': 9525.6,  'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 11193.90,  'max': None, 'score': 10},
+            {'min': 10926.04,  'max': 11193.90,  'score': 7},
+            {'min': 10627.19,  'max': 10926.04,  'score': 5},
+            {'min': 10271.79,   'max': 10627.19,  'score': 3},
+            {'min': None,    'max': 10271.79,   'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 10529.28,  'max': None,     'score': 7},
+            {'min': 9975.60,   'max': 10529.28, 'score': 5},
+            {'min': 9438.64,   'max': 9975.60,  'score': 3},
+            {'min': 8933.82,   'max': 9438.64,  'score': 1},
+            {'min': None,      'max': 8933.82,  'score': 0},
+        ],
+        'Winger': [
+            {'min': 10597.7,  'max': None, 'score': 7},
+            {'min': 10253.05,  'max': 10597.7, 'score': 5},
+            {'min': 9922.66,   'max': 10253.05, 'score': 3},
+            {'min': 9576.8,    'max': 9922.66,  'score': 1},
+            {'min': None,    'max': 9576.8,   'score': 0},
+        ],
+        'Striker': [
+            {'min': 10337.14,  'max': None, 'score': 7},
+            {'min': 9986.61,  'max': 10337.14, 'score': 5},
+            {'min': 9725.31,   'max': 9986.61, 'score': 3},
+            {'min': 9370.5,  'max': 9725.31,  'score': 1},
+            {'min': None,    'max': 9370.5, 'score': 0},
+        ],
+    },
+    'hsr_distance_full_all': {
+        'Central Defender': [
+            {'min': 418.68,  'max': None,    'score': 7},
+            {'min': 386.56,  'max': 418.68,  'score': 5},
+            {'min': 359.06,  'max': 386.56,  'score': 3},
+            {'min': 319.99,  'max': 359.06,  'score': 1},
+            {'min': None,    'max': 319.99,  'score': 0},
+        ],
+        'Full Back': [
+            {'min': 683.49,  'max': None,    'score': 7},
+            {'min': 626.45,  'max': 683.49,  'score': 5},
+            {'min': 574.46,  'max': 626.45,  'score': 3},
+            {'min': 515.74,  'max': 574.46,  'score': 1},
+            {'min': None,    'max': 515.74,  'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 671.14,  'max': None,    'score': 7},
+            {'min': 603.56,  'max': 671.14,  'score': 5},
+            {'min': 547.54,  'max': 603.56,  'score': 3},
+            {'min': 465.70,  'max': 547.54,  'score': 1},
+            {'min': None,    'max': 465.70,  'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 688.96,  'max': None,   'score': 10},
+            {'min': 629.37,  'max': 688.96, 'score': 7},
+            {'min': 567.04,  'max': 629.37, 'score': 5},
+            {'min': 495.78,  'max': 567.04, 'score': 3},
+            {'min': None,    'max': 495.78, 'score': 0},
+        ],
+        'Winger': [
+            {'min': 719.96,  'max': None,    'score': 7},
+            {'min': 671.78,  'max': 719.96,  'score': 5},
+            {'min': 622.00,  'max': 671.78,  'score': 3},
+            {'min': 560.85,  'max': 622.00,  'score': 1},
+            {'min': None,    'max': 560.85,  'score': 0},
+        ],
+        'Striker': [
+            {'min': 649.93,  'max': None,    'score': 7},
+            {'min': 595.20,  'max': 649.93,  'score': 5},
+            {'min': 551.35,  'max': 595.20,  'score': 3},
+            {'min': 484.71,  'max': 551.35,  'score': 1},
+            {'min': None,    'max': 484.71,  'score': 0},
+        ],
+    },
+    'sprint_distance_full_all': {
+        'Central Defender': [
+            {'min': 139.22, 'max': None,    'score': 7},
+            {'min': 119.31, 'max': 139.22,  'score': 5},
+            {'min': 102.34,  'max': 119.31,  'score': 3},
+            {'min': 82.93,  'max': 102.34,   'score': 1},
+            {'min': None,   'max': 82.93,   'score': 0},
+        ],
+        'Full Back': [
+            {'min': 272.36, 'max': None,    'score': 7},
+            {'min': 240.01, 'max': 272.36,  'score': 5},
+            {'min': 204.02, 'max': 240.01,  'score': 3},
+            {'min': 172.29,  'max': 204.02,  'score': 1},
+            {'min': None,   'max': 172.29,   'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 180.98, 'max': None,    'score': 4},
+            {'min': 139.11, 'max': 180.98,  'score': 3},
+            {'min': 109.68, 'max': 139.11,  'score': 2},
+            {'min': 80.78,  'max': 109.68,  'score': 1},
+            {'min': None,   'max': 80.78,   'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 214.74,  'max': None,   'score': 4},
+            {'min': 184.28,  'max': 214.74, 'score': 3},
+            {'min': 159.87,  'max': 184.28, 'score': 2},
+            {'min': 112.56,  'max': 159.87, 'score': 1},
+            {'min': None,    'max': 112.56, 'score': 0},
+        ],
+        'Winger': [
+            {'min': 305.22, 'max': None,    'score': 7},
+            {'min': 258.86, 'max': 305.22,  'score': 5},
+            {'min': 224.24, 'max': 258.86,  'score': 3},
+            {'min': 179.44, 'max': 224.24,  'score': 1},
+            {'min': None,   'max': 179.44,  'score': 0},
+        ],
+        'Striker': [
+            {'min': 253.71, 'max': None,    'score': 7},
+            {'min': 219.69, 'max': 253.71,  'score': 5},
+            {'min': 180.40, 'max': 219.69,  'score': 3},
+            {'min': 136.27, 'max': 180.40,  'score': 1},
+            {'min': None,   'max': 136.27,  'score': 0},
+        ],
+    },
+    'sprint_count_full_all': {
+        'Central Defender': [
+            {'min': 7.79, 'max': None,   'score': 7},
+            {'min': 6.74,  'max': 7.79,  'score': 5},
+            {'min': 5.87,  'max': 6.74,   'score': 3},
+            {'min': 4.9,  'max': 5.87,   'score': 1},
+            {'min': None,  'max': 4.9,   'score': 0},
+        ],
+        'Full Back': [
+            {'min': 14.47, 'max': None,   'score': 7},
+            {'min': 12.89, 'max': 14.47,  'score': 5},
+            {'min': 11.44, 'max': 12.89,  'score': 3},
+            {'min': 9.69,  'max': 11.44,  'score': 1},
+            {'min': None,  'max': 9.69,   'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 10.10, 'max': None,   'score': 4},
+            {'min': 7.85,  'max': 10.10,  'score': 3},
+            {'min': 6.26,  'max': 7.85,   'score': 2},
+            {'min': 4.83,  'max': 6.26,   'score': 1},
+            {'min': None,  'max': 4.83,   'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 12.36, 'max': None,   'score': 4},
+            {'min': 10.51, 'max': 12.36,  'score': 3},
+            {'min': 8.62,  'max': 10.51,  'score': 2},
+            {'min': 6.31,  'max': 8.62,   'score': 1},
+            {'min': None,  'max': 6.31,   'score': 0},
+        ],
+        'Winger': [
+            {'min': 16.27, 'max': None,   'score': 7},
+            {'min': 14.26, 'max': 16.27,  'score': 5},
+            {'min': 12.32, 'max': 14.26,  'score': 3},
+            {'min': 10.2,  'max': 12.32,  'score': 1},
+            {'min': None,  'max': 10.2,   'score': 0},
+        ],
+        'Striker': [
+            {'min': 14.28, 'max': None,   'score': 7},
+            {'min': 12.44, 'max': 14.28,  'score': 5},
+            {'min': 10.54,  'max': 12.44,  'score': 3},
+            {'min': 7.99,  'max': 10.54,   'score': 1},
+            {'min': None,  'max': 7.99,   'score': 0},
+        ],
+    },
+    'highaccel_count_full_all': {
+        'Central Defender': [
+            {'min': 5.84, 'max': None, 'score': 7},
+            {'min': 5.14, 'max': 5.84, 'score': 5},
+            {'min': 4.62, 'max': 5.14, 'score': 3},
+            {'min': 4.09, 'max': 4.62, 'score': 1},
+            {'min': None,'max': 4.09,  'score': 0},
+        ],
+        'Full Back': [
+            {'min': 8.93, 'max': None, 'score': 7},
+            {'min': 8.07, 'max': 8.93, 'score': 5},
+            {'min': 7.22, 'max': 8.07, 'score': 3},
+            {'min': 6.24, 'max': 7.22, 'score': 1},
+            {'min': None,'max': 6.24,  'score': 0},
+        ],
+        'Midfielder': [
+            {'min': 5.18,'max': None,'score': 7},
+            {'min': 4.37,'max': 5.18,'score': 5},
+            {'min': 3.77,'max': 4.37,'score': 3},
+            {'min': 3.15,'max': 3.77,'score': 1},
+            {'min': None,'max': 3.15,'score': 0},
+        ],
+        'Attacking Midfielder': [
+            {'min': 6.97, 'max': None,   'score': 7},
+            {'min': 5.62, 'max': 6.97,   'score': 5},
+            {'min': 4.81, 'max': 5.62,   'score': 3},
+            {'min': 4.04, 'max': 4.81,   'score': 1},
+            {'min': None, 'max': 4.04,   'score': 0},
+        ],
+        'Winger': [
+            {'min': 9.96,'max': None,'score': 10},
+            {'min': 8.88,'max': 9.96,'score': 7},
+            {'min': 7.63,'max': 8.88,'score': 5},
+            {'min': 6.30,'max': 7.63,'score': 3},
+            {'min': None,'max': 6.30,'score': 0},
+        ],
+        'Striker': [
+            {'min': 9.52,'max': None,'score': 4},
+            {'min': 8.35,'max': 9.52,'score': 3},
+            {'min': 7.12,'max': 8.35,'score': 2},
+            {'min': 6.20,'max': 7.12,'score': 1},
+            {'min': None,'max': 6.20,'score': 0},
+        ],
+    },
+}
+
+def points_column(label: str) -> str:
+    return f"xPhy Pts {label}"
+
+
+def threshold_max(bar_key: str, position) -> int:
+    rules = threshold_dict1.get(bar_key, {}).get(position, [])
+    return max((r["score"] for r in rules), default=0)
+
+
+def threshold_points(values: pd.Series, positions: pd.Series, bar_key: str) -> pd.Series:
+    """Points of each value on the scale of its position (0 outside the scale, NaN when missing)."""
+    vals = pd.to_numeric(values, errors="coerce").to_numpy(dtype=float)
+    pos = positions.to_numpy()
+    out = np.zeros(len(vals))
+    for position, rules in threshold_dict1.get(bar_key, {}).items():
+        todo = (pos == position) & ~np.isnan(vals)
+        for rule in rules:  # premier palier atteint, comme dans les tableaux de détail
+            lo, hi = rule.get("min"), rule.get("max")
+            hit = todo.copy()
+            if lo is not None:
+                hit &= vals >= lo
+            if hi is not None:
+                hit &= vals < hi
+            out[hit] = rule.get("score", 0)
+            todo &= ~hit
+    out[np.isnan(vals)] = np.nan
+    return pd.Series(out, index=values.index)
+
+
+def xphy_points(df: pd.DataFrame, position_col: str = "Position Group") -> pd.DataFrame:
+    """One ``xPhy Pts <metric>`` column per `XPHY_METRIC_MAP` entry present in `df`."""
+    return pd.DataFrame({
+        points_column(label): threshold_points(df[label], df[position_col], bar_key)
+        for label, (bar_key, _) in XPHY_METRIC_MAP.items()
+        if label in df.columns
+    }, index=df.index)
@@ -0,0 +1,266 @@
+"""Percentile of every radar metric within each row's default peer group.
+
+A radar ranks a player against the peers of their position and season (top-5
+leagues, a minutes floor, and fallbacks when that group is empty); each radar
+of the app has its own peer definition, listed in `PEER_GROUPS`.  The snapshot
+(`skapp.snapshot`) stores, for every row, one ``<metric> (pct <group>)`` column
+per metric of the groups of its dataset, and one table of peer means per group
+and season (position, metric -> peers, mean, percentile of the mean).
+
+Percentiles are stored un-inverted: the radars apply their own inverse metrics
+(``100 - pct``).  The radars read these columns and only run the live engine
+(`pct_rank` on `peer_frame`) for a peer group that is not the row's default one,
+e.g. a second player compared in the first player's group.
+"""
+
+import numpy as np
+import pandas as pd
+
+from skapp.metrics import NAME_NORMALIZER, graph_columns, metric_templates_tech, resolve_metric_col
+
+SK_TOP5 = ["ENG - Premier League", "FRA - Ligue 1", "ESP - LaLiga", "ITA - Serie A", "GER - Bundesliga"]
+SB_TOP5 = ["ENG - Premier League", "FRA - Ligue 1", "SPA - La Liga", "ITA - Serie A", "GER - 1. Bundesliga"]
+
+# Radar physique des pages Merged (popover du Player Search et onglet Merged Indexes)
+MERGED_PHYSICAL_METRICS = [
+    "TOP 5 PSV-99", "HI Distance P90", "M/min P90",
+    "HSR Distance P90", "Sprinting Distance P90", "Sprint Count P90", "High Acceleration Count P90",
+]
+TECH_RADAR_METRICS = list(dict.fromkeys(m for metrics in metric_templates_tech.values() for m in metrics))
+
+_SK_KEYS = {"position": "Position Group", "season": "Season", "competition": "Competition"}
+_SB_KEYS = {"position": "Position Group", "season": "Season Name", "competition": "Competition Name"}
+
+# dataset : lignes qui reçoivent les percentiles ; peers : dataset des pairs
+# min_minutes / strict : Minutes >= min (ou > min si strict)
+# season_match : "exact" ou "contains" (saison des pairs contenant celle du joueur)
+# fallback : "previous_season" (AAAA/AAAA -> AAAA-1/AAAA), "all_competitions"
+PEER_GROUPS = {
+    "xphy": {
+        "dataset": "xphysical", "peers": "xphysical", "keys": _SK_KEYS, "leagues": SK_TOP5,
+        "min_minutes": None, "strict": False, "season_match": "exact",
+        "fallback": ("previous_season", "all_competitions"), "metrics": graph_columns,
+    },
+    "xtech": {
+        "dataset": "xtechnical", "peers": "xtechnical", "keys": _SB_KEYS, "leagues": SB_TOP5,
+        "min_minutes": 600, "strict": False, "season_match": "exact",
+        "fallback": ("all_competitions",), "metrics": TECH_RADAR_METRICS,
+    },
+    "merged_phy": {
+        "dataset": "merged", "peers": "merged", "keys": _SB_KEYS, "leagues": SB_TOP5,
+        "min_minutes": 600, "strict": True, "season_match": "contains",
+        "fallback": (), "metrics": MERGED_PHYSICAL_METRICS,
+    },
+    "merged_tech": {
+        "dataset": "merged", "peers": "xtechnical", "keys": _SB_KEYS, "leagues": SB_TOP5,
+        "min_minutes": 600, "strict": False, "season_match": "exact",
+        "fallback": ("all_competitions",), "metrics": TECH_RADAR_METRICS,
+    },
+    "mi_phy": {
+        "dataset": "merged", "peers": "merged", "keys": _SB_KEYS, "leagues": SB_TOP5,
+        "min_minutes": 500, "strict": True, "season_match": "contains",
+        "fallback": (), "metrics": MERGED_PHYSICAL_METRICS,
+    },
+    "mi_tech": {
+        "dataset": "merged", "peers": "merged", "keys": _SB_KEYS, "leagues": SB_TOP5,
+        "min_minutes": 600, "strict": False, "season_match": "exact",
+        "fallback": ("all_competitions",), "metrics": TECH_RADAR_METRICS,
+    },
+}
+
+PEER_STATS_COLUMNS = ["Position Group", "Season", "Metric", "Peers", "Mean", "Mean Pct"]
+
+
+def percentile_column(group: str, metric: str) -> str:
+    return f"{metric} (pct {group})"
+
+
+def groups_for(dataset: str) -> list:
+    return [g for g, spec in PEER_GROUPS.items() if spec["dataset"] == dataset]
+
+
+def pct_rank(series, value) -> float:
+    """Percentile de `value` dans `series` (0–100), moitié des ex aequo comptée."""
+    arr = pd.to_numeric(pd.Series(series), errors="coerce").dropna().values
+    if len(arr) == 0:
+        return 0.0
+    lower = (arr < value).sum()
+    equal = (arr == value).sum()
+    return float((lower + 0.5 * equal) / len(arr) * 100)
+
+
+def _ranks_sorted(arr: np.ndarray, values: np.ndarray) -> np.ndarray:
+    if len(arr) == 0:
+        return np.zeros(len(values))
+    lower = np.searchsorted(arr, values, side="left")
+    equal = np.searchsorted(arr, values, side="right") - lower
+    out = (lower + 0.5 * equal) / len(arr) * 100
+    out[np.isnan(values)] = 0.0  # comme pct_rank : une valeur manquante n'est supérieure à personne
+    return out
+
+
+def pct_ranks(peer_values, values) -> np.ndarray:
+    """Vectorised `pct_rank` of `values` against the same peers (searchsorted on sorted peers)."""
+    arr = np.sort(pd.to_numeric(pd.Series(peer_values), errors="coerce").dropna().to_numpy(dtype=float))
+    return _ranks_sorted(arr, np.asarray(values, dtype=float))
+
+
+def previous_season(season: str):
+    parts = str(season).split("/")
+    if len(parts) == 2 and parts[0] == parts[1] and parts[0].isdigit():
+        return f"{int(parts[0]) - 1}/{parts[0]}"
+    return None
+
+
+def peer_seasons(group: str, season, seasons) -> set:
+    """Seasons of the peer dataset that can feed the peer group of `season`."""
+    spec = PEER_GROUPS[group]
+    season = str(season)
+    if spec["season_match"] == "contains":
+        found = {s for s in map(str, seasons) if season in s}
+    else:
+        found = {season}
+    if "previous_season" in spec["fallback"] and previous_season(season):
+        found.add(previous_season(season))
+    return found
+
+
+def _text(series: pd.Series) -> np.ndarray:
+    return series.astype(str).str.strip().to_numpy()
+
+
+def _peer_keys(group: str, peers: pd.DataFrame) -> dict:
+    spec = PEER_GROUPS[group]
+    keys = {name: _text(peers[col]) for name, col in spec["keys"].items()}
+    if spec["min_minutes"] is not None:
+        minutes = pd.to_numeric(peers["Minutes"], errors="coerce").to_numpy(dtype=float)
+        keys["minutes_ok"] = (minutes > spec["min_minutes"]) if spec["strict"] else (minutes >= spec["min_minutes"])
+    keys["top5"] = np.isin(keys["competition"], spec["leagues"])
+    return keys
+
+
+def _peer_mask(group: str, keys: dict, position: str, season: str) -> np.ndarray:
+    spec = PEER_GROUPS[group]
+    base = keys["position"] == position
+    if "minutes_ok" in keys:
+        base &= keys["minutes_ok"]
+    if spec["season_match"] == "contains":
+        in_season = np.array([season in s for s in keys["season"]], dtype=bool)
+    else:
+        in_season = keys["season"] == season
+    mask = base & in_season & keys["top5"]
+    if not mask.any() and "previous_season" in spec["fallback"] and previous_season(season):
+        mask = base & (keys["season"] == previous_season(season)) & keys["top5"]
+    if not mask.any() and "all_competitions" in spec["fallback"]:
+        mask = base & in_season
+    return mask
+
+
+def peer_frame(group: str, peers: pd.DataFrame, position, season) -> pd.DataFrame:
+    """Peers of (`position`, `season`) for `group`, with the fallbacks of its radar."""
+    mask = _peer_mask(group, _peer_keys(group, peers), str(position).strip(), str(season).strip())
+    return peers[mask]
+
+
+def _normalized(df: pd.DataFrame) -> pd.DataFrame:
+    return df.rename(columns={k: v for k, v in NAME_NORMALIZER.items() if k in df.columns})
+
+
+def _matrix(df: pd.DataFrame, cols: list) -> np.ndarray:
+    # colonnes contiguës (ordre Fortran) : les sommes par colonne suivent le même chemin que pandas
+    out = np.empty((len(df), len(cols)), order="F")
+    for j, c in enumerate(cols):
+        out[:, j] = pd.to_numeric(df[c], errors="coerce").to_numpy(dtype=float)
+    return out
+
+
+def peer_blocks(group: str, rows: pd.DataFrame, peers: pd.DataFrame):
+    """Inputs of `materialize`: ``(metrics, row values, peer values, blocks)``.
+
+    The values are float matrices (one column per metric present in `rows` and
+    `peers`); `blocks` maps each (position, season) of `rows` to its row
+    positions and the mask of its peers.
+    """
+    spec = PEER_GROUPS[group]
+    rows_n, peers_n = _normalized(rows), _normalized(peers)
+    metrics, row_cols, peer_cols = [], [], []
+    for m in spec["metrics"]:
+        try:
+            rc, pc = resolve_metric_col(rows_n.columns, m), resolve_metric_col(peers_n.columns, m)
+        except KeyError:
+            continue
+        metrics.append(m)
+        row_cols.append(rc)
+        peer_cols.append(pc)
+
+    row_vals, peer_vals = _matrix(rows_n, row_cols), _matrix(peers_n, peer_cols)
+    keys = _peer_keys(group, peers_n) if len(peers_n) else None
+    positions = _text(rows_n[spec["keys"]["position"]])
+    seasons = _text(rows_n[spec["keys"]["season"]])
+    blocks = {
+        (position, season): (idx, _peer_mask(group, keys, position, season) if keys is not None
+                             else np.zeros(0, dtype=bool))
+        for (position, season), idx in
+        pd.DataFrame({"p": positions, "s": seasons}).groupby(["p", "s"], sort=False).indices.items()
+    }
+    return metrics, row_vals, peer_vals, blocks
+
+
+def materialize(group: str, rows: pd.DataFrame, peers: pd.DataFrame):
+    """Percentile columns of `rows` for `group` and the peer means of their (position, season) groups.
+
+    Returns ``(pct, stats)``: `pct` is aligned on ``rows.index``; `stats` has
+    `PEER_STATS_COLUMNS`.  Metrics absent from `rows` or `peers` are skipped.
+    """
+    metrics, row_vals, peer_vals, blocks = peer_blocks(group, rows, peers)
+    pct = np.zeros((len(rows), len(metrics)), order="F")
+    stats = []
+    for (position, season), (idx, mask) in blocks.items():
+        ref = peer_vals[mask]
+        for j, m in enumerate(metrics):
+            col = ref[:, j]
+            arr = np.sort(col[~np.isnan(col)])
+            pct[idx, j] = _ranks_sorted(arr, row_vals[idx, j])
+            mean = pd.Series(col).mean()
+            stats.append((position, season, m, len(arr), mean, float(_ranks_sorted(arr, np.array([mean]))[0])))
+
+    pct = pd.DataFrame(pct, index=rows.index, columns=[percentile_column(group, m) for m in metrics])
+    return pct, pd.DataFrame(stats, columns=PEER_STATS_COLUMNS)
+
+
+def lookup_percentiles(row, group: str, metrics, peers=None, inverse=(), peer_group=None) -> list:
+    """Percentile of `row` for each metric, read from its materialized columns.
+
+    `peer_group` is the ``(position, season)`` the radar ranks against (default:
+    the row's own).  When it is another group, or a column is missing, the live
+    engine ranks the row against `peers` (a callable returning the peer frame,
+    only evaluated then).  Metrics in `inverse` are returned as ``100 - pct``.
+    """
+    keys = PEER_GROUPS[group]["keys"]
+    own = peer_group is None or (
+        tuple(str(v).strip() for v in peer_group)
+        == (str(row.get(keys["position"])).strip(), str(row.get(keys["season"])).strip())
+    )
+    out, live = [], None
+    for m in metrics:
+        value = row.get(percentile_column(group, m)) if own else None
+        if value is None or pd.isna(value):
+            if peers is None:
+                raise KeyError(percentile_column(group, m))
+            live = peers() if live is None else live
+            value = pct_rank(live[resolve_metric_col(live.columns, m)], row[resolve_metric_col(row.index, m)])
+        value = float(value)
+        out.append(100 - value if m in inverse else value)
+    return out
+
+
+def lookup_peer_means(stats: pd.DataFrame, position, season, metrics, inverse=()):
+    """(means, percentiles of the means) of a peer group, or None when it was not materialized."""
+    try:
+        sel = stats.loc[(str(position).strip(), str(season).strip())].reindex(list(metrics))
+    except KeyError:
+        return None
+    if sel["Mean Pct"].isna().any():
+        return None
+    pcts = [100 - p if m in inverse else p for m, p in zip(metrics, sel["Mean Pct"].astype(float))]
+    return sel["Mean"].astype(float).tolist(), pcts
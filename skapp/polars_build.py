@@ -0,0 +1,213 @@
+"""Polars engine of the snapshot build (``python -m skapp.snapshot --engine polars``).
+
+The build steps that work on whole columns run as Polars lazy queries, on all
+the cores Polars is given (``POLARS_MAX_THREADS``, every core by default):
+
+* ingest: the CSVs are scanned with the NA markers of `pandas.read_csv`, the
+  header names stripped, and the derived xTechnical columns (``season_short``,
+  ``Display Name``) computed as expressions;
+* scoring: the xPhysical threshold points of the merged rows
+  (`skapp.metrics.threshold_dict1`) as one ``when/then`` chain per metric;
+* ranking: the ``xPhysical Rank`` the Top 50 of the xPhysical page is sorted
+  on, per position group of a partition;
+* percentiles: the rank of every row of a season among the peers of its
+  (position, season) block, for every metric of a peer group at once, by an
+  as-of join on the sorted distinct peer values.  The blocks and peer masks
+  are those of `skapp.percentiles.peer_blocks`.
+
+Each step returns the pandas objects of its pandas counterpart, with the same
+dtypes and values, so the partition, peer and Arrow files are the ones the
+pandas build writes and the app reads them unchanged.  The rest of the build
+(registry, merge, writing) stays with pandas.  The peer means keep the pandas
+sum, whose rounding the peer tables record.
+"""
+
+import functools
+
+import numpy as np
+import pandas as pd
+
+from skapp.metrics import XPHY_METRIC_MAP, points_column, threshold_dict1
+from skapp.percentiles import PEER_STATS_COLUMNS, peer_blocks, percentile_column
+
+try:
+    import polars as pl
+except ImportError:  # dépendance optionnelle : moteur pandas
+    pl = None
+
+# Marqueurs de valeur manquante de pandas.read_csv
+NA_VALUES = [
+    "", "#N/A", "#N/A N/A", "#NA", "-1.#IND", "-1.#QNAN", "-NaN", "-nan", "1.#IND", "1.#QNAN", "<NA>", "N/A",
+    "NA", "NULL", "NaN", "None", "n/a", "nan", "null",
+]
+
+
+def _require():
+    if pl is None:
+        raise ImportError("The polars build engine needs the polars package")
+
+
+def _scan(path: str):
+    lf = pl.scan_csv(path, infer_schema_length=None, null_values=NA_VALUES)
+    return lf.rename({c: c.strip() for c in lf.collect_schema().names()})
+
+
+def _to_pandas(lf) -> pd.DataFrame:
+    df = lf.collect().to_pandas()
+    # textes manquants : NaN comme read_csv (Polars donne None)
+    for c in df.columns[df.dtypes == object]:
+        if df[c].isna().any():
+            df[c] = df[c].where(df[c].notna(), np.nan)
+    return df
+
+
+def read_xphysical(path: str) -> pd.DataFrame:
+    _require()
+    return _to_pandas(_scan(path))
+
+
+def read_xtechnical(path: str) -> pd.DataFrame:
+    _require()
+    lf = _scan(path)
+    names = lf.collect_schema().names()
+    season = pl.col("Season Name").cast(pl.String).fill_null("nan")
+    # skapp.data.shorten_season : 'AAAA/AAAA' -> 'AA/AA'
+    short = pl.when(season.str.contains(r"^\d{4}/\d{4}$")).then(
+        season.str.slice(2, 2) + "/" + season.str.slice(7, 2)
+    ).otherwise(season)
+    # skapp.data.display_names : 'Known Name (Player Name)' quand le nom connu diffère
+    name = pl.col("Player Name")
+    if "Player Known Name" in names:
+        known = pl.col("Player Known Name")
+        display = pl.when(known.is_not_null() & known.ne_missing(name)).then(
+            pl.format("{} ({})", known, name.cast(pl.String).fill_null("nan"))
+        ).otherwise(name)
+    else:
+        display = name
+    return _to_pandas(lf.with_columns(short.alias("season_short"), display.alias("Display Name")))
+
+
+@functools.lru_cache(maxsize=None)
+def _points(label: str, bar_key: str, position_col: str):
+    values = pl.col(label).cast(pl.Float64, strict=False)
+    position = pl.col(position_col).cast(pl.String)
+    chain = pl.when(values.is_null() | values.is_nan()).then(float("nan"))
+    for pos, rules in threshold_dict1.get(bar_key, {}).items():
+        for rule in rules:  # premier palier atteint, comme skapp.metrics.threshold_points
+            hit = position == pos
+            if rule.get("min") is not None:
+                hit &= values >= rule["min"]
+            if rule.get("max") is not None:
+                hit &= values < rule["max"]
+            chain = chain.when(hit).then(float(rule.get("score", 0)))
+    return chain.otherwise(0.0).alias(points_column(label))
+
+
+def xphy_points(df: pd.DataFrame, position_col: str = "Position Group") -> pd.DataFrame:
+    """`skapp.metrics.xphy_points` as one Polars query."""
+    _require()
+    labels = [label for label in XPHY_METRIC_MAP if label in df.columns]
+    if not labels:
+        return pd.DataFrame(index=df.index)
+    frame = pl.from_pandas(df[list(dict.fromkeys(labels + [position_col]))].astype({position_col: str}))
+    out = frame.lazy().select(_points(label, XPHY_METRIC_MAP[label][0], position_col) for label in labels)
+    return out.collect().to_pandas().set_index(df.index)
+
+
+def rank_xphysical(part: pd.DataFrame) -> pd.Series:
+    """`skapp.snapshot.rank_xphysical`: rank of ``xPhysical`` per position group (1 = best, missing last)."""
+    _require()
+    position = part["Position Group"]
+    frame = pl.DataFrame({
+        "position": position.astype(str).where(position.notna(), None).to_numpy(),
+        "value": pd.to_numeric(part["xPhysical"], errors="coerce").to_numpy(dtype=float),
+    }, nan_to_null=True)
+    value = pl.col("value")
+    # method="first" : ex aequo dans l'ordre des lignes ; na_option="bottom" : manquants après, dans l'ordre ;
+    # sans poste : pas de rang (groupby de pandas)
+    ranked = frame.lazy().select(
+        pl.when(pl.col("position").is_not_null()).then(
+            pl.when(value.is_not_null())
+            .then(value.rank("ordinal", descending=True))
+            .otherwise(value.count() + value.is_null().cum_sum())
+            .over("position")
+        ).alias("rank")
+    ).collect()
+    return pd.Series(ranked["rank"].to_numpy(), index=part.index).astype("Int64")
+
+
+def _ranks(peers, queries):
+    """Percentile (as `skapp.percentiles._ranks_sorted`) of each query ``x`` among the peers ``v`` of its block.
+
+    `peers`: (block, metric, v) without NaN; `queries`: (block, metric, x, id).
+    """
+    keys = ["block", "metric"]
+    counts = (
+        peers.group_by([*keys, "v"]).agg(pl.len().alias("equal"))
+        .sort("v")
+        .with_columns(pl.col("equal").cum_sum().over(keys).alias("le"))
+    )
+    totals = peers.group_by(keys).agg(pl.len().alias("n"))
+    matched = queries.sort("x").join_asof(counts, left_on="x", right_on="v", by=keys, strategy="backward",
+                                           check_sortedness=False)  # trié ci-dessus
+    hit = pl.col("v") == pl.col("x")
+    lower = pl.when(hit).then(pl.col("le") - pl.col("equal")).otherwise(pl.col("le").fill_null(0))
+    equal = pl.when(hit).then(pl.col("equal")).otherwise(0)
+    n = pl.col("n").fill_null(0)
+    pct = (
+        pl.when(pl.col("x").is_nan() | (n == 0)).then(0.0)
+        .otherwise((lower.cast(pl.Int64) + 0.5 * equal.cast(pl.Int64)) / n.cast(pl.Int64) * 100)
+    )
+    return matched.join(totals, on=keys, how="left").select("id", "metric", pct.alias("pct"))
+
+
+def materialize(group: str, rows: pd.DataFrame, peers: pd.DataFrame):
+    """`skapp.percentiles.materialize` with the ranks of every block and metric in one Polars query."""
+    _require()
+    metrics, row_vals, peer_vals, blocks = peer_blocks(group, rows, peers)
+    m = len(metrics)
+    peer_parts, row_parts, mean_parts, stats = [], [], [], []
+    for b, ((position, season), (idx, mask)) in enumerate(blocks.items()):
+        ref = peer_vals[mask]
+        peer_parts.append(pl.DataFrame({
+            "block": np.full(ref.size, b, dtype=np.int64), "metric": np.repeat(np.arange(m), len(ref)),
+            "v": ref.T.ravel(),
+        }))
+        row_parts.append(pl.DataFrame({
+            "block": np.full(len(idx) * m, b, dtype=np.int64), "metric": np.repeat(np.arange(m), len(idx)),
+            "x": row_vals[idx].T.ravel(), "id": np.tile(idx, m).astype(np.int64),
+        }))
+        means = [pd.Series(ref[:, j]).mean() for j in range(m)]
+        mean_parts.append(pl.DataFrame({
+            "block": np.full(m, b, dtype=np.int64), "metric": np.arange(m),
+            "x": np.array(means, dtype=float), "id": np.full(m, b, dtype=np.int64),
+        }))
+        stats += [(position, season, metric, int((~np.isnan(ref[:, j])).sum()), means[j])
+                  for j, metric in enumerate(metrics)]
+
+    pct = np.zeros((len(rows), m), order="F")
+    mean_pct = np.zeros((len(blocks), m))
+    if blocks and m:
+        peers_lf = pl.concat(peer_parts).lazy().filter(pl.col("v").is_not_nan())
+        row_pct, block_pct = pl.collect_all([
+            _ranks(peers_lf, pl.concat(row_parts).lazy()), _ranks(peers_lf, pl.concat(mean_parts).lazy()),
+        ])
+        pct[row_pct["id"].to_numpy(), row_pct["metric"].to_numpy()] = row_pct["pct"].to_numpy()
+        mean_pct[block_pct["id"].to_numpy(), block_pct["metric"].to_numpy()] = block_pct["pct"].to_numpy()
+
+    table = [
+        (position, season, metric, peers_n, mean, float(mean_pct[i // m, i % m]))
+        for i, (position, season, metric, peers_n, mean) in enumerate(stats)
+    ]
+    pct = pd.DataFrame(pct, index=rows.index, columns=[percentile_column(group, metric) for metric in metrics])
+    return pct, pd.DataFrame(table, columns=PEER_STATS_COLUMNS)
+
+
+# Étapes du build remplacées par ce moteur (skapp.snapshot.refresh)
+STEPS = {
+    "read_xphysical": read_xphysical,
+    "read_xtechnical": read_xtechnical,
+    "xphy_points": xphy_points,
+    "rank_xphysical": rank_xphysical,
+    "materialize": materialize,
+}
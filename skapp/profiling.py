@@ -0,0 +1,62 @@
+"""cProfile capture of app reruns.
+
+With ``?profile=N`` in the URL the app profiles the next N reruns of the
+session: `start` enables a `cProfile.Profile` on the script thread, `save`
+writes it to ``PROFILE_DIR/<time>-<page>.prof`` (readable with `pstats`,
+snakeviz...) together with the rendered top functions (``.txt``).
+`top_functions` gives the same table as a DataFrame for the app panel.
+
+Only the script thread is profiled.
+"""
+
+import cProfile
+import io
+import os
+import pstats
+import re
+import time
+
+import pandas as pd
+
+PROFILE_DIR = "profiles"
+TOP_FUNCTIONS = 40
+TOP_COLUMNS = ["Function", "Location", "Calls", "Own (ms)", "Cumulative (ms)", "Per call (ms)"]
+
+
+def start():
+    """Enabled profiler, or None when another profiler is already active."""
+    profile = cProfile.Profile()
+    try:
+        profile.enable()
+    except ValueError:
+        return None
+    return profile
+
+
+def save(profile: cProfile.Profile, page: str, directory: str = PROFILE_DIR, limit: int = TOP_FUNCTIONS) -> str:
+    """Stop `profile` and write its ``.prof`` and ``.txt`` files; returns the ``.prof`` path."""
+    profile.disable()
+    os.makedirs(directory, exist_ok=True)
+    now = time.time()
+    # horodatage à la milliseconde : plusieurs reruns profilés par seconde ne s'écrasent pas
+    stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(now)) + f"{now % 1:.3f}"[1:]
+    name = f"{stamp}-{re.sub(r'[^A-Za-z0-9]+', '_', page)}"
+    path = os.path.join(directory, name + ".prof")
+    profile.dump_stats(path)
+    text = io.StringIO()
+    pstats.Stats(path, stream=text).sort_stats("cumulative").print_stats(limit)
+    with open(os.path.join(directory, name + ".txt"), "w", encoding="utf-8") as fh:
+        fh.write(text.getvalue())
+    return path
+
+
+def top_functions(path: str, limit: int = TOP_FUNCTIONS, sort: str = "Cumulative (ms)") -> pd.DataFrame:
+    """Top `limit` functions of a ``.prof`` file, sorted by `sort` (a column of `TOP_COLUMNS`)."""
+    rows = []
+    for (filename, line, func), (_, calls, own, cumulative, _) in pstats.Stats(path).stats.items():
+        rows.append((
+            func, f"{os.path.basename(filename)}:{line}", calls,
+            own * 1000, cumulative * 1000, cumulative * 1000 / calls if calls else 0.0,
+        ))
+    df = pd.DataFrame(rows, columns=TOP_COLUMNS)
+    return df.sort_values(sort, ascending=False).head(limit).round(2).reset_index(drop=True)
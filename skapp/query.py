@@ -0,0 +1,228 @@
+"""Player Search queries over the snapshot files, with pandas or DuckDB.
+
+`search` answers the grid query of a Player Search table straight from the
+partition files of the snapshot (`skapp.snapshot`): only the partitions of the
+selected seasons and competitions are read, then come the base filters
+(positions, feet, age and minutes ranges) and the percentile thresholds of the
+popovers, each the percentile of the base rows as in
+`skapp.filters.percentile_filter` with a quantile table.  Only the requested
+columns are returned, in snapshot order, indexed by their row position in the
+dataset (the index of the frames of `skapp.snapshot.map_dataset`).
+
+Two backends answer the same query:
+
+* ``"duckdb"``: one SQL query of an in-process DuckDB over the Parquet files
+  of the partitions, thresholds computed by ``quantile_cont`` window
+  functions; the column names of the app (`skapp.data.prepare_dataset`) are
+  mapped back to the columns of the files;
+* ``"pandas"``: the partitions read with pandas and filtered by
+  `filter_frame`, the filters of the app over a frame already in memory.
+
+`default_backend` reads ``SKAPP_QUERY_BACKEND`` (pandas unless it asks for
+DuckDB).  The Player Search pages query through `grid_rows`: DuckDB when it is
+the backend, else (or when the query fails) their own pandas filtering of the
+selection they hold in memory, which is faster than re-reading the files as
+long as the selection is cached.  `bench.query` times DuckDB against that
+in-memory path and checks that they return the same rows.
+"""
+
+import logging
+import os
+
+import numpy as np
+import pandas as pd
+import pyarrow.parquet as pq
+
+from skapp.data import prepare_dataset
+from skapp.filters import percentile_filter, quantile_table
+from skapp.metrics import NAME_NORMALIZER
+from skapp.snapshot import SNAPSHOT_DIR, read_partition
+
+try:
+    import duckdb
+except ImportError:  # dépendance optionnelle : backend pandas
+    duckdb = None
+
+BACKENDS = ("pandas", "duckdb")
+BACKEND_ENV = "SKAPP_QUERY_BACKEND"
+# Colonnes des filtres de base, par dataset (noms de l'app)
+FILTER_COLUMNS = {
+    "xphysical": {"position": "Position Group", "foot": None, "age": "Age", "minutes": None},
+    "xtechnical": {"position": "Position Group", "foot": "Prefered Foot", "age": "Age", "minutes": "Minutes"},
+    "merged": {"position": "Position Group", "foot": "Prefered Foot", "age": "Age", "minutes": "Minutes"},
+}
+# Colonnes texte nettoyées par prepare_dataset (str.strip)
+_STRIPPED = {"xtechnical": ("Prefered Foot", "Player Name", "Position Group", "Competition Name")}
+# Alias de prepare_dataset (nom de l'app -> colonne du fichier)
+_ALIASES = {"xphysical": {"Player Name": "Player", "Team Name": "Team", "Competition Name": "Competition"}}
+
+log = logging.getLogger(__name__)
+_database = []  # base DuckDB en mémoire du processus, un curseur par requête
+
+
+def default_backend() -> str:
+    """``"duckdb"`` when ``SKAPP_QUERY_BACKEND`` asks for it and duckdb is installed, else ``"pandas"``."""
+    wanted = os.environ.get(BACKEND_ENV, "").strip().lower()
+    return "duckdb" if wanted == "duckdb" and duckdb is not None else "pandas"
+
+
+def partition_files(manifest: dict, dataset: str, seasons, competitions, directory: str = SNAPSHOT_DIR) -> list:
+    """Manifest entries of the partitions of `dataset` in `seasons` x `competitions`, in snapshot order."""
+    seasons, competitions = {str(s) for s in seasons}, {str(c) for c in competitions}
+    return [
+        p for p in manifest["datasets"][dataset]["partitions"].values()
+        if p["season"] in seasons and p["competition"] in competitions
+    ]
+
+
+def _offsets(manifest: dict, dataset: str) -> dict:
+    """Partition file -> position of its first row in the dataset (partitions concatenated in snapshot order)."""
+    out, start = {}, 0
+    for p in manifest["datasets"][dataset]["partitions"].values():
+        out[p["file"]] = start
+        start += p["rows"]
+    return out
+
+
+def search(manifest: dict, dataset: str, seasons, competitions, positions=(), feet=(), age=None, minutes=None,
+           percentiles: dict = None, columns=None, directory: str = SNAPSHOT_DIR, backend: str = None) -> pd.DataFrame:
+    """Rows of the Player Search grid of `dataset`, projected on `columns` (all columns when None).
+
+    `age` / `minutes` are inclusive ``(min, max)`` ranges, `percentiles` maps a
+    column to its minimum percentile (0 = no filter).  Filters on a column the
+    dataset does not have are ignored, as in the app.
+    """
+    backend = backend or default_backend()
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown query backend {backend!r} (expected one of {', '.join(BACKENDS)})")
+    if backend == "duckdb" and duckdb is None:
+        raise ImportError("The duckdb backend needs the duckdb package")
+    entries = partition_files(manifest, dataset, seasons, competitions, directory)
+    filters = {"position": list(positions or ()), "foot": list(feet or ()), "age": age, "minutes": minutes}
+    percentiles = {c: p for c, p in (percentiles or {}).items() if p > 0}
+    run = _search_duckdb if backend == "duckdb" else _search_pandas
+    return run(entries, _offsets(manifest, dataset), dataset, filters, percentiles, columns, directory)
+
+
+def grid_rows(fallback, manifest: dict, dataset: str, seasons, competitions, backend: str = None,
+              **query) -> pd.DataFrame:
+    """`search` with the DuckDB backend, else ``fallback()``.
+
+    `fallback` is the pandas filtering of the caller (the app filters the frames
+    it already holds in memory); it answers with the pandas backend and when the
+    DuckDB query raises (the error is logged).
+    """
+    if (backend or default_backend()) != "duckdb":
+        return fallback()
+    try:
+        return search(manifest, dataset, seasons, competitions, backend="duckdb", **query)
+    except Exception:
+        log.exception("DuckDB query of %s failed, falling back to pandas", dataset)
+        return fallback()
+
+
+def filter_frame(df: pd.DataFrame, dataset: str, positions=(), feet=(), age=None, minutes=None,
+                 percentiles: dict = None, columns=None) -> pd.DataFrame:
+    """The filters of `search` over rows of `dataset` already loaded (`prepare_dataset`), index kept."""
+    filters = {"position": list(positions or ()), "foot": list(feet or ()), "age": age, "minutes": minutes}
+    percentiles = {c: p for c, p in (percentiles or {}).items() if p > 0}
+    keep = np.ones(len(df), dtype=bool)
+    for name, col in FILTER_COLUMNS[dataset].items():
+        value = filters[name]
+        if col is None or col not in df.columns or not value:
+            continue
+        if name in ("position", "foot"):
+            keep &= df[col].isin(value).to_numpy()
+        else:
+            keep &= ((df[col] >= value[0]) & (df[col] <= value[1])).to_numpy()
+    base = df[keep]
+    cols = [c for c in percentiles if c in base.columns]
+    out = percentile_filter(base, {("query", c): percentiles[c] for c in cols}, quantile_table(base, cols))
+    if columns is not None:
+        out = out[[c for c in columns if c in out.columns]]
+    return out
+
+
+def _search_pandas(entries, offsets, dataset, filters, percentiles, columns, directory) -> pd.DataFrame:
+    parts = []
+    for e in entries:
+        part = read_partition(directory, e)
+        part.index = pd.RangeIndex(offsets[e["file"]], offsets[e["file"]] + len(part))
+        parts.append(part)
+    if not parts:
+        return pd.DataFrame(columns=list(columns or []))
+    df = prepare_dataset(pd.concat(parts), dataset)
+    return filter_frame(
+        df, dataset, filters["position"], filters["foot"], filters["age"], filters["minutes"], percentiles, columns,
+    )
+
+
+def _quote(name: str) -> str:
+    return '"' + str(name).replace('"', '""') + '"'
+
+
+def source_columns(schema_names, dataset: str) -> dict:
+    """App column name -> SQL expression over the columns of a partition file (as `prepare_dataset`)."""
+    out = {}
+    for raw in schema_names:
+        name = raw.strip()
+        name = NAME_NORMALIZER.get(name, name)
+        expr = _quote(raw)
+        out[name] = f"trim({expr})" if name in _STRIPPED.get(dataset, ()) else expr
+    for alias, col in _ALIASES.get(dataset, {}).items():
+        if alias not in out and col in out:
+            out[alias] = out[col]
+    return out
+
+
+def _cursor():
+    if not _database:
+        _database.append(duckdb.connect())
+    return _database[0].cursor()
+
+
+def _search_duckdb(entries, offsets, dataset, filters, percentiles, columns, directory) -> pd.DataFrame:
+    if not entries:
+        return pd.DataFrame(columns=list(columns or []))
+    files = [os.path.join(directory, e["file"]) for e in entries]
+    source = source_columns(pq.read_schema(files[0]).names, dataset)
+
+    where, params = [], {"files": files, "offsets": [offsets[e["file"]] for e in entries]}
+    for name, col in FILTER_COLUMNS[dataset].items():
+        value = filters[name]
+        if col is None or col not in source or not value:
+            continue
+        if name in ("position", "foot"):
+            where.append(f"list_contains(${name}, {source[col]})")
+            params[name] = [str(v) for v in value]
+        else:
+            where.append(f"{source[col]} BETWEEN ${name}_min AND ${name}_max")
+            params.update({f"{name}_min": value[0], f"{name}_max": value[1]})
+
+    names = list(source) if columns is None else [c for c in columns if c in source]
+    cols = [c for c in percentiles if c in source]
+    # Seuils : percentile (interpolation linéaire, NULL ignorés) des lignes de base, fenêtre sur toute la base ;
+    # un seuil NULL (colonne sans valeur) ne filtre pas
+    values = {c: f"TRY_CAST({_quote(c)} AS DOUBLE)" for c in cols}
+    thresholds = "".join(
+        f", quantile_cont({values[c]}, {percentiles[c] / 100!r}) OVER () AS _t{i}" for i, c in enumerate(cols)
+    )
+    passed = " AND ".join(f"(_t{i} IS NULL OR {values[c]} >= _t{i})" for i, c in enumerate(cols))
+    sql = f"""
+        WITH base AS (
+            SELECT {', '.join(f'{source[c]} AS {_quote(c)}' for c in dict.fromkeys(names + cols))},
+                   list_position($files, filename) AS _part, file_row_number AS _row
+            FROM read_parquet($files, filename = true, file_row_number = true)
+            {'WHERE ' + ' AND '.join(where) if where else ''}
+        ),
+        scored AS (SELECT *{thresholds} FROM base)
+        SELECT {', '.join(_quote(c) for c in names)}, $offsets[_part] + _row AS _position FROM scored
+        {'WHERE ' + passed if passed else ''}
+        ORDER BY _part, _row
+    """
+    con = _cursor()
+    try:
+        out = con.execute(sql, params).df()
+    finally:
+        con.close()
+    return out.set_index(pd.Index(out.pop("_position").to_numpy(), dtype="int64")).rename_axis(None)
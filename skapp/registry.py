@@ -0,0 +1,315 @@
+"""Stable integer player identities shared by the SkillCorner and StatsBomb files.
+
+SkillCorner rows (SK_All.csv) name a player through "Player" / "Short Name",
+StatsBomb rows (SB_All.csv, SB_SK_MERGED.csv) through "Player Name" /
+"Player Known Name".  A name is not an identity: two players can share one.
+The registry gives an integer ``Player ID`` to each (normalized name, season,
+team) stint of each source, the stints of a name being grouped by continuity:
+
+* a stint joins the identity of the name whose club it continues (compatible
+  team, `teams_compatible`), else the only identity it does not contradict (a
+  transfer);
+* two stints contradict each other when they are in the same season at
+  incompatible clubs, or when their birth years (season start minus
+  ``Age``) are more than a year apart.
+
+An ambiguous stint starts a new identity.  A SkillCorner identity reuses the
+StatsBomb ID when it can be linked to it, inside (season, team) blocks:
+
+1. same normalized full name;
+2. otherwise, the StatsBomb known name matches the SkillCorner full or short name;
+3. otherwise, same first initial and last name;
+4. otherwise, the StatsBomb name has a single identity whose age it does not contradict.
+
+Linked matches are only accepted when they point to a single StatsBomb player.
+Assignments are persisted (``player_registry.csv``) and never rewritten, so IDs
+stay the same from one data drop to the next.
+"""
+
+import functools
+import os
+import re
+import unicodedata
+
+import numpy as np
+import pandas as pd
+
+from skapp.data import temp_path
+
+PLAYER_ID = "Player ID"
+REGISTRY_PATH = "player_registry.csv"
+# Une ligne par passage (nom, saison, club) ; Born : année de naissance estimée (vide si inconnue).
+# Un registre antérieur (sans saison ni club) attribue ses IDs par nom.
+REGISTRY_COLUMNS = [PLAYER_ID, "Source", "Name Key", "Season", "Team", "Born"]
+STINT_COLUMNS = ["Name Key", "Season", "Team"]
+
+# Colonnes d'identité par source
+SOURCE_COLUMNS = {
+    "SK": {"name": "Player", "alt": "Short Name", "team": "Team", "season": "Season", "age": "Age"},
+    "SB": {
+        "name": "Player Name", "alt": "Player Known Name", "team": "Team Name", "season": "Season Name",
+        "age": "Age",
+    },
+}
+
+UNKNOWN_ID = -1
+
+_TRANSLIT = str.maketrans({
+    "ø": "o", "Ø": "O", "ł": "l", "Ł": "L", "đ": "d", "Đ": "D", "ß": "ss",
+    "æ": "ae", "Æ": "AE", "œ": "oe", "Œ": "OE", "ı": "i", "ð": "d", "þ": "th",
+})
+
+# Tokens trop génériques pour rapprocher deux noms de club
+_GENERIC_TEAM_TOKENS = {
+    "fc", "cf", "ac", "as", "sc", "afc", "ssc", "us", "ss", "ud", "cd", "sd", "rc", "rcd",
+    "fk", "sk", "sv", "vfb", "vfl", "tsg", "bsc", "ogc", "club", "calcio", "football",
+    "de", "di", "del", "la", "le", "1", "04", "05", "1899", "1900", "1901", "1907", "1909", "1913",
+}
+
+
+@functools.lru_cache(maxsize=1 << 17)
+def normalize_name(value) -> str:
+    """Lower-case, accent-free, punctuation-free form of a player or team name."""
+    if value is None or (isinstance(value, float) and np.isnan(value)):
+        return ""
+    text = unicodedata.normalize("NFKD", str(value).translate(_TRANSLIT))
+    text = "".join(ch for ch in text if not unicodedata.combining(ch))
+    text = re.sub(r"[^0-9a-z]+", " ", text.lower())
+    return " ".join(text.split())
+
+
+def name_keys(series: pd.Series) -> pd.Series:
+    """Vectorised `normalize_name` (each distinct value is normalized once)."""
+    mapping = {v: normalize_name(v) for v in pd.unique(series.dropna())}
+    return series.map(mapping).fillna("")
+
+
+def _initial_surname(key: str) -> str:
+    parts = key.split()
+    if len(parts) < 2:
+        return ""
+    return f"{parts[0][0]} {parts[-1]}"
+
+
+@functools.lru_cache(maxsize=None)
+def _team_tokens(team) -> frozenset:
+    return frozenset(t for t in normalize_name(team).split() if t not in _GENERIC_TEAM_TOKENS)
+
+
+def teams_compatible(team_a, team_b) -> bool:
+    """True when two provider spellings plausibly designate the same club."""
+    ta, tb = _team_tokens(team_a), _team_tokens(team_b)
+    if not ta or not tb:
+        return False
+    if ta & tb:
+        return True
+    # "Inter" / "Internazionale", "Leverkusen" / "Bayer Leverkusen"...
+    return any(a in b or b in a for a in ta for b in tb if min(len(a), len(b)) >= 4)
+
+
+def _stint_frame(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    """(key, season, team) of each row of `df`, as the registry records them."""
+    cols = SOURCE_COLUMNS[source]
+    return pd.DataFrame({
+        "key": name_keys(df[cols["name"]]),
+        "season": df[cols["season"]].astype(str) if cols["season"] in df.columns else "",
+        "team": df[cols["team"]].astype(str) if cols["team"] in df.columns else "",
+    }, index=df.index)
+
+
+def _identity_frame(df: pd.DataFrame, source: str) -> pd.DataFrame:
+    cols = SOURCE_COLUMNS[source]
+    out = _stint_frame(df, source).assign(
+        alt=name_keys(df[cols["alt"]]) if cols["alt"] in df.columns else "",
+        born=np.nan,
+    )
+    if cols["age"] in df.columns:
+        # Année de naissance estimée : début de saison - âge
+        start = out["season"].str.extract(r"(\d{4})", expand=False).astype(float)
+        out["born"] = (start - pd.to_numeric(df[cols["age"]], errors="coerce")).round()
+    out = out[out["key"] != ""]
+    return out.drop_duplicates(ignore_index=True)
+
+
+def _stints(identities: pd.DataFrame) -> pd.DataFrame:
+    """One row per (key, season, team) of an identity frame, sorted, with its median birth year."""
+    return (
+        identities.groupby(["key", "season", "team"], as_index=False)["born"].median()
+        .sort_values(["key", "season", "team"], ignore_index=True)
+    )
+
+
+def _conflict(a: tuple, b: tuple, clubs: bool = True) -> bool:
+    """True when two stints (season, team, born) cannot be the same player (`clubs`: also compare the teams)."""
+    if clubs and a[0] == b[0] and a[1] != b[1] and not teams_compatible(a[1], b[1]):
+        return True
+    return not (np.isnan(a[2]) or np.isnan(b[2])) and abs(a[2] - b[2]) > 1
+
+
+def _assign(stints: list, clusters: list) -> list:
+    """Index in `clusters` (stints of the identities of one name) of each of `stints`, in order.
+
+    New identities are appended to `clusters`.
+    """
+    out = []
+    for stint in stints:
+        free = [i for i, c in enumerate(clusters) if not any(_conflict(stint, other) for other in c)]
+        same_club = [i for i in free if any(teams_compatible(stint[1], other[1]) for other in clusters[i])]
+        candidates = same_club or free
+        if len(candidates) == 1:
+            i = candidates[0]
+        else:  # aucune identité compatible, ou plusieurs : nouvelle identité
+            i = len(clusters)
+            clusters.append([])
+        clusters[i].append(stint)
+        out.append(i)
+    return out
+
+
+def _blocked_links(sk: pd.DataFrame, sb: pd.DataFrame, sk_match: list, sb_match: str) -> dict:
+    """SK stint (key, season, team) -> SB IDs of the candidates sharing (season, match key) and a compatible team."""
+    left = pd.concat(
+        [sk[["key", "team", "season"]].assign(match=sk[c]) for c in sk_match],
+        ignore_index=True,
+    )
+    left = left[left["match"] != ""].drop_duplicates()
+    right = sb[[PLAYER_ID, "team", "season", sb_match]].rename(columns={sb_match: "match"})
+    right = right[right["match"] != ""].drop_duplicates()
+    cand = left.merge(right, on=["season", "match"], suffixes=("_sk", "_sb"))
+    if cand.empty:
+        return {}
+    pairs = cand[["team_sk", "team_sb"]].drop_duplicates()
+    ok = {
+        (a, b): teams_compatible(a, b)
+        for a, b in zip(pairs["team_sk"], pairs["team_sb"])
+    }
+    cand = cand[[ok[(a, b)] for a, b in zip(cand["team_sk"], cand["team_sb"])]]
+    out = {}
+    for key, season, team, pid in cand[["key", "season", "team_sk", PLAYER_ID]].drop_duplicates().itertuples(
+        index=False
+    ):
+        out.setdefault((key, season, team), set()).add(int(pid))
+    return out
+
+
+def _empty_registry() -> pd.DataFrame:
+    return pd.DataFrame({
+        PLAYER_ID: pd.Series(dtype="int64"), "Source": pd.Series(dtype=str), "Name Key": pd.Series(dtype=str),
+        "Season": pd.Series(dtype=str), "Team": pd.Series(dtype=str), "Born": pd.Series(dtype=float),
+    })
+
+
+def load_registry(path: str = REGISTRY_PATH) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return _empty_registry()
+    text = {c: str for c in REGISTRY_COLUMNS[1:-1]}
+    reg = pd.read_csv(path, dtype=text, keep_default_na=False)
+    for col in ("Season", "Team"):
+        if col not in reg.columns:  # registre antérieur : un ID par nom
+            reg[col] = ""
+    reg[PLAYER_ID] = reg[PLAYER_ID].astype("int64")
+    reg["Born"] = pd.to_numeric(reg["Born"], errors="coerce") if "Born" in reg.columns else np.nan
+    return reg[REGISTRY_COLUMNS]
+
+
+def save_registry(registry: pd.DataFrame, path: str = REGISTRY_PATH) -> None:
+    """Atomic write; a read-only deployment simply keeps the in-memory registry."""
+    tmp = temp_path(path)  # nom unique : plusieurs processus peuvent enregistrer en même temps
+    try:
+        registry.to_csv(tmp, index=False)
+        os.replace(tmp, path)
+    except OSError:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+def update_registry(registry: pd.DataFrame, df_phys: pd.DataFrame, *sb_frames: pd.DataFrame) -> pd.DataFrame:
+    """Add the stints not yet registered; existing assignments are left untouched."""
+    registry = registry[REGISTRY_COLUMNS].copy() if registry is not None else _empty_registry()
+    # (source, nom) -> {ID: passages connus}
+    identities = {}
+    for pid, src, key, season, team, born in registry[REGISTRY_COLUMNS].itertuples(index=False):
+        stints = identities.setdefault((src, key), {}).setdefault(int(pid), [])
+        if season or team:
+            stints.append((season, team, born))
+    stint_ids = {
+        (src, key, season, team): int(pid)
+        for pid, src, key, season, team in registry[[PLAYER_ID, "Source", *STINT_COLUMNS]].itertuples(index=False)
+    }
+    next_id = [int(registry[PLAYER_ID].max()) + 1 if len(registry) else 1]
+    new_rows = []
+
+    def register(source, stints, pick_id):
+        """Group the new stints of each name into identities; `pick_id(key, stints)` names a new identity."""
+        fresh = [
+            s for s in stints.itertuples(index=False) if (source, s.key, s.season, s.team) not in stint_ids
+        ]
+        by_key = {}
+        for s in fresh:
+            by_key.setdefault(s.key, []).append((s.season, s.team, s.born))
+        for key, group in by_key.items():
+            known = identities.setdefault((source, key), {})
+            pids = list(known)
+            clusters = [list(known[p]) for p in pids]
+            assigned = _assign(group, clusters)
+            for i in range(len(pids), len(clusters)):
+                pid = pick_id(key, clusters[i])
+                if pid is None:
+                    pid, next_id[0] = next_id[0], next_id[0] + 1
+                pids.append(pid)
+            for stint, i in zip(group, assigned):
+                known.setdefault(pids[i], []).append(stint)
+                stint_ids[(source, key, stint[0], stint[1])] = pids[i]
+                new_rows.append((pids[i], source, key, *stint))
+
+    # 1) StatsBomb : identités propres
+    sb = pd.concat([_identity_frame(f, "SB") for f in sb_frames if f is not None], ignore_index=True)
+    register("SB", _stints(sb), lambda key, stints: None)
+    sb[PLAYER_ID] = [stint_ids[("SB", k, s, t)] for k, s, t in zip(sb["key"], sb["season"], sb["team"])]
+    sb["initial"] = sb["key"].map(_initial_surname)
+
+    # 2) SkillCorner : rattachement à l'ID StatsBomb quand c'est possible
+    sk = _identity_frame(df_phys, "SK")
+    links = []
+    if not sk.empty:
+        sk = sk.assign(initial=sk["key"].map(_initial_surname))
+        links = [
+            _blocked_links(sk, sb, ["key"], "key"),
+            _blocked_links(sk, sb, ["key", "alt"], "alt"),
+            _blocked_links(sk, sb, ["initial"], "initial"),
+        ]
+
+    def sb_identity(key, stints):
+        for rule in links:
+            ids = set().union(*(rule.get((key, season, team), set()) for season, team, _ in stints))
+            if ids:
+                return ids.pop() if len(ids) == 1 else None
+        # Hors blocs : la seule identité StatsBomb du nom dont l'âge ne contredit rien
+        # (les clubs ne se comparent pas d'un fournisseur à l'autre hors blocs)
+        candidates = [
+            pid for pid, other in identities.get(("SB", key), {}).items()
+            if not any(_conflict(a, b, clubs=False) for a in stints for b in other)
+        ]
+        return candidates[0] if len(candidates) == 1 else None
+
+    register("SK", _stints(sk), sb_identity)
+
+    if new_rows:
+        registry = pd.concat(
+            [registry, pd.DataFrame(new_rows, columns=REGISTRY_COLUMNS)], ignore_index=True
+        )
+    return registry.sort_values([PLAYER_ID, "Source", *STINT_COLUMNS], ignore_index=True)
+
+
+def player_ids(df: pd.DataFrame, registry: pd.DataFrame, source: str) -> np.ndarray:
+    """``Player ID`` of each row of `df` (UNKNOWN_ID when the name is missing or not registered)."""
+    reg = registry.loc[registry["Source"] == source]
+    stints = _stint_frame(df, source)
+    lookup = reg.drop_duplicates(STINT_COLUMNS).set_index(STINT_COLUMNS)[PLAYER_ID]
+    ids = lookup.reindex(pd.MultiIndex.from_frame(stints)).to_numpy(dtype=float)
+    # Passage absent (registre antérieur) : l'ID du nom quand il n'en a qu'un
+    per_name = reg[["Name Key", PLAYER_ID]].drop_duplicates()
+    single = per_name.drop_duplicates("Name Key", keep=False).set_index("Name Key")[PLAYER_ID]
+    fallback = stints["key"].map(single).to_numpy(dtype=float)
+    ids = np.where(np.isnan(ids), fallback, ids)
+    return np.nan_to_num(ids, nan=UNKNOWN_ID).astype("int64")
@@ -0,0 +1,361 @@
+"""Figures and tables of the Merged player reports.
+
+The Merged Indexes tab and the Player Search detailed report show the same
+blocks for one merged row: a physical radar, a technical radar, and the
+xPHY / xDEF / xTECH gauges with their points tables.  The builders below take
+the row and the (read-only) frames they need and return Plotly figures and
+DataFrames without calling Streamlit (`build_blocks`); the page renders the
+results afterwards.  Figures are built in one call from trace / layout dicts
+(``add_trace`` + ``update_layout`` re-validate the whole figure at each step).
+
+``python -m bench.merged_indexes`` times the blocks of a report both ways.
+"""
+
+from contextlib import nullcontext
+from functools import partial
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+
+from skapp.metrics import XPHY_METRIC_MAP, points_column, resolve_metric_col, threshold_max, xtech_post_config
+from skapp.percentiles import lookup_peer_means, lookup_percentiles, pct_rank
+from skapp.registry import PLAYER_ID
+
+PHYSICAL_RADAR_METRICS = [
+    "TOP 5 PSV-99", "HI Distance P90", "M/min P90",
+    "HSR Distance P90", "Sprinting Distance P90", "Sprint Count P90", "High Acceleration Count P90"
+]
+PHYSICAL_RADAR_LABELS = [
+    "TOP5 PSV-99", "HI Dist", "Tot Dist", "HSR Dist", "Sprint Dist", "Sprint Ct", "High Acc Ct"
+]
+TECH_INVERSE_METRICS = ["Turnovers P90", "Dispossessions P90"]
+
+POSTE_MAP = {
+    "Goalkeeper": "GK",
+    "Central Defender": "CB",
+    "Full Back": "FB",
+    "Midfielder": "MID",
+    "Attacking Midfielder": "AM",
+    "Winger": "WING",
+    "Striker": "ST"
+}
+
+def build_blocks(tasks: dict, span=None) -> dict:
+    """Run ``{name: callable}`` in order and return ``{name: (result, error)}``.
+
+    An error in one block does not stop the others; the page shows it in place.
+    `span(name)` (a context manager, e.g. a `skapp.timing.Timings` span) times
+    each block; the blocks run in the calling thread, so the spans are attributed
+    to the page / tab being rendered.
+    """
+    out = {}
+    for name, fn in tasks.items():
+        try:
+            with span(name) if span else nullcontext():
+                out[name] = (fn(), None)
+        except Exception as e:
+            out[name] = (None, e)
+    return out
+
+
+def lazy(fn):
+    """Zero-argument callable evaluating `fn` once (peers for the live percentile engine)."""
+    cache = []
+
+    def get():
+        if not cache:
+            cache.append(fn())
+        return cache[0]
+    return get
+
+
+def _fmt(v):
+    try:
+        v = float(v)
+        if pd.isna(v):
+            return "NA"
+        return f"{v:.2f}"
+    except Exception:
+        return "NA"
+
+
+def _radar_layout(angular=None) -> dict:
+    polar = dict(
+        bgcolor='rgba(0,0,0,0)',
+        radialaxis=dict(
+            range=[0, 100],
+            tickvals=[0, 25, 50, 75, 100],
+            ticks='outside',
+            showticklabels=True,
+            ticksuffix='%',
+            tickfont=dict(color='white'),
+            gridcolor='gray'
+        )
+    )
+    if angular:
+        polar["angularaxis"] = angular
+    return dict(
+        hovermode='closest',
+        polar=polar,
+        paper_bgcolor='rgba(0,0,0,0)',
+        font=dict(color='white'),
+        showlegend=False,
+        height=500
+    )
+
+
+def _radar_traces(r_player, r_avg, theta, player_hover, avg_hover, player_name) -> list:
+    """Player and Top 5 average traces (filled line + invisible hover markers)."""
+    return [
+        dict(type="scatterpolar", r=r_player, theta=theta, mode='lines', fill='toself',
+             line=dict(color='gold', width=2), fillcolor='rgba(255,215,0,0.3)', hoverinfo='skip', name=player_name),
+        dict(type="scatterpolar", r=r_player, theta=theta, mode='markers', hoverinfo='text', hovertext=player_hover,
+             marker=dict(size=12, color='rgba(255,215,0,0)'), showlegend=False),
+        dict(type="scatterpolar", r=r_avg, theta=theta, mode='lines', fill='toself',
+             line=dict(color='lightgreen', width=2), fillcolor='rgba(144,238,144,0.3)', hoverinfo='skip',
+             name='Top5 Average'),
+        dict(type="scatterpolar", r=r_avg, theta=theta, mode='markers', hoverinfo='text', hovertext=avg_hover,
+             marker=dict(size=12, color='rgba(144,238,144,0)'), showlegend=False),
+    ]
+
+
+def physical_radar(row, group: str, stats: pd.DataFrame, peers, player_name) -> go.Figure:
+    """Physical radar of `row` against its `group` peers (Top 5 average as second trace)."""
+    pos, season = row.get("Position Group", "—"), row.get("Season Name", None)
+    r_player = lookup_percentiles(row, group, PHYSICAL_RADAR_METRICS, peers=peers)
+    means = lookup_peer_means(stats, pos, season, PHYSICAL_RADAR_METRICS)
+    if means is None:
+        ref = peers()
+        means = (None, [pct_rank(ref[m], ref[m].mean()) for m in PHYSICAL_RADAR_METRICS])
+    r_top5 = means[1]
+    raw_vals = [row.get(m, "NA") for m in PHYSICAL_RADAR_METRICS]
+
+    r_player_closed = r_player + [r_player[0]]
+    r_top5_closed = r_top5 + [r_top5[0]]
+    metrics_closed = PHYSICAL_RADAR_LABELS + [PHYSICAL_RADAR_LABELS[0]]
+    raw_closed = raw_vals + [raw_vals[0]]
+
+    # Figure construite en une fois (traces + layout) : bien moins coûteux que add_trace / update_layout
+    traces = _radar_traces(
+        r_player_closed, r_top5_closed, metrics_closed,
+        [
+            f"<b>{label}</b><br>Value: {v*90:.0f} m<br>Percentile: {r:.1f}%"
+            if label == "Tot Dist"
+            else f"<b>{label}</b><br>Value: {v:.2f}<br>Percentile: {r:.1f}%"
+            for label, v, r in zip(metrics_closed, raw_closed, r_player_closed)
+        ],
+        [
+            f"<b>{label}</b><br>Mean Percentile: {r:.1f}%"
+            for label, r in zip(metrics_closed, r_top5_closed)
+        ],
+        player_name,
+    )
+    return go.Figure(data=traces, layout=_radar_layout())
+
+
+def technical_radar(row, group: str, template: list, labels: list, stats: pd.DataFrame, peers,
+                    player_name, inverse=TECH_INVERSE_METRICS) -> go.Figure:
+    """Technical radar of `row` for one template; metrics missing from the row are skipped."""
+    means = lookup_peer_means(stats, row.get("Position Group"), row["Season Name"], template, inverse=inverse)
+
+    # Calculs robustes (on saute les métriques absentes)
+    r_tech, r_avg, raw_vals, labels_kept = [], [], [], []
+    for i, (m, lab) in enumerate(zip(template, labels)):
+        try:
+            val = row[resolve_metric_col(row.index, m)]
+            r = lookup_percentiles(row, group, [m], peers=peers, inverse=inverse)[0]
+        except KeyError:
+            continue
+
+        if means is not None:
+            rav = means[1][i]
+        else:
+            ref = peers()
+            ser = ref[resolve_metric_col(ref.columns, m)]
+            rav = 100 - pct_rank(ser, ser.mean()) if m in inverse else pct_rank(ser, ser.mean())
+
+        r_tech.append(r)
+        r_avg.append(rav)
+        raw_vals.append(val)
+        labels_kept.append(lab)
+
+    # Construction du radar (fermé)
+    metrics_closed = labels_kept + [labels_kept[0]] if labels_kept else []
+    r_tech_closed = r_tech + [r_tech[0]] if r_tech else []
+    r_avg_closed = r_avg + [r_avg[0]] if r_avg else []
+    raw_closed = raw_vals + [raw_vals[0]] if raw_vals else []
+
+    traces = _radar_traces(
+        r_tech_closed, r_avg_closed, metrics_closed,
+        [
+            f"<b>{label}</b><br>Value: {_fmt(v)}<br>Percentile: {r:.1f}%"
+            for label, v, r in zip(metrics_closed, raw_closed, r_tech_closed)
+        ],
+        [
+            f"<b>{label}</b><br>Mean Percentile: {r:.1f}%"
+            for label, r in zip(metrics_closed, r_avg_closed)
+        ],
+        player_name,
+    ) if r_tech_closed else []
+    return go.Figure(data=traces, layout=_radar_layout(angular=dict(rotation=90, direction="clockwise")))
+
+
+def gauge_figure(index_value, mean_peer, rank, total_peers) -> go.Figure:
+    hue = 120 * (index_value / 100)
+    bar_color = f"hsl({hue:.0f}, 75%, 50%)"
+    indicator = dict(
+        type="indicator",
+        mode="gauge+number",
+        value=int(round(index_value)),
+        number={'font': {'size': 48}},
+        gauge={
+            'axis': {'range': [0, 100], 'tickwidth': 1, 'tickcolor': "white"},
+            'bar': {'color': bar_color, 'thickness': 0.25},
+            'bgcolor': "rgba(255,255,255,0)",
+            'borderwidth': 0,
+            'shape': "angular",
+            'steps': [{'range': [0, 100], 'color': 'rgba(100,100,100,0.3)'}],
+            'threshold': {'line': {'color': "white", 'width': 4},
+                          'thickness': 0.75,
+                          'value': mean_peer}
+        },
+        domain={'x': [0, 1], 'y': [0, 1]},
+        title={'text': f"<b>{rank}ᵉ/{total_peers}</b>", 'font': {'size': 20}}
+    )
+    layout = dict(
+        margin={'t': 40, 'b': 0, 'l': 0, 'r': 0},
+        paper_bgcolor="rgba(0,0,0,0)",
+        height=300
+    )
+    return go.Figure(data=[indicator], layout=layout)
+
+
+def index_rank(peers: pd.DataFrame, col: str, player_id):
+    ranked = peers.sort_values(col, ascending=False).reset_index(drop=True)
+    if player_id in ranked[PLAYER_ID].values:
+        return int(ranked[ranked[PLAYER_ID] == player_id].index[0] + 1)
+    return "—"  # Pas de classement si < 600 min ou joueur non présent
+
+
+def xphysical_details(row) -> pd.DataFrame:
+    """Points of each xPhysical metric (materialized by the snapshot, `skapp.metrics.xphy_points`)."""
+    pos = row.get("Position Group", "")
+    detail_rows = []
+    total_pts = 0
+    total_max = 0
+    for label, (bar_key, raw_label) in XPHY_METRIC_MAP.items():
+        val = row.get(label)
+        score = 0
+        max_score = 0
+        if pd.notna(val):
+            score = int(row.get(points_column(label), 0))
+            max_score = threshold_max(bar_key, pos)
+        total_pts += score
+        total_max += max_score
+        detail_rows.append({
+            "Metric": raw_label,
+            "Player Value": f"{val:.2f}" if pd.notna(val) else "NA",
+            "Points": f"{score} / {max_score}"
+        })
+
+    # Ajout du total et index
+    index_val = row.get("xPhysical", 0)
+    detail_rows.append({
+        "Metric": "**Total**",
+        "Player Value": "",
+        "Points": f"**{total_pts} / {total_max}**"
+    })
+    detail_rows.append({
+        "Metric": "**xPhysical Index**",
+        "Player Value": "",
+        "Points": f"**{index_val:.0f}**"
+    })
+    return pd.DataFrame(detail_rows).set_index("Metric")
+
+
+def xtech_details(row, columns, part: str, index_col: str):
+    """xDEF / xTECH points table (``part`` = "def" / "tech"), None for goalkeepers or unknown posts."""
+    pos = row.get("Position Group", "")
+    config = xtech_post_config.get(pos) if pos != "Goalkeeper" else None
+    if not config:
+        return None
+    metric_map = config["metric_map"]
+    labels = config["labels"]
+    metric_rows = []
+
+    for raw_col in config[part]:
+        note_col, scores = metric_map.get(raw_col, (None, None))
+        if not note_col:
+            continue
+        # Résoudre la vraie colonne disponible (raw_col peut être aliasé)
+        try:
+            actual_col = resolve_metric_col(columns, raw_col)
+        except KeyError:
+            continue
+        raw_val = row.get(actual_col, None)
+        note_val = row.get(note_col, None)
+        max_pts = max(scores)
+        label = labels.get(raw_col, raw_col)
+        metric_rows.append({
+            "Metrics": label,
+            "Player Figures": f"{raw_val:.2f}" if pd.notna(raw_val) else "NA",
+            "Points": f"{note_val} / {max_pts}" if pd.notna(note_val) else f"0 / {max_pts}"
+        })
+
+    # Total
+    total_pts = sum(int(r["Points"].split("/")[0].strip()) for r in metric_rows if "/" in r["Points"])
+    total_max = sum(int(r["Points"].split("/")[1].strip()) for r in metric_rows if "/" in r["Points"])
+    metric_rows.append({
+        "Metrics": "**Total**",
+        "Player Figures": "",
+        "Points": f"**{total_pts} / {total_max}**"
+    })
+
+    # Index
+    index_val = row.get(index_col, None)
+    if pd.notna(index_val):
+        metric_rows.append({
+            "Metrics": f"**Index {index_col}**",
+            "Player Figures": "",
+            "Points": f"**{index_val:.0f} / 100**"
+        })
+
+    return pd.DataFrame(metric_rows).drop_duplicates(subset=["Metrics"], keep="first").set_index("Metrics")
+
+
+def index_gauge(row, peers: pd.DataFrame, label: str, col: str, details_title: str, details) -> dict:
+    """One xPHY / xDEF / xTECH gauge: `row` ranked among `peers` (same position, season, competition)."""
+    mean_val = peers[col].mean() if not peers.empty else np.nan
+    rank = index_rank(peers, col, row[PLAYER_ID])
+    return {
+        "label": label,
+        "figure": gauge_figure(float(row.get(col, 0)), mean_val, rank, len(peers)),
+        "mean": mean_val,
+        "details_title": details_title,
+        "details": details(),
+    }
+
+
+def index_gauge_tasks(row, peers: pd.DataFrame) -> dict:
+    """``{label: callable}`` building the three gauges of `row` (independent, see `build_blocks`)."""
+    poste = POSTE_MAP.get(row.get("Position Group", ""), "ST")
+    cols = peers.columns
+    specs = [
+        ("xPHY", "xPhysical", "xPhysical Details", lambda: xphysical_details(row)),
+        ("xDEF", f"xTech {poste} DEF (/100)", "xDef Details",
+         lambda: xtech_details(row, cols, "def", "xDEF")),
+        ("xTECH", f"xTech {poste} TECH (/100)", "xTech Details",
+         lambda: xtech_details(row, cols, "tech", "xTECH")),
+    ]
+    return {spec[0]: partial(index_gauge, row, peers, *spec) for spec in specs}
+
+
+def index_peers(df_merged: pd.DataFrame, row) -> pd.DataFrame:
+    """Peers of the index gauges: same position, season and competition, 600+ minutes."""
+    return df_merged[
+        (df_merged["Position Group"] == row.get("Position Group", "")) &
+        (df_merged["Season Name"] == row["Season Name"]) &
+        (df_merged["Competition Name"] == row["Competition Name"]) &
+        (df_merged["Minutes"] >= 600)
+    ]
@@ -0,0 +1,101 @@
+"""Memory held for the app sessions, and release of the idle ones.
+
+A session keeps little in `st.session_state` (widget values, selections); the
+rows of its "Load Data" selections are entries of the process-wide
+`skapp.cache.SharedLRU`.  `SessionRegistry` records, per session, the last
+rerun, the page, the size of its session state and the LRU keys it holds (one
+per dataset).  The keys of active sessions are pinned in the LRU, so that the
+budget (`LOAD_CACHE_BYTES`) evicts the selections nobody looks at first.
+
+A session idle for more than `IDLE_SECONDS` (a forgotten browser tab) releases
+its keys: the entries no active session holds are dropped at once.  The
+session keeps its selection, so when the scout comes back the rows are derived
+again by `get_or_compute` on the next rerun.
+"""
+
+import threading
+import time
+
+import pandas as pd
+
+from skapp.cache import SharedLRU
+
+IDLE_SECONDS = 30 * 60
+# Sessions fermées : oubliées après ce délai (Streamlit ne prévient pas à la fermeture d'un onglet)
+FORGET_SECONDS = 24 * 3600
+REPORT_COLUMNS = ["Session", "Page", "Idle (min)", "State (KB)", "Loaded (MB)", "Selections"]
+
+
+class SessionRegistry:
+    """Per-session accounting of the state and `SharedLRU` entries held by the app sessions (thread-safe)."""
+
+    def __init__(self, cache: SharedLRU, idle_seconds: float = IDLE_SECONDS,
+                 forget_seconds: float = FORGET_SECONDS, clock=time.monotonic):
+        self.cache = cache
+        self.idle_seconds = idle_seconds
+        self.forget_seconds = forget_seconds
+        self.clock = clock
+        self.released = 0
+        self._sessions = {}  # id -> {"page", "seen", "state", "keys": {dataset: clé du LRU}}
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._sessions)
+
+    def touch(self, session_id: str, page: str, state_bytes: int) -> None:
+        """Rerun of `session_id`; also releases the sessions gone idle."""
+        with self._lock:
+            record = self._sessions.setdefault(session_id, {"keys": {}})
+            record.update(page=page, seen=self.clock(), state=state_bytes)
+        self.sweep()
+
+    def hold(self, session_id: str, dataset: str, key) -> None:
+        """`key` is the current selection of `dataset` for the session (replaces the previous one)."""
+        with self._lock:
+            record = self._sessions.setdefault(session_id, {"page": "", "seen": self.clock(), "state": 0, "keys": {}})
+            if record["keys"].get(dataset) == key:
+                return
+            record["keys"][dataset] = key
+            self._pin()
+
+    def _pin(self):
+        # appelé sous self._lock ; le LRU lit l'attribut sans prendre ce verrou
+        self.cache.pinned = frozenset(k for r in self._sessions.values() for k in r["keys"].values())
+
+    def sweep(self) -> int:
+        """Release the keys of the idle sessions; returns the number of sessions released."""
+        now = self.clock()
+        released, count = set(), 0
+        with self._lock:
+            for session_id, record in list(self._sessions.items()):
+                idle = now - record["seen"]
+                if idle > self.idle_seconds and record["keys"]:
+                    released.update(record["keys"].values())
+                    record["keys"] = {}
+                    count += 1
+                if idle > self.forget_seconds:
+                    del self._sessions[session_id]
+            if not count:
+                return 0
+            self._pin()
+            held = self.cache.pinned
+            self.released += count
+        for key in released - held:
+            self.cache.discard(key)
+        return count
+
+    def report(self) -> pd.DataFrame:
+        """Sessions by memory held (state + loaded selections), largest first."""
+        now = self.clock()
+        with self._lock:
+            records = [(sid, dict(r), list(r["keys"].values())) for sid, r in self._sessions.items()]
+        rows = [
+            (
+                sid[:8], r["page"], (now - r["seen"]) / 60, r["state"] / 1024,
+                sum(self.cache.nbytes_of(k) for k in keys) / 1024 ** 2, len(keys),
+            )
+            for sid, r, keys in records
+        ]
+        df = pd.DataFrame(rows, columns=REPORT_COLUMNS)
+        df["_bytes"] = df["State (KB)"] * 1024 + df["Loaded (MB)"] * 1024 ** 2
+        return df.sort_values("_bytes", ascending=False).drop(columns="_bytes").round(1).reset_index(drop=True)
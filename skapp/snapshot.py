@@ -0,0 +1,623 @@
+"""Partitioned snapshot of the three datasets, refreshed incrementally.
+
+SK_All.csv and SB_All.csv are split into (season, competition) partitions, each
+identified by a content hash (row hashes of `pd.util.hash_pandas_object` plus the
+column list).  When a new matchday lands, only the partitions whose hash changed
+are processed again:
+
+* re-ingested: written to ``snapshot/<dataset>/<partition>.parquet``;
+* re-indexed: ``Player ID`` from the registry, new names only (`skapp.registry`);
+* re-ranked: ``xPhysical Rank`` inside each position group;
+* rescored: merged partitions are re-joined from the SkillCorner / StatsBomb
+  partitions they depend on (`skapp.merge.merge_partition`) and get their
+  xPhysical threshold points (`skapp.metrics.xphy_points`);
+* percentiles: every radar metric of every row within its default peer group,
+  plus the peer means in ``snapshot/peers/<group>/<season>.parquet``
+  (`skapp.percentiles`).  Peers span a whole season, so the other partitions
+  of the season are rewritten as well;
+* engine: ``--engine polars`` runs the ingest, scoring, ranking and
+  percentile steps as Polars queries (`skapp.polars_build`), with the same
+  output files;
+* parallel: ``--workers N`` builds the seasons (a season and its peers being
+  the unit of work) in N forked processes, largest first; a season that fails
+  keeps its previous files and is retried at the next refresh, the others
+  are published.  The time of every partition and season is recorded;
+* published: each changed dataset is written whole to ``snapshot/<dataset>.arrow``
+  (Arrow IPC), which the app processes memory-map read-only (`map_dataset`):
+  the numeric columns of their DataFrames are views on the shared page cache.
+
+``snapshot/manifest.json`` records the hash and version of every partition and a
+version per dataset.  The app keys its frame, peer and leaderboard caches on
+these versions, so a refresh only invalidates the caches of the partitions
+that changed.
+
+Several server processes can share the directory: a refresh holds an exclusive
+lock on ``snapshot/.lock`` (POSIX ``flock``), so the others wait for its
+manifest and find nothing left to do, and every file is written to a unique
+temporary name before being renamed into place.
+
+Usage::
+
+    python -m skapp.snapshot [--sk SK_All.csv] [--sb SB_All.csv] [--dir snapshot] [--full] [--engine polars]
+                             [--workers N]
+"""
+
+import argparse
+import contextlib
+import hashlib
+import json
+import multiprocessing
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+
+try:
+    import fcntl
+except ImportError:  # Windows : pas de verrou entre processus
+    fcntl = None
+
+from skapp import polars_build
+from skapp.data import XPHYSICAL_PATH, XTECHNICAL_PATH, read_xphysical, read_xtechnical, temp_path
+from skapp.merge import competition_key, merge_partition
+from skapp.metrics import xphy_points
+from skapp.percentiles import PEER_GROUPS, PEER_STATS_COLUMNS, groups_for, materialize, peer_seasons
+from skapp.registry import (
+    PLAYER_ID, REGISTRY_PATH, load_registry, normalize_name, player_ids, save_registry,
+    update_registry,
+)
+
+SNAPSHOT_DIR = "snapshot"
+MANIFEST_NAME = "manifest.json"
+LOCK_NAME = ".lock"
+# À incrémenter quand les colonnes dérivées changent : force une reconstruction complète
+SNAPSHOT_FORMAT = 3
+
+# Colonnes (saison, compétition) de chaque dataset
+PARTITION_COLUMNS = {
+    "xphysical": ("Season", "Competition"),
+    "xtechnical": ("Season Name", "Competition Name"),
+    "merged": ("Season Name", "Competition Name"),
+}
+DATASETS = list(PARTITION_COLUMNS)
+
+XPHYSICAL_RANK = "xPhysical Rank"
+ENGINES = ("pandas", "polars")
+
+
+def partition_key(season, competition) -> str:
+    return f"{season}|{competition}"
+
+
+def _partition_file(dataset: str, key: str) -> str:
+    return f"{dataset}/{normalize_name(key).replace(' ', '_') or 'unknown'}.parquet"
+
+
+def _digest(*parts) -> str:
+    h = hashlib.sha1()
+    for part in parts:
+        h.update(part if isinstance(part, bytes) else str(part).encode("utf-8"))
+        h.update(b"\x1f")
+    return h.hexdigest()
+
+
+def partition_rows(df: pd.DataFrame, dataset: str) -> dict:
+    """Partition key -> row positions, in order of first appearance."""
+    season_col, comp_col = PARTITION_COLUMNS[dataset]
+    groups = df.groupby([df[season_col].astype(str), df[comp_col].astype(str)], sort=False).indices
+    return {partition_key(s, c): idx for (s, c), idx in groups.items()}
+
+
+def partition_hashes(df: pd.DataFrame, dataset: str, rows: dict = None) -> dict:
+    """Partition key -> content hash (rows in file order + column list)."""
+    rows = partition_rows(df, dataset) if rows is None else rows
+    # Numériques en float64 arrondis : un int devenu float (NaN ailleurs dans le fichier) ou
+    # un écart au dernier chiffre du parseur CSV ne doivent pas invalider la partition
+    numeric = df.select_dtypes("number").columns
+    canon = df.assign(**{c: df[c].astype("float64").round(6) for c in numeric})
+    row_hashes = pd.util.hash_pandas_object(canon, index=False).to_numpy()
+    columns = "\x1f".join(map(str, df.columns))
+    return {key: _digest(SNAPSHOT_FORMAT, columns, row_hashes[idx].tobytes()) for key, idx in rows.items()}
+
+
+def _empty_manifest() -> dict:
+    return {"format": SNAPSHOT_FORMAT, "datasets": {d: {"version": "", "partitions": {}} for d in DATASETS}}
+
+
+def load_manifest(directory: str = SNAPSHOT_DIR) -> dict:
+    path = os.path.join(directory, MANIFEST_NAME)
+    try:
+        with open(path, encoding="utf-8") as fh:
+            manifest = json.load(fh)
+    except (OSError, ValueError):
+        return _empty_manifest()
+    if manifest.get("format") != SNAPSHOT_FORMAT or set(manifest.get("datasets", {})) != set(DATASETS):
+        return _empty_manifest()
+    return manifest
+
+
+def _write_atomic(path: str, write) -> None:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    tmp = temp_path(path)
+    try:
+        write(tmp)
+        os.replace(tmp, path)
+    finally:
+        if os.path.exists(tmp):
+            os.remove(tmp)
+
+
+@contextlib.contextmanager
+def _locked(directory: str):
+    """Exclusive lock of the snapshot directory across processes (no-op without fcntl)."""
+    os.makedirs(directory, exist_ok=True)
+    with open(os.path.join(directory, LOCK_NAME), "a") as fh:
+        if fcntl is not None:
+            fcntl.flock(fh, fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(fh, fcntl.LOCK_UN)
+
+
+def _save_manifest(manifest: dict, directory: str) -> None:
+    def write(tmp):
+        with open(tmp, "w", encoding="utf-8") as fh:
+            json.dump(manifest, fh, indent=1, ensure_ascii=False)
+    _write_atomic(os.path.join(directory, MANIFEST_NAME), write)
+
+
+def _write_partition(df: pd.DataFrame, directory: str, dataset: str, key: str) -> str:
+    rel = _partition_file(dataset, key)
+    _write_atomic(os.path.join(directory, rel), lambda tmp: df.to_parquet(tmp, index=False))
+    return rel
+
+
+def dataset_version(partitions: dict) -> str:
+    return _digest(*(f"{k}:{p['version']}" for k, p in sorted(partitions.items())))
+
+
+def _join_pair(key: str) -> tuple:
+    season, competition = key.split("|", 1)
+    return season, competition_key(pd.Series([competition])).iloc[0]
+
+
+def _season(key: str) -> str:
+    return key.split("|", 1)[0]
+
+
+def rank_xphysical(part: pd.DataFrame) -> pd.Series:
+    """Rank of ``xPhysical`` inside each position group of one partition (1 = best)."""
+    return part.groupby("Position Group")["xPhysical"].rank(
+        method="first", ascending=False, na_option="bottom"
+    ).astype("Int64")
+
+
+def _steps(engine: str) -> dict:
+    """Functions of the column-wise build steps for `engine`."""
+    if engine == "polars":
+        polars_build._require()
+        return polars_build.STEPS
+    if engine != "pandas":
+        raise ValueError(f"Unknown build engine {engine!r} (expected one of {', '.join(ENGINES)})")
+    return {
+        "read_xphysical": read_xphysical, "read_xtechnical": read_xtechnical, "xphy_points": xphy_points,
+        "rank_xphysical": rank_xphysical, "materialize": materialize,
+    }
+
+
+_TASK = None  # tâche de la reconstruction en cours, héritée par les processus forkés
+
+
+def _run_task(args) -> dict:
+    t0 = time.perf_counter()
+    try:
+        result = _TASK(*args)
+    except Exception as exc:  # saison en échec : les autres continuent
+        result = {"error": f"{type(exc).__name__}: {exc}"}
+    result.update(seconds=time.perf_counter() - t0, worker=os.getpid())
+    return result
+
+
+def run_tasks(task, tasks: list, workers: int = 1) -> list:
+    """``task(*args)`` for each args of `tasks`, in `workers` forked processes; results in order of `tasks`.
+
+    A task that raises, or is lost with a process that died, gives
+    ``{"error": ...}``.  `tasks` come largest first, so they start first.  Runs
+    in-process with one worker or where fork is not available.
+    """
+    global _TASK
+    _TASK = task
+    try:
+        workers = min(workers or 1, len(tasks))
+        if workers <= 1 or "fork" not in multiprocessing.get_all_start_methods():
+            return [_run_task(args) for args in tasks]
+        results = [None] * len(tasks)
+        with ProcessPoolExecutor(workers, mp_context=multiprocessing.get_context("fork")) as pool:
+            futures = {pool.submit(_run_task, args): i for i, args in enumerate(tasks)}
+            for future, i in futures.items():
+                try:
+                    results[i] = future.result()
+                except Exception as exc:
+                    # processus tué (mémoire...) : cette tâche et celles en attente sont reportées, pas les terminées
+                    results[i] = {"error": f"{type(exc).__name__}: {exc}", "seconds": 0.0, "worker": None}
+        return results
+    finally:
+        _TASK = None
+
+
+def refresh(sk_path: str = XPHYSICAL_PATH, sb_path: str = XTECHNICAL_PATH, directory: str = SNAPSHOT_DIR,
+            registry_path: str = REGISTRY_PATH, full: bool = False, engine: str = "pandas",
+            workers: int = 1) -> dict:
+    """Bring the snapshot in line with the CSVs and return the manifest.
+
+    Nothing is read when neither CSV changed (same size and mtime as recorded
+    in the manifest).  Otherwise both files are hashed and only the partitions
+    whose version changed are rewritten; with `full`, every partition is.  A
+    partition's version combines its content hash with the hashes of the
+    partitions its percentile peers come from (`skapp.percentiles`), so a new
+    matchday also refreshes the percentiles of the other partitions of its
+    season.  The manifest's ``refresh`` entry lists what was done.  `engine`
+    picks the implementation of the column-wise steps (`ENGINES`); both write
+    the same files.  With `workers` > 1 the seasons are built in as many
+    processes (pandas engine only); a season that fails keeps its previous
+    entries and is listed under ``refresh.failed``.
+
+    The whole refresh holds the directory lock: a concurrent refresh of another
+    process waits, then reads the manifest this one published.
+    """
+    with _locked(directory):
+        return _refresh(sk_path, sb_path, directory, registry_path, full, engine, workers)
+
+
+def _refresh(sk_path, sb_path, directory, registry_path, full, engine, workers) -> dict:
+    signature = [list(s) for s in source_signature(sk_path, sb_path)]
+    old = load_manifest(directory)
+    # Saisons en échec au rafraîchissement précédent : reconstruites même sans changement des CSV
+    retry = (old.get("refresh") or {}).get("failed", {})
+    if not full and old.get("sources") == signature and not any(retry.values()):
+        old.pop("refresh", None)
+        if _publish(old, old, directory):
+            _save_manifest(old, directory)  # fichiers Arrow manquants (snapshot antérieur, suppression)
+        return old
+
+    steps = _steps(engine)
+    t0 = time.perf_counter()
+    frames = {"xphysical": steps["read_xphysical"](sk_path), "xtechnical": steps["read_xtechnical"](sb_path)}
+    rows = {d: partition_rows(f, d) for d, f in frames.items()}
+    hashes = {d: partition_hashes(frames[d], d, rows[d]) for d in frames}
+    known = {d: old["datasets"][d]["partitions"] for d in DATASETS}
+
+    def take(dataset, keys):
+        idx = [rows[dataset][k] for k in keys]
+        return frames[dataset].iloc[np.concatenate(idx) if idx else []]
+
+    # Re-indexation : seuls les noms des partitions modifiées sont proposés au registre
+    modified = {
+        d: [k for k, h in hashes[d].items() if full or known[d].get(k, {}).get("hash") != h]
+        for d in frames
+    }
+    seasons = {_season(k) for d in frames for k in modified[d]}
+    df_tech = frames["xtechnical"]
+    registry = update_registry(
+        load_registry(registry_path),
+        take("xphysical", modified["xphysical"]),
+        df_tech[df_tech["Season Name"].astype(str).isin(seasons)],
+    )
+    save_registry(registry, registry_path)
+
+    # Merged : une partition par partition StatsBomb, jointe aux partitions SkillCorner de même
+    # (saison, compétition) ; son hash combine ceux de ses partitions sources
+    pair_of = {d: {k: _join_pair(k) for k in rows[d]} for d in frames}
+    sk_keys_of = {
+        k: [j for j, pair in pair_of["xphysical"].items() if pair == pair_of["xtechnical"][k]]
+        for k in rows["xtechnical"]
+    }
+    hashes["merged"] = {
+        k: _digest(hashes["xtechnical"][k], *sorted(hashes["xphysical"][j] for j in sk_keys))
+        for k, sk_keys in sk_keys_of.items()
+    }
+    merged_cache = {}
+
+    def merged_part(key):
+        if key not in merged_cache:
+            sb_part, sk_part = take("xtechnical", [key]), take("xphysical", sk_keys_of[key])
+            part = merge_partition(
+                sk_part, sb_part, player_ids(sk_part, registry, "SK"), player_ids(sb_part, registry, "SB")
+            )
+            merged_cache[key] = pd.concat([part, steps["xphy_points"](part)], axis=1)
+        return merged_cache[key]
+
+    # Percentiles : la version d'une partition dépend des partitions de ses pairs (même saison)
+    keys_by_season = {d: {} for d in DATASETS}
+    for d in DATASETS:
+        for k in hashes[d]:
+            keys_by_season[d].setdefault(_season(k), []).append(k)
+
+    def peer_keys(group, season):
+        peers = PEER_GROUPS[group]["peers"]
+        wanted = peer_seasons(group, season, keys_by_season[peers])
+        return [k for s in sorted(wanted) for k in keys_by_season[peers].get(s, [])]
+
+    def peer_signature(group, season):
+        peers = PEER_GROUPS[group]["peers"]
+        return _digest(group, *sorted(hashes[peers][k] for k in peer_keys(group, season)))
+
+    def peer_rows(group, season):
+        peers = PEER_GROUPS[group]["peers"]
+        keys = peer_keys(group, season)
+        if peers != "merged":
+            return frames[peers]
+        parts = [merged_part(k) for k in keys]
+        return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+    def base_part(dataset, key):
+        if dataset == "merged":
+            return merged_part(key)
+        part = take(dataset, [key]).reset_index(drop=True)
+        part[PLAYER_ID] = player_ids(part, registry, "SK" if dataset == "xphysical" else "SB")
+        if dataset == "xphysical":
+            part[XPHYSICAL_RANK] = steps["rank_xphysical"](part)
+        return part
+
+    def build_season(dataset, season, keys, todo, stats_todo, versions, stats_version):
+        """Partitions `todo` and peer tables `stats_todo` of one season, written; their entries and timings."""
+        season_col, comp_col = PARTITION_COLUMNS[dataset]
+        out = {"parts": {}, "stats": {}, "partitions_s": {}, "percentiles_s": 0.0}
+        # Percentiles calculés une fois pour toute la saison, puis répartis par partition
+        base = {}
+        for k in keys:
+            t0 = time.perf_counter()
+            base[k] = base_part(dataset, k)
+            out["partitions_s"][k] = time.perf_counter() - t0
+        base = {k: part for k, part in base.items() if not part.empty}
+        if not base:
+            return out
+        t0 = time.perf_counter()
+        season_rows = pd.concat(base.values(), ignore_index=True)
+        owner = np.repeat(list(base), [len(part) for part in base.values()])
+        pcts = []
+        for g in groups_for(dataset):
+            pct, table = steps["materialize"](g, season_rows, peer_rows(g, season))
+            pcts.append(pct)
+            if g in stats_todo:
+                rel = f"peers/{g}/{normalize_name(season).replace(' ', '_') or 'unknown'}.parquet"
+                _write_atomic(os.path.join(directory, rel), lambda tmp: table.to_parquet(tmp, index=False))
+                out["stats"][g] = {"version": stats_version[g], "file": rel}
+        pct_rows = pd.concat(pcts, axis=1) if pcts else pd.DataFrame(index=season_rows.index)
+        out["percentiles_s"] = time.perf_counter() - t0
+        for k in todo:
+            if k not in base:
+                continue
+            t0 = time.perf_counter()
+            part = pd.concat([base[k], pct_rows[owner == k].reset_index(drop=True)], axis=1)
+            out["parts"][k] = {
+                "season": str(part[season_col].iloc[0]), "competition": str(part[comp_col].iloc[0]),
+                "hash": hashes[dataset][k], "version": versions[k], "rows": len(part),
+                "file": _write_partition(part, directory, dataset, k),
+            }
+            out["partitions_s"][k] += time.perf_counter() - t0
+        return out
+
+    # Saisons à reconstruire : une tâche par (dataset, saison), les pairs d'une partition couvrant sa saison
+    new = {"format": SNAPSHOT_FORMAT, "sources": signature, "datasets": {}, "peers": {}}
+    parts = {d: {} for d in DATASETS}
+    stats_entries = {g: {} for d in DATASETS for g in groups_for(d)}
+    tasks = []
+    for dataset in DATASETS:
+        groups = groups_for(dataset)
+        stats_known = {g: old.get("peers", {}).get(g, {}) for g in groups}
+        for season, keys in keys_by_season[dataset].items():
+            signatures = [peer_signature(g, season) for g in groups]
+            versions = {k: _digest(hashes[dataset][k], *signatures) for k in keys}
+            redo = full or season in retry.get(dataset, {})
+            todo = [
+                k for k in keys
+                if redo or known[dataset].get(k, {}).get("version") != versions[k]
+                or not os.path.exists(os.path.join(directory, known[dataset][k]["file"]))
+            ]
+            stats_version = {g: _digest(sig, *(versions[k] for k in keys)) for g, sig in zip(groups, signatures)}
+            stats_todo = [
+                g for g in groups
+                if redo or stats_known[g].get(season, {}).get("version") != stats_version[g]
+                or not os.path.exists(os.path.join(directory, stats_known[g][season]["file"]))
+            ]
+            for k in keys:
+                if k not in todo:
+                    parts[dataset][k] = known[dataset][k]
+            for g in groups:
+                if g not in stats_todo:
+                    stats_entries[g][season] = stats_known[g][season]
+            if todo or stats_todo:
+                tasks.append((dataset, season, keys, todo, stats_todo, versions, stats_version))
+
+    # Grandes saisons d'abord ; le moteur polars parallélise déjà chaque étape (et son pool de threads
+    # ne survit pas à un fork)
+    tasks.sort(key=lambda t: -sum(len(rows[t[0] if t[0] != "merged" else "xtechnical"][k]) for k in t[2]))
+    results = run_tasks(build_season, tasks, workers if engine == "pandas" else 1)
+
+    timings = {"partitions": {d: {} for d in DATASETS}, "seasons": {d: {} for d in DATASETS}}
+    failed = {d: {} for d in DATASETS}
+    for (dataset, season, keys, todo, stats_todo, _, _), result in zip(tasks, results):
+        timings["seasons"][dataset][season] = {
+            "seconds": round(result["seconds"], 3), "worker": result["worker"],
+            "percentiles_s": round(result.get("percentiles_s", 0.0), 3),
+        }
+        if "error" in result:
+            # Saison en échec : ses partitions gardent leur entrée précédente, reprises au prochain
+            # rafraîchissement (refresh.failed) ; les autres saisons sont publiées
+            failed[dataset][season] = result["error"]
+            for k in todo:
+                entry = known[dataset].get(k)
+                if entry and os.path.exists(os.path.join(directory, entry["file"])):
+                    parts[dataset][k] = entry
+            for g in stats_todo:
+                entry = old.get("peers", {}).get(g, {}).get(season)
+                if entry and os.path.exists(os.path.join(directory, entry["file"])):
+                    stats_entries[g][season] = entry
+            continue
+        parts[dataset].update(result["parts"])
+        for g, entry in result["stats"].items():
+            stats_entries[g][season] = entry
+        timings["partitions"][dataset].update({k: round(v, 3) for k, v in result["partitions_s"].items()})
+
+    changed, removed = {}, {}
+    for dataset in DATASETS:
+        dataset_parts = {k: parts[dataset][k] for k in hashes[dataset] if k in parts[dataset]}  # ordre du fichier
+        new["datasets"][dataset] = {"version": dataset_version(dataset_parts), "partitions": dataset_parts}
+        changed[dataset] = [k for k, p in dataset_parts.items() if known[dataset].get(k) is not p]
+        removed[dataset] = [k for k in known[dataset] if k not in dataset_parts]
+    new["peers"].update(stats_entries)
+
+    _publish(new, old, directory, full)
+
+    # Fichiers orphelins (partitions ou saisons disparues)
+    live = {p["file"] for d in DATASETS for p in new["datasets"][d]["partitions"].values()}
+    live |= {e["file"] for g in new["peers"].values() for e in g.values()}
+    stale = {p["file"] for d in DATASETS for p in known[d].values()}
+    stale |= {e["file"] for g in old.get("peers", {}).values() for e in g.values()}
+    for rel in stale - live:
+        if os.path.exists(os.path.join(directory, rel)):
+            os.remove(os.path.join(directory, rel))
+
+    new["refresh"] = {
+        "changed": changed, "removed": removed, "full": full, "engine": engine,
+        "workers": workers if engine == "pandas" else 1, "failed": failed, "timings": timings,
+        "seconds": round(time.perf_counter() - t0, 3),
+    }
+    _save_manifest(new, directory)
+    return new
+
+
+def partition_version(manifest: dict, dataset: str, season, competition) -> str:
+    """Version of one partition ('' when it does not exist)."""
+    part = manifest["datasets"][dataset]["partitions"].get(partition_key(season, competition))
+    return part["version"] if part else ""
+
+
+def peer_stats_version(manifest: dict, group: str) -> str:
+    seasons = manifest.get("peers", {}).get(group, {})
+    return _digest(*(f"{s}:{e['version']}" for s, e in sorted(seasons.items())))
+
+
+def read_peer_stats(manifest: dict, group: str, directory: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """Peer means of `group`, indexed by (position, season)."""
+    parts = [pd.read_parquet(os.path.join(directory, e["file"])) for e in manifest["peers"].get(group, {}).values()]
+    stats = pd.concat(parts, ignore_index=True) if parts else pd.DataFrame(columns=PEER_STATS_COLUMNS)
+    return stats.set_index(["Position Group", "Season", "Metric"]).sort_index()
+
+
+def read_partition(directory: str, entry: dict) -> pd.DataFrame:
+    return pd.read_parquet(os.path.join(directory, entry["file"]))
+
+
+def read_dataset(manifest: dict, dataset: str, directory: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    parts = [read_partition(directory, p) for p in manifest["datasets"][dataset]["partitions"].values()]
+    return pd.concat(parts, ignore_index=True) if parts else pd.DataFrame()
+
+
+def _arrow_table(df: pd.DataFrame) -> pa.Table:
+    table = pa.Table.from_pandas(df, preserve_index=False)
+    # Flottants : NaN gardés comme valeurs, sans masque de nulls, pour que to_pandas ne copie pas la colonne
+    for i, name in enumerate(df.columns):
+        if df[name].dtype == np.float64:
+            table = table.set_column(i, table.schema.field(i), pa.array(df[name].to_numpy(), from_pandas=False))
+    return table
+
+
+def _write_arrow(df: pd.DataFrame, path: str) -> None:
+    table = _arrow_table(df)
+
+    def write(tmp):
+        with pa.OSFile(tmp, "wb") as sink, pa.ipc.new_file(sink, table.schema) as writer:
+            writer.write_table(table, max_chunksize=max(len(table), 1))  # un seul lot : colonnes contiguës
+    # remplacement atomique : les processus qui mappent l'ancien fichier gardent son inode jusqu'à leur rechargement
+    _write_atomic(path, write)
+
+
+def _publish(manifest: dict, old: dict, directory: str, full: bool = False) -> bool:
+    """Write the Arrow file of each dataset whose version changed; True when one was written."""
+    written = False
+    for dataset in DATASETS:
+        entry = manifest["datasets"][dataset]
+        version = entry["version"]
+        known = old["datasets"][dataset].get("arrow", {})
+        rel = f"{dataset}.arrow"
+        if full or known.get("version") != version or not os.path.exists(os.path.join(directory, rel)):
+            _write_arrow(read_dataset(manifest, dataset, directory), os.path.join(directory, rel))
+            written = True
+        entry["arrow"] = {"version": version, "file": rel}
+    return written
+
+
+def map_dataset(manifest: dict, dataset: str, directory: str = SNAPSHOT_DIR) -> pd.DataFrame:
+    """`dataset` memory-mapped from its Arrow file (falls back to `read_dataset`).
+
+    Numeric columns without nulls are zero-copy, read-only views on the mapping,
+    shared by every process that maps the file; text and nullable integer columns
+    are converted.  The frame must not be modified in place.
+    """
+    entry = manifest["datasets"][dataset].get("arrow")
+    path = os.path.join(directory, entry["file"]) if entry else None
+    if entry is None or entry["version"] != manifest["datasets"][dataset]["version"] or not os.path.exists(path):
+        return read_dataset(manifest, dataset, directory)
+    with pa.memory_map(path, "r") as source:
+        table = pa.ipc.open_file(source).read_all()
+    # split_blocks : une colonne par bloc, pas de consolidation (qui copierait les colonnes mappées)
+    return table.to_pandas(split_blocks=True)
+
+
+def source_signature(*paths: str) -> tuple:
+    """(path, mtime, size) of each file: cheap cache key for `refresh`."""
+    out = []
+    for path in paths:
+        try:
+            st = os.stat(path)
+            out.append((path, st.st_mtime_ns, st.st_size))
+        except OSError:
+            out.append((path, None, None))
+    return tuple(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--sk", default=XPHYSICAL_PATH)
+    parser.add_argument("--sb", default=XTECHNICAL_PATH)
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--registry", default=REGISTRY_PATH)
+    parser.add_argument("--full", action="store_true", help="rebuild every partition")
+    parser.add_argument("--engine", choices=ENGINES, default="pandas", help="implementation of the column-wise steps")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="processes building the seasons")
+    args = parser.parse_args(argv)
+    manifest = refresh(
+        args.sk, args.sb, args.dir, args.registry, full=args.full, engine=args.engine, workers=args.workers
+    )
+    report = manifest.get("refresh")
+    if report is None:
+        print(f"snapshot up to date -> {args.dir}")
+        return
+    for dataset in DATASETS:
+        total = len(manifest["datasets"][dataset]["partitions"])
+        print(
+            f"{dataset}: {len(report['changed'][dataset])}/{total} partitions rebuilt, "
+            f"{len(report['removed'][dataset])} removed"
+        )
+    slowest = sorted(
+        ((s, d, k) for d, parts in report["timings"]["partitions"].items() for k, s in parts.items()), reverse=True
+    )
+    for seconds, dataset, key in slowest[:5]:
+        print(f"  {seconds:>8.2f}s  {dataset}/{key}")
+    failed = [(d, s, e) for d, seasons in report["failed"].items() for s, e in seasons.items()]
+    for dataset, season, error in failed:
+        print(f"  ! {dataset} {season}: {error} (previous files kept)")
+    print(f"{report['seconds']}s ({report['workers']} workers) -> {args.dir}")
+    if failed:
+        raise SystemExit(1)
+
+
+if __name__ == "__main__":
+    main()
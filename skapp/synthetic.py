@@ -0,0 +1,372 @@
+"""Synthetic SK_All.csv / SB_All.csv / SB_SK_MERGED.csv with the schema read by the app.
+
+The production files cannot leave the club; benchmarks, scaling tests and
+contractors use these instead.  The columns are those the app and the
+snapshot read:
+
+* SK_All: SkillCorner identity columns, `graph_columns`, the ``Note xPhy``
+  points of `XPHY_METRIC_MAP` (scored with `threshold_dict1`, as the notes of
+  the real file) and ``Note xPhysical`` / ``Note xPhy_max`` / ``xPhysical``;
+* SB_All: StatsBomb identity columns, the metrics of `metric_templates_tech`,
+  of the ``classic_*_metric_map`` scales and of the Player Search filters, the
+  xTech points (quintile of the metric inside the season and position) and
+  the ``(/100)`` indexes built from them, ``xTECH`` / ``xDEF``;
+* SB_SK_MERGED: built from both by `skapp.merge.merge_files`, like the real one.
+
+Values follow per-position distributions: physical volumes around the
+thresholds of each position, technical volumes scaled by the role of the
+position (attacking, defensive, passing, goalkeeping), ratios in [0, 1].  A
+latent level per player correlates the metrics and seasons of a player.
+
+At scale 1 there are `len(COMPETITIONS)` competitions of `TEAMS` clubs of
+`SQUAD` players over `SEASONS` (about 10k StatsBomb rows); scale k multiplies
+the number of competitions (synthetic leagues are added after the reference
+ones), hence the rows and the snapshot partitions.  Files are written one
+block of competitions at a time, so memory does not grow with the scale.
+
+Usage::
+
+    python -m skapp.synthetic [--out synthetic] [--scale 1] [--seed 0] [--no-merge]
+"""
+
+import argparse
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+from skapp.data import MERGED_PATH, XPHYSICAL_PATH, XTECHNICAL_PATH
+from skapp.merge import merge_files
+from skapp.metrics import (
+    XPHY_METRIC_MAP, graph_columns, metric_templates_tech, threshold_dict1, threshold_max,
+    threshold_points, xtech_columns_map, xtech_def_columns_map, xtech_post_config, xtech_tech_columns_map,
+)
+from skapp.percentiles import SB_TOP5, SK_TOP5
+from skapp.registry import REGISTRY_PATH
+
+SEASONS = ["2023/2024", "2024/2025", "2025/2026"]
+# Compétitions de référence (libellé SkillCorner, libellé StatsBomb)
+COMPETITIONS = list(zip(SK_TOP5, SB_TOP5)) + [
+    ("POR - Liga Portugal", "POR - Liga Portugal"),
+    ("NED - Eredivisie", "NED - Eredivisie"),
+    ("BEL - Pro League", "BEL - Pro League"),
+]
+TEAMS = 18
+# Effectif par poste StatsBomb (23 joueurs)
+SQUAD = {
+    "Goalkeeper": 2, "Central Defender": 4, "Full Back": 4, "Midfielder": 4,
+    "Attacking Midfielder": 2, "Winger": 4, "Striker": 3,
+}
+# Poste SkillCorner de chaque poste StatsBomb (pas de gardiens dans les données physiques)
+SK_POSITIONS = {
+    "Central Defender": "Central Defender", "Full Back": "Full Back", "Midfielder": "Midfield",
+    "Attacking Midfielder": "Midfield", "Winger": "Wide Attacker", "Striker": "Center Forward",
+}
+# Part des joueurs de champ suivis par SkillCorner (les autres restent hors du merged)
+SK_COVERAGE = 0.9
+MISSING_RATE = 0.01
+BLOCK_COMPETITIONS = 25
+
+# Colonnes lues par les filtres du Player Search xTech / Merged, hors templates et barèmes
+XTECHNICAL_EXTRA_METRICS = [
+    "Npg P90", "Op Assists P90", "Conversion Ratio", "Shots P90", "Op Xa P90", "Op Key Passes P90",
+    "Shots Key Passes P90", "Sp Key Passes P90", "Sp Xa P90", "Penalty Wins P90", "Obv P90",
+    "Obv Pass P90", "Obv Shot P90", "Obv Defensive Action P90", "Obv Dribble Carry P90", "Obv Gk P90",
+    "Deep Completions P90", "Ball Recoveries P90", "Tackles And Interceptions P90", "Xs Ratio",
+]
+# Libellés d'affichage des templates -> nom de colonne StatsBomb (résolu par skapp.metrics.resolve_metric_col)
+RAW_NAMES = {"OP xGAssisted": "Op Xa P90", "OBV": "Obv P90"}
+
+# Volumes physiques P90 (moyenne, écart-type) d'un joueur de champ ; TIP / OTIP P30 en sont dérivés
+PHYSICAL_P90 = {
+    "Total Distance": (10300, 650), "M/min": (112, 7), "Running Distance": (2250, 330),
+    "HSR Distance": (640, 160), "HSR Count": (34, 8), "Sprinting Distance": (230, 85),
+    "Sprint Count": (12, 4), "HI Distance": (870, 220), "HI Count": (48, 11),
+    "Medium Acceleration Count": (32, 7), "High Acceleration Count": (6.5, 2),
+    "Medium Deceleration Count": (28, 6), "High Deceleration Count": (6, 2),
+    "Explosive Acceleration to HSR Count": (6, 2), "Explosive Acceleration to Sprint Count": (2, 0.8),
+}
+PHYSICAL_POSITION = {
+    "Central Defender": 0.85, "Full Back": 1.1, "Midfielder": 1.0, "Attacking Midfielder": 1.0,
+    "Winger": 1.15, "Striker": 1.0,
+}
+# En possession (TIP) / hors possession (OTIP), rapportés à 30 min
+PHASE_FACTORS = {"TIP": 1.1 / 3, "OTIP": 0.95 / 3}
+
+# Rôle d'une métrique technique (premier mot-clé trouvé) et facteur de volume par poste
+ROLE_KEYWORDS = [
+    ("goalkeeping", ["Gk", "Save", "Gsaa", "Clcaa", "Xs Ratio", "Shots Faced", "Aggressive Distance",
+                     "Pass Into Danger", "Change In Pass Length"]),
+    ("attacking", ["Shot", "Xg", "Npg", "Goal", "Box", "Dribble", "Key Pass", "Xa", "Assist", "Cross",
+                   "Through", "Penalty", "Scoring", "Conversion", "Fouls Won"]),
+    ("defensive", ["Pressure", "Tackle", "Interception", "Recover", "Aerial", "Clearance", "Block",
+                   "Challenge", "Hops", "Fouls", "Counterpressure", "Defensive", "Regain", "Error"]),
+]
+ROLE_FACTORS = {
+    "attacking": {"Goalkeeper": 0.05, "Central Defender": 0.3, "Full Back": 0.6, "Midfielder": 0.7,
+                  "Attacking Midfielder": 1.2, "Winger": 1.3, "Striker": 1.5},
+    "defensive": {"Goalkeeper": 0.2, "Central Defender": 1.3, "Full Back": 1.1, "Midfielder": 1.2,
+                  "Attacking Midfielder": 0.8, "Winger": 0.7, "Striker": 0.6},
+    "passing": {"Goalkeeper": 0.7, "Central Defender": 1.1, "Full Back": 1.0, "Midfielder": 1.3,
+                "Attacking Midfielder": 1.0, "Winger": 0.8, "Striker": 0.6},
+}
+# Volume moyen P90 par mot-clé (premier trouvé), 2 sinon
+COUNT_SCALES = [
+    ("Passes P90", 35), ("Carries", 22), ("Pressures", 12), ("Recoveries", 5), ("Npxgxa", 0.3),
+    ("Per Shot", 0.11), ("Xg", 0.2), ("Xa", 0.1), ("Obv", 0.06), ("Average X", 40),
+    ("Aggressive Distance", 12), ("Change In Pass Length", 2), ("Hops", 50), ("Scoring Contribution", 0.3),
+    ("Shots Faced", 3.5), ("Npg", 0.2), ("Assists", 0.1),
+]
+# Écarts centrés sur 0 (écart-type)
+SIGNED_METRICS = {"PSxG - xG": 0.05, "Gsaa P90": 0.1}
+
+FIRST_NAMES = [
+    "Adrien", "Bruno", "Carlos", "Dario", "Emil", "Fabio", "Gino", "Hugo", "Ivan", "Jonas", "Karim", "Luca",
+    "Mateo", "Nico", "Oscar", "Pablo", "Rafael", "Sami", "Tomas", "Umberto", "Victor", "Willem", "Yann",
+    "Zeno", "Alessio", "Bastien", "Cesar", "Diego", "Enzo", "Filip",
+]
+SYLLABLES = ["ba", "co", "di", "fe", "ga", "ka", "lo", "ma", "ne", "ri", "sa", "to", "vi", "ze", "ber",
+             "dan", "len", "mar", "ros", "tin"]
+CITIES = [
+    "Aldon", "Brenna", "Castel", "Dorvik", "Elmont", "Farro", "Galvez", "Hartel", "Istra", "Juvena",
+    "Kalder", "Lugano", "Morvan", "Norda", "Orsay", "Parma", "Quinto", "Rosten", "Salva", "Tarvo",
+]
+CLUB_SUFFIXES = ["FC", "United", "City", "Athletic", "Sporting", "Rovers", "Calcio", "SC", "Real", "Academy"]
+
+
+def competitions(scale: float = 1.0) -> list:
+    """(SkillCorner, StatsBomb) labels of the competitions at `scale`."""
+    count = max(1, round(len(COMPETITIONS) * scale))
+    extra = [(f"SYN - League {i:03d}",) * 2 for i in range(1, count - len(COMPETITIONS) + 1)]
+    return (COMPETITIONS + extra)[:count]
+
+
+def _player_name(i: int) -> str:
+    first, rest = FIRST_NAMES[i % len(FIRST_NAMES)], i // len(FIRST_NAMES)
+    parts = []
+    while True:  # nom de famille : rest écrit en base len(SYLLABLES), au moins deux syllabes
+        rest, digit = divmod(rest, len(SYLLABLES))
+        parts.append(SYLLABLES[digit])
+        if not rest and len(parts) >= 2:
+            break
+    return f"{first} {''.join(parts).capitalize()}"
+
+
+def _club_name(i: int) -> str:
+    city, rest = CITIES[i % len(CITIES)], i // len(CITIES)
+    rest, suffix = divmod(rest, len(CLUB_SUFFIXES))
+    return f"{city} {CLUB_SUFFIXES[suffix]}" + (f" {rest + 1}" if rest else "")
+
+
+def roster(first: int, count: int, seed: int = 0) -> pd.DataFrame:
+    """Players of competitions ``first .. first + count - 1``, identical in every season."""
+    per_team = sum(SQUAD.values())
+    positions = np.repeat(list(SQUAD), list(SQUAD.values()))
+    comp = np.repeat(np.arange(first, first + count), TEAMS * per_team)
+    team = np.repeat(np.arange(first * TEAMS, (first + count) * TEAMS), per_team)
+    pid = np.arange(first * TEAMS * per_team, (first + count) * TEAMS * per_team)
+    rng = np.random.default_rng([seed, first])
+    return pd.DataFrame({
+        "pid": pid, "comp": comp, "team": [_club_name(t) for t in team],
+        "position": np.tile(positions, count * TEAMS),
+        "name": [_player_name(i) for i in pid],
+        "born": rng.integers(0, 18, len(pid)),  # âge la première saison - 17
+        "level": rng.normal(0, 1, len(pid)),
+        "foot": rng.choice(["Right Footed", "Left Footed", "Both Feet"], len(pid), p=[0.72, 0.25, 0.03]),
+        "known": rng.random(len(pid)) < 0.15,
+        "tracked": rng.random(len(pid)) < SK_COVERAGE,
+    })
+
+
+def _volume(rng, mean, level, spread=0.3):
+    # volume > 0 : log-normal autour de `mean`, corrélé au niveau du joueur
+    return mean * np.exp(0.2 * level + rng.normal(0, spread, len(level)) - spread ** 2 / 2)
+
+
+def xphysical_frame(players: pd.DataFrame, season: int, comps: list, rng) -> pd.DataFrame:
+    """SK_All rows of the tracked outfield `players` for season index `season`."""
+    p = players[players["tracked"] & (players["position"] != "Goalkeeper")]
+    level, pos = p["level"].to_numpy(), p["position"]
+    factor = pos.map(PHYSICAL_POSITION).to_numpy()
+    out = {
+        "Player": p["name"].to_numpy(),
+        "Short Name": (p["name"].str[0] + ". " + p["name"].str.split().str[-1]).to_numpy(),
+        "Team": p["team"].to_numpy(),
+        "Competition": [comps[c][0] for c in p["comp"]],
+        "Season": SEASONS[season],
+        "Position Group": pos.map(SK_POSITIONS).to_numpy(),
+        "Age": p["born"].to_numpy() + 17 + season,
+    }
+    p90 = {stem: _volume(rng, mean * factor, level, sd / mean) for stem, (mean, sd) in PHYSICAL_P90.items()}
+    # métriques notées : autour des paliers du poste (seuils de threshold_dict1)
+    for label, (bar_key, _) in XPHY_METRIC_MAP.items():
+        stem = label.replace(" P90", "")
+        if stem not in p90:
+            continue
+        values = np.empty(len(p))
+        for position in PHYSICAL_POSITION:
+            rows = (pos == position).to_numpy()
+            bounds = [b for r in threshold_dict1[bar_key][position] for b in (r["min"], r["max"]) if b is not None]
+            values[rows] = _volume(rng, np.median(bounds), level[rows], (max(bounds) - min(bounds)) / np.median(bounds) / 2)
+        p90[stem] = values
+    top5 = rng.normal(0, 1, len(p))
+    for position in PHYSICAL_POSITION:
+        rows = (pos == position).to_numpy()
+        bounds = [b for r in threshold_dict1["psv99_top5"][position] for b in (r["min"], r["max"]) if b is not None]
+        top5[rows] = np.median(bounds) + 0.6 * level[rows] + top5[rows] * (max(bounds) - min(bounds)) / 3
+    for col in graph_columns:
+        if col == "PSV-99":
+            out[col] = top5 - np.abs(rng.normal(0.8, 0.3, len(p)))
+        elif col == "TOP 5 PSV-99":
+            out[col] = top5
+        elif col.endswith(" P90"):
+            out[col] = p90[col[:-4]]
+        elif col != "xPhysical":
+            stem, phase, _ = col.rsplit(" ", 2)  # "<métrique> TIP P30" / "<métrique> OTIP P30"
+            out[col] = p90[stem] * PHASE_FACTORS[phase] * rng.normal(1, 0.08, len(p))
+    df = pd.DataFrame(out)
+
+    # notes xPhy (barème du poste StatsBomb correspondant), total et index /100
+    notes = pd.DataFrame({
+        f"Note xPhy {label}": threshold_points(df[label], pos.reset_index(drop=True), bar_key).astype(int)
+        for label, (bar_key, _) in XPHY_METRIC_MAP.items()
+    })
+    total_max = sum(pos.map(lambda p_, k=k: threshold_max(k, p_)).to_numpy() for k, _ in XPHY_METRIC_MAP.values())
+    df = pd.concat([df, notes], axis=1)
+    df["Note xPhysical"] = notes.sum(axis=1)
+    df["Note xPhy_max"] = total_max
+    df["xPhysical"] = np.round(100 * df["Note xPhysical"] / total_max).astype(int)
+    return df
+
+
+def xtechnical_columns() -> dict:
+    """StatsBomb metric columns (lower-case key -> column) and the xTech points of each position."""
+    names = list(XTECHNICAL_EXTRA_METRICS)
+    for metrics in metric_templates_tech.values():
+        names += [RAW_NAMES.get(m, m) for m in metrics]
+    points = {}
+    for position, config in xtech_post_config.items():
+        for raw, (note, scale) in config["metric_map"].items():
+            names.append(RAW_NAMES.get(raw, raw))
+            points.setdefault(position, []).append((RAW_NAMES.get(raw, raw).lower(), note, scale))
+    columns = {}
+    for name in names:  # une colonne par nom, à la casse près (les alias sont résolus sans la casse)
+        columns.setdefault(name.lower(), name)
+    return {"metrics": columns, "points": points}
+
+
+def _role(col: str) -> str:
+    return next((role for role, words in ROLE_KEYWORDS if any(w.lower() in col.lower() for w in words)), "passing")
+
+
+def xtechnical_frame(players: pd.DataFrame, season: int, comps: list, rng) -> pd.DataFrame:
+    """SB_All rows of `players` for season index `season`."""
+    level, pos = players["level"].to_numpy(), players["position"]
+    n = len(players)
+    known = players["name"].str.split().str[-1]
+    out = {
+        "Player Name": players["name"].to_numpy(),
+        "Player Known Name": np.where(players["known"], known, players["name"]),
+        "Player Last Name": known.to_numpy(),
+        "Team Name": players["team"].to_numpy(),
+        "Competition Name": [comps[c][1] for c in players["comp"]],
+        "Season Name": SEASONS[season],
+        "Position Group": pos.to_numpy(),
+        "Age": players["born"].to_numpy() + 17 + season,
+        "Minutes": np.round(3060 * rng.beta(2, 1.3, n)).astype(int),
+        "Prefered Foot": players["foot"].to_numpy(),
+    }
+    schema = xtechnical_columns()
+    goalkeeper = (pos == "Goalkeeper").to_numpy()
+    for col in schema["metrics"].values():
+        role = _role(col)
+        if col in SIGNED_METRICS:
+            values = rng.normal(0, SIGNED_METRICS[col], n) + 0.3 * SIGNED_METRICS[col] * level
+        elif "Ratio" in col:
+            values = np.clip(rng.beta(8, 4, n) + 0.03 * level, 0, 1)
+        else:
+            mean = next((m for word, m in COUNT_SCALES if word.lower() in col.lower()), 2.0)
+            factor = 1.0 if role == "goalkeeping" else pos.map(ROLE_FACTORS[role]).to_numpy()
+            values = _volume(rng, mean * factor, level, 0.35)
+        if role == "goalkeeping":
+            values = np.where(goalkeeper, values, np.nan)
+        values[rng.random(n) < MISSING_RATE] = np.nan
+        out[col] = values
+    df = pd.DataFrame(out)
+
+    # points xTech : quintile de la métrique dans la saison et le poste, palier du barème ; index /100
+    extra = {}
+    for position, config in xtech_post_config.items():
+        rows = (pos == position).to_numpy()
+        groups = {"def": config.get("def", config.get("save", [])), "tech": config.get("tech", config.get("usage", []))}
+        earned, best = {}, {}
+        for raw, note, scale in schema["points"][position]:
+            col = schema["metrics"][raw]
+            pct = df.loc[rows, col].rank(pct=True).to_numpy()
+            pts = np.where(np.isnan(pct), 0, np.take(scale, np.minimum(np.nan_to_num(pct) * 5, 4).astype(int)))
+            extra.setdefault(note, np.zeros(n, dtype=int))[rows] = pts  # points entiers, 0 hors du poste
+            earned[raw], best[raw] = pts, max(scale)
+        for target, members in ((xtech_def_columns_map[position], groups["def"]),
+                                (xtech_tech_columns_map[position], groups["tech"]),
+                                (xtech_columns_map[position], list(earned))):
+            keys = [RAW_NAMES.get(m, m).lower() for m in members if RAW_NAMES.get(m, m).lower() in earned]
+            if keys:
+                total = sum(earned[k] for k in keys)
+                extra.setdefault(target, np.full(n, np.nan))[rows] = np.round(100 * total / sum(best[k] for k in keys))
+        for generic, target in (("xDEF", xtech_def_columns_map[position]), ("xTECH", xtech_tech_columns_map[position])):
+            if target in extra:
+                extra.setdefault(generic, np.full(n, np.nan))[rows] = extra[target][rows]
+    return pd.concat([df, pd.DataFrame(extra)], axis=1)
+
+
+def generate(out_dir: str = "synthetic", scale: float = 1.0, seed: int = 0, merge: bool = True) -> dict:
+    """Write the synthetic files in `out_dir` and return their row / column counts."""
+    t0 = time.perf_counter()
+    os.makedirs(out_dir, exist_ok=True)
+    comps = competitions(scale)
+    paths = {"xphysical": os.path.join(out_dir, XPHYSICAL_PATH), "xtechnical": os.path.join(out_dir, XTECHNICAL_PATH)}
+    report = {name: {"path": path, "rows": 0, "columns": 0} for name, path in paths.items()}
+    for name, path in paths.items():  # fichier écrit par blocs : écrit à côté, remplacé à la fin
+        if os.path.exists(f"{path}.tmp"):
+            os.remove(f"{path}.tmp")
+    for first in range(0, len(comps), BLOCK_COMPETITIONS):
+        players = roster(first, min(BLOCK_COMPETITIONS, len(comps) - first), seed)
+        for season in range(len(SEASONS)):
+            rng = np.random.default_rng([seed, first, season])
+            for name, build in (("xphysical", xphysical_frame), ("xtechnical", xtechnical_frame)):
+                df = build(players, season, comps, rng)
+                header = not report[name]["rows"]
+                df.to_csv(f"{paths[name]}.tmp", mode="w" if header else "a", header=header, index=False,
+                          float_format="%.6g")
+                report[name]["rows"] += len(df)
+                report[name]["columns"] = df.shape[1]
+    for name, path in paths.items():
+        os.replace(f"{path}.tmp", path)
+    if merge:
+        merged = merge_files(
+            paths["xphysical"], paths["xtechnical"], os.path.join(out_dir, MERGED_PATH),
+            os.path.join(out_dir, REGISTRY_PATH),
+        )
+        report["merged"] = {"path": merged["path"], "rows": merged["rows"], "columns": merged["columns"]}
+    report["competitions"] = len(comps)
+    report["seconds"] = round(time.perf_counter() - t0, 3)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--out", default="synthetic")
+    parser.add_argument("--scale", type=float, default=1.0, help="row count multiplier (1 to 100)")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--no-merge", action="store_true", help="skip SB_SK_MERGED.csv")
+    args = parser.parse_args(argv)
+    report = generate(args.out, args.scale, args.seed, merge=not args.no_merge)
+    for name in ("xphysical", "xtechnical", "merged"):
+        if name in report:
+            print(f"{name}: {report[name]['rows']} rows x {report[name]['columns']} columns -> {report[name]['path']}")
+    print(f"{report['competitions']} competitions, {report['seconds']}s")
+
+
+if __name__ == "__main__":
+    main()
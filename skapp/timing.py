@@ -0,0 +1,95 @@
+"""Timing spans of the app reruns, aggregated per page and tab.
+
+The app times the parts of a rerun (``load``, ``filter``, ``percentiles``,
+``figure`` and ``figure:<block>`` for each block of the Merged reports,
+``aggrid``, and each ``tab`` as a whole) with `Timings.span` / `Timings.mark`.  Spans are attributed to the page and tab being rendered (set by
+`Timings.page` / `Timings.tab`, per script thread), and the last `HISTORY`
+durations of each (page, tab, span) are kept to compute p50 / p95
+(`Timings.summary`).  When `log_path` is set, every span is also appended to a
+JSONL file.  The app shows the summary in a diagnostics panel (``?diagnostics=1``).
+"""
+
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager
+
+import numpy as np
+import pandas as pd
+
+HISTORY = 500
+TIMINGS_LOG = "timings.jsonl"
+SUMMARY_COLUMNS = ["Page", "Tab", "Span", "Count", "p50 (ms)", "p95 (ms)", "Max (ms)"]
+
+# (page, tab) du rendu en cours : une valeur par thread de script (chaque rerun Streamlit a le sien)
+_scope = contextvars.ContextVar("timing_scope", default=("app", ""))
+
+
+class Timings:
+    """Process-wide store of span durations (thread-safe)."""
+
+    def __init__(self, history: int = HISTORY, log_path: str = None):
+        self.log_path = log_path
+        self._samples = defaultdict(lambda: deque(maxlen=history))
+        self._lock = threading.Lock()
+
+    def page(self, name: str) -> None:
+        _scope.set((name, ""))
+
+    @contextmanager
+    def tab(self, name: str):
+        """Tab being rendered (nested tabs are joined with ' / '), timed as a ``tab`` span."""
+        page, outer = _scope.get()
+        token = _scope.set((page, f"{outer} / {name}" if outer else name))
+        try:
+            with self.span("tab"):
+                yield
+        finally:
+            _scope.reset(token)
+
+    def record(self, kind: str, seconds: float) -> None:
+        page, tab = _scope.get()
+        with self._lock:
+            self._samples[(page, tab, kind)].append(seconds)
+            if self.log_path:
+                line = {"ts": round(time.time(), 3), "page": page, "tab": tab, "span": kind,
+                        "ms": round(seconds * 1000, 3)}
+                with open(self.log_path, "a", encoding="utf-8") as fh:
+                    fh.write(json.dumps(line) + "\n")
+
+    @contextmanager
+    def span(self, kind: str):
+        t0 = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(kind, time.perf_counter() - t0)
+
+    def mark(self, kind: str):
+        """Start a span without a ``with`` block; call the returned function to end it."""
+        t0 = time.perf_counter()
+        return lambda: self.record(kind, time.perf_counter() - t0)
+
+    def wrap(self, kind: str, fn):
+        """`fn` timed as a `kind` span at each call."""
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with self.span(kind):
+                return fn(*args, **kwargs)
+        return timed
+
+    def summary(self) -> pd.DataFrame:
+        with self._lock:
+            items = [(key, np.array(values) * 1000) for key, values in self._samples.items() if values]
+        rows = [
+            (*key, len(ms), np.percentile(ms, 50), np.percentile(ms, 95), ms.max())
+            for key, ms in sorted(items)
+        ]
+        return pd.DataFrame(rows, columns=SUMMARY_COLUMNS).round(1)
+
+    def clear(self) -> None:
+        with self._lock:
+            self._samples.clear()
@@ -0,0 +1,220 @@
+"""Boot-time warmup and readiness endpoint of an app server.
+
+The first scout after a deploy used to pay every cold cost: CSV parsing, the
+``Display Name`` apply, percentiles, peer tables, leaderboards.  `warm` does that
+work at server start, on a background thread:
+
+* snapshot: `skapp.snapshot.refresh` (CSVs, percentiles, Arrow files);
+* datasets: the Arrow files are read once so that their pages are in the page
+  cache when the app maps them;
+* peers: the peer tables of every radar group (`skapp.percentiles`);
+* leaderboards: the Top 50 of every position for the latest season of the five
+  reference leagues (`SK_TOP5` / `SB_TOP5`), written to the disk cache under the
+  keys of the app (`skapp.cache.persisted_key`).
+
+Each step is logged with its duration.  The launcher serves ``/ready`` on a
+second port: 200 once the warmup is done and Streamlit answers its health
+check, 503 before, so the load balancer only routes to warm instances;
+``/warmup`` returns the step timings as JSON.
+
+Usage::
+
+    python -m skapp.warmup [--script "Streamlit SK.py"] [--port 8501] [--ready-port 8502] [--dir snapshot]
+                           [--no-app] [-- streamlit args]
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from skapp import leaderboards
+from skapp.cache import DISK_CACHE_NAME, DiskCache, persisted_key
+from skapp.data import XPHYSICAL_PATH, XTECHNICAL_PATH, prepare_dataset
+from skapp.percentiles import PEER_GROUPS, SB_TOP5, SK_TOP5
+from skapp.registry import REGISTRY_PATH
+from skapp.snapshot import (
+    DATASETS, PARTITION_COLUMNS, SNAPSHOT_DIR, map_dataset, partition_version, read_peer_stats, refresh,
+)
+
+APP_SCRIPT = "Streamlit SK.py"
+APP_PORT = 8501
+READY_PORT = 8502
+
+# Index du Top 50 xTechnical (options du selectbox de la page) et minutes par défaut du slider
+XTECH_TOP50_INDEXES = {"Goalkeeper": ["xTech GK Save (/100)", "xTech GK Usage (/100)"]}
+XTECH_TOP50_DEFAULT_INDEXES = ["xDEF", "xTECH"]
+XTECH_TOP50_MIN_MINUTES = 600
+
+log = logging.getLogger(__name__)
+
+
+def latest_season(seasons):
+    """Most recent 'YYYY/YYYY' season of `seasons` (None when there is none)."""
+    dated = [s for s in map(str, seasons) if re.match(r"^\d{4}/\d{4}$", s)]
+    return max(dated, key=lambda s: int(s[:4])) if dated else None
+
+
+class Warmup:
+    """State of a warmup run: step timings, done flag and error, read by the readiness endpoint."""
+
+    def __init__(self):
+        self.steps = []
+        self.error = None
+        self.done = threading.Event()
+        self._lock = threading.Lock()
+
+    def step(self, name, fn):
+        t0 = time.perf_counter()
+        result = fn()
+        seconds = round(time.perf_counter() - t0, 3)
+        with self._lock:
+            self.steps.append({"step": name, "seconds": seconds})
+        log.info("warmup %s: %.3fs", name, seconds)
+        return result
+
+    def status(self) -> dict:
+        with self._lock:
+            return {
+                "done": self.done.is_set(), "error": self.error, "steps": list(self.steps),
+                "seconds": round(sum(s["seconds"] for s in self.steps), 3),
+            }
+
+
+def _touch(path: str) -> int:
+    # lecture séquentielle : les pages du fichier Arrow restent dans le cache du noyau pour les mmap de l'app
+    size = 0
+    with open(path, "rb") as fh:
+        while chunk := fh.read(1 << 24):
+            size += len(chunk)
+    return size
+
+
+def _leaderboards(manifest: dict, frames: dict, cache: DiskCache) -> int:
+    count = 0
+    for dataset, leagues in (("xphysical", SK_TOP5), ("xtechnical", SB_TOP5)):
+        df = frames[dataset]
+        season_col, comp_col = PARTITION_COLUMNS[dataset]
+        season = latest_season(df[season_col].dropna().unique())
+        for competition in leagues:
+            version = partition_version(manifest, dataset, season, competition)
+            if not version:
+                continue
+            part = df[(df[season_col] == season) & (df[comp_col] == competition)]
+            for position in part["Position Group"].dropna().unique().tolist():
+                if dataset == "xphysical":
+                    cache.get_or_compute(
+                        persisted_key("top50_xphysical", competition, season, position, version),
+                        lambda: leaderboards.top50_xphysical(df, competition, season, position),
+                    )
+                    count += 1
+                    continue
+                for index_col in XTECH_TOP50_INDEXES.get(position, XTECH_TOP50_DEFAULT_INDEXES):
+                    if index_col not in df.columns:
+                        continue
+                    cache.get_or_compute(
+                        persisted_key(
+                            "top50_xtechnical", competition, season, position, index_col,
+                            XTECH_TOP50_MIN_MINUTES, version,
+                        ),
+                        lambda: leaderboards.top50_xtechnical(
+                            df, competition, season, position, index_col, XTECH_TOP50_MIN_MINUTES
+                        ),
+                    )
+                    count += 1
+    return count
+
+
+def warm(warmup: Warmup = None, directory: str = SNAPSHOT_DIR, sk_path: str = XPHYSICAL_PATH,
+         sb_path: str = XTECHNICAL_PATH, registry_path: str = REGISTRY_PATH) -> Warmup:
+    """Run every warmup step; an error is logged and kept in ``warmup.error``."""
+    warmup = warmup or Warmup()
+    try:
+        manifest = warmup.step("snapshot", lambda: refresh(sk_path, sb_path, directory, registry_path))
+        for dataset in DATASETS:
+            entry = manifest["datasets"][dataset].get("arrow")
+            if entry:
+                warmup.step(f"page cache {dataset}", lambda: _touch(os.path.join(directory, entry["file"])))
+        frames = {
+            d: warmup.step(f"dataset {d}", lambda: prepare_dataset(map_dataset(manifest, d, directory), d))
+            for d in ("xphysical", "xtechnical")
+        }
+        for group in PEER_GROUPS:
+            warmup.step(f"peers {group}", lambda: read_peer_stats(manifest, group, directory))
+        cache = DiskCache(os.path.join(directory, DISK_CACHE_NAME))
+        warmup.step("leaderboards", lambda: _leaderboards(manifest, frames, cache))
+    except Exception as exc:  # l'instance reste non prête, l'erreur est exposée par /warmup
+        warmup.error = f"{type(exc).__name__}: {exc}"
+        log.exception("warmup failed")
+    warmup.done.set()
+    return warmup
+
+
+def app_healthy(port: int = APP_PORT, timeout: float = 1.0) -> bool:
+    try:
+        with urllib.request.urlopen(f"http://127.0.0.1:{port}/_stcore/health", timeout=timeout) as resp:
+            return resp.status == 200
+    except OSError:
+        return False
+
+
+def readiness_server(warmup: Warmup, port: int = READY_PORT, app_port: int = APP_PORT) -> ThreadingHTTPServer:
+    """``/ready`` and ``/warmup`` on `port`, served from a daemon thread."""
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            if self.path == "/ready":
+                ready = warmup.done.is_set() and warmup.error is None and app_healthy(app_port)
+                self._send(200 if ready else 503, b"ready" if ready else b"warming up", "text/plain")
+            elif self.path == "/warmup":
+                self._send(200, json.dumps(warmup.status()).encode("utf-8"), "application/json")
+            else:
+                self._send(404, b"not found", "text/plain")
+
+        def _send(self, code, body, content_type):
+            self.send_response(code)
+            self.send_header("Content-Type", content_type)
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+
+        def log_message(self, *args):
+            pass  # sondes du load balancer : pas de log par requête
+
+    server = ThreadingHTTPServer(("0.0.0.0", port), Handler)
+    threading.Thread(target=server.serve_forever, name="readiness", daemon=True).start()
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--script", default=APP_SCRIPT)
+    parser.add_argument("--port", type=int, default=APP_PORT, help="Streamlit server port")
+    parser.add_argument("--ready-port", type=int, default=READY_PORT)
+    parser.add_argument("--dir", default=SNAPSHOT_DIR)
+    parser.add_argument("--no-app", action="store_true", help="run the warmup in the foreground and exit")
+    parser.add_argument("streamlit_args", nargs="*", help="extra `streamlit run` arguments (after --)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(name)s %(message)s")
+
+    if args.no_app:
+        warmup = warm(directory=args.dir)
+        print(json.dumps(warmup.status(), indent=1))
+        sys.exit(1 if warmup.error else 0)
+
+    warmup = Warmup()
+    threading.Thread(target=warm, args=(warmup, args.dir), name="warmup", daemon=True).start()
+    readiness_server(warmup, args.ready_port, args.port)
+
+    from streamlit.web import cli as stcli
+    sys.argv = ["streamlit", "run", args.script, "--server.port", str(args.port), *args.streamlit_args]
+    sys.exit(stcli.main())
+
+
+if __name__ == "__main__":
+    main()
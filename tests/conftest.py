@@ -0,0 +1,31 @@
+import os
+
+import pytest
+
+from skapp.data import XPHYSICAL_PATH, XTECHNICAL_PATH
+from skapp.snapshot import refresh
+from skapp.synthetic import generate
+
+# Deux compétitions (une du top 5 par source), trois saisons : quelques milliers de lignes
+SCALE = 0.25
+
+
+def synthetic_paths(directory) -> dict:
+    return {
+        "sk": os.path.join(directory, XPHYSICAL_PATH), "sb": os.path.join(directory, XTECHNICAL_PATH),
+        "snapshot": os.path.join(directory, "snapshot"), "registry": os.path.join(directory, "registry.csv"),
+    }
+
+
+@pytest.fixture(scope="session")
+def synthetic_dir(tmp_path_factory):
+    directory = str(tmp_path_factory.mktemp("synthetic"))
+    generate(directory, scale=SCALE, merge=False)
+    return directory
+
+
+@pytest.fixture(scope="session")
+def snapshot(synthetic_dir):
+    """(manifest, directory) of the snapshot of the synthetic files (read-only)."""
+    paths = synthetic_paths(synthetic_dir)
+    return refresh(paths["sk"], paths["sb"], paths["snapshot"], paths["registry"]), paths["snapshot"]
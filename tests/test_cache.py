@@ -0,0 +1,95 @@
+import pandas as pd
+
+from skapp import cache as cache_module
+from skapp.cache import DiskCache, SharedLRU, persisted, selection_key
+
+
+def test_lru_stays_under_its_byte_budget():
+    cache = SharedLRU(10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.get("a")  # "b" devient la moins récemment lue
+    cache.put("c", "xxxx")
+    assert "b" not in cache and "a" in cache and "c" in cache
+    assert cache.nbytes == 8 <= cache.max_bytes
+    assert cache.stats()["evictions"] == 1
+
+
+def test_lru_does_not_keep_a_value_larger_than_the_budget():
+    cache = SharedLRU(10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("big", "x" * 11)
+    assert "big" not in cache and "a" in cache
+    assert cache.nbytes == 4
+
+
+def test_pinned_keys_are_evicted_last():
+    cache = SharedLRU(10, sizeof=len)
+    cache.put("a", "xxxx")
+    cache.put("b", "xxxx")
+    cache.pinned = frozenset({"a"})
+    cache.put("c", "xxxx")
+    assert "a" in cache and "b" not in cache
+    # que des clés épinglées : la plus ancienne part quand même, le budget prime
+    cache.pinned = frozenset({"a", "c"})
+    cache.put("d", "xxxx")
+    assert "a" not in cache and "c" in cache and "d" in cache
+    assert cache.nbytes <= cache.max_bytes
+
+
+def test_get_or_compute_runs_compute_once_per_key():
+    cache = SharedLRU(10, sizeof=len)
+    calls = []
+    for _ in range(3):
+        assert cache.get_or_compute("a", lambda: calls.append(1) or "xx") == "xx"
+    assert len(calls) == 1
+    assert (cache.stats()["hits"], cache.stats()["misses"]) == (2, 1)
+
+
+def test_selection_key_ignores_order_and_duplicates():
+    assert selection_key("merged", "v1", ["2024/2025", "2023/2024"], ["L1", "L1"]) == \
+        selection_key("merged", "v1", ["2023/2024", "2024/2025"], ["L1"])
+
+
+def test_disk_cache_hit_survives_a_new_instance(tmp_path):
+    path = str(tmp_path / "cache.sqlite")
+    calls = []
+    compute = lambda: calls.append(1) or pd.DataFrame({"xTECH": [1.0, 2.0]})
+    first = DiskCache(path).get_or_compute(("leaderboard", "v1"), compute)
+    # autre processus / redémarrage : relu depuis le fichier
+    again = DiskCache(path).get_or_compute(("leaderboard", "v1"), compute)
+    assert len(calls) == 1
+    pd.testing.assert_frame_equal(first, again)
+
+
+def test_disk_cache_misses_on_a_new_version(tmp_path, monkeypatch):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"))
+    cache.put(("leaderboard", "v1"), "old")
+    assert cache.get(("leaderboard", "v2")) is None
+    assert cache.get(("leaderboard", "v1")) == "old"
+    monkeypatch.setattr(cache_module, "DISK_CACHE_FORMAT", cache_module.DISK_CACHE_FORMAT + 1)
+    assert cache.get(("leaderboard", "v1")) is None
+
+
+def test_disk_cache_evicts_above_its_byte_budget(tmp_path):
+    cache = DiskCache(str(tmp_path / "cache.sqlite"), max_bytes=2500)
+    for i in range(3):
+        cache.put(i, b"x" * 1000)
+    assert cache.stats()["bytes"] <= 2500
+    assert cache.get(0) is None and cache.get(2) == b"x" * 1000
+
+
+def test_persisted_keys_on_arguments_without_underscore(tmp_path):
+    disk = DiskCache(str(tmp_path / "cache.sqlite"))
+    calls = []
+
+    @persisted(lambda: disk)
+    def ranking(_df, version, top=3):
+        calls.append(version)
+        return list(_df["xTECH"].nlargest(top))
+
+    df = pd.DataFrame({"xTECH": [5, 1, 4, 3]})
+    assert ranking(df, "v1") == [5, 4, 3]
+    assert ranking(df.iloc[:0], "v1") == [5, 4, 3]  # la frame ne fait pas partie de la clé
+    assert ranking(df, "v2", top=1) == [5]
+    assert calls == ["v1", "v2"]
@@ -0,0 +1,66 @@
+import numpy as np
+import pandas as pd
+import pytest
+
+from skapp import filter_expr
+from skapp.filter_expr import FilterExpressionError, compile_expression
+
+
+@pytest.fixture(params=["numexpr", "numpy"])
+def engine(request, monkeypatch):
+    if request.param == "numpy":
+        monkeypatch.setattr(filter_expr, "numexpr", None)
+    elif filter_expr.numexpr is None:
+        pytest.skip("numexpr not installed")
+    return request.param
+
+
+@pytest.fixture
+def df():
+    return pd.DataFrame({
+        "Age": [20, np.nan, 25, 30],
+        "xTECH": [80, 90, np.nan, 40],
+        "Prefered Foot": ["Left Footed", "Right Footed", None, "Left Footed"],
+        "Position Group": ["Midfield", "Midfield", "Striker", "Striker"],
+    })
+
+
+def rows(df, text):
+    return list(np.flatnonzero(compile_expression(text, df.columns).mask(df)))
+
+
+def test_comparison(engine, df):
+    assert rows(df, "xTECH > 70 and Age < 23") == [0]
+
+
+def test_not_equal_excludes_missing(engine, df):
+    assert rows(df, "Age != 25") == [0, 3]
+
+
+def test_not_excludes_missing(engine, df):
+    assert rows(df, "not Age > 22") == [0]
+    assert rows(df, "~(xTECH >= 80)") == [3]
+
+
+def test_text_not_equal_excludes_missing(engine, df):
+    assert rows(df, 'Prefered Foot != "Left Footed"') == [1]
+
+
+def test_or_keeps_a_known_true_side(engine, df):
+    assert rows(df, "Age > 22 or xTECH > 85") == [1, 2, 3]
+    assert rows(df, "not (Age > 22 or xTECH > 85)") == [0]
+
+
+def test_and_is_false_when_a_known_side_is(engine, df):
+    assert rows(df, "not (Age > 22 and xTECH > 85)") == [0, 3]
+    assert rows(df, "not (Age > 22 and xTECH > 95)") == [0, 1, 3]
+
+
+def test_arithmetic_and_percentiles(engine, df):
+    assert rows(df, "(xTECH + Age) / 2 >= 50") == [0]
+    assert rows(df, "xTECH above p50") == [0, 1]
+
+
+def test_unknown_metric():
+    with pytest.raises(FilterExpressionError, match="Unknown metric"):
+        compile_expression("Speed > 3", ["Age"])
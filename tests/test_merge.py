@@ -0,0 +1,57 @@
+import pandas as pd
+
+from skapp.merge import UNMATCHED_PATH, merge_files, split_by_season
+from skapp.registry import load_registry
+
+SK_COLUMNS = ["Player", "Short Name", "Team", "Competition", "Season", "Position Group", "Age", "Distance P90"]
+SB_COLUMNS = ["Player Name", "Player Known Name", "Team Name", "Competition Name", "Season Name", "Age", "xTECH"]
+
+
+def _write(tmp_path):
+    sk = pd.DataFrame([
+        ["Lucas Silva", "L. Silva", "Aldon", "FRA - Ligue 1", "2023/2024", "Midfield", 23, 10.5],
+        ["Juan Perez", "J. Perez", "Galvez United", "ESP - LaLiga", "2024/2025", "Striker", 27, 9.1],
+        ["Lucas Silva", "L. Silva", "Aldon", "FRA - Ligue 1", "2024/2025", "Midfield", 24, 11.0],
+    ], columns=SK_COLUMNS)
+    sb = pd.DataFrame([
+        ["Lucas Silva", None, "Aldon FC", "FRA - Ligue 1", "2023/2024", 23, 61.0],
+        ["Lucas Silva", None, "Aldon FC", "FRA - Ligue 1", "2024/2025", 24, 64.0],
+        ["Marco Rossi", None, "Aldon FC", "FRA - Ligue 1", "2024/2025", 30, 50.0],
+        ["Juan Perez", None, "Galvez United", "SPA - La Liga", "2024/2025", 27, 70.0],
+    ], columns=SB_COLUMNS)
+    paths = {"sk": str(tmp_path / "SK_All.csv"), "sb": str(tmp_path / "SB_All.csv")}
+    sk.to_csv(paths["sk"], index=False)
+    sb.to_csv(paths["sb"], index=False)
+    return paths
+
+
+def test_split_by_season_writes_one_file_per_season(tmp_path):
+    paths = _write(tmp_path)
+    files = split_by_season(paths["sk"], "Season", str(tmp_path / "split"))
+    assert sorted(files) == ["2023/2024", "2024/2025"]
+    parts = {season: pd.read_csv(path) for season, path in files.items()}
+    assert all(list(df.columns) == SK_COLUMNS for df in parts.values())
+    assert [len(parts["2023/2024"]), len(parts["2024/2025"])] == [1, 2]
+    assert set(parts["2024/2025"]["Player"]) == {"Juan Perez", "Lucas Silva"}
+
+
+def test_merge_files_joins_each_season(tmp_path):
+    paths = _write(tmp_path)
+    report = merge_files(paths["sk"], paths["sb"], str(tmp_path / "merged.csv"), str(tmp_path / "registry.csv"))
+    merged = pd.read_csv(report["path"])
+    assert report["rows"] == len(merged) == 3
+    # colonnes StatsBomb conservées, métriques SkillCorner ajoutées, identité SkillCorner retirée
+    assert list(merged.columns) == SB_COLUMNS + ["Distance P90"]
+    assert list(merged["Season Name"]) == sorted(merged["Season Name"])  # écrit saison par saison
+    # chaque saison rejoint la ligne SkillCorner de la même saison (alias de compétition compris)
+    by_row = merged.set_index(["Player Name", "Season Name"])["Distance P90"]
+    assert by_row.to_dict() == {
+        ("Lucas Silva", "2023/2024"): 10.5,
+        ("Lucas Silva", "2024/2025"): 11.0,
+        ("Juan Perez", "2024/2025"): 9.1,
+    }
+    unmatched = pd.read_csv(tmp_path / UNMATCHED_PATH)
+    assert unmatched[["Source", "Player"]].values.tolist() == [["SB", "Marco Rossi"]]
+    assert report["unmatched_technical"] == 1 and report["unmatched_physical"] == 0
+    assert len(load_registry(str(tmp_path / "registry.csv"))) > 0
+    assert not [p for p in tmp_path.iterdir() if p.name.endswith(".tmp")]
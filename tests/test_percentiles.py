@@ -0,0 +1,27 @@
+import pytest
+
+from skapp.percentiles import PEER_GROUPS, lookup_percentiles, peer_frame
+from skapp.snapshot import read_dataset
+
+
+@pytest.mark.parametrize("group", list(PEER_GROUPS))
+def test_materialized_percentiles_match_the_live_engine(snapshot, group):
+    manifest, directory = snapshot
+    spec = PEER_GROUPS[group]
+    rows = read_dataset(manifest, spec["dataset"], directory)
+    peers = read_dataset(manifest, spec["peers"], directory)
+    metrics = [m for m in spec["metrics"] if f"{m} (pct {group})" in rows.columns]
+    assert metrics
+    keys = spec["keys"]
+    checked = 0
+    for _, row in rows.iloc[::100].iterrows():
+        stored = lookup_percentiles(row, group, metrics)
+        # sans ses colonnes matérialisées, la ligne passe par le moteur live (pct_rank sur peer_frame)
+        bare = row.drop([c for c in row.index if c.endswith(f"(pct {group})")])
+        live = lookup_percentiles(
+            bare, group, metrics,
+            peers=lambda: peer_frame(group, peers, row[keys["position"]], row[keys["season"]]),
+        )
+        assert stored == pytest.approx(live, abs=1e-9)
+        checked += 1
+    assert checked > 5
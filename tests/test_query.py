@@ -0,0 +1,61 @@
+import pandas as pd
+import pytest
+
+from bench.query import GRID_COLUMNS, QUERIES, scope
+from skapp import query
+from skapp.data import prepare_dataset
+from skapp.snapshot import PARTITION_COLUMNS, map_dataset, read_dataset
+
+
+def _assert_same(a, b):
+    # les entiers nullables reviennent de DuckDB en flottants
+    pd.testing.assert_frame_equal(a, b, check_dtype=False, check_index_type=False)
+
+
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_pandas_search_matches_the_in_memory_filter(snapshot, name):
+    manifest, directory = snapshot
+    dataset, which, filters = QUERIES[name]
+    seasons, competitions = scope(manifest, dataset, which)
+    loaded = prepare_dataset(map_dataset(manifest, dataset, directory), dataset)
+    season_col, comp_col = PARTITION_COLUMNS[dataset]
+    loaded = loaded[loaded[season_col].astype(str).isin(seasons) & loaded[comp_col].isin(competitions)]
+
+    rows = query.search(manifest, dataset, seasons, competitions, columns=GRID_COLUMNS[dataset],
+                        directory=directory, backend="pandas", **filters)
+    assert len(rows)
+    _assert_same(rows, query.filter_frame(loaded, dataset, columns=GRID_COLUMNS[dataset], **filters))
+
+
+@pytest.mark.skipif(query.duckdb is None, reason="duckdb not installed")
+@pytest.mark.parametrize("name", list(QUERIES))
+def test_duckdb_search_matches_pandas(snapshot, name):
+    manifest, directory = snapshot
+    dataset, which, filters = QUERIES[name]
+    seasons, competitions = scope(manifest, dataset, which)
+    run = lambda backend, columns: query.search(
+        manifest, dataset, seasons, competitions, columns=columns, directory=directory, backend=backend, **filters,
+    )
+    duck = run("duckdb", GRID_COLUMNS[dataset])
+    _assert_same(duck, run("pandas", GRID_COLUMNS[dataset]))
+    # index = position de la ligne dans le dataset : les lignes projetées retrouvent leur ligne complète
+    full = read_dataset(manifest, dataset, directory)
+    assert list(full.loc[duck.index, "Player ID"]) == list(duck["Player ID"])
+
+
+@pytest.mark.skipif(query.duckdb is None, reason="duckdb not installed")
+def test_duckdb_search_without_projection_matches_pandas(snapshot):
+    manifest, directory = snapshot
+    dataset, which, filters = QUERIES["merged_all_filtered"]
+    seasons, competitions = scope(manifest, dataset, which)
+    frames = [
+        query.search(manifest, dataset, seasons, competitions, directory=directory, backend=backend, **filters)
+        for backend in query.BACKENDS
+    ]
+    _assert_same(*frames)
+
+
+def test_unknown_backend_is_rejected(snapshot):
+    manifest, directory = snapshot
+    with pytest.raises(ValueError):
+        query.search(manifest, "xphysical", [], [], directory=directory, backend="sqlite")
@@ -0,0 +1,63 @@
+import pandas as pd
+
+from skapp.registry import load_registry, player_ids, save_registry, update_registry
+
+
+def _sb(rows):
+    return pd.DataFrame(rows, columns=["Player Name", "Player Known Name", "Team Name", "Season Name", "Age"])
+
+
+def _sk(rows):
+    return pd.DataFrame(rows, columns=["Player", "Short Name", "Team", "Season", "Age"])
+
+
+def test_same_name_on_different_teams_gets_two_ids():
+    sb = _sb([
+        ["Lucas Silva", None, "Aldon FC", "2024/2025", 24],
+        ["Lucas Silva", None, "Galvez United", "2024/2025", 24],
+    ])
+    sk = _sk([
+        ["Lucas Silva", "L. Silva", "Aldon", "2024/2025", 24],
+        ["Lucas Silva", "L. Silva", "Galvez United", "2024/2025", 24],
+    ])
+    registry = update_registry(None, sk, sb)
+    sb_ids, sk_ids = player_ids(sb, registry, "SB"), player_ids(sk, registry, "SK")
+    assert sb_ids[0] != sb_ids[1]
+    # chaque ligne SkillCorner rejoint le joueur StatsBomb de son club
+    assert list(sk_ids) == list(sb_ids)
+
+
+def test_same_name_with_different_ages_gets_two_ids():
+    sb = _sb([
+        ["Lucas Silva", None, "Aldon FC", "2023/2024", 19],
+        ["Lucas Silva", None, "Galvez United", "2024/2025", 31],
+    ])
+    ids = player_ids(sb, update_registry(None, _sk([]), sb), "SB")
+    assert ids[0] != ids[1]
+
+
+def test_transfer_keeps_the_id():
+    sb = _sb([
+        ["Lucas Silva", None, "Aldon FC", "2023/2024", 23],
+        ["Lucas Silva", None, "Galvez United", "2024/2025", 24],
+    ])
+    ids = player_ids(sb, update_registry(None, _sk([]), sb), "SB")
+    assert ids[0] == ids[1]
+
+
+def test_ids_are_stable_across_drops(tmp_path):
+    path = str(tmp_path / "registry.csv")
+    first = _sb([
+        ["Lucas Silva", None, "Aldon FC", "2024/2025", 24],
+        ["Lucas Silva", None, "Galvez United", "2024/2025", 24],
+    ])
+    save_registry(update_registry(None, _sk([]), first), path)
+    before = player_ids(first, load_registry(path), "SB")
+
+    later = _sb([
+        ["Lucas Silva", None, "Galvez United", "2025/2026", 25],
+        ["Lucas Silva", None, "Aldon FC", "2025/2026", 25],
+    ])
+    registry = update_registry(load_registry(path), _sk([]), later)
+    assert list(player_ids(first, registry, "SB")) == list(before)
+    assert list(player_ids(later, registry, "SB")) == [before[1], before[0]]
@@ -0,0 +1,68 @@
+from skapp.cache import SharedLRU
+from skapp.sessions import SessionRegistry
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _registry(clock):
+    cache = SharedLRU(100, sizeof=len)
+    return cache, SessionRegistry(cache, idle_seconds=60, forget_seconds=600, clock=clock)
+
+
+def test_active_sessions_pin_their_keys():
+    clock = Clock()
+    cache, sessions = _registry(clock)
+    sessions.hold("s1", "merged", "k1")
+    sessions.hold("s2", "merged", "k2")
+    assert cache.pinned == {"k1", "k2"}
+    sessions.hold("s1", "merged", "k3")  # nouvelle sélection : remplace la précédente
+    assert cache.pinned == {"k2", "k3"}
+
+
+def test_idle_session_releases_its_keys():
+    clock = Clock()
+    cache, sessions = _registry(clock)
+    for key in ("k1", "k2"):
+        cache.put(key, "xx")
+    sessions.touch("s1", "Merged", 0)
+    sessions.hold("s1", "merged", "k1")
+    sessions.touch("s2", "Merged", 0)
+    sessions.hold("s2", "merged", "k2")
+
+    clock.now = 50
+    sessions.touch("s2", "Merged", 0)
+    clock.now = 100  # s1 inactive depuis 100 s, s2 depuis 50 s
+    assert sessions.sweep() == 1
+    assert "k1" not in cache and "k2" in cache
+    assert cache.pinned == {"k2"}
+    assert sessions.released == 1 and len(sessions) == 2
+
+
+def test_key_still_held_by_another_session_is_kept():
+    clock = Clock()
+    cache, sessions = _registry(clock)
+    cache.put("k1", "xx")
+    for session_id in ("s1", "s2"):
+        sessions.touch(session_id, "Merged", 0)
+        sessions.hold(session_id, "merged", "k1")
+    clock.now = 50
+    sessions.touch("s2", "Merged", 0)
+    clock.now = 100
+    assert sessions.sweep() == 1
+    assert "k1" in cache and cache.pinned == {"k1"}
+
+
+def test_closed_sessions_are_forgotten():
+    clock = Clock()
+    _, sessions = _registry(clock)
+    sessions.touch("s1", "Merged", 0)
+    clock.now = 700
+    sessions.touch("s2", "Merged", 0)
+    assert len(sessions) == 1
+    assert list(sessions.report()["Session"]) == ["s2"]
@@ -0,0 +1,66 @@
+import os
+import shutil
+
+import pandas as pd
+import pytest
+
+from conftest import synthetic_paths
+from skapp.snapshot import DATASETS, partition_key, read_dataset, refresh
+
+
+@pytest.fixture
+def files(synthetic_dir, tmp_path):
+    paths = synthetic_paths(str(tmp_path))
+    source = synthetic_paths(synthetic_dir)
+    for name in ("sk", "sb"):
+        shutil.copy(source[name], paths[name])
+    return paths
+
+
+def _refresh(paths):
+    return refresh(paths["sk"], paths["sb"], paths["snapshot"], paths["registry"])
+
+
+def _versions(manifest):
+    return {d: {k: p["version"] for k, p in manifest["datasets"][d]["partitions"].items()} for d in DATASETS}
+
+
+def test_unchanged_sources_are_a_no_op(files):
+    first = _refresh(files)
+    assert all(first["refresh"]["changed"][d] for d in DATASETS)
+
+    again = _refresh(files)
+    assert "refresh" not in again  # signature des CSV inchangée : rien n'est relu
+    assert _versions(again) == _versions(first)
+
+    # même contenu réécrit (nouvelle date) : relu et haché, aucune partition reconstruite
+    df = pd.read_csv(files["sk"])
+    df.to_csv(files["sk"], index=False)
+    os.utime(files["sk"], ns=(0, 0))
+    touched = _refresh(files)
+    assert touched["refresh"]["changed"] == {d: [] for d in DATASETS}
+    assert touched["refresh"]["removed"] == {d: [] for d in DATASETS}
+    assert _versions(touched) == _versions(first)
+
+
+def test_only_the_changed_partition_and_its_season_peers_are_rebuilt(files):
+    first = _refresh(files)
+    before = read_dataset(first, "xphysical", files["snapshot"])["PSV-99"].sum()
+    df = pd.read_csv(files["sk"])
+    season = sorted(df["Season"].unique())[-1]  # dernière saison : aucune autre ne s'y replie
+    competition = df["Competition"].iloc[0]
+    row = df.index[(df["Season"] == season) & (df["Competition"] == competition)][0]
+    df.loc[row, "PSV-99"] += 1.5
+    df.to_csv(files["sk"], index=False)
+
+    second = _refresh(files)
+    changed = second["refresh"]["changed"]
+    assert partition_key(season, competition) in changed["xphysical"]
+    assert all(k.startswith(f"{season}|") for d in DATASETS for k in changed[d])
+    # les autres saisons gardent leur version et leur fichier
+    for d in DATASETS:
+        for key, part in first["datasets"][d]["partitions"].items():
+            if not key.startswith(f"{season}|"):
+                assert second["datasets"][d]["partitions"][key] == part
+    after = read_dataset(second, "xphysical", files["snapshot"])["PSV-99"].sum()
+    assert after == pytest.approx(before + 1.5)